@@ -20,4 +20,6 @@ app.conf.task_routes = {
     "kitsune.retrieval.tasks.sync_documents": {"queue": "retrieval_bulk"},
     "kitsune.retrieval.tasks.delete_document": {"queue": "retrieval"},
     "kitsune.retrieval.tasks.reconcile_write_index": {"queue": "retrieval_bulk"},
+    "kitsune.retrieval.tasks.warm_query_vector_cache": {"queue": "retrieval_bulk"},
+    "kitsune.retrieval.tasks.build_local_knn_snapshot": {"queue": "retrieval_bulk"},
 }
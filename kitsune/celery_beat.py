@@ -24,6 +24,11 @@ PERIODIC_TASKS_ALL = {
         "task": "kitsune.dashboards.tasks.update_l10n_coverage_metrics",
         "schedule": crontab(hour="1", minute="0"),
     },
+    # Daily at 00:15. Catches overview changes which no signal saw.
+    "update_document_overviews": {
+        "task": "kitsune.dashboards.tasks.update_document_overviews",
+        "schedule": crontab(hour="0", minute="15"),
+    },
     # Karma Periodic Tasks
     # Daily at 00:42.
     "update_top_contributors": {
@@ -90,6 +95,12 @@ PERIODIC_TASKS_ALL = {
         "task": "kitsune.questions.tasks.update_weekly_votes",
         "schedule": crontab(hour="1", minute="40"),
     },
+    # Search Periodic Tasks
+    # Every 5 minutes. Drains live-indexing marks whose scheduled flush was lost.
+    "flush_index_queue": {
+        "task": "kitsune.search.es_utils.flush_index_queue",
+        "schedule": crontab(minute="*/5"),
+    },
     # SUMO Periodic Tasks
     # Every 5 minutes.
     "watchdog": {
@@ -155,16 +166,32 @@ PERIODIC_TASKS_ALL = {
         "task": "kitsune.wiki.tasks.publish_pending_translations",
         "schedule": crontab(minute="55"),
     },
-    # Daily at 00:00.
+    # Daily at 00:00 except Sunday, skipping the documents that haven't changed.
     "rebuild_kb": {
         "task": "kitsune.wiki.tasks.run_rebuild_kb",
-        "schedule": crontab(hour="0", minute="0"),
+        "schedule": crontab(hour="0", minute="0", day_of_week="1-6"),
+    },
+    # Weekly on Sunday at 00:00, re-rendering every document.
+    "force_rebuild_kb": {
+        "task": "kitsune.wiki.tasks.run_rebuild_kb",
+        "schedule": crontab(hour="0", minute="0", day_of_week="0"),
+        "kwargs": {"force": True},
     },
     # Daily at 02:00, after rebuild_kb, whose .update() writes bypass the retrieval signals.
     "reconcile_retrieval_index": {
         "task": "kitsune.retrieval.tasks.reconcile_write_index",
         "schedule": crontab(hour="2", minute="0"),
     },
+    # Daily at 03:00, after reconciliation has had time to repair the read generation.
+    "build_local_knn_snapshot": {
+        "task": "kitsune.retrieval.tasks.build_local_knn_snapshot",
+        "schedule": crontab(hour="3", minute="0"),
+    },
+    # Hourly, inside the default query-vector cache lifetime, so popular queries never expire.
+    "warm_retrieval_query_vectors": {
+        "task": "kitsune.retrieval.tasks.warm_query_vector_cache",
+        "schedule": crontab(minute="45"),
+    },
     # Every Sunday at 01:00.
     "cleanup_old_anchor_records": {
         "task": "kitsune.wiki.tasks.cleanup_old_anchor_records",
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DashboardsConfig(AppConfig):
     name = "kitsune.dashboards"
     default_auto_field = "django.db.models.AutoField"
+
+    def ready(self):
+        from kitsune.dashboards import signals  # noqa
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.14 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboards", "0001_squashed_0010_auto_20210726_1036"),
+        ("wiki", "0025_revisiontranslationrecord"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentOverview",
+            fields=[
+                (
+                    "document",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="overview",
+                        serialize=False,
+                        to="wiki.document",
+                    ),
+                ),
+                ("ready_for_l10n", models.BooleanField(default=False)),
+                ("unapproved_revision_comment", models.CharField(max_length=255, null=True)),
+                ("latest_significant_revision_id", models.IntegerField(null=True)),
+            ],
+        ),
+    ]
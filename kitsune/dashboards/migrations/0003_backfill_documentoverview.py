@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Case, Exists, F, Max, OuterRef, Q, Subquery, When
+
+# The significances of kitsune.wiki.config, as they were when this migration was written.
+TYPO_SIGNIFICANCE = 10
+MEDIUM_SIGNIFICANCE = 20
+
+
+def backfill_document_overviews(apps, schema_editor):
+    """Compute the overview rows of the default-language documents, as DocumentOverview.refresh
+    did when this migration was written."""
+    Document = apps.get_model("wiki", "Document")
+    Revision = apps.get_model("wiki", "Revision")
+    DocumentOverview = apps.get_model("dashboards", "DocumentOverview")
+
+    docs = (
+        Document.objects.filter(locale=settings.WIKI_DEFAULT_LANGUAGE)
+        .annotate(
+            ready_for_l10n=Case(
+                When(
+                    Q(latest_localizable_revision__isnull=False)
+                    & ~Exists(
+                        Revision.objects.filter(
+                            document=OuterRef("pk"),
+                            is_approved=True,
+                            is_ready_for_localization=False,
+                            significance__gt=TYPO_SIGNIFICANCE,
+                            id__gt=F("document__latest_localizable_revision__id"),
+                        )
+                    ),
+                    then=True,
+                ),
+                default=False,
+            ),
+            unapproved_revision_comment=Subquery(
+                Revision.objects.filter(document=OuterRef("pk"), reviewed=None)
+                .filter(
+                    Q(document__current_revision__isnull=True)
+                    | Q(id__gt=F("document__current_revision__id"))
+                )
+                .order_by("created")[:1]
+                .values("comment")
+            ),
+            latest_significant_revision_id=Subquery(
+                Revision.objects.filter(
+                    document=OuterRef("pk"),
+                    is_approved=True,
+                    is_ready_for_localization=True,
+                    significance__gte=MEDIUM_SIGNIFICANCE,
+                )
+                .order_by()
+                .values("document")
+                .annotate(latest_id=Max("id"))
+                .values("latest_id")
+            ),
+        )
+        .values_list(
+            "id", "ready_for_l10n", "unapproved_revision_comment", "latest_significant_revision_id"
+        )
+    )
+
+    DocumentOverview.objects.bulk_create(
+        (
+            DocumentOverview(
+                document_id=document_id,
+                ready_for_l10n=ready_for_l10n,
+                unapproved_revision_comment=comment,
+                latest_significant_revision_id=latest_id,
+            )
+            for document_id, ready_for_l10n, comment, latest_id in docs.iterator()
+        ),
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["document"],
+        update_fields=[
+            "ready_for_l10n",
+            "unapproved_revision_comment",
+            "latest_significant_revision_id",
+        ],
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboards", "0002_documentoverview"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_document_overviews, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,17 @@
 import itertools
 import logging
 
+from django.conf import settings
 from django.db import IntegrityError, models, transaction
-from django.db.models import Q, Subquery
+from django.db.models import Case, Exists, F, Max, OuterRef, Q, Subquery, When
 from django.utils.translation import gettext_lazy as _lazy
 
 from kitsune.dashboards import PERIODS
 from kitsune.products.models import Product
 from kitsune.sumo import googleanalytics
 from kitsune.sumo.models import LocaleField, ModelBase
-from kitsune.wiki.models import Document
+from kitsune.wiki.config import MEDIUM_SIGNIFICANCE, TYPO_SIGNIFICANCE
+from kitsune.wiki.models import MAX_REVISION_COMMENT_LENGTH, Document, Revision
 
 log = logging.getLogger("k.dashboards")
 
@@ -105,6 +107,106 @@ class WikiDocumentVisits(ModelBase):
                 log.info("Done.")
 
 
+class DocumentOverview(ModelBase):
+    """The revision-derived attributes of a default-language document on the KB dashboard.
+
+    Rows are refreshed for a document whenever it or one of its revisions is saved, and
+    for every document once a day, so the overview doesn't compute them per page load.
+    """
+
+    document = models.OneToOneField(
+        Document, on_delete=models.CASCADE, primary_key=True, related_name="overview"
+    )
+    # Whether the latest localizable revision has no newer, significant, approved
+    # revision which isn't ready for localization.
+    ready_for_l10n = models.BooleanField(default=False)
+    # The comment of the oldest unreviewed revision newer than the current one.
+    unapproved_revision_comment = models.CharField(
+        max_length=MAX_REVISION_COMMENT_LENGTH, null=True
+    )
+    # The newest approved, ready for localization, revision of at least medium
+    # significance. Translations based on an older revision need an update.
+    latest_significant_revision_id = models.IntegerField(null=True)
+
+    def __str__(self):
+        return f"Overview of {self.document_id}"
+
+    @classmethod
+    def compute(cls, document_ids=None):
+        """Return unsaved rows for the given documents, or all default-language documents."""
+        docs = Document.objects.filter(locale=settings.WIKI_DEFAULT_LANGUAGE)
+        if document_ids is not None:
+            docs = docs.filter(id__in=document_ids)
+
+        docs = docs.annotate(
+            ready_for_l10n=Case(
+                When(
+                    Q(latest_localizable_revision__isnull=False)
+                    & ~Exists(
+                        Revision.objects.filter(
+                            document=OuterRef("pk"),
+                            is_approved=True,
+                            is_ready_for_localization=False,
+                            significance__gt=TYPO_SIGNIFICANCE,
+                            id__gt=F("document__latest_localizable_revision__id"),
+                        )
+                    ),
+                    then=True,
+                ),
+                default=False,
+            ),
+            unapproved_revision_comment=Subquery(
+                Revision.objects.filter(
+                    document=OuterRef("pk"),
+                    reviewed=None,
+                )
+                .filter(
+                    Q(document__current_revision__isnull=True)
+                    | Q(id__gt=F("document__current_revision__id"))
+                )
+                .order_by("created")[:1]
+                .values("comment")
+            ),
+            latest_significant_revision_id=Subquery(
+                Revision.objects.filter(
+                    document=OuterRef("pk"),
+                    is_approved=True,
+                    is_ready_for_localization=True,
+                    significance__gte=MEDIUM_SIGNIFICANCE,
+                )
+                .order_by()
+                .values("document")
+                .annotate(latest_id=Max("id"))
+                .values("latest_id")
+            ),
+        ).values_list(
+            "id", "ready_for_l10n", "unapproved_revision_comment", "latest_significant_revision_id"
+        )
+
+        for document_id, ready_for_l10n, comment, latest_id in docs.iterator():
+            yield cls(
+                document_id=document_id,
+                ready_for_l10n=ready_for_l10n,
+                unapproved_revision_comment=comment,
+                latest_significant_revision_id=latest_id,
+            )
+
+    @classmethod
+    def refresh(cls, document_ids=None):
+        """Recompute the rows of the given documents, or of all default-language documents."""
+        cls.objects.bulk_create(
+            cls.compute(document_ids),
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["document"],
+            update_fields=[
+                "ready_for_l10n",
+                "unapproved_revision_comment",
+                "latest_significant_revision_id",
+            ],
+        )
+
+
 L10N_TOP20_CODE = "percent_localized_top20"
 L10N_TOP100_CODE = "percent_localized_top100"
 L10N_ALL_CODE = "percent_localized_all"
@@ -6,12 +6,13 @@ is_ready_for_localization=False do not exist.
 
 """
 
+import json
 import logging
-from collections import OrderedDict
+from collections import Counter, OrderedDict, defaultdict
 
 from django.conf import settings
 from django.contrib.postgres.aggregates import StringAgg
-from django.db.models import Case, Count, Exists, F, Max, OuterRef, Q, Subquery, When
+from django.db.models import Count, Exists, F, Max, OuterRef, Q, Subquery
 from django.db.models.functions import Coalesce
 from django.template.loader import render_to_string
 from django.utils import timezone
@@ -19,9 +20,10 @@ from django.utils.translation import gettext as _
 from django.utils.translation import gettext_lazy as _lazy
 from django.utils.translation import pgettext_lazy
 from markupsafe import Markup
+from redis.exceptions import RedisError as RedisCommandError
 
 from kitsune.dashboards import LAST_30_DAYS, PERIODS
-from kitsune.dashboards.models import WikiDocumentVisits
+from kitsune.dashboards.models import DocumentOverview, WikiDocumentVisits
 from kitsune.products.models import ProductSupportConfig
 from kitsune.sumo.redis_utils import RedisError, redis_client
 from kitsune.sumo.templatetags.jinja_helpers import urlparams
@@ -163,72 +165,37 @@ def kb_overview_rows(user=None, mode=None, max=None, locale=None, product=None,
     if category:
         docs = docs.filter(category__in=[category])
 
-    docs = docs.annotate(
-        num_visits=get_visits_subquery(period=mode),
-        ready_for_l10n=Case(
-            When(
-                Q(latest_localizable_revision__isnull=False)
-                & ~Exists(
-                    Revision.objects.filter(
-                        document=OuterRef("pk"),
-                        is_approved=True,
-                        is_ready_for_localization=False,
-                        significance__gt=TYPO_SIGNIFICANCE,
-                        id__gt=F("document__latest_localizable_revision__id"),
-                    )
-                ),
-                then=True,
-            ),
-            default=False,
-        ),
-        unapproved_revision_comment=Subquery(
-            Revision.objects.filter(
-                document=OuterRef("pk"),
-                reviewed=None,
-            )
-            .filter(
-                Q(document__current_revision__isnull=True)
-                | Q(id__gt=F("document__current_revision__id"))
-            )
-            .order_by("created")[:1]
-            .values("comment")
-        ),
-    )
-
-    if locale and (locale != settings.WIKI_DEFAULT_LANGUAGE):
-        transdoc_subquery = Document.objects.filter(
-            locale=locale,
-            is_archived=False,
-            parent=OuterRef("pk"),
-            current_revision__isnull=False,
-        )
-        docs = docs.annotate(
-            transdoc_exists=Exists(transdoc_subquery),
-            transdoc_current_revision_based_on_id=Subquery(
-                transdoc_subquery.values("current_revision__based_on__id")
-            ),
-        ).annotate(
-            transdoc_is_outdated=Exists(
-                Revision.objects.filter(
-                    document=OuterRef("pk"),
-                    is_approved=True,
-                    is_ready_for_localization=True,
-                    significance__gte=MEDIUM_SIGNIFICANCE,
-                    id__gt=OuterRef("transdoc_current_revision_based_on_id"),
-                )
-            ),
-        )
+    docs = docs.select_related("overview").annotate(num_visits=get_visits_subquery(period=mode))
 
     docs = docs.order_by(F("num_visits").desc(nulls_last=True), "title")
 
     if max:
         docs = docs[:max]
 
+    docs = list(docs)
+
+    # Documents whose overview wasn't stored yet get one computed for this request only,
+    # since a GET must not write (e.g. in read-only mode); it's stored by the next refresh.
+    missing = [d.id for d in docs if not hasattr(d, "overview")]
+    computed = {o.document_id: o for o in DocumentOverview.compute(missing)} if missing else {}
+
+    if locale and (locale != settings.WIKI_DEFAULT_LANGUAGE):
+        # The revision each translation's current revision is based on, by parent.
+        transdoc_based_on = dict(
+            Document.objects.filter(
+                locale=locale,
+                is_archived=False,
+                parent__in=[d.id for d in docs],
+                current_revision__isnull=False,
+            ).values_list("parent_id", "current_revision__based_on_id")
+        )
+
     rows = []
 
-    max_visits = docs[0].num_visits if docs.count() else None
+    max_visits = docs[0].num_visits if docs else None
 
     for d in docs:
+        overview = computed[d.id] if d.id in computed else d.overview
         data = {
             "url": reverse("wiki.document", args=[d.slug], locale=settings.WIKI_DEFAULT_LANGUAGE),
             "trans_url": reverse(
@@ -236,7 +203,7 @@ def kb_overview_rows(user=None, mode=None, max=None, locale=None, product=None,
             ),
             "title": d.title,
             "num_visits": d.num_visits,
-            "ready_for_l10n": d.ready_for_l10n,
+            "ready_for_l10n": overview.ready_for_l10n,
         }
 
         if d.current_revision:
@@ -248,15 +215,21 @@ def kb_overview_rows(user=None, mode=None, max=None, locale=None, product=None,
         if data.get("expiry_date"):
             data["stale"] = data["expiry_date"] < timezone.now()
 
-        if d.unapproved_revision_comment is None:
+        if overview.unapproved_revision_comment is None:
             data["latest_revision"] = True
         else:
-            data["revision_comment"] = d.unapproved_revision_comment
+            data["revision_comment"] = overview.unapproved_revision_comment
 
         # Get the translated doc
         if locale and (locale != settings.WIKI_DEFAULT_LANGUAGE):
-            if d.transdoc_exists:
-                data["needs_update"] = d.transdoc_is_outdated
+            if d.id in transdoc_based_on:
+                # Outdated when the parent has a significant, ready revision after the
+                # one the translation is based on.
+                based_on_id = transdoc_based_on[d.id]
+                latest_id = overview.latest_significant_revision_id
+                data["needs_update"] = (
+                    based_on_id is not None and latest_id is not None and latest_id > based_on_id
+                )
         else:  # For en-US we show the needs_changes comment.
             data["needs_update"] = d.needs_change
             data["needs_update_comment"] = d.needs_change_comment
@@ -266,6 +239,29 @@ def kb_overview_rows(user=None, mode=None, max=None, locale=None, product=None,
     return rows
 
 
+# Categories which are never counted in the localization overview.
+L10N_OVERVIEW_IGNORED_CATEGORIES = (
+    ADMINISTRATION_CATEGORY,
+    NAVIGATION_CATEGORY,
+    HOW_TO_CONTRIBUTE_CATEGORY,
+)
+# For a translation: its parent has a >10-significance, ready-for-l10n revision
+# after the one the translation's current revision is based on.
+ANY_SIGNIFICANT_UPDATES_EXIST = Exists(
+    Revision.objects.filter(
+        document=OuterRef("parent"),
+        is_ready_for_localization=True,
+        significance__gte=MEDIUM_SIGNIFICANCE,
+        id__gt=OuterRef("current_revision__based_on__id"),
+    )
+)
+HAS_APPROVED_OR_UNREVIEWED_REVISION = Exists(
+    Revision.objects.filter(document=OuterRef("pk")).filter(
+        Q(is_approved=True) | Q(reviewed__isnull=True)
+    )
+)
+
+
 def l10n_overview_rows(locale, product=None, user=None):
     """Return the iterable of dicts needed to draw the Overview table."""
     # The Overview table is a special case: it has only a static number of
@@ -276,11 +272,7 @@ def l10n_overview_rows(locale, product=None, user=None):
     def percent_or_100(num, denom):
         return round(num / float(denom) * 100) if denom else 100
 
-    ignore_categories = [
-        ADMINISTRATION_CATEGORY,
-        NAVIGATION_CATEGORY,
-        HOW_TO_CONTRIBUTE_CATEGORY,
-    ]
+    ignore_categories = list(L10N_OVERVIEW_IGNORED_CATEGORIES)
 
     total = Document.objects.visible(
         user,
@@ -304,16 +296,6 @@ def l10n_overview_rows(locale, product=None, user=None):
 
     # Translations whose based_on revision has no >10-significance, ready-for-
     # l10n revisions after it.
-
-    any_significant_updates_exist = Exists(
-        Revision.objects.filter(
-            document=OuterRef("parent"),
-            is_ready_for_localization=True,
-            significance__gte=MEDIUM_SIGNIFICANCE,
-            id__gt=OuterRef("current_revision__based_on__id"),
-        )
-    )
-
     up_to_date_translation_count = (
         Document.objects.visible(
             user,
@@ -327,7 +309,7 @@ def l10n_overview_rows(locale, product=None, user=None):
         )
         .exclude(parent__category__in=ignore_categories)
         .exclude(parent__html__startswith=REDIRECT_HTML)
-        .exclude(any_significant_updates_exist)
+        .exclude(ANY_SIGNIFICANT_UPDATES_EXIST)
     )
 
     if product:
@@ -364,14 +346,8 @@ def l10n_overview_rows(locale, product=None, user=None):
                     parent=OuterRef("pk"),
                     current_revision__isnull=False,
                 )
-                .filter(
-                    Exists(
-                        Revision.objects.filter(document=OuterRef("pk")).filter(
-                            Q(is_approved=True) | Q(reviewed__isnull=True)
-                        )
-                    )
-                )
-                .exclude(any_significant_updates_exist)
+                .filter(HAS_APPROVED_OR_UNREVIEWED_REVISION)
+                .exclude(ANY_SIGNIFICANT_UPDATES_EXIST)
             )
         )
         .alias(num_visits=get_visits_subquery())
@@ -457,6 +433,121 @@ def l10n_overview_rows(locale, product=None, user=None):
     }
 
 
+def l10n_coverage(locales, products):
+    """Return the coverage rows of `l10n_overview_rows` for many locales and products.
+
+    The result maps each (locale, product id) pair, including a product id of None
+    for all products, to the "top-20", "top-100" and "all" rows' numerators and
+    denominators, as `l10n_overview_rows` computes them for an anonymous user. The
+    documents and translations involved are read once, rather than once per pair.
+    """
+    product_ids = [product.id for product in products]
+    # The (product, locale) pairs which have a forum, and so count canned responses.
+    forum_locales = set(
+        ProductSupportConfig.objects.filter(product__in=product_ids, is_active=True).values_list(
+            "product_id", "forum_config__enabled_locales__locale"
+        )
+    )
+
+    # Ordered by traffic, so each product's top articles are a prefix of its share.
+    parents = list(
+        Document.objects.visible(
+            None,
+            locale=settings.WIKI_DEFAULT_LANGUAGE,
+            is_archived=False,
+            is_localizable=True,
+            current_revision__isnull=False,
+            latest_localizable_revision__isnull=False,
+        )
+        .exclude(html__startswith=REDIRECT_HTML)
+        .exclude(category__in=L10N_OVERVIEW_IGNORED_CATEGORIES)
+        .alias(num_visits=get_visits_subquery())
+        .order_by(F("num_visits").desc(nulls_last=True), "title")
+        .values_list("id", "category", "is_template", "parent_id")
+    )
+
+    translations = list(
+        Document.objects.visible(
+            None,
+            locale__in=locales,
+            is_archived=False,
+            is_template=False,
+            parent__isnull=False,
+            parent__is_archived=False,
+            parent__is_localizable=True,
+            current_revision__isnull=False,
+            parent__latest_localizable_revision__isnull=False,
+        )
+        .exclude(parent__category__in=L10N_OVERVIEW_IGNORED_CATEGORIES)
+        .exclude(parent__html__startswith=REDIRECT_HTML)
+        .exclude(ANY_SIGNIFICANT_UPDATES_EXIST)
+        .values_list("locale", "parent_id", "parent__category")
+    )
+
+    doc_products = defaultdict(set)
+    for document_id, product_id in Document.products.through.objects.filter(
+        document_id__in={row[0] for row in parents} | {row[1] for row in translations},
+        product_id__in=product_ids,
+    ).values_list("document_id", "product_id"):
+        doc_products[document_id].add(product_id)
+
+    # The total and the 100 most visited articles, per product and per whether
+    # canned responses are excluded.
+    scopes = {}
+    for product_id in [None, *product_ids]:
+        for exclude_canned in (False, True) if product_id else (False,):
+            total_docs = 0
+            ranked = []
+            for document_id, category, is_template, parent_id in parents:
+                if product_id and product_id not in doc_products[document_id]:
+                    continue
+                if exclude_canned and category == CANNED_RESPONSES_CATEGORY:
+                    continue
+                if not is_template:
+                    total_docs += 1
+                    if parent_id is None and len(ranked) < 100:
+                        ranked.append(document_id)
+            scopes[product_id, exclude_canned] = (total_docs, ranked)
+
+    translated = set(
+        Document.objects.filter(
+            locale__in=locales,
+            parent__in={document_id for _, ranked in scopes.values() for document_id in ranked},
+            current_revision__isnull=False,
+        )
+        .filter(HAS_APPROVED_OR_UNREVIEWED_REVISION)
+        .exclude(ANY_SIGNIFICANT_UPDATES_EXIST)
+        .values_list("locale", "parent_id")
+    )
+
+    up_to_date = Counter()
+    for locale, parent_id, category in translations:
+        is_canned = category == CANNED_RESPONSES_CATEGORY
+        for product_id in [None, *doc_products[parent_id]]:
+            up_to_date[locale, product_id, is_canned] += 1
+
+    coverage = {}
+    for product_id in [None, *product_ids]:
+        for locale in locales:
+            exclude_canned = bool(product_id) and (product_id, locale) not in forum_locales
+            total_docs, ranked = scopes[product_id, exclude_canned]
+            translated_docs = up_to_date[locale, product_id, False]
+            if not exclude_canned:
+                translated_docs += up_to_date[locale, product_id, True]
+            rows = {
+                f"top-{n}": {
+                    "numerator": sum(
+                        (locale, document_id) in translated for document_id in ranked[:n]
+                    ),
+                    "denominator": min(n, total_docs),
+                }
+                for n in (20, 100)
+            }
+            rows["all"] = {"numerator": translated_docs, "denominator": total_docs}
+            coverage[locale, product_id] = rows
+    return coverage
+
+
 class Readout:
     """Abstract class representing one table on the Localization Dashboard
 
@@ -1070,6 +1161,18 @@ class UnreviewedReadout(Readout):
         }
 
 
+# The most unhelpful articles, as cached by `cache_most_unhelpful_kb_articles`: a hash of
+# each article's details, as JSON, and a sorted set of article ids in order, per product.
+UNHELPFUL_DOCS_KEY = f"{settings.HELPFULVOTES_UNHELPFUL_KEY}:docs"
+# The set of the sorted sets' keys, so the next run can replace them all.
+UNHELPFUL_RANKS_KEY = f"{settings.HELPFULVOTES_UNHELPFUL_KEY}:ranks"
+
+
+def unhelpful_rank_key(product_id=None):
+    """The key of the sorted set of unhelpful articles of a product, or of all products."""
+    return f"{settings.HELPFULVOTES_UNHELPFUL_KEY}:rank:{product_id or 'all'}"
+
+
 class UnhelpfulReadout(Readout):
     # L10n: This is a table header displayed on https://support.mozilla.org/contributors/unhelpful.
     title = _lazy("Unhelpful Documents")
@@ -1093,50 +1196,35 @@ class UnhelpfulReadout(Readout):
     default_mode = None
 
     # This class is a namespace and doesn't get instantiated.
-    key = settings.HELPFULVOTES_UNHELPFUL_KEY
     try:
-        hide_readout = redis_client("helpfulvotes").llen(key) == 0
-    except RedisError as e:
+        hide_readout = not redis_client("helpfulvotes").exists(unhelpful_rank_key())
+    except (RedisError, RedisCommandError) as e:
         log.error("Redis error: {}".format(e))
         hide_readout = True
 
     def rows(self, max=None):
-        REDIS_KEY = settings.HELPFULVOTES_UNHELPFUL_KEY
+        rank_key = unhelpful_rank_key(self.product.id if self.product else None)
         try:
             redis = redis_client("helpfulvotes")
-            length = redis.llen(REDIS_KEY)
-            max_get = max or length
-            output = redis.lrange(REDIS_KEY, 0, max_get)
-        except RedisError as e:
+            doc_ids = redis.zrange(rank_key, 0, (max or 0) - 1)
+            output = redis.hmget(UNHELPFUL_DOCS_KEY, doc_ids) if doc_ids else []
+        except (RedisError, RedisCommandError) as e:
             log.error("Redis error: {}".format(e))
             output = []
 
-        data = []
-        for r in output:
-            row = self.row_to_dict(r)
-            if row:
-                data.append(row)
-
-        return data
-
-    def row_to_dict(self, strresult):
-        result = strresult.split("::")
-
-        # Filter by product
-        if self.product:
-            doc = Document.objects.filter(products__in=[self.product], slug=result[5])
-            if not doc.count():
-                return None
+        # An entry is missing if the articles were recomputed between the two reads.
+        return [self.row_to_dict(json.loads(entry)) for entry in output if entry]
 
+    def row_to_dict(self, entry):
         helpfulness = Markup(
             '<span title="{:+.1f}%">{:.1f}%</span>'.format(
-                float(result[3]) * 100, float(result[2]) * 100
+                entry["diffperc"] * 100, entry["currperc"] * 100
             )
         )
         return {
-            "title": str(result[6]),
-            "url": reverse("wiki.document_revisions", args=[result[5]], locale=self.locale),
-            "visits": int(float(result[1])),
+            "title": entry["title"],
+            "url": reverse("wiki.document_revisions", args=[entry["slug"]], locale=self.locale),
+            "visits": int(entry["total"]),
             "custom": True,
             "column4_data": helpfulness,
         }
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from kitsune.dashboards.models import DocumentOverview
+from kitsune.wiki.models import Document, Revision
+
+
+def _update_overview(document_id, locale):
+    if locale == settings.WIKI_DEFAULT_LANGUAGE:
+        DocumentOverview.refresh([document_id])
+
+
+@receiver(post_save, sender=Revision, dispatch_uid="dashboards.update_overview_on_revision_save")
+def update_overview_on_revision_save(sender, instance, raw=False, **kwargs):
+    """Revisions being created, reviewed or marked ready change the overview."""
+    if raw:
+        return
+    _update_overview(instance.document_id, instance.document.locale)
+
+
+@receiver(
+    post_delete, sender=Revision, dispatch_uid="dashboards.update_overview_on_revision_delete"
+)
+def update_overview_on_revision_delete(sender, instance, **kwargs):
+    """
+    Deleting a revision can change the overview too. The document might be going with it,
+    so wait for the commit, when refreshing a deleted document does nothing.
+    """
+    document_id = instance.document_id
+    transaction.on_commit(lambda: DocumentOverview.refresh([document_id]))
+
+
+@receiver(post_save, sender=Document, dispatch_uid="dashboards.update_overview_on_document_save")
+def update_overview_on_document_save(sender, instance, raw=False, **kwargs):
+    """A document's current and latest localizable revisions change the overview."""
+    if raw:
+        return
+    _update_overview(instance.id, instance.locale)
@@ -1,3 +1,5 @@
+import json
+from collections import defaultdict
 from datetime import date
 
 from celery import shared_task
@@ -11,10 +13,16 @@ from kitsune.dashboards.models import (
     L10N_TOP20_CODE,
     L10N_TOP100_CODE,
     PERIODS,
+    DocumentOverview,
     WikiDocumentVisits,
     WikiMetric,
 )
-from kitsune.dashboards.readouts import l10n_overview_rows
+from kitsune.dashboards.readouts import (
+    UNHELPFUL_DOCS_KEY,
+    UNHELPFUL_RANKS_KEY,
+    l10n_coverage,
+    unhelpful_rank_key,
+)
 from kitsune.products.models import Product
 from kitsune.sumo.decorators import skip_if_read_only_mode
 from kitsune.sumo.redis_utils import redis_client
@@ -51,64 +59,48 @@ def update_l10n_coverage_metrics() -> None:
     """
     Calculate and store the l10n metrics for each locale/product. The metrics are:
     * Percent localized of top 20 articles
+    * Percent localized of top 100 articles
     * Percent localized of all articles
     """
     today = date.today()
 
-    # Loop through all locales.
-    for locale in settings.SUMO_LANGUAGES:
-        # Skip en-US, it is always 100% localized.
-        if locale == settings.WIKI_DEFAULT_LANGUAGE:
-            continue
-
-        # Loop through all enabled products, including None (really All).
-        for product in [None, *list(Product.objects.filter(visible=True))]:
-            # (Ab)use the l10n_overview_rows helper from the readouts.
-            rows = l10n_overview_rows(locale=locale, product=product)
-
-            # % of top 20 articles
-            top20 = rows["top-20"]
-
-            try:
-                percent = 100.0 * float(top20["numerator"]) / top20["denominator"]
-            except ZeroDivisionError:
-                percent = 0.0
-
-            WikiMetric.objects.create(
-                code=L10N_TOP20_CODE, locale=locale, product=product, date=today, value=percent
-            )
-
-            # % of top 100 articles
-            top100 = rows["top-100"]
-
-            try:
-                percent = 100.0 * float(top100["numerator"]) / top100["denominator"]
-            except ZeroDivisionError:
-                percent = 0.0
-
-            WikiMetric.objects.create(
-                code=L10N_TOP100_CODE,
-                locale=locale,
-                product=product,
-                date=today,
-                value=percent,
-            )
-
-            # % of all articles
-            all_ = rows["all"]
+    # Skip en-US, it is always 100% localized.
+    locales = [
+        locale for locale in settings.SUMO_LANGUAGES if locale != settings.WIKI_DEFAULT_LANGUAGE
+    ]
+    # All enabled products, and None (really All).
+    coverage = l10n_coverage(locales, Product.objects.filter(visible=True))
+
+    metrics = []
+    for (locale, product_id), rows in coverage.items():
+        for code, row in (
+            (L10N_TOP20_CODE, rows["top-20"]),
+            (L10N_TOP100_CODE, rows["top-100"]),
+            (L10N_ALL_CODE, rows["all"]),
+        ):
             try:
-                percent = 100 * float(all_["numerator"]) / all_["denominator"]
+                percent = 100.0 * float(row["numerator"]) / row["denominator"]
             except ZeroDivisionError:
                 percent = 0.0
 
-            WikiMetric.objects.create(
-                code=L10N_ALL_CODE, locale=locale, product=product, date=today, value=percent
+            metrics.append(
+                WikiMetric(
+                    code=code, locale=locale, product_id=product_id, date=today, value=percent
+                )
             )
+    WikiMetric.objects.bulk_create(metrics)
 
     # Warm the cached dashboard payloads with the freshly-computed data.
     warm_wiki_metrics_cache()
 
 
+@shared_task
+@skip_if_read_only_mode
+def update_document_overviews(document_ids: list[int] | None = None) -> None:
+    """Refresh the KB dashboard overview rows of the given documents, or of all of them."""
+    DocumentOverview.refresh(document_ids)
+
+
 @shared_task
 @skip_if_read_only_mode
 def reload_wiki_traffic_stats(verbose: bool = True) -> None:
@@ -170,7 +162,12 @@ def _get_current_unhelpful(old_formatted):
 @shared_task
 @skip_if_read_only_mode
 def cache_most_unhelpful_kb_articles() -> None:
-    """Calculate and save the most unhelpful KB articles in the past two weeks."""
+    """Calculate and save the most unhelpful KB articles in the past two weeks.
+
+    Each article's details are stored once, in a hash, and its position in a sorted set for
+    all products and one for each of its products, so the readout can page through any
+    product's articles without a database query.
+    """
 
     REDIS_KEY = settings.HELPFULVOTES_UNHELPFUL_KEY
 
@@ -208,28 +205,44 @@ def cache_most_unhelpful_kb_articles() -> None:
     ]
     sorted_final.sort(key=lambda entry: entry[4])  # Sort by Bayesian Avg
 
-    redis = redis_client("helpfulvotes")
-
-    redis.delete(REDIS_KEY)
-
     max_total = max([b[1] for b in sorted_final])
 
-    for entry in sorted_final:
-        doc = Document.objects.get(pk=entry[0])
-        redis.rpush(
-            REDIS_KEY,
-            (
-                "{}::{}::{}::{}::{}::{}::{}".format(
-                    entry[0],  # Document ID
-                    entry[1],  # Total Votes
-                    entry[2],  # Current Percentage
-                    entry[3],  # Difference in Percentage
-                    1 - (entry[1] / max_total),  # Graph Color
-                    doc.slug,  # Document slug
-                    doc.title,  # Document title
-                )
-            ),
+    docs = Document.objects.only("slug", "title").in_bulk([entry[0] for entry in sorted_final])
+    product_ids = defaultdict(list)
+    for doc_id, product_id in Document.products.through.objects.filter(
+        document_id__in=docs
+    ).values_list("document_id", "product_id"):
+        product_ids[doc_id].append(product_id)
+
+    entries = {}
+    ranks = defaultdict(dict)
+    for position, entry in enumerate(sorted_final):
+        if (doc := docs.get(entry[0])) is None:
+            continue
+        entries[doc.id] = json.dumps(
+            {
+                "total": entry[1],
+                "currperc": entry[2],
+                "diffperc": entry[3],
+                "color": 1 - (entry[1] / max_total),
+                "slug": doc.slug,
+                "title": doc.title,
+            }
         )
+        # Every product's ranking is a subsequence of the overall ranking.
+        for product_id in [None, *product_ids[doc.id]]:
+            ranks[unhelpful_rank_key(product_id)][doc.id] = position
+
+    redis = redis_client("helpfulvotes")
+    pipe = redis.pipeline(transaction=True)
+    pipe.delete(REDIS_KEY, UNHELPFUL_DOCS_KEY, *redis.smembers(UNHELPFUL_RANKS_KEY))
+    pipe.delete(UNHELPFUL_RANKS_KEY)
+    if entries:
+        pipe.hset(UNHELPFUL_DOCS_KEY, mapping=entries)
+        for rank_key, positions in ranks.items():
+            pipe.zadd(rank_key, positions)
+        pipe.sadd(UNHELPFUL_RANKS_KEY, *ranks)
+    pipe.execute()
 
 
 @shared_task
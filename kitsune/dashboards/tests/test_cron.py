@@ -1,7 +1,7 @@
+import json
 from datetime import date, timedelta
 
-from django.conf import settings
-from django.test import tag
+from django.test import RequestFactory, tag
 
 from kitsune.dashboards.models import (
     L10N_ALL_CODE,
@@ -9,6 +9,7 @@ from kitsune.dashboards.models import (
     L10N_TOP100_CODE,
     WikiMetric,
 )
+from kitsune.dashboards.readouts import UNHELPFUL_DOCS_KEY, UnhelpfulReadout, unhelpful_rank_key
 from kitsune.dashboards.tasks import (
     _get_current_unhelpful,
     _get_old_unhelpful,
@@ -136,7 +137,6 @@ class TopUnhelpfulArticlesTests(TestCase):
 class TopUnhelpfulArticlesCommandTests(TestCase):
     def setUp(self):
         super().setUp()
-        self.REDIS_KEY = settings.HELPFULVOTES_UNHELPFUL_KEY
         try:
             self.redis = redis_client("helpfulvotes")
             self.redis.flushdb()
@@ -150,10 +150,14 @@ class TopUnhelpfulArticlesCommandTests(TestCase):
             raise SkipTest
         super().tearDown()
 
+    def cached(self, product_id=None):
+        doc_ids = self.redis.zrange(unhelpful_rank_key(product_id), 0, -1)
+        return [json.loads(entry) for entry in self.redis.hmget(UNHELPFUL_DOCS_KEY, doc_ids)]
+
     def test_no_articles(self):
         """No articles returns no unhelpful articles."""
         cache_most_unhelpful_kb_articles()
-        self.assertEqual(0, self.redis.llen(self.REDIS_KEY))
+        self.assertEqual([], self.cached())
 
     def test_caching_unhelpful(self):
         """Command should get the unhelpful articles."""
@@ -167,12 +171,18 @@ class TopUnhelpfulArticlesCommandTests(TestCase):
 
         cache_most_unhelpful_kb_articles()
 
-        self.assertEqual(1, self.redis.llen(self.REDIS_KEY))
-        result = self.redis.lrange(self.REDIS_KEY, 0, 1)
         self.assertEqual(
-            "%d::%.1f::%.1f::%.1f::%.1f::%s::%s"
-            % (r.document.id, 5.0, 0.4, 0.0, 0.0, r.document.slug, r.document.title),
-            result[0],
+            [
+                {
+                    "total": 5,
+                    "currperc": 0.4,
+                    "diffperc": 0.0,
+                    "color": 0.0,
+                    "slug": r.document.slug,
+                    "title": r.document.title,
+                }
+            ],
+            self.cached(),
         )
 
     def test_caching_helpful(self):
@@ -187,7 +197,7 @@ class TopUnhelpfulArticlesCommandTests(TestCase):
 
         cache_most_unhelpful_kb_articles()
 
-        self.assertEqual(0, self.redis.llen(self.REDIS_KEY))
+        self.assertEqual([], self.cached())
 
     def test_caching_changed_helpfulness(self):
         """Changed helpfulness should be calculated correctly."""
@@ -207,13 +217,11 @@ class TopUnhelpfulArticlesCommandTests(TestCase):
 
         cache_most_unhelpful_kb_articles()
 
-        self.assertEqual(1, self.redis.llen(self.REDIS_KEY))
-        result = self.redis.lrange(self.REDIS_KEY, 0, 1)
-        self.assertEqual(
-            "%d::%.1f::%.1f::%.1f::%.1f::%s::%s"
-            % (r.document.id, 5.0, 0.4, 0.2, 0.0, r.document.slug, r.document.title),
-            result[0],
-        )
+        [result] = self.cached()
+        self.assertEqual(5, result["total"])
+        self.assertAlmostEqual(0.4, result["currperc"])
+        self.assertAlmostEqual(0.2, result["diffperc"])
+        self.assertEqual(r.document.slug, result["slug"])
 
     def test_caching_sorting(self):
         """Tests if Bayesian Average sorting works correctly."""
@@ -246,11 +254,55 @@ class TopUnhelpfulArticlesCommandTests(TestCase):
 
         cache_most_unhelpful_kb_articles()
 
-        self.assertEqual(3, self.redis.llen(self.REDIS_KEY))
-        result = self.redis.lrange(self.REDIS_KEY, 0, 3)
-        assert "%d::%.1f:" % (r2.document.id, 242.0) in result[0]
-        assert "%d::%.1f:" % (r3.document.id, 122.0) in result[1]
-        assert "%d::%.1f:" % (r.document.id, 102.0) in result[2]
+        self.assertEqual(
+            [(r2.document.slug, 242), (r3.document.slug, 122), (r.document.slug, 102)],
+            [(entry["slug"], entry["total"]) for entry in self.cached()],
+        )
+
+    def test_caching_per_product(self):
+        """Each product's ranking holds its own articles, in the overall order."""
+        p1, p2 = ProductFactory(), ProductFactory()
+        revisions = []
+        for product, unhelpful in ((p1, 181), (p2, 91), (p1, 76)):
+            r = _make_backdated_revision(90)
+            r.document.products.add(product)
+            for x in range(0, 30):
+                _add_vote_in_past(r, 1, 3)
+            for x in range(0, unhelpful):
+                _add_vote_in_past(r, 0, 3)
+            revisions.append(r)
+
+        cache_most_unhelpful_kb_articles()
+
+        slugs = [r.document.slug for r in revisions]
+        self.assertEqual(slugs, [entry["slug"] for entry in self.cached()])
+        self.assertEqual([slugs[0], slugs[2]], [entry["slug"] for entry in self.cached(p1.id)])
+        self.assertEqual([slugs[1]], [entry["slug"] for entry in self.cached(p2.id)])
+
+        # The readout reads a product's articles from the cache alone.
+        with self.assertNumQueries(0):
+            rows = UnhelpfulReadout(RequestFactory().get("/"), locale="en-US", product=p1).rows()
+        self.assertEqual(
+            [revisions[0].document.title, revisions[2].document.title],
+            [row["title"] for row in rows],
+        )
+
+    def test_recaching_replaces_stale_products(self):
+        """A product whose articles are no longer unhelpful keeps no ranking."""
+        product = ProductFactory()
+        r = _make_backdated_revision(90)
+        r.document.products.add(product)
+        for x in range(0, 5):
+            _add_vote_in_past(r, 0, 3)
+        _add_vote_in_past(r, 1, 3)
+        cache_most_unhelpful_kb_articles()
+        self.assertEqual(1, len(self.cached(product.id)))
+
+        r.document.products.remove(product)
+        cache_most_unhelpful_kb_articles()
+
+        self.assertEqual([], self.cached(product.id))
+        self.assertEqual(1, len(self.cached()))
 
 
 class L10nMetricsTests(TestCase):
@@ -1,9 +1,11 @@
 from unittest.mock import patch
 
 from kitsune.dashboards import LAST_7_DAYS
-from kitsune.dashboards.models import WikiDocumentVisits, googleanalytics
+from kitsune.dashboards.models import DocumentOverview, WikiDocumentVisits, googleanalytics
+from kitsune.dashboards.readouts import kb_overview_rows
 from kitsune.sumo.tests import TestCase
-from kitsune.wiki.tests import ApprovedRevisionFactory
+from kitsune.wiki.config import MEDIUM_SIGNIFICANCE
+from kitsune.wiki.tests import ApprovedRevisionFactory, RevisionFactory, TranslatedRevisionFactory
 
 
 class DocumentVisitsTests(TestCase):
@@ -39,3 +41,46 @@ class DocumentVisitsTests(TestCase):
         wdv3 = WikiDocumentVisits.objects.get(document=d3)
         self.assertEqual(3000, wdv3.visits)
         self.assertEqual(LAST_7_DAYS, wdv2.period)
+
+
+class DocumentOverviewTests(TestCase):
+    def test_saving_revisions_updates_the_overview(self):
+        rev = ApprovedRevisionFactory(is_ready_for_localization=True)
+        overview = DocumentOverview.objects.get(document=rev.document)
+        self.assertTrue(overview.ready_for_l10n)
+        self.assertIsNone(overview.unapproved_revision_comment)
+
+        pending = RevisionFactory(document=rev.document, comment="Fix the steps")
+        overview.refresh_from_db()
+        self.assertEqual("Fix the steps", overview.unapproved_revision_comment)
+
+        pending.is_approved = True
+        pending.significance = MEDIUM_SIGNIFICANCE
+        pending.save()
+        overview.refresh_from_db()
+        self.assertIsNone(overview.unapproved_revision_comment)
+        self.assertFalse(overview.ready_for_l10n)
+
+    def test_translations_have_no_overview(self):
+        trans = TranslatedRevisionFactory(document__locale="de")
+
+        self.assertFalse(DocumentOverview.objects.filter(document=trans.document).exists())
+        self.assertTrue(DocumentOverview.objects.filter(document=trans.document.parent).exists())
+
+    def test_missing_overviews_are_computed_on_read_without_storing_them(self):
+        ApprovedRevisionFactory(is_ready_for_localization=True)
+        DocumentOverview.objects.all().delete()
+
+        [row] = kb_overview_rows()
+
+        self.assertTrue(row["ready_for_l10n"])
+        self.assertEqual(0, DocumentOverview.objects.count())
+
+    def test_overview_rows_read_documents_and_translations_once(self):
+        for _ in range(3):
+            TranslatedRevisionFactory(document__locale="de")
+
+        with self.assertNumQueries(2):
+            rows = kb_overview_rows(locale="de")
+
+        self.assertEqual([False] * 3, [row["needs_update"] for row in rows])
@@ -17,9 +17,11 @@ from kitsune.dashboards.readouts import (
     UnreadyForLocalizationReadout,
     UnreviewedReadout,
     kb_overview_rows,
+    l10n_coverage,
     l10n_overview_rows,
 )
-from kitsune.products.tests import ProductFactory
+from kitsune.products.tests import ProductFactory, ProductSupportConfigFactory
+from kitsune.questions.tests import AAQConfigFactory, QuestionLocaleFactory
 from kitsune.sumo.models import ModelBase
 from kitsune.sumo.tests import TestCase
 from kitsune.users.tests import GroupFactory, UserFactory, add_permission
@@ -477,6 +479,82 @@ class L10NOverviewTests(TestCase):
         self.assertEqual(1, overview["all"]["numerator"])
 
 
+class L10nCoverageTests(TestCase):
+    def setUp(self):
+        forum = ProductFactory(title="Firefox", visible=True)
+        ProductSupportConfigFactory(
+            product=forum,
+            forum_config=AAQConfigFactory(enabled_locales=[QuestionLocaleFactory(locale="de")]),
+        )
+        no_forum = ProductFactory(title="Thunderbird", visible=True)
+        self.products = [forum, no_forum]
+
+        parents = []
+        for i in range(25):
+            revision = ApprovedRevisionFactory(
+                is_ready_for_localization=True,
+                document__products=[forum] if i < 15 else [no_forum],
+            )
+            WikiDocumentVisits.objects.create(
+                document=revision.document, visits=100 - i, period=LAST_30_DAYS
+            )
+            parents.append(revision)
+        parents.append(
+            ApprovedRevisionFactory(
+                is_ready_for_localization=True,
+                document__category=CANNED_RESPONSES_CATEGORY,
+                document__products=self.products,
+            )
+        )
+        parents.append(
+            ApprovedRevisionFactory(
+                is_ready_for_localization=True,
+                document__title="Template:Thing",
+                document__category=TEMPLATES_CATEGORY,
+                document__products=[forum],
+            )
+        )
+
+        for locale, translated in (("de", parents[:12] + parents[-2:]), ("es", parents[20:])):
+            for based_on in translated:
+                ApprovedRevisionFactory(
+                    document=DocumentFactory(
+                        parent=based_on.document, locale=locale, title=based_on.document.title
+                    ),
+                    based_on=based_on,
+                )
+        # Leave one of the translations out of date.
+        ApprovedRevisionFactory(
+            document=parents[0].document,
+            significance=MEDIUM_SIGNIFICANCE,
+            is_ready_for_localization=True,
+        )
+
+    def test_matches_the_overview_rows(self):
+        locales = ["de", "es", "fr"]
+
+        coverage = l10n_coverage(locales, self.products)
+
+        for locale in locales:
+            for product in [None, *self.products]:
+                with self.subTest(locale=locale, product=product):
+                    overview = l10n_overview_rows(locale, product=product)
+                    self.assertEqual(
+                        coverage[locale, product.id if product else None],
+                        {
+                            row: {
+                                "numerator": overview[row]["numerator"],
+                                "denominator": overview[row]["denominator"],
+                            }
+                            for row in ("top-20", "top-100", "all")
+                        },
+                    )
+
+    def test_query_count_does_not_depend_on_locales_or_products(self):
+        with self.assertNumQueries(5):
+            l10n_coverage(["de", "es", "fr", "it"], self.products)
+
+
 class UnreviewedChangesTests(ReadoutTestCase):
     """Tests for the Unreviewed Changes readout
 
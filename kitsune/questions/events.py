@@ -82,7 +82,15 @@ class QuestionReplyEvent(QuestionEvent):
     event_type = "question reply"
 
     def _mails(self, users_and_watches):
-        """Send one kind of mail to the asker and another to other watchers."""
+        """Send one kind of mail to the asker and another to other watchers.
+
+        Each kind is rendered once per locale, and once more for watchers without a
+        display name, and then filled in with each recipient's name, answer date and
+        watch URLs.
+        """
+        # Avoid circular import issues
+        from kitsune.users.templatetags.jinja_helpers import display_name
+
         # Cache answer.question, similar to caching solution.question below.
         self.answer.question = self.instance
         asker_id = self.answer.question.creator.id
@@ -93,14 +101,14 @@ class QuestionReplyEvent(QuestionEvent):
             "answerer": self.answer.creator,
             "question_title": self.instance.title,
             "host": Site.objects.get_current().domain,
+            "question_url": add_utm(
+                urlparams(self.instance.get_absolute_url()), "questions-reply"
+            ),
+            "answer_url": add_utm(urlparams(self.answer.get_absolute_url()), "questions-reply"),
         }
 
         @email_utils.safe_translation
-        def _make_mail(locale, user, context):
-            # Avoid circular import issues
-            from kitsune.users.templatetags.jinja_helpers import display_name
-
-            is_asker = asker_id == user.id
+        def _make_bulk_mail(locale, is_asker, has_name):
             if is_asker:
                 subject = _(
                     '{} posted an answer to your question "{}"'.format(
@@ -114,28 +122,22 @@ class QuestionReplyEvent(QuestionEvent):
                 text_template = "questions/email/new_answer.ltxt"
                 html_template = "questions/email/new_answer.html"
 
-            for k in ["question_url", "answer_url", "solution_url"]:
-                context[k] = add_utm(urlparams(context[k]), "questions-reply")
+            slots = ["created", "solution_url", "watch"]
+            if has_name:
+                slots.append("to_user_name")
 
-            mail = email_utils.make_mail(
+            return email_utils.BulkMail(
                 subject=subject,
                 text_template=text_template,
                 html_template=html_template,
-                context_vars=context,
+                context_vars={**c, "to_user_name": ""},
                 from_email="Mozilla Support Forum <no-reply@support.mozilla.org>",
-                to_email=user.email,
+                slots=slots,
             )
 
-            return mail
-
+        bulk_mails = {}
+        created = {}
         for u, w in users_and_watches:
-            c["question_url"] = self.instance.get_absolute_url()
-            c["answer_url"] = self.answer.get_absolute_url()
-            c["solution_url"] = self.answer.get_solution_url(watch=w[0])
-
-            c["to_user"] = u
-            c["watch"] = w[0]  # TODO: Expose all watches.
-
             # u here can be a Django User model or a Tidings EmailUser
             # model. In the case of the latter, there is no associated
             # profile, so we set the locale to en-US.
@@ -146,11 +148,27 @@ class QuestionReplyEvent(QuestionEvent):
                 locale = "en-US"
                 tzinfo = ZoneInfo(settings.TIME_ZONE)
 
-            c["created"] = format_datetime(
-                self.answer.created, tzinfo=tzinfo, locale=locale.replace("-", "_")
-            )
+            name = display_name(u)
+            kind = (locale, asker_id == u.id, bool(name))
+            if kind not in bulk_mails:
+                bulk_mails[kind] = _make_bulk_mail(*kind)
 
-            yield _make_mail(locale, u, c)
+            if (tzinfo, locale) not in created:
+                created[tzinfo, locale] = format_datetime(
+                    self.answer.created, tzinfo=tzinfo, locale=locale.replace("-", "_")
+                )
+
+            values = {
+                "created": created[tzinfo, locale],
+                "solution_url": add_utm(
+                    urlparams(self.answer.get_solution_url(watch=w[0])), "questions-reply"
+                ),
+                "watch": w[0],  # TODO: Expose all watches.
+            }
+            if name:
+                values["to_user_name"] = name
+
+            yield bulk_mails[kind].make_mail(u.email, **values)
 
     @classmethod
     def description_of_watch(cls, watch):
@@ -0,0 +1,110 @@
+"""Time rendering the new answer notifications, one render per recipient and rendered once.
+
+The recipients are anonymous watchers made up for the benchmark, so nothing is written to the
+database or sent. The "per recipient" figures render the templates and inline the HTML for
+each recipient, as notifications were made before; the "rendered once" figures are those of
+``QuestionReplyEvent._mails()``. Both are reported per 10,000 recipients.
+"""
+
+from time import perf_counter
+from zoneinfo import ZoneInfo
+
+from babel.dates import format_datetime
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import translation
+
+from kitsune.questions.events import QuestionReplyEvent
+from kitsune.questions.models import Answer
+from kitsune.sumo import email_utils
+from kitsune.sumo.templatetags.jinja_helpers import add_utm, urlparams
+from kitsune.tidings.models import EmailUser, Watch
+
+
+def _recipients(count):
+    return [
+        (EmailUser(email=f"watcher{n}@example.com"), [Watch(id=n, secret=f"{n:010d}")])
+        for n in range(1, count + 1)
+    ]
+
+
+def _per_recipient(answer, users_and_watches):
+    """Make each mail the way QuestionReplyEvent did before it rendered once per kind."""
+    question = answer.question
+    for user, watches in users_and_watches:
+        context = {
+            "answer": answer.content,
+            "answer_html": answer.content_parsed,
+            "answerer": answer.creator,
+            "question_title": question.title,
+            "host": Site.objects.get_current().domain,
+            "question_url": add_utm(urlparams(question.get_absolute_url()), "questions-reply"),
+            "answer_url": add_utm(urlparams(answer.get_absolute_url()), "questions-reply"),
+            "solution_url": add_utm(
+                urlparams(answer.get_solution_url(watch=watches[0])), "questions-reply"
+            ),
+            "to_user_name": "",
+            "watch": watches[0],
+            "created": format_datetime(
+                answer.created, tzinfo=ZoneInfo(settings.TIME_ZONE), locale="en_US"
+            ),
+        }
+        yield email_utils.make_mail(
+            subject=f"Re: {question.title}",
+            text_template="questions/email/new_answer.ltxt",
+            html_template="questions/email/new_answer.html",
+            context_vars=context,
+            from_email="Mozilla Support Forum <no-reply@support.mozilla.org>",
+            to_email=user.email,
+        )
+
+
+def _per_10k(seconds, count):
+    return f"{seconds * 10_000 / count:>10.2f} s per 10k recipients"
+
+
+class Command(BaseCommand):
+    help = "Measure the render time of new answer notifications, per recipient and once."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--answer",
+            type=int,
+            default=None,
+            metavar="ID",
+            help="Answer to notify about. Absent means the most recent answer.",
+        )
+        parser.add_argument(
+            "--recipients", type=int, default=1000, help="Recipients to render mail for."
+        )
+
+    def handle(self, *args, **options):
+        if options["recipients"] <= 0:
+            raise CommandError("--recipients must be a positive integer.")
+        answers = Answer.objects.select_related("question", "creator").order_by("-id")
+        if options["answer"] is not None:
+            answers = answers.filter(id=options["answer"])
+        if (answer := answers.first()) is None:
+            raise CommandError("There is no answer to notify about.")
+
+        count = options["recipients"]
+        users_and_watches = _recipients(count)
+        timings = {}
+        with translation.override("en-US"):
+            started = perf_counter()
+            for _ in _per_recipient(answer, users_and_watches):
+                pass
+            timings["per recipient"] = perf_counter() - started
+
+            started = perf_counter()
+            for _ in QuestionReplyEvent(answer)._mails(users_and_watches):
+                pass
+            timings["rendered once"] = perf_counter() - started
+
+        self.stdout.write(f"{count:,} recipients of answer {answer.id}:")
+        for label, seconds in timings.items():
+            self.stdout.write(f"  {label:<15}{_per_10k(seconds, count)}")
+        self.stdout.write(
+            f"  speedup        {timings['per recipient'] / timings['rendered once']:>10.1f}x"
+        )
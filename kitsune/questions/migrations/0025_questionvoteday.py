@@ -0,0 +1,76 @@
+# Generated by Django 5.2.14 on 2026-10-18 16:05
+
+from datetime import UTC, datetime, time, timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+
+def count_recent_votes(apps, schema_editor):
+    """Count the votes of the current window by day, and the questions' weekly votes from them."""
+    Question = apps.get_model("questions", "Question")
+    QuestionVote = apps.get_model("questions", "QuestionVote")
+    QuestionVoteDay = apps.get_model("questions", "QuestionVoteDay")
+
+    window_start = timezone.now().date() - timedelta(days=7)
+    days = (
+        QuestionVote.objects.filter(created__gte=datetime.combine(window_start, time.min, UTC))
+        .annotate(day=TruncDate("created", tzinfo=UTC))
+        .order_by()
+        .values("question_id", "day")
+        .annotate(votes=Count("id"))
+    )
+    QuestionVoteDay.objects.bulk_create(
+        (QuestionVoteDay(**day) for day in days.iterator()), batch_size=1000
+    )
+
+    Question.objects.filter(num_votes_past_week__gt=0).update(num_votes_past_week=0)
+    Question.objects.filter(id__in=QuestionVoteDay.objects.values("question_id")).update(
+        num_votes_past_week=Coalesce(
+            Subquery(
+                QuestionVoteDay.objects.filter(question_id=OuterRef("id"))
+                .order_by()
+                .values("question_id")
+                .annotate(votes=Sum("votes"))
+                .values("votes")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("questions", "0024_remove_aaqconfig_unique_active_config_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QuestionVoteDay",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("votes", models.PositiveIntegerField(default=0)),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="vote_days",
+                        to="questions.question",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("question", "day")},
+            },
+        ),
+        migrations.RunPython(count_recent_votes, migrations.RunPython.noop),
+    ]
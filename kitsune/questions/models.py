@@ -2,7 +2,7 @@ import itertools
 import json
 import logging
 import re
-from datetime import timedelta
+from datetime import UTC, timedelta
 from functools import cached_property
 from typing import override
 from urllib.parse import urlparse
@@ -14,10 +14,10 @@ from django.contrib.auth.models import User
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.core.cache import cache
-from django.db import IntegrityError, models, transaction
-from django.db.models import Count, Subquery
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Count, F, Subquery
 from django.db.models.functions import Now
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.urls import is_valid_path
 from django.utils import timezone, translation
@@ -42,6 +42,14 @@ log = logging.getLogger("k.questions")
 
 VOTE_METADATA_MAX_LENGTH = 1000
 
+# Adds a vote to its question's day, making the day if it's the first vote.
+SQL_COUNT_QUESTION_VOTE = """
+    INSERT INTO questions_questionvoteday (question_id, day, votes)
+    VALUES (%s, %s, 1)
+    ON CONFLICT (question_id, day)
+    DO UPDATE SET votes = questions_questionvoteday.votes + 1
+"""
+
 
 class InvalidUserException(ValueError):
     pass
@@ -408,14 +416,6 @@ class Question(AAQBase):
             self._num_votes = n
         return self._num_votes
 
-    def sync_num_votes_past_week(self):
-        """Get the number of votes for this question in the past week."""
-        last_week = timezone.now().date() - timedelta(days=7)
-        # Use "__range" to ensure the database index is used in Postgres.
-        n = QuestionVote.objects.filter(question=self, created__range=(last_week, Now())).count()
-        self.num_votes_past_week = n
-        return n
-
     @property
     def helpful_replies(self):
         """Return answers that have been voted as helpful."""
@@ -1168,6 +1168,61 @@ class QuestionVote(VoteBase):
     )
 
 
+class QuestionVoteDay(ModelBase):
+    """The number of votes a question got on a day, in UTC.
+
+    Question.num_votes_past_week is the sum of the days from a week ago to
+    today. It moves as votes are counted here, and as the update_weekly_votes
+    task takes out the days that leave the window, which are then deleted.
+    """
+
+    question = models.ForeignKey("Question", on_delete=models.CASCADE, related_name="vote_days")
+    day = models.DateField()
+    votes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("question", "day")
+
+    @staticmethod
+    def window_start():
+        """Return the first day counted in Question.num_votes_past_week."""
+        return timezone.now().date() - timedelta(days=7)
+
+    @staticmethod
+    def day_of(vote):
+        return vote.created.astimezone(UTC).date()
+
+    @classmethod
+    def count(cls, vote):
+        """Count a new vote in its day and its question's weekly votes."""
+        day = cls.day_of(vote)
+        if day < cls.window_start():
+            return
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(SQL_COUNT_QUESTION_VOTE, [vote.question_id, day])
+            Question.objects.filter(id=vote.question_id).update(
+                num_votes_past_week=F("num_votes_past_week") + 1
+            )
+
+    @classmethod
+    def uncount(cls, vote):
+        """Take a deleted vote out of its day and its question's weekly votes.
+
+        Votes from days that aren't counted anymore, or never were, are ignored.
+        """
+        day = cls.day_of(vote)
+        if day < cls.window_start():
+            return
+        with transaction.atomic():
+            if cls.objects.filter(question_id=vote.question_id, day=day, votes__gt=0).update(
+                votes=F("votes") - 1
+            ):
+                Question.objects.filter(id=vote.question_id, num_votes_past_week__gt=0).update(
+                    num_votes_past_week=F("num_votes_past_week") - 1
+                )
+
+
 class AnswerVote(VoteBase):
     """Helpful or Not Helpful vote on Answer."""
 
@@ -1188,15 +1243,15 @@ class VoteMetadata(ModelBase):
     value = models.CharField(max_length=VOTE_METADATA_MAX_LENGTH)
 
 
-def send_vote_update_task(**kwargs):
-    from kitsune.questions.tasks import update_question_votes
-
-    if kwargs.get("created"):
-        q = kwargs.get("instance").question
-        update_question_votes.delay(q.id)
+@receiver(post_save, sender=QuestionVote, dispatch_uid="questions.count_question_vote")
+def count_question_vote(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        QuestionVoteDay.count(instance)
 
 
-post_save.connect(send_vote_update_task, sender=QuestionVote)
+@receiver(post_delete, sender=QuestionVote, dispatch_uid="questions.uncount_question_vote")
+def uncount_question_vote(sender, instance, **kwargs):
+    QuestionVoteDay.uncount(instance)
 
 
 _tenths_version_pattern = re.compile(r"(\d+\.\d+).*")
@@ -1,4 +1,3 @@
-import itertools
 import logging
 import textwrap
 from datetime import date, datetime, timedelta
@@ -7,8 +6,9 @@ from celery import shared_task
 from django.conf import settings
 from django.contrib.auth.models import Group, User
 from django.core.mail import send_mail
-from django.db.models import Count, OuterRef, Subquery
-from django.db.models.functions import Coalesce, Now
+from django.db import connection, transaction
+from django.db.models import F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from sentry_sdk import capture_exception
 
@@ -21,49 +21,18 @@ from kitsune.sumo.decorators import skip_if_read_only_mode
 
 log = logging.getLogger("k.task")
 
-
-@shared_task(rate_limit="1/s")
-@skip_if_read_only_mode
-def update_question_votes(question_id):
-    from kitsune.questions.models import Question
-
-    log.debug("Got a new QuestionVote for question_id={}.".format(question_id))
-
-    try:
-        q = Question.objects.get(id=question_id)
-        q.sync_num_votes_past_week()
-        q.save(force_update=True)
-    except Question.DoesNotExist:
-        log.info("Question id={} deleted before task.".format(question_id))
-
-
-@shared_task(rate_limit="4/s")
-@skip_if_read_only_mode
-def update_question_vote_chunk(question_ids: list[int]) -> None:
-    """Given a list of questions, update the "num_votes_past_week" attribute of each one."""
-    from kitsune.questions.models import Question, QuestionVote
-
-    log.info("Calculating past week votes for {} questions.".format(len(question_ids)))
-
-    past_week = (timezone.now() - timedelta(days=7)).replace(
-        hour=0, minute=0, second=0, microsecond=0
-    )
-
-    Question.objects.filter(id__in=question_ids).update(
-        num_votes_past_week=Coalesce(
-            Subquery(
-                # Use "__range" to ensure the database index is used in Postgres.
-                QuestionVote.objects.filter(
-                    question_id=OuterRef("id"), created__range=(past_week, Now())
-                )
-                .order_by()
-                .values("question_id")
-                .annotate(count=Count("*"))
-                .values("count")
-            ),
-            0,
-        )
-    )
+# Numbers the question's answers that aren't spam by creation, and moves those
+# that aren't on the page their number falls on.
+SQL_UPDATE_ANSWER_PAGES = """
+    UPDATE questions_answer
+    SET page = numbered.page
+    FROM (
+        SELECT id, (row_number() OVER (ORDER BY created, id) - 1) / %s + 1 AS page
+        FROM questions_answer
+        WHERE question_id = %s AND NOT is_spam
+    ) AS numbered
+    WHERE questions_answer.id = numbered.id AND questions_answer.page <> numbered.page
+"""
 
 
 @shared_task(rate_limit="4/m")
@@ -79,12 +48,13 @@ def update_answer_pages(question_id: int):
 
     log.debug(f"Recalculating answer page numbers for question {question.pk}: {question.title}")
 
-    i = 0
-    answers = question.answers.using("default").order_by("created")
-    for answer in answers.filter(is_spam=False):
-        answer.page = i // ANSWERS_PER_PAGE + 1
-        answer.save(no_notify=True)
-        i += 1
+    # An answer's page only goes into its links, so it is updated without the
+    # post_save signals of a save(), and only for the answers changing page.
+    with connection.cursor() as cursor:
+        cursor.execute(SQL_UPDATE_ANSWER_PAGES, [ANSWERS_PER_PAGE, question.pk])
+        moved = cursor.rowcount
+
+    log.debug(f"Moved {moved} answers of question {question.pk} to another page.")
 
 
 @shared_task
@@ -217,28 +187,39 @@ def report_employee_answers() -> None:
 @shared_task
 @skip_if_read_only_mode
 def update_weekly_votes() -> None:
-    from kitsune.questions.models import Question, QuestionVote
+    """Drop the days that have left the window, and recount the questions' weekly votes.
 
-    # Get all questions (id) with a vote in the last week.
-    recent = timezone.now() - timedelta(days=7)
-    q = QuestionVote.objects.filter(created__range=(recent, Now()))
-    q = q.values_list("question_id", flat=True).order_by("question")
-    q = q.distinct()
-    q_with_recent_votes = list(q)
-
-    # Get all questions with num_votes_past_week > 0
-    q = Question.objects.filter(num_votes_past_week__gt=0)
-    q = q.values_list("id", flat=True)
-    q_with_nonzero_votes = list(q)
-
-    # Union.
-    qs_to_update = list(set(q_with_recent_votes + q_with_nonzero_votes))
-
-    log.info(f"Started update of {len(qs_to_update)} questions.")
+    New and deleted votes are counted as they happen, see QuestionVoteDay. The
+    recount from the days left corrects any counter that drifted from them, e.g.
+    one overwritten by the save() of a stale Question.
+    """
+    from kitsune.questions.models import Question, QuestionVoteDay
+
+    window_start = QuestionVoteDay.window_start()
+    counted = QuestionVoteDay.objects.filter(day__gte=window_start)
+    votes = Subquery(
+        counted.filter(question_id=OuterRef("id"))
+        .order_by()
+        .values("question_id")
+        .annotate(votes=Sum("votes"))
+        .values("votes")
+    )
 
-    # Chunk them for tasks.
-    for chunk in itertools.batched(qs_to_update, 50, strict=False):
-        update_question_vote_chunk.delay(list(chunk))
+    with transaction.atomic():
+        QuestionVoteDay.objects.filter(day__lt=window_start).delete()
+        # The rows are locked so that a vote counted meanwhile is added on top
+        # of the recount, rather than overwritten by it.
+        changed = [
+            Question(id=question_id, num_votes_past_week=num_votes)
+            for question_id, num_votes in Question.objects.select_for_update(of=("self",))
+            .filter(Q(num_votes_past_week__gt=0) | Q(id__in=counted.values("question_id")))
+            .annotate(num_votes=Coalesce(votes, 0))
+            .exclude(num_votes_past_week=F("num_votes"))
+            .values_list("id", "num_votes")
+        ]
+        Question.objects.bulk_update(changed, ["num_votes_past_week"], batch_size=1000)
+
+    log.info(f"Updated the weekly votes of {len(changed)} questions.")
 
 
 @shared_task
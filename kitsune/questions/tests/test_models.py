@@ -142,6 +142,23 @@ class TestAnswer(TestCase):
         a3 = Answer.objects.filter(question=a1.question)[0]
         assert a3.page == 1, "Page was {}".format(a3.page)
 
+    @mock.patch("kitsune.questions.tasks.ANSWERS_PER_PAGE", 2)
+    def test_update_page_task_skips_spam_and_signals(self):
+        q = QuestionFactory()
+        now = timezone.now()
+        answers = [
+            AnswerFactory(question=q, created=now + timedelta(minutes=i), is_spam=i == 1)
+            for i in range(5)
+        ]
+        Answer.objects.filter(question=q).update(page=9)
+
+        with mock.patch.object(Answer, "save") as save:
+            update_answer_pages(q.id)
+
+        save.assert_not_called()
+        pages = dict(Answer.objects.filter(question=q).values_list("id", "page"))
+        self.assertEqual([pages[a.id] for a in answers], [1, 9, 1, 2, 2])
+
     def test_creator_num_answers(self):
         a = AnswerFactory()
 
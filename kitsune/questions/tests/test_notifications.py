@@ -4,10 +4,12 @@ from unittest import mock
 from django.contrib.sites.models import Site
 from django.core import mail
 from django.test.utils import override_settings
+from markupsafe import escape
 
 from kitsune.questions.events import QuestionReplyEvent, QuestionSolvedEvent
 from kitsune.questions.models import Question
 from kitsune.questions.tests import AnswerFactory, QuestionFactory
+from kitsune.sumo import email_utils
 from kitsune.sumo.tests import TestCase, attrs_eq, post, starts_with
 from kitsune.users.models import Setting
 from kitsune.users.templatetags.jinja_helpers import display_name
@@ -344,6 +346,29 @@ class TestAnswerNotifications(TestCase):
 
         starts_with(notification.body, ANSWER_EMAIL_TO_ASKER.format(**self.format_args()))
 
+    def test_notifications_are_rendered_once_per_kind(self):
+        """Watchers share one rendering but get their own name and watch URLs."""
+        watchers = [UserFactory(), UserFactory()]
+        for watcher in watchers:
+            QuestionReplyEvent.notify(watcher, self.question)
+
+        with mock.patch.object(
+            email_utils, "render_email", wraps=email_utils.render_email
+        ) as render_email:
+            self.makeAnswer()
+
+        # The text and HTML of the asker's mail and of the watchers' mail.
+        self.assertEqual(4, render_email.call_count)
+        self.assertEqual(3, len(mail.outbox))
+        for watcher in watchers:
+            [notification] = [m for m in mail.outbox if m.to == [watcher.email]]
+            watch = QuestionReplyEvent._watches_belonging_to_user(
+                watcher, object_id=self.question.id
+            ).get()
+            self.assertIn("Hi {},".format(display_name(watcher)), notification.body)
+            self.assertIn(watch.unsubscribe_url(), notification.body)
+            self.assertIn(str(escape(watch.unsubscribe_url())), notification.alternatives[0][0])
+
     @override_settings(DEFAULT_REPLY_TO_EMAIL="replyto@example.com")
     def test_notify_anonymous_reply_to(self):
         """
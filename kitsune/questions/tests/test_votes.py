@@ -1,4 +1,9 @@
-from kitsune.questions.models import Question
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from kitsune.questions.models import Question, QuestionVoteDay
 from kitsune.questions.tasks import update_weekly_votes
 from kitsune.questions.tests import QuestionFactory, QuestionVoteFactory
 from kitsune.sumo.tests import TestCase
@@ -16,16 +21,53 @@ class TestVotes(TestCase):
         q = Question.objects.get(id=q.id)
         self.assertEqual(1, q.num_votes_past_week)
 
-    def test_cron_updates_counts(self):
+    def test_only_votes_within_the_week_are_counted(self):
+        q = QuestionFactory()
+        now = timezone.now()
+        for days in (3, 6, 7, 8, 9):
+            QuestionVoteFactory(question=q, created=now - timedelta(days=days))
+
+        q.refresh_from_db()
+        self.assertEqual(3, q.num_votes_past_week)
+        self.assertEqual(3, q.vote_days.count())
+
+    def test_deleted_vote_updates_count(self):
         q = QuestionFactory()
+        vote = QuestionVoteFactory(question=q)
+        old_vote = QuestionVoteFactory(question=q, created=timezone.now() - timedelta(days=9))
+
+        vote.delete()
+        old_vote.delete()
+
+        q.refresh_from_db()
         self.assertEqual(0, q.num_votes_past_week)
+        self.assertEqual([0], list(q.vote_days.values_list("votes", flat=True)))
 
+    def test_cron_expires_days_leaving_the_week(self):
+        q = QuestionFactory()
         QuestionVoteFactory(question=q, anonymous_id="abc123")
-
-        q.num_votes_past_week = 0
-        q.save()
+        QuestionVoteFactory(question=q, anonymous_id="def456")
+        # A week goes by, and a new vote comes in.
+        QuestionVoteDay.objects.filter(question=q).update(day=F("day") - timedelta(days=8))
+        QuestionVoteFactory(question=q, anonymous_id="ghi789")
 
         update_weekly_votes()
 
-        q = Question.objects.get(pk=q.pk)
+        q.refresh_from_db()
         self.assertEqual(1, q.num_votes_past_week)
+        self.assertEqual([1], list(q.vote_days.values_list("votes", flat=True)))
+
+    def test_cron_corrects_drifted_counts(self):
+        q = QuestionFactory()
+        QuestionVoteFactory(question=q, anonymous_id="abc123")
+        QuestionVoteFactory(question=q, anonymous_id="def456")
+        # A stale copy of the question saved over the counter.
+        Question.objects.filter(id=q.id).update(num_votes_past_week=0)
+        unvoted = QuestionFactory(num_votes_past_week=5)
+
+        update_weekly_votes()
+
+        q.refresh_from_db()
+        self.assertEqual(2, q.num_votes_past_week)
+        unvoted.refresh_from_db()
+        self.assertEqual(0, unvoted.num_votes_past_week)
@@ -1,14 +1,29 @@
-"""Authoritative viewer access and KB retrieval-result authorization."""
+"""Authoritative viewer access and KB retrieval-result authorization.
 
-from collections.abc import Collection, Sequence
+Both lookups are cached behind one access generation. Every change that can alter a viewer's
+memberships or a family's eligibility, display, restriction, or products bumps the generation
+after it commits (see ``retrieval.signals``), so cached facts are never used across such a
+change: entries written under an older generation are simply never read again. A record is
+keyed by the generation read *before* its database query, so a write that commits while the
+query runs cannot be cached under the generation that follows it.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Collection, Iterable, Sequence
 from dataclasses import dataclass
 from time import perf_counter
 
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser, User
-from django.db.models import Q
+from django.contrib.postgres.expressions import ArraySubquery
+from django.core.cache import cache
+from django.db.models import OuterRef, Q
+from django.db.models.functions import Coalesce
 
 from kitsune.retrieval.eligibility import content_eligible_documents
+from kitsune.retrieval.overfetch import ViewerClass, record_authorization
 from kitsune.retrieval.query import (
     ENGLISH_LOCALE,
     DefaultOperator,
@@ -26,6 +41,9 @@ from kitsune.wiki.models import Document
 
 PRIMARY_DATABASE = "default"
 
+_CACHE_NAMESPACE = "retrieval:access:v1"
+_GENERATION_KEY = f"{_CACHE_NAMESPACE}:generation"
+
 
 @dataclass(frozen=True)
 class ViewerAccess:
@@ -42,6 +60,12 @@ class ViewerAccess:
         ):
             raise ValueError("group_ids must be sorted, unique positive integers")
 
+    @property
+    def viewer_class(self) -> ViewerClass:
+        if self.privileged:
+            return "privileged"
+        return "group" if self.group_ids else "public"
+
 
 @dataclass(frozen=True)
 class DisplayDocument:
@@ -66,6 +90,96 @@ class AuthorizedCandidate:
     evidence: AuthorizedPassage | LegacyQuestion
 
 
+@dataclass(frozen=True)
+class _FamilyRecord:
+    """What authorizing one KB family needs, as seen from one requested locale.
+
+    ``member_ids`` are the family's content-eligible documents in the requested and English
+    locales, the only locales retrieval searches. Restrictions and products are the
+    original's, which translations inherit. A family with no members is cached too, so stale
+    index entries for deleted or ineligible documents stay off the database.
+    """
+
+    member_ids: frozenset[int]
+    display: DisplayDocument | None
+    group_ids: frozenset[int]
+    product_ids: frozenset[int]
+
+    def permits(self, viewer_access: ViewerAccess, product_id: int | None) -> bool:
+        if product_id is not None and product_id not in self.product_ids:
+            return False
+        return (
+            viewer_access.privileged
+            or not self.group_ids
+            or not self.group_ids.isdisjoint(viewer_access.group_ids)
+        )
+
+
+class _LocalRecordCache:
+    """A thread-safe, bounded LRU in front of the shared cache, keyed by generation."""
+
+    def __init__(self):
+        self._entries: OrderedDict[str, tuple[float, _FamilyRecord]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> _FamilyRecord | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, record = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return record
+
+    def set_many(self, records: dict[str, _FamilyRecord]) -> None:
+        max_size = settings.RETRIEVAL_AUTHORIZATION_LOCAL_CACHE_SIZE
+        if not max_size:
+            return
+        expires = time.monotonic() + settings.RETRIEVAL_AUTHORIZATION_CACHE_TTL_SECONDS
+        with self._lock:
+            for key, record in records.items():
+                self._entries[key] = (expires, record)
+                self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_local_records = _LocalRecordCache()
+
+
+def bump_access_generation() -> None:
+    """Stop serving every cached family record and viewer membership."""
+    try:
+        cache.incr(_GENERATION_KEY)
+    except ValueError:
+        pass  # No generation yet: nothing has been cached under one that is still read.
+    except Exception:
+        pass  # Entries still expire within RETRIEVAL_AUTHORIZATION_CACHE_TTL_SECONDS.
+
+
+def _access_generation() -> int | None:
+    """The current access generation, or None when authorization must not use the cache."""
+    if not settings.RETRIEVAL_AUTHORIZATION_CACHE_TTL_SECONDS:
+        return None
+    try:
+        generation = cache.get(_GENERATION_KEY)
+        if generation is None:
+            # Start from the clock, not 1, so a generation lost to eviction can never be
+            # reissued while entries written under it are still alive.
+            cache.add(_GENERATION_KEY, time.time_ns(), timeout=None)
+            generation = cache.get(_GENERATION_KEY)
+    except Exception:
+        return None
+    return generation if is_positive_int(generation) else None
+
+
 def viewer_access_for(user: User | AnonymousUser) -> ViewerAccess:
     """Resolve group membership once; staff and superusers bypass restrictions."""
     if not user.is_authenticated:
@@ -73,10 +187,27 @@ def viewer_access_for(user: User | AnonymousUser) -> ViewerAccess:
     if user.is_superuser:
         return ViewerAccess(privileged=True)
 
+    generation = _access_generation()
+    key = f"{_CACHE_NAMESPACE}:viewer:{generation}:{user.pk}"
+    if generation is not None:
+        try:
+            cached = cache.get(key)
+        except Exception:
+            cached = None
+        if isinstance(cached, ViewerAccess):
+            return cached
+
     memberships = tuple(user.groups.using(PRIMARY_DATABASE).values_list("id", "name"))
     if any(name == settings.STAFF_GROUP for _, name in memberships):
-        return ViewerAccess(privileged=True)
-    return ViewerAccess(tuple(sorted(group_id for group_id, _ in memberships)))
+        access = ViewerAccess(privileged=True)
+    else:
+        access = ViewerAccess(tuple(sorted(group_id for group_id, _ in memberships)))
+    if generation is not None:
+        try:
+            cache.set(key, access, timeout=settings.RETRIEVAL_AUTHORIZATION_CACHE_TTL_SECONDS)
+        except Exception:
+            pass
+    return access
 
 
 def retrieve(
@@ -139,7 +270,7 @@ def retrieve(
         minimum_should_match=minimum_should_match,
         strict=strict,
     )
-    return authorize_candidates(
+    authorized = authorize_candidates(
         result,
         viewer_access=viewer_access,
         locale=locale,
@@ -147,6 +278,16 @@ def retrieve(
         page_size=page_size,
         page_offset=offset if authorize_prefix else 0,
     )
+    if authorize_prefix:
+        record_authorization(
+            viewer_access.viewer_class,
+            source_set,
+            considered=len(result.candidates),
+            rejected=(
+                authorized.authorization_rejection_count - result.authorization_rejection_count
+            ),
+        )
+    return authorized
 
 
 def authorize_candidates(
@@ -158,75 +299,22 @@ def authorize_candidates(
     page_size: int,
     page_offset: int,
 ) -> RetrievalResult[AuthorizedCandidate]:
-    """Apply the primary-database authorization boundary to indexed candidates."""
+    """Apply the primary-database authorization boundary to indexed candidates.
+
+    Family records come from the access cache where the current generation has them; the rest
+    are read from the primary database in one query and cached.
+    """
     started = perf_counter()
-    passages = [
-        candidate.evidence
-        for candidate in result.candidates
-        if isinstance(candidate.evidence, RetrievalPassage)
-    ]
-    family_by_source_id = {}
-    displays = {}
-    if passages:
-        source_ids: set[int] = set()
-        family_ids: set[int] = set()
-        for passage in passages:
-            source_id = parse_positive_integer_id(passage.object_id)
-            family_id = parse_positive_integer_id(passage.family_id.removeprefix("kb:"))
-            if source_id is not None and family_id is not None:
-                source_ids.add(source_id)
+    family_ids = set()
+    for candidate in result.candidates:
+        if isinstance(candidate.evidence, RetrievalPassage):
+            family_id = parse_positive_integer_id(candidate.family_id.removeprefix("kb:"))
+            if family_id is not None:
                 family_ids.add(family_id)
-
-        display_locales = {locale, ENGLISH_LOCALE}
-        documents = content_eligible_documents(Document.objects.using(PRIMARY_DATABASE)).filter(
-            Q(id__in=source_ids)
-            | Q(id__in=family_ids, locale__in=display_locales)
-            | Q(parent_id__in=family_ids, locale__in=display_locales)
-        )
-
-        if not viewer_access.privileged:
-            access = Q(parent__isnull=True, restrict_to_groups__isnull=True) | Q(
-                parent__isnull=False, parent__restrict_to_groups__isnull=True
-            )
-            if viewer_access.group_ids:
-                access |= Q(
-                    parent__isnull=True, restrict_to_groups__id__in=viewer_access.group_ids
-                ) | Q(
-                    parent__isnull=False,
-                    parent__restrict_to_groups__id__in=viewer_access.group_ids,
-                )
-            documents = documents.filter(access)
-
-        if product_id is not None:
-            documents = documents.filter(
-                Q(parent__isnull=True, products__id=product_id)
-                | Q(parent__isnull=False, parent__products__id=product_id)
-            )
-
-        for (
-            document_id,
-            parent_id,
-            document_locale,
-            title,
-            slug,
-            summary,
-        ) in documents.distinct().values_list(
-            "id",
-            "parent_id",
-            "locale",
-            "title",
-            "slug",
-            "current_revision__summary",
-        ):
-            family_id = parent_id or document_id
-            family_by_source_id[document_id] = family_id
-            displays[(family_id, document_locale)] = DisplayDocument(
-                document_id,
-                document_locale,
-                title,
-                slug,
-                summary,
-            )
+    has_passages = any(
+        isinstance(candidate.evidence, RetrievalPassage) for candidate in result.candidates
+    )
+    records, misses = _family_records(family_ids, locale) if family_ids else ({}, 0)
 
     authorized = []
     for candidate in result.candidates:
@@ -243,21 +331,23 @@ def authorize_candidates(
 
         passage = candidate.evidence
         source_id = parse_positive_integer_id(passage.object_id)
-        if source_id is None:
-            continue
-        family_id = family_by_source_id.get(source_id)
-        if family_id is None or candidate.family_id != f"kb:{family_id}":
+        family_id = parse_positive_integer_id(candidate.family_id.removeprefix("kb:"))
+        record = records.get(family_id) if family_id is not None else None
+        if (
+            record is None
+            or source_id not in record.member_ids
+            or record.display is None
+            or not record.permits(viewer_access, product_id)
+        ):
             continue
-        display = displays.get((family_id, locale)) or displays.get((family_id, ENGLISH_LOCALE))
-        if display is not None:
-            authorized.append(
-                AuthorizedCandidate(
-                    candidate.rank,
-                    candidate.score,
-                    candidate.family_id,
-                    AuthorizedPassage(passage, display),
-                )
+        authorized.append(
+            AuthorizedCandidate(
+                candidate.rank,
+                candidate.score,
+                candidate.family_id,
+                AuthorizedPassage(passage, record.display),
             )
+        )
 
     page_end = page_offset + page_size
     return RetrievalResult(
@@ -273,5 +363,122 @@ def authorize_candidates(
         authorization_rejection_count=(
             result.authorization_rejection_count + len(result.candidates) - len(authorized)
         ),
-        db_ms=round((perf_counter() - started) * 1000) if passages else 0,
+        db_ms=round((perf_counter() - started) * 1000) if has_passages else 0,
+        semantic_engine=result.semantic_engine,
+        authorization_cache_miss_count=result.authorization_cache_miss_count + misses,
+    )
+
+
+def _family_records(
+    family_ids: Iterable[int], locale: str
+) -> tuple[dict[int, _FamilyRecord], int]:
+    """Records for ``family_ids`` and how many had to be read from the database."""
+    family_ids = sorted(family_ids)
+    generation = _access_generation()
+    if generation is None:
+        return _load_family_records(family_ids, locale), len(family_ids)
+
+    keys = {
+        family_id: f"{_CACHE_NAMESPACE}:family:{generation}:{locale}:{family_id}"
+        for family_id in family_ids
+    }
+    records = {}
+    for family_id, key in keys.items():
+        record = _local_records.get(key)
+        if record is not None:
+            records[family_id] = record
+
+    shared = [keys[family_id] for family_id in family_ids if family_id not in records]
+    if shared:
+        try:
+            found = cache.get_many(shared)
+        except Exception:
+            found = {}
+        hits = {key: record for key, record in found.items() if isinstance(record, _FamilyRecord)}
+        _local_records.set_many(hits)
+        for family_id in family_ids:
+            if keys[family_id] in hits:
+                records[family_id] = hits[keys[family_id]]
+
+    missing = [family_id for family_id in family_ids if family_id not in records]
+    if missing:
+        loaded = _load_family_records(missing, locale)
+        fresh = {keys[family_id]: record for family_id, record in loaded.items()}
+        try:
+            cache.set_many(fresh, timeout=settings.RETRIEVAL_AUTHORIZATION_CACHE_TTL_SECONDS)
+        except Exception:
+            pass
+        _local_records.set_many(fresh)
+        records.update(loaded)
+    return records, len(missing)
+
+
+def _load_family_records(family_ids: Sequence[int], locale: str) -> dict[int, _FamilyRecord]:
+    """Read the records of ``family_ids`` from the primary database in one query."""
+    display_locales = list(dict.fromkeys([locale, ENGLISH_LOCALE]))
+    original = Coalesce(OuterRef("parent_id"), OuterRef("id"))
+    rows = (
+        content_eligible_documents(Document.objects.using(PRIMARY_DATABASE))
+        .filter(
+            Q(id__in=family_ids, parent__isnull=True) | Q(parent_id__in=family_ids),
+            locale__in=display_locales,
+        )
+        .annotate(
+            family_group_ids=ArraySubquery(
+                Document.restrict_to_groups.through.objects.filter(document_id=original).values(
+                    "group_id"
+                )
+            ),
+            family_product_ids=ArraySubquery(
+                Document.products.through.objects.filter(document_id=original).values("product_id")
+            ),
+        )
+        .values_list(
+            "id",
+            "parent_id",
+            "locale",
+            "title",
+            "slug",
+            "current_revision__summary",
+            "family_group_ids",
+            "family_product_ids",
+        )
     )
+
+    members: dict[int, set[int]] = {family_id: set() for family_id in family_ids}
+    displays: dict[tuple[int, str], DisplayDocument] = {}
+    groups: dict[int, frozenset[int]] = {}
+    products: dict[int, frozenset[int]] = {}
+    for (
+        document_id,
+        parent_id,
+        document_locale,
+        title,
+        slug,
+        summary,
+        group_ids,
+        product_ids,
+    ) in rows:
+        family_id = parent_id or document_id
+        members[family_id].add(document_id)
+        displays[(family_id, document_locale)] = DisplayDocument(
+            document_id,
+            document_locale,
+            title,
+            slug,
+            summary,
+        )
+        groups[family_id] = frozenset(group_ids or ())
+        products[family_id] = frozenset(product_ids or ())
+
+    return {
+        family_id: _FamilyRecord(
+            member_ids=frozenset(members[family_id]),
+            display=(
+                displays.get((family_id, locale)) or displays.get((family_id, ENGLISH_LOCALE))
+            ),
+            group_ids=groups.get(family_id, frozenset()),
+            product_ids=products.get(family_id, frozenset()),
+        )
+        for family_id in family_ids
+    }
@@ -0,0 +1,421 @@
+"""Parallel, resumable backfill of one retrieval write generation.
+
+``sync_chunks --backfill`` enqueues batches and leaves progress to the queue. Filling a new
+generation for a model change needs more than that: a fixed plan, a ceiling on provider
+tokens, a view of throughput, and a way to continue after the process dies. ``run_backfill``
+partitions the eligible corpus into ordered primary-key ranges, syncs them on a pool of worker
+threads through the same batch path the tasks use, and records each completed range in Redis
+so a rerun skips it.
+
+Provider input is estimated locally with ``count_tokens`` and packed into requests with
+``provider_request_batch_lengths``; each request's tokens are taken from one token bucket that
+every worker shares, so the provider quota is saturated but not exceeded. Chunk texts that
+already have a stored vector cost the provider nothing and are not charged.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field, replace
+from itertools import batched
+
+from django.db import connection
+
+from kitsune.retrieval.chunk_vectors import cached_chunk_vectors
+from kitsune.retrieval.chunking import chunk, count_tokens
+from kitsune.retrieval.eligibility import eligible_documents
+from kitsune.retrieval.embeddings import EmbeddingRecipe, provider_request_batch_lengths
+from kitsune.retrieval.events import emit
+from kitsune.retrieval.index import recipe_for_index
+from kitsune.retrieval.locks import DocumentLockUnavailable
+from kitsune.retrieval.sync import (
+    CONTENT_TYPE,
+    max_batch_documents,
+    sync_document_batch,
+    sync_document_chunks,
+)
+from kitsune.sumo.redis_utils import redis_client
+from kitsune.wiki.models import Document
+
+_CHECKPOINT_PREFIX = "retrieval:backfill:v1"
+# Long enough to resume a backfill interrupted over a weekend, short enough that an abandoned
+# plan does not outlive the generation it was made for by much.
+_CHECKPOINT_TTL_SECONDS = 14 * 24 * 60 * 60
+
+
+class TokenBucket:
+    """A thread-safe token bucket; a rate of zero admits everything at once.
+
+    Each acquisition reserves its tokens immediately and sleeps until the bucket would have
+    held them, so waiting workers are admitted in arrival order and a request larger than the
+    bucket is admitted rather than starved.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        *,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._level = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> float:
+        """Take ``tokens``, waiting as long as the rate requires; return the seconds waited."""
+        if not self.rate or tokens <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+            self._updated = now
+            self._level -= tokens
+            wait = -self._level / self.rate if self._level < 0 else 0.0
+        if wait:
+            self._sleep(wait)
+        return wait
+
+
+@dataclass(frozen=True)
+class BackfillRange:
+    """Eligible documents with ``first_id <= pk <= last_id``; the last range is open-ended so
+    documents created after planning are still covered."""
+
+    number: int
+    first_id: int
+    last_id: int | None
+    documents: int
+
+
+@dataclass(frozen=True)
+class RangeReport:
+    """What syncing one range did and what it cost."""
+
+    number: int
+    documents: int = 0
+    # Locally estimated input tokens charged to the bucket, and the requests they pack into.
+    tokens: int = 0
+    provider_requests: int = 0
+    embedding_calls: int = 0
+    reused_chunks: int = 0
+    embedded_chunks: int = 0
+    # Documents the batch handed back, synced one by one; contended ones are left to the
+    # worker already holding their lease.
+    redispatched: int = 0
+    contended: int = 0
+    seconds: float = 0.0
+
+
+@dataclass(frozen=True)
+class BackfillProgress:
+    """Throughput so far, reported after every completed range."""
+
+    completed_ranges: int
+    total_ranges: int
+    completed_documents: int
+    total_documents: int
+    # This run only; ranges resumed from the checkpoint took no time here.
+    documents: int
+    tokens: int
+    elapsed: float
+
+    @property
+    def documents_per_second(self) -> float:
+        return self.documents / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> float | None:
+        remaining = max(0, self.total_documents - self.completed_documents)
+        if not remaining:
+            return 0.0
+        rate = self.documents_per_second
+        return remaining / rate if rate else None
+
+
+@dataclass
+class BackfillReport:
+    index: str
+    ranges: int = 0
+    resumed_ranges: int = 0
+    failed_ranges: list[int] = field(default_factory=list)
+    documents: int = 0
+    tokens: int = 0
+    provider_requests: int = 0
+    embedding_calls: int = 0
+    reused_chunks: int = 0
+    embedded_chunks: int = 0
+    seconds: float = 0.0
+
+
+class BackfillCheckpoint:
+    """The plan and completed ranges of one backfill, kept in Redis.
+
+    A backfill is identified by its target index and locale filter. The plan is stored with it
+    because range boundaries must not move between runs: a document created in the meantime
+    lands in the open-ended last range instead of shifting every range after it.
+    """
+
+    def __init__(self, index: str, locales: Sequence[str] = ()):
+        scope = hashlib.sha256(json.dumps(sorted(locales)).encode("utf-8")).hexdigest()[:16]
+        self._key = f"{_CHECKPOINT_PREFIX}:{index}:{scope}"
+        self._client = redis_client("default")
+
+    def plan(self) -> list[BackfillRange] | None:
+        stored = self._client.get(f"{self._key}:plan")
+        if stored is None:
+            return None
+        return [BackfillRange(**item) for item in json.loads(stored)]
+
+    def save_plan(self, ranges: Sequence[BackfillRange]) -> None:
+        self._client.set(
+            f"{self._key}:plan",
+            json.dumps([asdict(item) for item in ranges]),
+            ex=_CHECKPOINT_TTL_SECONDS,
+        )
+
+    def completed(self) -> dict[int, RangeReport]:
+        stored = self._client.hgetall(f"{self._key}:done")
+        return {
+            int(number): RangeReport(**json.loads(report)) for number, report in stored.items()
+        }
+
+    def mark_completed(self, report: RangeReport) -> None:
+        done = f"{self._key}:done"
+        pipeline = self._client.pipeline()
+        pipeline.hset(done, str(report.number), json.dumps(asdict(report)))
+        pipeline.expire(done, _CHECKPOINT_TTL_SECONDS)
+        pipeline.expire(f"{self._key}:plan", _CHECKPOINT_TTL_SECONDS)
+        pipeline.execute()
+
+    def clear(self) -> None:
+        self._client.delete(f"{self._key}:plan", f"{self._key}:done")
+
+
+def _documents(locales: Sequence[str]):
+    documents = eligible_documents()
+    if locales:
+        documents = documents.filter(locale__in=locales)
+    return documents
+
+
+def plan_ranges(locales: Sequence[str], range_size: int) -> list[BackfillRange]:
+    """Partition the eligible documents into ordered ranges of ``range_size`` documents."""
+    ids = (
+        _documents(locales)
+        .select_related(None)
+        .prefetch_related(None)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+        .iterator(chunk_size=range_size)
+    )
+    ranges = [
+        BackfillRange(number, batch[0], batch[-1], len(batch))
+        for number, batch in enumerate(batched(ids, range_size, strict=False))
+    ]
+    if ranges:
+        ranges[-1] = replace(ranges[-1], last_id=None)
+    return ranges
+
+
+def _charge(document_ids, recipe: EmbeddingRecipe, bucket: TokenBucket) -> tuple[int, int]:
+    """Take the batch's estimated provider input from the bucket, one request at a time."""
+    documents = Document.objects.filter(pk__in=document_ids).only("html", "title")
+    texts = [
+        item.text
+        for document in documents
+        for item in chunk(CONTENT_TYPE, document.html, title=document.title)
+    ]
+    stored = cached_chunk_vectors(texts, recipe)
+    tokens = [count_tokens(text) for text in dict.fromkeys(texts) if text not in stored]
+    requests = provider_request_batch_lengths(tokens)
+    start = 0
+    for length in requests:
+        bucket.acquire(sum(tokens[start : start + length]))
+        start += length
+    return sum(tokens), len(requests)
+
+
+def _sync_range(
+    backfill_range: BackfillRange,
+    index: str,
+    locales: Sequence[str],
+    recipe: EmbeddingRecipe,
+    bucket: TokenBucket,
+) -> RangeReport:
+    started = time.monotonic()
+    documents = _documents(locales).filter(pk__gte=backfill_range.first_id)
+    if backfill_range.last_id is not None:
+        documents = documents.filter(pk__lte=backfill_range.last_id)
+    ids = list(documents.order_by("pk").values_list("pk", flat=True))
+
+    totals = dict.fromkeys(
+        (
+            "tokens",
+            "provider_requests",
+            "embedding_calls",
+            "reused_chunks",
+            "embedded_chunks",
+            "redispatched",
+            "contended",
+        ),
+        0,
+    )
+    for batch in batched(ids, max_batch_documents(), strict=False):
+        tokens, requests = _charge(batch, recipe, bucket)
+        report = sync_document_batch(batch, target_index=index)
+        totals["tokens"] += tokens
+        totals["provider_requests"] += requests
+        totals["embedding_calls"] += report.embedding_calls
+        totals["reused_chunks"] += report.reused_chunks
+        totals["embedded_chunks"] += report.embedded_chunks
+        totals["redispatched"] += len(report.redispatch)
+        for document_id in report.redispatch:
+            try:
+                single = sync_document_chunks(document_id, target_index=index)
+            except DocumentLockUnavailable:
+                totals["contended"] += 1
+                continue
+            totals["embedding_calls"] += single.embedding_calls
+            totals["reused_chunks"] += single.reused_chunks
+            totals["embedded_chunks"] += single.embedded_chunks
+    return RangeReport(
+        number=backfill_range.number,
+        documents=len(ids),
+        seconds=time.monotonic() - started,
+        **totals,
+    )
+
+
+def _sync_range_in_thread(*args) -> RangeReport:
+    try:
+        return _sync_range(*args)
+    finally:
+        # Each pool thread opens its own database connection; close it with the range.
+        connection.close()
+
+
+def run_backfill(
+    index: str,
+    *,
+    locales: Sequence[str] = (),
+    workers: int = 1,
+    range_size: int = 1000,
+    tokens_per_second: int = 0,
+    restart: bool = False,
+    progress: Callable[[BackfillProgress], None] | None = None,
+) -> BackfillReport:
+    """Sync every eligible document into ``index``, resuming from the last checkpoint.
+
+    One worker runs ranges in the calling thread. A failed range is logged and left out of the
+    checkpoint, so a rerun retries exactly the ranges that did not finish.
+    """
+    recipe = recipe_for_index(index)  # Fail before planning on an unusable target.
+    checkpoint = BackfillCheckpoint(index, locales)
+    if restart:
+        checkpoint.clear()
+    ranges = checkpoint.plan()
+    if ranges is None:
+        ranges = plan_ranges(locales, range_size)
+        checkpoint.save_plan(ranges)
+    done = checkpoint.completed()
+    pending = [item for item in ranges if item.number not in done]
+
+    report = BackfillReport(index=index, ranges=len(ranges), resumed_ranges=len(done))
+    bucket = TokenBucket(tokens_per_second)
+    total_documents = sum(item.documents for item in ranges)
+    completed_ranges = len(done)
+    completed_documents = sum(item.documents for item in done.values())
+    started = time.monotonic()
+
+    def record(result: RangeReport) -> None:
+        nonlocal completed_ranges, completed_documents
+        checkpoint.mark_completed(result)
+        completed_ranges += 1
+        completed_documents += result.documents
+        report.documents += result.documents
+        report.tokens += result.tokens
+        report.provider_requests += result.provider_requests
+        report.embedding_calls += result.embedding_calls
+        report.reused_chunks += result.reused_chunks
+        report.embedded_chunks += result.embedded_chunks
+        if progress is not None:
+            progress(
+                BackfillProgress(
+                    completed_ranges=completed_ranges,
+                    total_ranges=report.ranges,
+                    completed_documents=completed_documents,
+                    total_documents=total_documents,
+                    documents=report.documents,
+                    tokens=report.tokens,
+                    elapsed=time.monotonic() - started,
+                )
+            )
+
+    def fail(backfill_range: BackfillRange, exc: Exception) -> None:
+        report.failed_ranges.append(backfill_range.number)
+        # Only the exception's type: a provider message can quote the input or the credential.
+        emit(
+            "retrieval.backfill.range_failed",
+            level=logging.ERROR,
+            content_type=CONTENT_TYPE,
+            index=index,
+            range_number=backfill_range.number,
+            error_type=type(exc).__name__,
+        )
+
+    arguments = (index, locales, recipe, bucket)
+    if workers <= 1:
+        for backfill_range in pending:
+            try:
+                result = _sync_range(backfill_range, *arguments)
+            except Exception as exc:
+                fail(backfill_range, exc)
+            else:
+                record(result)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_sync_range_in_thread, backfill_range, *arguments): backfill_range
+                for backfill_range in pending
+            }
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    fail(futures[future], exc)
+                else:
+                    record(result)
+
+    report.seconds = time.monotonic() - started
+    report.failed_ranges.sort()
+    emit(
+        "retrieval.backfill.completed",
+        level=logging.WARNING if report.failed_ranges else logging.INFO,
+        content_type=CONTENT_TYPE,
+        index=index,
+        range_count=report.ranges,
+        resumed_range_count=report.resumed_ranges,
+        failed_range_count=len(report.failed_ranges),
+        document_count=report.documents,
+        tokens=report.tokens,
+        provider_requests=report.provider_requests,
+        embedding_calls=report.embedding_calls,
+        reused_chunks=report.reused_chunks,
+        embedded_chunks=report.embedded_chunks,
+        duration_ms=int(report.seconds * 1000),
+    )
+    return report
@@ -18,6 +18,7 @@ from django.core.checks import Error, register
 from kitsune.retrieval.embeddings import MIN_EMBEDDING_TIMEOUT_SECONDS
 from kitsune.retrieval.fingerprints import is_valid_similarity_floor
 from kitsune.retrieval.index import SIMILARITY
+from kitsune.retrieval.local_knn import LOCAL_KNN_MODES
 from kitsune.retrieval.validation import is_finite_number, is_nonnegative_int, is_positive_int
 
 _SHA256_HEX = re.compile(r"[0-9a-f]{64}\Z")
@@ -72,9 +73,21 @@ def query_configuration_problems() -> list[str]:
             f"of at least {MIN_EMBEDDING_TIMEOUT_SECONDS}"
         )
 
+    if not is_nonnegative_int(settings.RETRIEVAL_QUERY_EMBEDDING_BATCH_WINDOW_MS):
+        problems.append("RETRIEVAL_QUERY_EMBEDDING_BATCH_WINDOW_MS must be a non-negative integer")
+
     ttl = settings.RETRIEVAL_QUERY_VECTOR_CACHE_TTL_SECONDS
     if not is_positive_int(ttl):
         problems.append("RETRIEVAL_QUERY_VECTOR_CACHE_TTL_SECONDS must be a positive integer")
+    if not is_nonnegative_int(settings.RETRIEVAL_QUERY_VECTOR_LOCAL_CACHE_SIZE):
+        problems.append("RETRIEVAL_QUERY_VECTOR_LOCAL_CACHE_SIZE must be a non-negative integer")
+    if not is_nonnegative_int(settings.RETRIEVAL_CHUNK_VECTOR_CACHE_TTL_SECONDS):
+        problems.append("RETRIEVAL_CHUNK_VECTOR_CACHE_TTL_SECONDS must be a non-negative integer")
+    if not is_nonnegative_int(settings.RETRIEVAL_BACKFILL_TOKENS_PER_SECOND):
+        problems.append("RETRIEVAL_BACKFILL_TOKENS_PER_SECOND must be a non-negative integer")
+
+    if not is_nonnegative_int(settings.RETRIEVAL_QUERY_VECTOR_WARMUP_TOP_N):
+        problems.append("RETRIEVAL_QUERY_VECTOR_WARMUP_TOP_N must be a non-negative integer")
 
     bounds = (
         ("RETRIEVAL_SEMANTIC_K", settings.RETRIEVAL_SEMANTIC_K),
@@ -94,9 +107,24 @@ def query_configuration_problems() -> list[str]:
     ):
         problems.append("RETRIEVAL_KNN_NUM_CANDIDATES must be at least RETRIEVAL_SEMANTIC_K")
 
-    overfetch = settings.RETRIEVAL_AUTHORIZATION_OVERFETCH
-    if not is_nonnegative_int(overfetch):
+    overfetch = settings.RETRIEVAL_AUTHORIZATION_MAX_OVERFETCH
+    if not is_nonnegative_int(settings.RETRIEVAL_AUTHORIZATION_OVERFETCH):
         problems.append("RETRIEVAL_AUTHORIZATION_OVERFETCH must be a non-negative integer")
+    if not is_nonnegative_int(overfetch):
+        problems.append("RETRIEVAL_AUTHORIZATION_MAX_OVERFETCH must be a non-negative integer")
+    elif (
+        is_nonnegative_int(settings.RETRIEVAL_AUTHORIZATION_OVERFETCH)
+        and settings.RETRIEVAL_AUTHORIZATION_OVERFETCH > overfetch
+    ):
+        problems.append(
+            "RETRIEVAL_AUTHORIZATION_MAX_OVERFETCH must be at least "
+            "RETRIEVAL_AUTHORIZATION_OVERFETCH"
+        )
+    if not is_nonnegative_int(settings.RETRIEVAL_AUTHORIZATION_OVERFETCH_SAMPLES):
+        problems.append("RETRIEVAL_AUTHORIZATION_OVERFETCH_SAMPLES must be a non-negative integer")
+    percentile = settings.RETRIEVAL_AUTHORIZATION_OVERFETCH_PERCENTILE
+    if not is_positive_int(percentile) or percentile > 100:
+        problems.append("RETRIEVAL_AUTHORIZATION_OVERFETCH_PERCENTILE must be from 1 to 100")
 
     max_offset = settings.RETRIEVAL_MAX_PAGE_OFFSET
     if not is_nonnegative_int(max_offset):
@@ -108,8 +136,8 @@ def query_configuration_problems() -> list[str]:
         > settings.RETRIEVAL_RRF_RANK_WINDOW_SIZE
     ):
         problems.append(
-            "RETRIEVAL_MAX_PAGE_OFFSET plus the result page, authorization over-fetch, "
-            "and has-more probe must fit within RETRIEVAL_RRF_RANK_WINDOW_SIZE"
+            "RETRIEVAL_MAX_PAGE_OFFSET plus the result page, maximum authorization "
+            "over-fetch, and has-more probe must fit within RETRIEVAL_RRF_RANK_WINDOW_SIZE"
         )
 
     if settings.RETRIEVAL_LEXICAL_DEFAULT_OPERATOR not in ("AND", "OR"):
@@ -123,6 +151,25 @@ def query_configuration_problems() -> list[str]:
             "RETRIEVAL_QUERY_EMBEDDING_RATE must use count/[duration]unit, such as 10/m"
         )
 
+    if not is_nonnegative_int(settings.RETRIEVAL_AUTHORIZATION_CACHE_TTL_SECONDS):
+        problems.append("RETRIEVAL_AUTHORIZATION_CACHE_TTL_SECONDS must be a non-negative integer")
+    if not is_nonnegative_int(settings.RETRIEVAL_AUTHORIZATION_LOCAL_CACHE_SIZE):
+        problems.append("RETRIEVAL_AUTHORIZATION_LOCAL_CACHE_SIZE must be a non-negative integer")
+
+    if settings.RETRIEVAL_LOCAL_KNN_MODE not in LOCAL_KNN_MODES:
+        problems.append("RETRIEVAL_LOCAL_KNN_MODE must be off, fallback, or always")
+    elif (
+        settings.RETRIEVAL_LOCAL_KNN_MODE != "off"
+        and not settings.RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR
+    ):
+        problems.append(
+            "RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR is required unless the local engine is off"
+        )
+    if not is_nonnegative_int(settings.RETRIEVAL_LOCAL_KNN_NPROBE):
+        problems.append("RETRIEVAL_LOCAL_KNN_NPROBE must be a non-negative integer")
+    if not is_positive_int(settings.RETRIEVAL_LOCAL_KNN_BREAKER_SECONDS):
+        problems.append("RETRIEVAL_LOCAL_KNN_BREAKER_SECONDS must be a positive integer")
+
     floors = settings.RETRIEVAL_KNN_SIMILARITY_FLOORS
     if not isinstance(floors, dict):
         problems.append("RETRIEVAL_KNN_SIMILARITY_FLOORS must be an object")
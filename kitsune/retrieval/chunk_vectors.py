@@ -0,0 +1,69 @@
+"""Content-addressed document-chunk vectors, shared by every sync path.
+
+A chunk's vector depends only on its exact text and the document embedding space, so it is
+keyed by the SHA-256 of the text and ``document_embedding_fingerprint``. An edit to one section
+of a long article then pays only for the chunks whose text changed; a recipe change moves to a
+new key space instead of reusing incompatible vectors. The store is an optimization: a read or
+write failure, or an entry that does not validate against the recipe, is an ordinary miss.
+"""
+
+import hashlib
+from collections.abc import Iterable, Mapping
+
+from django.conf import settings
+from django.core.cache import cache
+
+from kitsune.retrieval.embeddings import (
+    EmbeddingRecipe,
+    InvalidEmbeddingResponse,
+    recipe_to_payload,
+    validate_embeddings,
+)
+from kitsune.retrieval.fingerprints import document_embedding_fingerprint
+
+_CACHE_NAMESPACE = "retrieval:chunk-vector:v1"
+
+
+def cached_chunk_vectors(texts: Iterable[str], recipe: EmbeddingRecipe) -> dict[str, list[float]]:
+    """Return the stored, valid vectors for the given chunk texts, keyed by text."""
+    if not settings.RETRIEVAL_CHUNK_VECTOR_CACHE_TTL_SECONDS:
+        return {}
+    keys = {_chunk_vector_cache_key(text, recipe): text for text in set(texts)}
+    if not keys:
+        return {}
+    try:
+        found = cache.get_many(list(keys))
+    except Exception:
+        return {}
+    vectors = {}
+    for key, vector in found.items():
+        text = keys[key]
+        try:
+            if not isinstance(vector, list):
+                raise InvalidEmbeddingResponse("cached embedding is not a list")
+            validate_embeddings([vector], [text], recipe)
+        except InvalidEmbeddingResponse:
+            continue
+        vectors[text] = [float(value) for value in vector]
+    return vectors
+
+
+def store_chunk_vectors(vectors: Mapping[str, list[float]], recipe: EmbeddingRecipe) -> bool:
+    """Write freshly embedded chunk vectors in one round trip; return whether all were kept."""
+    if not settings.RETRIEVAL_CHUNK_VECTOR_CACHE_TTL_SECONDS or not vectors:
+        return True
+    try:
+        failed = cache.set_many(
+            {_chunk_vector_cache_key(text, recipe): vector for text, vector in vectors.items()},
+            timeout=settings.RETRIEVAL_CHUNK_VECTOR_CACHE_TTL_SECONDS,
+        )
+    except Exception:
+        return False
+    return not failed
+
+
+def _chunk_vector_cache_key(text: str, recipe: EmbeddingRecipe) -> str:
+    recipe_to_payload(recipe)  # Fail closed on invalid recipes, including on cache hits.
+    recipe_digest = document_embedding_fingerprint(recipe)[1]
+    text_digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{_CACHE_NAMESPACE}:{recipe_digest}:{text_digest}"
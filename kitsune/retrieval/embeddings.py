@@ -346,10 +346,15 @@ def max_input_tokens() -> int:
     return _VERTEX_MAX_INPUT_TOKENS
 
 
+def max_request_inputs() -> int:
+    """The most inputs one provider request carries."""
+    return min(_configured_batch_size(), _VERTEX_MAX_BATCH_SIZE)
+
+
 def provider_request_batch_lengths(input_tokens: Sequence[int]) -> tuple[int, ...]:
     """Pack inputs into requests using the same count and token bounds as Vertex."""
     batch_lengths = []
-    max_inputs = min(_configured_batch_size(), _VERTEX_MAX_BATCH_SIZE)
+    max_inputs = max_request_inputs()
     batch_inputs = 0
     batch_tokens = 0
     for tokens in input_tokens:
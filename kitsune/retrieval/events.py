@@ -61,6 +61,13 @@ EVENT_CATALOG = frozenset(
         "retrieval.query.failed",
         # serving degradation
         "retrieval.query.degraded",
+        # query-vector cache warming
+        "retrieval.warmup.completed",
+        # local kNN fallback engine
+        "retrieval.local_knn.snapshot_built",
+        # orchestrated generation backfill
+        "retrieval.backfill.completed",
+        "retrieval.backfill.range_failed",
         # provider-free ingestion estimate
         "retrieval.estimate.completed",
         # generation lifecycle
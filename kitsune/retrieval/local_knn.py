@@ -0,0 +1,745 @@
+"""An in-process vector index that can serve the semantic leg when Elasticsearch kNN cannot.
+
+``build_snapshot`` scans one concrete chunk index into a directory of ``.npy`` arrays: unit
+vectors grouped by locale and, within large locales, by inverted-file (IVF) list, alongside the
+family, access, and product facts needed to filter exactly as the kNN clause does. Serving
+processes memory-map a snapshot read-only, so workers on one host share a single copy through
+the page cache and a process pays nothing until its first local query.
+
+The engine only ranks chunk IDs. The query layer re-applies the full semantic filter to those
+IDs in Elasticsearch and fuses them with the lexical leg in the same native RRF retriever, so
+the rank window, family collapse, access boundary, and response decoding are unchanged, and a
+chunk that has left the index since the snapshot was built is simply not returned.
+"""
+
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+from collections import defaultdict
+from collections.abc import Collection, Sequence
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Literal
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from elasticsearch.helpers import scan
+
+from kitsune.retrieval.events import emit
+from kitsune.retrieval.index import (
+    CHUNK_KIND,
+    PUBLIC_VISIBILITY,
+    RESTRICTED_VISIBILITY,
+    ChunkIdentity,
+    chunk_id,
+    recipe_for_index,
+)
+from kitsune.retrieval.sync import CONTENT_TYPE
+from kitsune.retrieval.validation import is_finite_number, is_nonnegative_int, is_positive_int
+from kitsune.search.es_utils import es_client
+
+LocalKnnMode = Literal["off", "fallback", "always"]
+LOCAL_KNN_MODES = ("off", "fallback", "always")
+
+SNAPSHOT_VERSION = 1
+_CURRENT = "CURRENT"
+_META = "meta.json"
+_ARRAYS = (
+    "vectors",
+    "object_ids",
+    "family_ids",
+    "positions",
+    "centroids",
+    "list_offsets",
+    "product_keys",
+    "product_indptr",
+    "product_rows",
+)
+# Locales below this size are always searched exactly: probing lists over a few thousand
+# vectors saves less than scanning the centroids costs.
+_IVF_MIN_ROWS = 4096
+_KMEANS_ITERATIONS = 10
+_KMEANS_SAMPLE_PER_LIST = 64
+_ASSIGN_BLOCK_ROWS = 8192
+# The previous build stays on disk so a process that has just read CURRENT can still open it.
+_BUILDS_KEPT = 2
+_DEGRADED_KEY = "retrieval:local-knn:elasticsearch-degraded"
+
+
+class LocalSnapshotUnavailable(Exception):
+    """No usable local kNN snapshot is configured or readable."""
+
+
+@dataclass(frozen=True)
+class LocalHits:
+    chunk_ids: tuple[str, ...]
+    scores: tuple[float, ...]
+    rows_scanned: int
+
+
+@dataclass(frozen=True)
+class SnapshotReport:
+    index: str
+    build: str
+    rows: int
+    skipped: int
+    locales: int
+    lists: int
+    seconds: float
+
+
+@dataclass(frozen=True)
+class EngineStats:
+    # Mean share of the exact top-k each engine returned, and its per-query latency.
+    recall: float
+    p50_ms: float
+    p95_ms: float
+
+
+@dataclass(frozen=True)
+class BenchmarkReport:
+    index: str
+    queries: int
+    k: int
+    nprobe: int
+    exact: EngineStats
+    approximate: EngineStats
+    elasticsearch: EngineStats | None
+
+
+@dataclass(frozen=True)
+class _Partition:
+    start: int
+    end: int
+    list_start: int
+    list_end: int
+
+
+class LocalSnapshot:
+    """One read-only, memory-mapped snapshot of a chunk index."""
+
+    def __init__(self, path: Path):
+        try:
+            meta = json.loads((path / _META).read_text(encoding="utf-8"))
+            arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in _ARRAYS}
+        except (OSError, ValueError) as exc:
+            raise LocalSnapshotUnavailable(f"could not read the snapshot at {path}") from exc
+        if not isinstance(meta, dict) or meta.get("version") != SNAPSHOT_VERSION:
+            raise LocalSnapshotUnavailable(f"the snapshot at {path} has an unsupported version")
+
+        self.index: str = meta["index"]
+        self.build: str = meta["build"]
+        self.dimensions: int = meta["dimensions"]
+        self.vectors = arrays["vectors"]
+        self.object_ids = arrays["object_ids"]
+        self.family_ids = arrays["family_ids"]
+        self.positions = arrays["positions"]
+        self.centroids = arrays["centroids"]
+        self.list_offsets = arrays["list_offsets"]
+        self._product_keys = arrays["product_keys"]
+        self._product_indptr = arrays["product_indptr"]
+        self._product_rows = arrays["product_rows"]
+        if self.vectors.shape != (len(self.object_ids), self.dimensions):
+            raise LocalSnapshotUnavailable(f"the snapshot at {path} is inconsistent")
+
+        self.partitions = {
+            locale: _Partition(*bounds) for locale, bounds in sorted(meta["partitions"].items())
+        }
+        self._locale_starts = np.array(
+            [partition.start for partition in self.partitions.values()], dtype=np.int64
+        )
+        self._locale_names = list(self.partitions)
+        self._restricted = {
+            int(row): frozenset(groups) for row, groups in meta["restricted"].items()
+        }
+        self._public = np.ones(len(self.object_ids), dtype=bool)
+        self._public[list(self._restricted)] = False
+        self._product_masks: dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.object_ids)
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        *,
+        locales: Sequence[str],
+        k: int,
+        product_id: int | None = None,
+        viewer_group_ids: Collection[int] = (),
+        privileged: bool = False,
+        excluded_family_ids: Collection[str] = (),
+        similarity_floor: float = -1.0,
+        nprobe: int = 0,
+    ) -> LocalHits:
+        """Return the ``k`` most similar permitted chunks, best first.
+
+        ``nprobe`` is the number of IVF lists searched per locale; 0 scans every vector, which
+        is the exact baseline. Scores are cosine similarities, as the kNN ``similarity`` floor
+        expects, so the same floor bounds both engines.
+        """
+        if not is_positive_int(k):
+            raise ValueError("k must be a positive integer")
+        if not is_nonnegative_int(nprobe):
+            raise ValueError("nprobe must be a non-negative integer")
+        query = np.array(query_vector, dtype=np.float32)
+        if query.shape != (self.dimensions,):
+            raise ValueError("query_vector does not match the snapshot dimensions")
+        norm = float(np.linalg.norm(query))
+        if not math.isfinite(norm) or norm == 0:
+            raise ValueError("query_vector must be finite and non-zero")
+        query /= norm
+
+        allowed = self._allowed(product_id, viewer_group_ids, privileged, excluded_family_ids)
+        found_rows, found_scores = [], []
+        scanned = 0
+        for locale in dict.fromkeys(locales):
+            partition = self.partitions.get(locale)
+            if partition is None:
+                continue
+            for start, end in self._ranges(partition, query, nprobe):
+                scores = self.vectors[start:end] @ query
+                keep = scores >= similarity_floor
+                if allowed is not None:
+                    keep &= allowed[start:end]
+                rows = np.flatnonzero(keep)
+                found_rows.append(rows + start)
+                found_scores.append(scores[rows])
+                scanned += end - start
+
+        if not found_rows:
+            return LocalHits((), (), scanned)
+        rows = np.concatenate(found_rows)
+        scores = np.concatenate(found_scores)
+        if len(rows) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[top], scores[top]
+        order = np.lexsort((rows, -scores))
+        return LocalHits(
+            tuple(self._chunk_id(int(row)) for row in rows[order]),
+            tuple(float(score) for score in scores[order]),
+            scanned,
+        )
+
+    def _ranges(self, partition: _Partition, query: np.ndarray, nprobe: int):
+        lists = partition.list_end - partition.list_start
+        if not nprobe or not lists or nprobe >= lists:
+            return [(partition.start, partition.end)]
+        scores = self.centroids[partition.list_start : partition.list_end] @ query
+        probed = np.sort(np.argpartition(-scores, nprobe - 1)[:nprobe]) + partition.list_start
+        return [
+            (int(self.list_offsets[list_id]), int(self.list_offsets[list_id + 1]))
+            for list_id in probed
+        ]
+
+    def _allowed(
+        self,
+        product_id: int | None,
+        viewer_group_ids: Collection[int],
+        privileged: bool,
+        excluded_family_ids: Collection[str],
+    ) -> np.ndarray | None:
+        """The rows this viewer may see, mirroring the kNN clause's filters; None is all."""
+        allowed = None
+        if not privileged and self._restricted:
+            allowed = self._public.copy()
+            groups = frozenset(viewer_group_ids)
+            if groups:
+                for row, row_groups in self._restricted.items():
+                    if row_groups & groups:
+                        allowed[row] = True
+        if product_id is not None:
+            product = self._product_mask(product_id)
+            allowed = product if allowed is None else allowed & product
+        excluded = [
+            int(family_id.removeprefix(f"{CONTENT_TYPE}:"))
+            for family_id in excluded_family_ids
+            if family_id.startswith(f"{CONTENT_TYPE}:")
+        ]
+        if excluded:
+            kept = ~np.isin(self.family_ids, excluded)
+            allowed = kept if allowed is None else allowed & kept
+        return allowed
+
+    def _product_mask(self, product_id: int) -> np.ndarray:
+        mask = self._product_masks.get(product_id)
+        if mask is None:
+            mask = np.zeros(len(self), dtype=bool)
+            position = int(np.searchsorted(self._product_keys, product_id))
+            if position < len(self._product_keys) and self._product_keys[position] == product_id:
+                start, end = self._product_indptr[position : position + 2]
+                mask[self._product_rows[start:end]] = True
+            self._product_masks[product_id] = mask
+        return mask
+
+    def locale_of(self, row: int) -> str:
+        return self._locale_names[int(np.searchsorted(self._locale_starts, row, "right")) - 1]
+
+    def _chunk_id(self, row: int) -> str:
+        identity = ChunkIdentity(CONTENT_TYPE, str(int(self.object_ids[row])), self.locale_of(row))
+        return chunk_id(identity, int(self.positions[row]))
+
+
+_loaded: LocalSnapshot | None = None
+_loaded_lock = threading.Lock()
+
+
+def mode() -> LocalKnnMode:
+    return settings.RETRIEVAL_LOCAL_KNN_MODE
+
+
+def load_snapshot(index: str) -> LocalSnapshot | None:
+    """The current snapshot of ``index`` for this process, or None when there is none.
+
+    Each call reads the small CURRENT pointer, so a rebuilt snapshot is picked up by the next
+    query without a restart. Only the most recently used index stays mapped.
+    """
+    global _loaded
+    if not settings.RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR or not _is_path_safe(index):
+        return None
+    directory = Path(settings.RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR) / index
+    try:
+        build = (directory / _CURRENT).read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if not _is_path_safe(build):
+        return None
+    with _loaded_lock:
+        if _loaded is None or _loaded.index != index or _loaded.build != build:
+            try:
+                _loaded = LocalSnapshot(directory / build)
+            except LocalSnapshotUnavailable:
+                return None
+        return _loaded
+
+
+def serves_semantic_leg() -> bool:
+    """Whether the local engine should serve the semantic leg before asking Elasticsearch."""
+    match mode():
+        case "always":
+            return True
+        case "fallback":
+            return elasticsearch_knn_degraded()
+        case _:
+            return False
+
+
+def elasticsearch_knn_degraded() -> bool:
+    try:
+        return bool(cache.get(_DEGRADED_KEY))
+    except Exception:
+        return False
+
+
+def mark_elasticsearch_knn_degraded() -> None:
+    """Route every worker's semantic leg to the local engine for the breaker interval."""
+    try:
+        cache.set(_DEGRADED_KEY, True, timeout=settings.RETRIEVAL_LOCAL_KNN_BREAKER_SECONDS)
+    except Exception:
+        pass  # The current request still falls back; only the shared breaker is lost.
+
+
+def semantic_chunk_ids(
+    index: str,
+    query_vector: Sequence[float],
+    *,
+    locales: Sequence[str],
+    k: int,
+    product_id: int | None,
+    viewer_group_ids: Collection[int],
+    privileged: bool,
+    excluded_family_ids: Collection[str],
+    similarity_floor: float,
+) -> tuple[str, ...] | None:
+    """Rank the semantic leg locally, or return None when no usable snapshot exists."""
+    snapshot = load_snapshot(index)
+    if snapshot is None or len(query_vector) != snapshot.dimensions:
+        return None
+    return snapshot.search(
+        query_vector,
+        locales=locales,
+        k=k,
+        product_id=product_id,
+        viewer_group_ids=viewer_group_ids,
+        privileged=privileged,
+        excluded_family_ids=excluded_family_ids,
+        similarity_floor=similarity_floor,
+        nprobe=settings.RETRIEVAL_LOCAL_KNN_NPROBE,
+    ).chunk_ids
+
+
+def benchmark_snapshot(
+    snapshot: LocalSnapshot,
+    *,
+    queries: int,
+    k: int,
+    nprobe: int,
+    num_candidates: int | None = None,
+    seed: int = 0,
+) -> BenchmarkReport:
+    """Measure recall@k and latency of the IVF search, and optionally of Elasticsearch kNN,
+    against an exact scan of the same snapshot.
+
+    Query vectors are chunk vectors sampled from the snapshot, so no provider call is made.
+    Each query is restricted to its chunk's locale and no access or product filter applies, so
+    the comparison measures nearest-neighbour quality alone. Passing ``num_candidates`` also
+    queries the snapshot's index with the kNN clause's own ``num_candidates``.
+    """
+    if not is_positive_int(queries):
+        raise ValueError("queries must be a positive integer")
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(snapshot), size=min(queries, len(snapshot)), replace=False)
+    timings: dict[str, list[float]] = defaultdict(list)
+    recalls: dict[str, list[float]] = defaultdict(list)
+    for row in rows.tolist():
+        vector = np.asarray(snapshot.vectors[row])
+        locale = snapshot.locale_of(row)
+        ranked = {}
+        for engine, probes in (("exact", 0), ("approximate", nprobe)):
+            started = perf_counter()
+            hits = snapshot.search(vector, locales=[locale], k=k, privileged=True, nprobe=probes)
+            timings[engine].append((perf_counter() - started) * 1000)
+            ranked[engine] = hits.chunk_ids
+        if num_candidates is not None:
+            started = perf_counter()
+            ranked["elasticsearch"] = _elasticsearch_knn(
+                snapshot.index, vector, locale=locale, k=k, num_candidates=num_candidates
+            )
+            timings["elasticsearch"].append((perf_counter() - started) * 1000)
+        exact = set(ranked["exact"])
+        for engine, chunk_ids in ranked.items():
+            recalls[engine].append(len(exact & set(chunk_ids)) / len(exact) if exact else 1.0)
+
+    def stats(engine: str) -> EngineStats:
+        p50, p95 = np.percentile(timings[engine], [50, 95]) if timings[engine] else (0.0, 0.0)
+        recall = float(np.mean(recalls[engine])) if recalls[engine] else 1.0
+        return EngineStats(recall=recall, p50_ms=float(p50), p95_ms=float(p95))
+
+    return BenchmarkReport(
+        index=snapshot.index,
+        queries=len(rows),
+        k=k,
+        nprobe=nprobe,
+        exact=stats("exact"),
+        approximate=stats("approximate"),
+        elasticsearch=stats("elasticsearch") if num_candidates is not None else None,
+    )
+
+
+def _elasticsearch_knn(
+    index: str, vector: np.ndarray, *, locale: str, k: int, num_candidates: int
+) -> tuple[str, ...]:
+    response = es_client().search(
+        index=index,
+        knn={
+            "field": "content_vector",
+            "query_vector": vector.tolist(),
+            "k": k,
+            "num_candidates": max(num_candidates, k),
+            "filter": [
+                {"term": {"kind": CHUNK_KIND}},
+                {"term": {"content_type": CONTENT_TYPE}},
+                {"term": {"locale": locale}},
+            ],
+        },
+        size=k,
+        source=False,
+    )
+    raw = getattr(response, "body", response)
+    return tuple(hit["_id"] for hit in raw["hits"]["hits"])
+
+
+@dataclass
+class _Rows:
+    object_ids: list[int]
+    family_ids: list[int]
+    positions: list[int]
+    locales: list[str]
+    products: list[tuple[int, ...]]
+    restricted: dict[int, list[int]]
+
+
+def build_snapshot(index: str, *, directory: str | None = None) -> SnapshotReport:
+    """Scan one concrete chunk index into a new snapshot and make it current.
+
+    Vectors stream to disk as they are scanned and are reordered on disk, so memory holds the
+    per-row facts and one k-means training sample rather than the whole corpus.
+    """
+    root = Path(directory or settings.RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR or "")
+    if not directory and not settings.RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR:
+        raise LocalSnapshotUnavailable("RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR is not set")
+    if not _is_path_safe(index):
+        raise ValueError("index must be a concrete index name")
+    started = perf_counter()
+    dimensions = recipe_for_index(index).dimensions
+    build = datetime.now(UTC).strftime("%Y%m%dT%H%M%S%fZ")
+    index_directory = root / index
+    index_directory.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{build}-", dir=index_directory))
+    try:
+        rows, skipped = _scan_into(staging / "scan.f32", index, dimensions)
+        scanned = _scanned_vectors(staging / "scan.f32", len(rows.object_ids), dimensions)
+        partitions, order, centroids, list_offsets = _layout(rows, scanned)
+        _write_arrays(staging, rows, scanned, order, centroids, list_offsets)
+        del scanned
+        (staging / "scan.f32").unlink()
+        inverse = np.empty(len(order), dtype=np.int64)
+        inverse[order] = np.arange(len(order))
+        (staging / _META).write_text(
+            json.dumps(
+                {
+                    "version": SNAPSHOT_VERSION,
+                    "index": index,
+                    "build": build,
+                    "dimensions": dimensions,
+                    "partitions": partitions,
+                    "restricted": {
+                        str(int(inverse[row])): groups for row, groups in rows.restricted.items()
+                    },
+                }
+            ),
+            encoding="utf-8",
+        )
+        staging.rename(index_directory / build)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer = index_directory / f".{_CURRENT}.{build}"
+    pointer.write_text(build, encoding="utf-8")
+    os.replace(pointer, index_directory / _CURRENT)
+    _prune(index_directory, keep=build)
+
+    report = SnapshotReport(
+        index=index,
+        build=build,
+        rows=len(order),
+        skipped=skipped,
+        locales=len(partitions),
+        lists=len(centroids),
+        seconds=perf_counter() - started,
+    )
+    emit(
+        "retrieval.local_knn.snapshot_built",
+        index=index,
+        row_count=report.rows,
+        skipped_count=report.skipped,
+        locale_count=report.locales,
+        list_count=report.lists,
+        duration_ms=round(report.seconds * 1000),
+    )
+    return report
+
+
+def _scan_into(path: Path, index: str, dimensions: int) -> tuple[_Rows, int]:
+    rows = _Rows([], [], [], [], [], {})
+    skipped = 0
+    query = {
+        "query": {
+            "bool": {
+                "filter": [
+                    {"term": {"kind": CHUNK_KIND}},
+                    {"term": {"content_type": CONTENT_TYPE}},
+                ]
+            }
+        },
+        "_source": {
+            "includes": [
+                "object_id",
+                "family_id",
+                "locale",
+                "position",
+                "visibility",
+                "access_group_ids",
+                "product_ids",
+                "content_vector",
+            ],
+            # Indices created on 9.2+ omit vectors from _source unless asked.
+            "exclude_vectors": False,
+        },
+    }
+    with path.open("wb") as vectors, closing(scan(es_client(), index=index, query=query)) as hits:
+        for hit in hits:
+            parsed = _parse_row(hit.get("_source", {}), dimensions)
+            if parsed is None:
+                skipped += 1
+                continue
+            vector, object_id, family_id, position, locale, products, groups = parsed
+            if groups is not None:
+                rows.restricted[len(rows.object_ids)] = groups
+            rows.object_ids.append(object_id)
+            rows.family_ids.append(family_id)
+            rows.positions.append(position)
+            rows.locales.append(locale)
+            rows.products.append(products)
+            vectors.write(vector.tobytes())
+    return rows, skipped
+
+
+def _scanned_vectors(path: Path, count: int, dimensions: int) -> np.ndarray:
+    if not count:
+        return np.zeros((0, dimensions), dtype=np.float32)  # An empty file cannot be mapped.
+    return np.memmap(path, dtype=np.float32, mode="r", shape=(count, dimensions))
+
+
+def _parse_row(source, dimensions: int):
+    """One chunk's vector and filter facts, or None when the stored chunk is unusable."""
+    vector = source.get("content_vector")
+    object_id = source.get("object_id")
+    family_id = source.get("family_id")
+    position = source.get("position")
+    locale = source.get("locale")
+    visibility = source.get("visibility")
+    product_ids = source.get("product_ids", [])
+    if (
+        not isinstance(vector, list)
+        or len(vector) != dimensions
+        or not all(is_finite_number(value) for value in vector)
+        or not isinstance(object_id, str)
+        or not object_id.isdecimal()
+        or not isinstance(family_id, str)
+        or not family_id.startswith(f"{CONTENT_TYPE}:")
+        or not family_id.removeprefix(f"{CONTENT_TYPE}:").isdecimal()
+        or not is_nonnegative_int(position)
+        or not isinstance(locale, str)
+        or not _is_path_safe(locale)
+        or not isinstance(product_ids, list)
+        or not all(isinstance(value, str) and value.isdecimal() for value in product_ids)
+    ):
+        return None
+
+    groups = None
+    if visibility == RESTRICTED_VISIBILITY:
+        groups = source.get("access_group_ids")
+        if not isinstance(groups, list) or not groups or not all(map(is_positive_int, groups)):
+            return None
+    elif visibility != PUBLIC_VISIBILITY:
+        return None
+
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array))
+    if not math.isfinite(norm) or norm == 0:
+        return None
+    return (
+        array / norm,
+        int(object_id),
+        int(family_id.removeprefix(f"{CONTENT_TYPE}:")),
+        position,
+        locale,
+        tuple(sorted({int(value) for value in product_ids})),
+        groups,
+    )
+
+
+def _layout(rows: _Rows, vectors: np.ndarray):
+    """Order rows by locale, then IVF list, and train each large locale's lists."""
+    by_locale: defaultdict[str, list[int]] = defaultdict(list)
+    for row, locale in enumerate(rows.locales):
+        by_locale[locale].append(row)
+
+    partitions = {}
+    order_parts: list[np.ndarray] = []
+    centroid_parts: list[np.ndarray] = []
+    offsets = [0]
+    start = list_start = 0
+    for locale in sorted(by_locale):
+        members = np.array(by_locale[locale], dtype=np.int64)
+        lists = math.isqrt(len(members)) if len(members) >= _IVF_MIN_ROWS else 0
+        if lists:
+            centroids = _train_lists(vectors, members, lists)
+            assignment = _assign(vectors, members, centroids)
+            members = members[np.argsort(assignment, kind="stable")]
+            counts = np.bincount(assignment, minlength=lists)
+            offsets.extend((start + np.cumsum(counts)).tolist())
+            centroid_parts.append(centroids)
+        order_parts.append(members)
+        partitions[locale] = [start, start + len(members), list_start, list_start + lists]
+        start += len(members)
+        list_start += lists
+
+    order = np.concatenate(order_parts) if order_parts else np.zeros(0, dtype=np.int64)
+    dimensions = vectors.shape[1]
+    centroids = (
+        np.concatenate(centroid_parts)
+        if centroid_parts
+        else np.zeros((0, dimensions), dtype=np.float32)
+    )
+    return partitions, order, centroids, np.array(offsets, dtype=np.int64)
+
+
+def _train_lists(vectors: np.ndarray, members: np.ndarray, lists: int) -> np.ndarray:
+    """Spherical k-means over a bounded sample; seeded so rebuilds of one corpus agree."""
+    rng = np.random.default_rng(0)
+    size = min(len(members), lists * _KMEANS_SAMPLE_PER_LIST)
+    sample = np.asarray(vectors[np.sort(rng.choice(members, size, replace=False))])
+    centroids = sample[rng.choice(size, lists, replace=False)].copy()
+    for _ in range(_KMEANS_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        empty = np.bincount(assignment, minlength=lists) == 0
+        sums[empty] = sample[rng.choice(size, int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.maximum(norms, np.finfo(np.float32).tiny)
+    return centroids.astype(np.float32)
+
+
+def _assign(vectors: np.ndarray, members: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assignment = np.empty(len(members), dtype=np.int64)
+    for start in range(0, len(members), _ASSIGN_BLOCK_ROWS):
+        block = np.asarray(vectors[members[start : start + _ASSIGN_BLOCK_ROWS]])
+        assignment[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+def _write_arrays(staging, rows, scanned, order, centroids, list_offsets) -> None:
+    vectors = np.lib.format.open_memmap(
+        staging / "vectors.npy", mode="w+", dtype=np.float32, shape=(len(order), scanned.shape[1])
+    )
+    for start in range(0, len(order), _ASSIGN_BLOCK_ROWS):
+        block = order[start : start + _ASSIGN_BLOCK_ROWS]
+        vectors[start : start + len(block)] = scanned[block]
+    vectors.flush()
+    del vectors
+
+    np.save(staging / "object_ids.npy", np.array(rows.object_ids, dtype=np.int64)[order])
+    np.save(staging / "family_ids.npy", np.array(rows.family_ids, dtype=np.int64)[order])
+    np.save(staging / "positions.npy", np.array(rows.positions, dtype=np.int32)[order])
+    np.save(staging / "centroids.npy", centroids)
+    np.save(staging / "list_offsets.npy", list_offsets)
+
+    # Product membership is stored by product so a filter is one contiguous slice.
+    by_product: defaultdict[int, list[int]] = defaultdict(list)
+    for row, original in enumerate(order.tolist()):
+        for product_id in rows.products[original]:
+            by_product[product_id].append(row)
+    keys = sorted(by_product)
+    indptr = np.zeros(len(keys) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(by_product[key]) for key in keys])
+    np.save(staging / "product_keys.npy", np.array(keys, dtype=np.int64))
+    np.save(staging / "product_indptr.npy", indptr)
+    np.save(
+        staging / "product_rows.npy",
+        np.array([row for key in keys for row in by_product[key]], dtype=np.int64),
+    )
+
+
+def _prune(index_directory: Path, *, keep: str) -> None:
+    builds = sorted(
+        (path for path in index_directory.iterdir() if path.is_dir() and _is_path_safe(path.name)),
+        key=lambda path: path.name,
+    )
+    for path in builds[:-_BUILDS_KEPT]:
+        if path.name != keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _is_path_safe(name: str) -> bool:
+    return bool(name) and not name.startswith(".") and "/" not in name and "\\" not in name
@@ -29,6 +29,7 @@ from kitsune.sumo.redis_utils import redis_client
 NAMESPACE = "retrieval:"
 KEY_PREFIX = f"{NAMESPACE}lease"
 _LIFECYCLE_KEY = f"{KEY_PREFIX}:lifecycle"
+_QUERY_VECTOR_KEY_PREFIX = f"{NAMESPACE}query-vector-lease"
 # Redis expiries are milliseconds, so anything shorter truncates to a ttl of zero — and
 # PEXPIRE with zero deletes the key outright.
 _MIN_TTL_SECONDS = 0.001
@@ -38,6 +39,8 @@ def _lock_kind(key: str) -> str:
     """Return bounded context without logging the identity-bearing Redis key."""
     if key == _LIFECYCLE_KEY:
         return "lifecycle"
+    if key.startswith(f"{_QUERY_VECTOR_KEY_PREFIX}:"):
+        return "query_vector"
     if key.startswith(f"{KEY_PREFIX}:"):
         return "document"
     return "other"
@@ -136,11 +139,12 @@ class RedisLease:
 
 
 @contextmanager
-def redis_lease(key: str, *, ttl_seconds=None):
+def redis_lease(key: str, *, ttl_seconds=None, contention_level: int = logging.WARNING):
     """Hold ``key`` for the duration of the block, releasing it on the way out.
 
     Never yields an unheld lease: an unusable key or ttl, contention, and an unreachable
-    backend all raise instead.
+    backend all raise instead. ``contention_level`` lets a caller for whom contention is the
+    normal outcome keep it out of warning-level logs.
     """
     if (
         not isinstance(key, str)
@@ -166,7 +170,7 @@ def redis_lease(key: str, *, ttl_seconds=None):
     if not acquired:
         emit(
             "retrieval.lock.contended",
-            level=logging.WARNING,
+            level=contention_level,
             lock_kind=_lock_kind(key),
         )
         raise DocumentLockUnavailable(f"{key} is held by another worker")
@@ -206,3 +210,16 @@ def lifecycle_lock(*, ttl_seconds=None):
             name="RETRIEVAL_LIFECYCLE_LOCK_TTL_SECONDS",
         )
     return redis_lease(_LIFECYCLE_KEY, ttl_seconds=ttl_seconds)
+
+
+def query_vector_lock(cache_digest: str, *, ttl_seconds):
+    """Elect the one worker that embeds a query-vector cache miss.
+
+    Under a burst of identical queries, contention is the expected outcome rather than a
+    symptom, so it is recorded at debug level.
+    """
+    return redis_lease(
+        f"{_QUERY_VECTOR_KEY_PREFIX}:{cache_digest}",
+        ttl_seconds=ttl_seconds,
+        contention_level=logging.DEBUG,
+    )
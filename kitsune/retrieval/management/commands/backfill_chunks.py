@@ -0,0 +1,127 @@
+"""Fill a retrieval write generation in this process, at a bounded provider rate.
+
+Unlike ``sync_chunks --backfill``, which enqueues batches for the workers, this command does the
+work itself on a pool of threads and knows when it is finished. The eligible corpus is split
+into ordered ranges once; each completed range is checkpointed in Redis, so rerunning the same
+command after a crash or an interrupt continues with the ranges that did not finish. Progress
+lines report documents and estimated embedding tokens per second and the remaining time.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from elasticsearch import NotFoundError
+
+from kitsune.retrieval.backfill import run_backfill
+from kitsune.retrieval.embeddings import InvalidEmbeddingRecipe
+from kitsune.retrieval.fingerprints import InvalidIndexMeta
+from kitsune.retrieval.index import InvalidDocumentState, resolve_write_target
+
+
+def _duration(seconds: float | None) -> str:
+    return "unknown" if seconds is None else str(timedelta(seconds=round(seconds)))
+
+
+class Command(BaseCommand):
+    help = "Sync every eligible document into a retrieval index on a resumable worker pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--index",
+            default=None,
+            metavar="NAME",
+            help="Concrete index to fill. Absent means one snapshot of the write target.",
+        )
+        parser.add_argument(
+            "--locale",
+            action="append",
+            default=None,
+            metavar="LOCALE",
+            help="Restrict to these locales; repeatable. Absent means every locale.",
+        )
+        parser.add_argument("--workers", type=int, default=4, help="Ranges synced at once.")
+        parser.add_argument(
+            "--range-size",
+            type=int,
+            default=1000,
+            help="Documents per checkpointed range. Only used when a new plan is made.",
+        )
+        parser.add_argument(
+            "--tokens-per-second",
+            type=int,
+            default=None,
+            help=(
+                "Ceiling on estimated embedding input tokens per second across all workers; "
+                "0 is unlimited. Absent means RETRIEVAL_BACKFILL_TOKENS_PER_SECOND."
+            ),
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Discard this target's checkpoint and plan the ranges again.",
+        )
+
+    def handle(self, *args, **options):
+        tokens_per_second = (
+            settings.RETRIEVAL_BACKFILL_TOKENS_PER_SECOND
+            if options["tokens_per_second"] is None
+            else options["tokens_per_second"]
+        )
+        if options["workers"] <= 0 or options["range_size"] <= 0:
+            raise CommandError("--workers and --range-size must be positive integers.")
+        if tokens_per_second < 0:
+            raise CommandError("--tokens-per-second must not be negative.")
+        locales = list(dict.fromkeys(options["locale"] or ()))
+        if any(not locale for locale in locales):
+            raise CommandError("--locale must not be empty.")
+
+        target = options["index"] or resolve_write_target()
+        if not target:
+            raise CommandError(
+                "No retrieval write index. Run retrieval_init first, or name one with --index."
+            )
+
+        def progress(update):
+            self.stdout.write(
+                f"range {update.completed_ranges}/{update.total_ranges}: "
+                f"{update.completed_documents:,}/{update.total_documents:,} documents, "
+                f"{update.documents_per_second:,.1f} docs/s, "
+                f"{update.tokens_per_second:,.0f} tokens/s, "
+                f"ETA {_duration(update.eta_seconds)}"
+            )
+
+        try:
+            report = run_backfill(
+                target,
+                locales=locales,
+                workers=options["workers"],
+                range_size=options["range_size"],
+                tokens_per_second=tokens_per_second,
+                restart=options["restart"],
+                progress=progress,
+            )
+        except (
+            InvalidDocumentState,
+            InvalidEmbeddingRecipe,
+            InvalidIndexMeta,
+            NotFoundError,
+        ) as exc:
+            raise CommandError(str(exc)) from exc
+
+        write = self.stdout.write
+        write(f"Target:                  {report.index}")
+        write(f"Ranges:                  {report.ranges:>10,}")
+        if report.resumed_ranges:
+            write(f"Resumed from checkpoint: {report.resumed_ranges:>10,}")
+        write(f"Documents synced:        {report.documents:>10,}")
+        write(f"Estimated tokens:        {report.tokens:>10,}")
+        write(f"Provider requests:       {report.provider_requests:>10,}")
+        write(f"Chunks reused/embedded:  {report.reused_chunks:>,} / {report.embedded_chunks:,}")
+        write(f"Elapsed:                 {_duration(report.seconds)}")
+        if report.failed_ranges:
+            raise CommandError(
+                f"{len(report.failed_ranges):,} ranges failed ({report.failed_ranges[:10]}). "
+                "Rerun the same command to retry them."
+            )
+        write("Run sync_chunks --gate before moving reads to this generation.")
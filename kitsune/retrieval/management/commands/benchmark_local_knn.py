@@ -0,0 +1,89 @@
+"""Compare the local kNN engine, and optionally Elasticsearch kNN, with an exact baseline.
+
+Queries are chunk vectors sampled from the current local snapshot, so this makes no provider
+calls and writes nothing. Recall is the share of an exact scan's top ``k`` that each engine
+returned for the same locale, without access or product filters; latency is per query, wall
+clock, in this process.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from kitsune.retrieval.index import ChunkDocument
+from kitsune.retrieval.local_knn import benchmark_snapshot, load_snapshot
+
+
+class Command(BaseCommand):
+    help = "Measure local kNN recall and latency against an exact scan of the same snapshot."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--index",
+            default=None,
+            metavar="NAME",
+            help="Concrete index whose snapshot to measure. Absent means the read generation.",
+        )
+        parser.add_argument("--queries", type=int, default=200, help="Sampled query vectors.")
+        parser.add_argument(
+            "--k",
+            type=int,
+            default=None,
+            help="Neighbours per query. Absent means RETRIEVAL_SEMANTIC_K.",
+        )
+        parser.add_argument(
+            "--nprobe",
+            type=int,
+            default=None,
+            help="IVF lists probed per locale. Absent means RETRIEVAL_LOCAL_KNN_NPROBE.",
+        )
+        parser.add_argument(
+            "--elasticsearch",
+            action="store_true",
+            help="Also run each query through Elasticsearch kNN with the serving bounds.",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Sampling seed.")
+
+    def handle(self, *args, **options):
+        k = options["k"] or settings.RETRIEVAL_SEMANTIC_K
+        nprobe = (
+            settings.RETRIEVAL_LOCAL_KNN_NPROBE if options["nprobe"] is None else options["nprobe"]
+        )
+        if options["queries"] <= 0 or k <= 0 or nprobe < 0:
+            raise CommandError("--queries and --k must be positive and --nprobe non-negative.")
+
+        index = options["index"] or ChunkDocument.alias_points_at(ChunkDocument.Index.read_alias)
+        if not index:
+            raise CommandError("No retrieval read index. Name one with --index.")
+        snapshot = load_snapshot(index)
+        if snapshot is None:
+            raise CommandError(
+                f"No local kNN snapshot of {index}. Build one with sync_chunks --snapshot."
+            )
+        if not len(snapshot):
+            raise CommandError(f"The local kNN snapshot of {index} is empty.")
+
+        report = benchmark_snapshot(
+            snapshot,
+            queries=options["queries"],
+            k=k,
+            nprobe=nprobe,
+            num_candidates=(
+                settings.RETRIEVAL_KNN_NUM_CANDIDATES if options["elasticsearch"] else None
+            ),
+            seed=options["seed"],
+        )
+
+        write = self.stdout.write
+        write(f"{report.index} (build {snapshot.build}): {len(snapshot):,} chunks.")
+        write(f"{report.queries:,} queries, recall@{report.k} against an exact scan:")
+        engines = [
+            ("exact", report.exact),
+            (f"ivf nprobe={report.nprobe}", report.approximate),
+        ]
+        if report.elasticsearch is not None:
+            engines.append(("elasticsearch", report.elasticsearch))
+        for name, stats in engines:
+            write(
+                f"  {name:<20} recall {stats.recall:>7.1%}   "
+                f"p50 {stats.p50_ms:>8.2f} ms   p95 {stats.p95_ms:>8.2f} ms"
+            )
@@ -1,12 +1,13 @@
-"""Backfill, reconcile, or gate the retrieval chunk index.
+"""Backfill, reconcile, gate, or snapshot the retrieval chunk index.
 
-The three modes are mutually exclusive and one must be named: this command can spend provider
+The modes are mutually exclusive and one must be named: this command can spend provider
 money and can delete indexed content, so it never infers what an operator meant. Reconciliation
 dispatches from the integrity gate's own findings rather than a second opinion about what
 "stale" means — the gate is what guards a read swap, so the two must not be able to disagree.
 
 Work is enqueued, not performed. Like ``es_reindex``, the command does not claim the queue has
-drained; an operator reruns ``--gate`` once the workers are done.
+drained; an operator reruns ``--gate`` once the workers are done. ``--snapshot`` is the
+exception: it scans the index into a local kNN snapshot in this process and makes it current.
 """
 
 from itertools import batched
@@ -23,6 +24,7 @@ from kitsune.retrieval.index import (
     recipe_for_index,
     resolve_write_target,
 )
+from kitsune.retrieval.local_knn import LocalSnapshotUnavailable, build_snapshot
 from kitsune.retrieval.tasks import enqueue_document_batch, enqueue_document_delete
 
 # Reported on its own line, above the ordinary counts: a stale access set is the one finding
@@ -31,7 +33,7 @@ _PROMINENT = GateCategory.ACCESS_DRIFT
 
 
 class Command(BaseCommand):
-    help = "Backfill, reconcile, or gate the retrieval chunk index."
+    help = "Backfill, reconcile, gate, or snapshot the retrieval chunk index."
 
     def add_arguments(self, parser):
         mode = parser.add_mutually_exclusive_group(required=True)
@@ -50,6 +52,11 @@ class Command(BaseCommand):
             action="store_true",
             help="Report integrity only. Writes nothing and enqueues nothing.",
         )
+        mode.add_argument(
+            "--snapshot",
+            action="store_true",
+            help="Build the local kNN snapshot of the index into RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR.",
+        )
         parser.add_argument(
             "--index",
             default=None,
@@ -105,6 +112,8 @@ class Command(BaseCommand):
                 self._backfill(target, locales, page_size, dry_run)
             elif options["reconcile"]:
                 self._reconcile(target, locales, page_size, dry_run)
+            elif options["snapshot"]:
+                self._snapshot(target)
             else:
                 self._gate(target, locales, page_size)
         except InvalidDocumentState as exc:
@@ -155,6 +164,18 @@ class Command(BaseCommand):
         elif dispatched:
             self.stdout.write("Rerun with --gate once the workers have drained.")
 
+    def _snapshot(self, index):
+        try:
+            report = build_snapshot(index)
+        except LocalSnapshotUnavailable as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(
+            f"{index}: snapshot {report.build} holds {report.rows} chunks in {report.locales} "
+            f"locales and {report.lists} IVF lists ({report.seconds:.1f}s)."
+        )
+        if report.skipped:
+            self.stdout.write(f"{index}: skipped {report.skipped} chunks without a usable vector.")
+
     def _gate(self, index, locales, page_size):
         report = gate_index(index, locales=locales, page_size=page_size)
         self._report(report)
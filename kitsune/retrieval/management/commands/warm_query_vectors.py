@@ -0,0 +1,94 @@
+"""Pre-populate the query-vector cache for the active read generation.
+
+This makes paid provider calls outside the HTTP rate limiter, in full provider requests. It
+reads query frequencies from analytics search events unless given a file, and reports how much
+of that search volume the shared cache can answer before and after.
+"""
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kitsune.dashboards import LAST_7_DAYS, LAST_30_DAYS, LAST_90_DAYS
+from kitsune.retrieval.index import RetrievalIndexUnavailable
+from kitsune.retrieval.warmup import (
+    queries_from_analytics,
+    queries_from_json,
+    warm_query_vectors,
+)
+
+_PERIODS = {7: LAST_7_DAYS, 30: LAST_30_DAYS, 90: LAST_90_DAYS}
+
+
+class Command(BaseCommand):
+    help = "Embed and cache the most searched queries for the active retrieval read generation."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=100,
+            help="Queries to warm per locale.",
+        )
+        parser.add_argument(
+            "--file",
+            default=None,
+            metavar="PATH",
+            help=(
+                'JSON list of {"query": ..., "locale": ..., "count": ...} objects. Absent '
+                "means analytics search events."
+            ),
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            choices=sorted(_PERIODS),
+            default=7,
+            help="Analytics period, in days, to rank searches over.",
+        )
+        parser.add_argument(
+            "--max-rows",
+            type=int,
+            default=10_000,
+            help="Most frequent analytics rows to read; the long tail is never fetched.",
+        )
+
+    def handle(self, *args, **options):
+        if options["top"] <= 0:
+            raise CommandError("--top must be a positive integer.")
+        if options["max_rows"] <= 0:
+            raise CommandError("--max-rows must be a positive integer.")
+
+        if options["file"]:
+            path = Path(options["file"])
+            try:
+                counts = queries_from_json(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, UnicodeError, json.JSONDecodeError, ValueError) as exc:
+                raise CommandError(f"Could not read {path}: {exc}") from exc
+        else:
+            counts = queries_from_analytics(_PERIODS[options["days"]], options["max_rows"])
+
+        try:
+            report = warm_query_vectors(counts, top_n=options["top"])
+        except RetrievalIndexUnavailable as exc:
+            raise CommandError(str(exc)) from exc
+
+        write = self.stdout.write
+        write(f"Read generation:         {report.index}")
+        write(f"Queries selected:        {report.selected:>10,}")
+        write(f"Already cached:          {report.already_cached:>10,}")
+        write(f"Embedded and cached:     {report.embedded:>10,}")
+        write(f"Provider requests:       {report.provider_requests:>10,}")
+        if report.oversized:
+            write(f"Over the input limit:    {report.oversized:>10,}")
+        if report.hit_rate_before is not None:
+            write(
+                f"Cache hit rate:          {report.hit_rate_before:>9.1%} -> "
+                f"{report.hit_rate_after:.1%} of {report.searches:,} searches"
+            )
+        if report.failed or report.write_failed:
+            raise CommandError(
+                f"{report.failed:,} queries could not be embedded and {report.write_failed:,} "
+                "could not be cached. Rerun once the provider and cache are available."
+            )
@@ -0,0 +1,90 @@
+"""Authorization over-fetch sized from the rejections recently seen for similar searches.
+
+Retrieval asks Elasticsearch for more KB candidates than a page needs because the primary
+database may reject some of them. How many it rejects depends mostly on who is searching and
+what is searched: anonymous viewers rarely lose a candidate, while a group member's
+restricted hits are rejected far more often. Each process keeps a rolling window of rejection
+rates per viewer class and source mix, and sizes the over-fetch for a request from a high
+percentile of that window, within ``RETRIEVAL_AUTHORIZATION_MAX_OVERFETCH``. Until a window has
+enough samples the configured ``RETRIEVAL_AUTHORIZATION_OVERFETCH`` applies.
+"""
+
+import math
+import threading
+from collections import deque
+from collections.abc import Collection
+from typing import Literal
+
+from django.conf import settings
+
+ViewerClass = Literal["public", "group", "privileged"]
+
+# Fewer samples than this say more about the few searches seen than about the traffic.
+_MIN_SAMPLES = 20
+
+
+class _RejectionRates:
+    """Thread-safe rolling windows of per-request rejection rates."""
+
+    def __init__(self):
+        self._windows: dict[tuple[str, str], deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: tuple[str, str], rate: float) -> None:
+        size = settings.RETRIEVAL_AUTHORIZATION_OVERFETCH_SAMPLES
+        if not size:
+            return
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window.maxlen != size:
+                window = self._windows[key] = deque(window or (), maxlen=size)
+            window.append(rate)
+
+    def percentile(self, key: tuple[str, str], percentile: int) -> float | None:
+        with self._lock:
+            samples = sorted(self._windows.get(key, ()))
+        if len(samples) < _MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, math.ceil(len(samples) * percentile / 100) - 1)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._windows.clear()
+
+
+_rejection_rates = _RejectionRates()
+
+
+def source_mix(sources: Collection[str]) -> str:
+    return "+".join(sorted(set(sources)))
+
+
+def authorization_overfetch(
+    viewer_class: ViewerClass, sources: Collection[str], *, window: int
+) -> int:
+    """Extra candidates to request so ``window`` authorized results usually survive.
+
+    A rejection rate ``r`` leaves ``window`` results from ``window / (1 - r)`` candidates, so
+    the over-fetch is the difference at the configured percentile of recent rates.
+    """
+    if not settings.RETRIEVAL_AUTHORIZATION_OVERFETCH_SAMPLES:
+        return settings.RETRIEVAL_AUTHORIZATION_OVERFETCH
+    maximum = settings.RETRIEVAL_AUTHORIZATION_MAX_OVERFETCH
+    rate = _rejection_rates.percentile(
+        (viewer_class, source_mix(sources)), settings.RETRIEVAL_AUTHORIZATION_OVERFETCH_PERCENTILE
+    )
+    if rate is None:
+        return settings.RETRIEVAL_AUTHORIZATION_OVERFETCH
+    if rate >= 1:
+        return maximum
+    return min(maximum, math.ceil(window * rate / (1 - rate)))
+
+
+def record_authorization(
+    viewer_class: ViewerClass, sources: Collection[str], *, considered: int, rejected: int
+) -> None:
+    """Add one request's share of rejected candidates to its window."""
+    if considered > 0:
+        _rejection_rates.add(
+            (viewer_class, source_mix(sources)), min(1.0, max(0, rejected) / considered)
+        )
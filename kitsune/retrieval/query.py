@@ -1,3 +1,4 @@
+import logging
 from collections.abc import Collection, Mapping, Sequence
 from dataclasses import dataclass
 from datetime import datetime
@@ -9,6 +10,8 @@ from elasticsearch.dsl import Q as DSLQ
 from elasticsearch.dsl.query import Query
 from pyparsing import ParseException
 
+from kitsune.retrieval import local_knn
+from kitsune.retrieval.events import emit
 from kitsune.retrieval.fingerprints import (
     SCOPE_ENVELOPE_VERSION,
     is_valid_similarity_floor,
@@ -47,6 +50,7 @@ Source = Literal["kb", "aaq"]
 DefaultOperator = Literal["AND", "OR"]
 LocaleComposition = Literal["combined", "separate"]
 RetrievalMode = Literal["lexical", "hybrid"]
+SemanticEngine = Literal["elasticsearch", "local"]
 RetrievalProvenance = Literal["lexical", "semantic"]
 _SOURCES = frozenset({KB_SOURCE, AAQ_SOURCE})
 RRF_RANK_CONSTANT = 60
@@ -136,6 +140,8 @@ class RetrievalResult[Candidate]:
     invalid_hit_count: int = 0
     authorization_rejection_count: int = 0
     db_ms: int = 0
+    authorization_cache_miss_count: int = 0
+    semantic_engine: SemanticEngine | None = None
 
 
 def _render(
@@ -361,6 +367,19 @@ def _standard_retriever(query: Query) -> dict:
     }
 
 
+def _ranked_ids(name: str, ids: Sequence[str], within: Query) -> Query:
+    """Match exactly ``ids`` within a filter, scored so their given order is the ranking."""
+    return DSLQ(
+        "bool",
+        _name=name,
+        filter=[within, DSLQ("ids", values=list(ids))],
+        should=[
+            DSLQ("constant_score", filter=DSLQ("ids", values=[id_]), boost=float(len(ids) - rank))
+            for rank, id_ in enumerate(ids)
+        ],
+    )
+
+
 def _exclude_families(query: Query, family_ids: Sequence[str]) -> Query:
     if not family_ids:
         return query
@@ -386,8 +405,13 @@ def _build_retriever(
     minimum_should_match: str | None = None,
     include_lexical: bool = True,
     excluded_family_ids: Collection[str] = (),
+    semantic_chunk_ids: Sequence[str] | None = None,
 ) -> dict:
-    """Build the private native retriever tree used by serving and evaluation."""
+    """Build the private native retriever tree used by serving and evaluation.
+
+    ``semantic_chunk_ids`` is a semantic leg already ranked by the local kNN engine. It
+    replaces the kNN clause but keeps its filter, so the fused tree is otherwise identical.
+    """
     bounds = {
         "semantic_k": semantic_k,
         "num_candidates": num_candidates,
@@ -467,20 +491,20 @@ def _build_retriever(
                 [DSLQ("terms", family_id=list(excluded_family_ids))] if excluded_family_ids else []
             ),
         )
-        retrievers.append(
-            _standard_retriever(
-                DSLQ(
-                    "knn",
-                    _name=f"semantic:{KB_SOURCE}",
-                    field="content_vector",
-                    query_vector=list(query_vector),
-                    k=semantic_k,
-                    num_candidates=num_candidates,
-                    similarity=float(similarity_floor),
-                    filter=semantic_filter,
-                )
+        if semantic_chunk_ids is not None:
+            semantic = _ranked_ids(f"semantic:{KB_SOURCE}", semantic_chunk_ids, semantic_filter)
+        else:
+            semantic = DSLQ(
+                "knn",
+                _name=f"semantic:{KB_SOURCE}",
+                field="content_vector",
+                query_vector=list(query_vector),
+                k=semantic_k,
+                num_candidates=num_candidates,
+                similarity=float(similarity_floor),
+                filter=semantic_filter,
             )
-        )
+        retrievers.append(_standard_retriever(semantic))
 
     if not retrievers:
         raise ValueError("retrieval requires a lexical or semantic child")
@@ -547,26 +571,6 @@ def _retrieve_unvalidated(
     if AAQ_SOURCE in source_set:
         indices.append(QuestionDocument.Index.read_alias)  # type: ignore[attr-defined]
 
-    retriever = _build_retriever(
-        query,
-        kb_index=kb_index,
-        locale=locale,
-        sources=source_set,
-        viewer_group_ids=viewer_group_ids,
-        product_id=product_id,
-        privileged=privileged,
-        query_vector=query_vector,
-        similarity_floor=similarity_floor,
-        semantic_k=semantic_k,
-        num_candidates=num_candidates,
-        rank_window_size=rank_window_size,
-        locale_composition=locale_composition,
-        default_operator=default_operator,
-        minimum_should_match=minimum_should_match,
-        include_lexical=include_lexical,
-        excluded_family_ids=excluded_family_ids,
-    )
-
     highlight_fields = {}
     if KB_SOURCE in source_set:
         kb_locales = [locale] if locale == ENGLISH_LOCALE else [locale, ENGLISH_LOCALE]
@@ -587,56 +591,118 @@ def _retrieve_unvalidated(
             "terms": {"field": "family_id", "size": family_distribution_size}
         }
 
-    response = es_client().search(
-        index=indices,
-        retriever=retriever,
-        from_=offset,
-        size=page_size + 1,
-        collapse={"field": "family_id"},
-        aggregations=aggregations,
-        source_includes=[
-            "kind",
-            "content_type",
-            "object_id",
-            "family_id",
-            "locale",
-            "position",
-            "heading_path",
-            "scope",
-            "content_text",
-            "product_ids",
-            "topic_ids",
-            "category",
-            "question_id",
-            "question_title",
-            "question_content",
-            "answer_content",
-            "question_updated",
-            "question_has_solution",
-            "question_num_votes",
-        ],
-        highlight={
-            "fields": highlight_fields,
-            "pre_tags": [f"<{HIGHLIGHT_TAG}>"],
-            "post_tags": [f"</{HIGHLIGHT_TAG}>"],
-        },
-        allow_partial_search_results=not strict,
-    )
-    raw = getattr(response, "body", response)
-    if not isinstance(raw, Mapping):
-        raise InvalidRetrievalResponse("Elasticsearch returned a non-object response")
-    mode: RetrievalMode = (
-        "hybrid" if query_vector is not None and KB_SOURCE in source_set else "lexical"
-    )
+    def search(semantic_chunk_ids: Sequence[str] | None) -> Mapping:
+        retriever = _build_retriever(
+            query,
+            kb_index=kb_index,
+            locale=locale,
+            sources=source_set,
+            viewer_group_ids=viewer_group_ids,
+            product_id=product_id,
+            privileged=privileged,
+            query_vector=query_vector,
+            similarity_floor=similarity_floor,
+            semantic_k=semantic_k,
+            num_candidates=num_candidates,
+            rank_window_size=rank_window_size,
+            locale_composition=locale_composition,
+            default_operator=default_operator,
+            minimum_should_match=minimum_should_match,
+            include_lexical=include_lexical,
+            excluded_family_ids=excluded_family_ids,
+            semantic_chunk_ids=semantic_chunk_ids,
+        )
+        response = es_client().search(
+            index=indices,
+            retriever=retriever,
+            from_=offset,
+            size=page_size + 1,
+            collapse={"field": "family_id"},
+            aggregations=aggregations,
+            source_includes=[
+                "kind",
+                "content_type",
+                "object_id",
+                "family_id",
+                "locale",
+                "position",
+                "heading_path",
+                "scope",
+                "content_text",
+                "product_ids",
+                "topic_ids",
+                "category",
+                "question_id",
+                "question_title",
+                "question_content",
+                "answer_content",
+                "question_updated",
+                "question_has_solution",
+                "question_num_votes",
+            ],
+            highlight={
+                "fields": highlight_fields,
+                "pre_tags": [f"<{HIGHLIGHT_TAG}>"],
+                "post_tags": [f"</{HIGHLIGHT_TAG}>"],
+            },
+            allow_partial_search_results=not strict,
+        )
+        raw = getattr(response, "body", response)
+        if not isinstance(raw, Mapping):
+            raise InvalidRetrievalResponse("Elasticsearch returned a non-object response")
+        return raw
+
+    def local_ranking() -> tuple[str, ...] | None:
+        if not kb_index or not is_valid_similarity_floor(similarity_floor, SIMILARITY):
+            return None  # Let the retriever builder reject the request as it always has.
+        return local_knn.semantic_chunk_ids(
+            kb_index,
+            query_vector,
+            locales=[locale] if locale == ENGLISH_LOCALE else [locale, ENGLISH_LOCALE],
+            k=semantic_k,
+            product_id=product_id,
+            viewer_group_ids=viewer_group_ids,
+            privileged=privileged,
+            excluded_family_ids=excluded_family_ids,
+            similarity_floor=float(similarity_floor),
+        )
+
+    semantic = query_vector is not None and KB_SOURCE in source_set
+    local_chunk_ids = local_ranking() if semantic and local_knn.serves_semantic_leg() else None
+    raw = search(local_chunk_ids)
+    if (
+        semantic
+        and local_chunk_ids is None
+        and local_knn.mode() == "fallback"
+        and _knn_degraded(raw)
+    ):
+        # Trip the shared breaker so other workers skip the failing kNN path, then answer this
+        # request from the snapshot if there is one.
+        emit("retrieval.query.degraded", level=logging.WARNING, reason="knn_degraded")
+        local_knn.mark_elasticsearch_knn_degraded()
+        local_chunk_ids = local_ranking()
+        if local_chunk_ids is not None:
+            raw = search(local_chunk_ids)
+
     return _decode_response(
         raw,
         page_size=page_size,
         offset=offset,
-        mode=mode,
+        mode="hybrid" if semantic else "lexical",
         include_family_distribution=family_distribution_size is not None,
+        semantic_engine=(
+            None if not semantic else "local" if local_chunk_ids is not None else "elasticsearch"
+        ),
     )
 
 
+def _knn_degraded(response: Mapping) -> bool:
+    """Whether a hybrid response lost shards or timed out, leaving its kNN leg incomplete."""
+    shards = response.get("_shards")
+    failed = shards.get("failed") if isinstance(shards, Mapping) else None
+    return response.get("timed_out") is True or is_positive_int(failed)
+
+
 def _decode_response(
     response: Mapping,
     *,
@@ -644,6 +710,7 @@ def _decode_response(
     offset: int,
     mode: RetrievalMode,
     include_family_distribution: bool = False,
+    semantic_engine: SemanticEngine | None = None,
 ) -> RetrievalResult[UnvalidatedCandidate]:
     shards = response.get("_shards")
     if not isinstance(shards, Mapping):
@@ -721,6 +788,7 @@ def _decode_response(
         took_ms=took,
         family_counts=family_counts,
         invalid_hit_count=rejected,
+        semantic_engine=semantic_engine,
     )
 
 
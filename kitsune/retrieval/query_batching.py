@@ -0,0 +1,119 @@
+"""Coalesce concurrent query-embedding misses into packed provider requests.
+
+Each interactive cache miss would otherwise cost one provider round trip for one input. The
+first miss for a recipe opens a short collection window; misses from other request threads
+that arrive within it join the batch, and the opener makes one ``get_embeddings`` call, which
+packs the inputs with the same bounds as document ingestion. No background thread is involved,
+so the batcher works unchanged under threaded and single-threaded workers.
+
+Every waiter is bounded by the collection window plus the configured query timeout, the same
+deadline a direct call would have had once its request was sent.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+from kitsune.retrieval.embeddings import (
+    EmbeddingRecipe,
+    EmbeddingUnavailable,
+    _configured_timeout_ms,
+    get_embeddings,
+    max_request_inputs,
+)
+
+
+@dataclass(eq=False)
+class _PendingQuery:
+    text: str
+    done: threading.Event = field(default_factory=threading.Event)
+    vector: list[float] | None = None
+    error: Exception | None = None
+
+
+class QueryEmbeddingBatcher:
+    """Collects query texts per recipe and embeds each collection in one call."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._open: dict[EmbeddingRecipe, list[_PendingQuery]] = {}
+
+    def embed(
+        self,
+        text: str,
+        recipe: EmbeddingRecipe,
+        *,
+        window_seconds: float,
+        max_batch_size: int,
+        timeout_seconds: float,
+    ) -> list[float]:
+        request = _PendingQuery(text)
+        with self._condition:
+            batch = self._open.get(recipe)
+            opener = batch is None
+            if opener:
+                batch = self._open[recipe] = []
+            batch.append(request)
+            if len(batch) >= max_batch_size:
+                # Close a full batch now so later arrivals start the next one.
+                del self._open[recipe]
+                self._condition.notify_all()
+
+        if opener:
+            deadline = time.monotonic() + window_seconds
+            with self._condition:
+                while self._open.get(recipe) is batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        del self._open[recipe]
+                        break
+                    self._condition.wait(remaining)
+            _dispatch(batch, recipe)
+        elif not request.done.wait(window_seconds + timeout_seconds):
+            raise EmbeddingUnavailable("batched query embedding did not complete in time")
+
+        if request.error is not None:
+            raise request.error
+        if request.vector is None:
+            raise EmbeddingUnavailable("batched query embedding was interrupted")
+        return request.vector
+
+
+def _dispatch(batch: list[_PendingQuery], recipe: EmbeddingRecipe) -> None:
+    texts = list(dict.fromkeys(request.text for request in batch))
+    try:
+        vectors = get_embeddings(texts, task="query", recipe=recipe)
+    except Exception as exc:
+        for request in batch:
+            request.error = exc
+    else:
+        by_text = dict(zip(texts, vectors, strict=True))
+        for request in batch:
+            request.vector = list(by_text[request.text])
+    finally:
+        for request in batch:
+            request.done.set()
+
+
+_batcher = QueryEmbeddingBatcher()
+
+
+def batch_window_seconds() -> float:
+    return settings.RETRIEVAL_QUERY_EMBEDDING_BATCH_WINDOW_MS / 1000
+
+
+def embed_query(text: str, recipe: EmbeddingRecipe) -> list[float]:
+    """Embed one query, sharing a provider request with concurrent callers when enabled."""
+    window_seconds = batch_window_seconds()
+    if not window_seconds:
+        [vector] = get_embeddings([text], task="query", recipe=recipe)
+        return vector
+    return _batcher.embed(
+        text,
+        recipe,
+        window_seconds=window_seconds,
+        max_batch_size=max_request_inputs(),
+        timeout_seconds=_configured_timeout_ms("query") / 1000,
+    )
@@ -1,6 +1,19 @@
-"""Exact-query vector caching shared by interactive retrieval consumers."""
+"""Normalized query-vector caching shared by interactive retrieval consumers.
+
+Queries that differ only in case, Unicode compatibility form, or whitespace share one key and
+one vector. Lookups consult a bounded per-process LRU before Django's shared cache, and
+concurrent misses for one key are coalesced so the provider sees a single request: threads in a
+process wait on the in-flight embedding, and workers elect one embedder through a short Redis
+lease while the rest wait for its vector to reach the shared cache.
+"""
 
 import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from contextlib import ExitStack
 from typing import Literal
 
 from django.conf import settings
@@ -8,23 +21,207 @@ from django.core.cache import cache
 
 from kitsune.retrieval.embeddings import (
     EmbeddingRecipe,
+    EmbeddingUnavailable,
     InvalidEmbeddingResponse,
-    get_embeddings,
     recipe_to_payload,
     validate_embeddings,
 )
 from kitsune.retrieval.fingerprints import query_embedding_fingerprint
+from kitsune.retrieval.locks import (
+    DocumentLockBackendError,
+    DocumentLockUnavailable,
+    query_vector_lock,
+)
+from kitsune.retrieval.query_batching import batch_window_seconds, embed_query
 
 _CACHE_NAMESPACE = "retrieval:query-vector:v1"
-CacheLookupOutcome = Literal["hit", "miss", "invalid", "read_failed"]
-CacheWriteOutcome = Literal["stored", "write_failed"]
+# The elected worker makes one provider attempt bounded by the query timeout; the lease only
+# needs to outlive that attempt and the cache write that follows it.
+_LEASE_GRACE_SECONDS = 1.0
+_SHARED_POLL_INTERVAL_SECONDS = 0.05
+CacheLookupOutcome = Literal["local_hit", "hit", "coalesced", "miss", "invalid", "read_failed"]
+CacheWriteOutcome = Literal["stored", "coalesced", "write_failed"]
+
+
+def normalize_query(query: str) -> str:
+    """Return the form of a query that is keyed and embedded."""
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+class _LocalVectorCache:
+    """A thread-safe, bounded LRU of validated vectors with the shared cache's lifetime."""
+
+    def __init__(self):
+        self._entries: OrderedDict[str, tuple[float, tuple[float, ...]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> list[float] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, vector = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return list(vector)
+
+    def set(self, key: str, vector: list[float]) -> None:
+        max_size = settings.RETRIEVAL_QUERY_VECTOR_LOCAL_CACHE_SIZE
+        if not max_size:
+            return
+        expires = time.monotonic() + settings.RETRIEVAL_QUERY_VECTOR_CACHE_TTL_SECONDS
+        with self._lock:
+            self._entries[key] = (expires, tuple(vector))
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class _Flight:
+    """One in-process embedding that concurrent callers for the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.vector: tuple[float, ...] | None = None
+
+
+_local_vectors = _LocalVectorCache()
+_flights: dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
 
 
 def get_cached_query_vector(
     query: str, recipe: EmbeddingRecipe
 ) -> tuple[list[float] | None, CacheLookupOutcome]:
-    """Return a validated exact-query cache hit and its bounded lookup outcome."""
+    """Return a validated cache hit for the normalized query and its bounded lookup outcome."""
+    key = _query_vector_cache_key(query, recipe)
+    vector = _local_vectors.get(key)
+    if vector is not None:
+        return vector, "local_hit"
+
+    with _flights_lock:
+        flight = _flights.get(key)
+    if flight is not None and flight.done.wait(_wait_seconds()) and flight.vector is not None:
+        return list(flight.vector), "coalesced"
+
+    vector, outcome = _read_shared(key, query, recipe)
+    if vector is not None:
+        _local_vectors.set(key, vector)
+    return vector, outcome
+
+
+def embed_and_cache_query_vector(
+    query: str, recipe: EmbeddingRecipe
+) -> tuple[list[float], CacheWriteOutcome]:
+    """Embed one authorized cache miss and report whether the cache write succeeded.
+
+    A caller that joins an embedding already in flight, in this process or another worker,
+    receives that vector with a ``coalesced`` outcome. If the joined embedding does not
+    produce a vector within the query timeout, this raises ``EmbeddingUnavailable`` rather
+    than adding another provider call to the burst.
+    """
     key = _query_vector_cache_key(query, recipe)
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        if not flight.done.wait(_wait_seconds()) or flight.vector is None:
+            raise EmbeddingUnavailable("a concurrent query embedding did not complete")
+        return list(flight.vector), "coalesced"
+
+    try:
+        vector, outcome = _embed_across_workers(key, query, recipe)
+        flight.vector = tuple(vector)
+        _local_vectors.set(key, vector)
+        return vector, outcome
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+
+def cached_query_vectors(
+    queries: Iterable[str], recipe: EmbeddingRecipe
+) -> dict[str, list[float]]:
+    """Return valid shared-cache vectors for the given queries, keyed by normalized query."""
+    keys = {_query_vector_cache_key(query, recipe): normalize_query(query) for query in queries}
+    found = cache.get_many(list(keys))
+    vectors = {}
+    for key, vector in found.items():
+        query = keys[key]
+        try:
+            if not isinstance(vector, list):
+                raise InvalidEmbeddingResponse("cached embedding is not a list")
+            validate_embeddings([vector], [query], recipe)
+        except InvalidEmbeddingResponse:
+            continue
+        vectors[query] = [float(value) for value in vector]
+    return vectors
+
+
+def store_query_vectors(
+    vectors: Mapping[str, list[float]], recipe: EmbeddingRecipe
+) -> CacheWriteOutcome:
+    """Write precomputed vectors in one round trip, restarting each entry's lifetime."""
+    try:
+        failed = cache.set_many(
+            {_query_vector_cache_key(query, recipe): vector for query, vector in vectors.items()},
+            timeout=settings.RETRIEVAL_QUERY_VECTOR_CACHE_TTL_SECONDS,
+        )
+    except Exception:
+        return "write_failed"
+    return "write_failed" if failed else "stored"
+
+
+def _embed_across_workers(
+    key: str, query: str, recipe: EmbeddingRecipe
+) -> tuple[list[float], CacheWriteOutcome]:
+    with ExitStack() as stack:
+        try:
+            stack.enter_context(
+                query_vector_lock(
+                    key.removeprefix(f"{_CACHE_NAMESPACE}:"),
+                    ttl_seconds=_wait_seconds() + _LEASE_GRACE_SECONDS,
+                )
+            )
+        except DocumentLockUnavailable:
+            return _await_shared_vector(key, query, recipe), "coalesced"
+        except DocumentLockBackendError:
+            pass  # Coalescing only saves provider calls; embedding without it is still correct.
+
+        vector = embed_query(normalize_query(query), recipe)
+        try:
+            cache.set(key, vector, timeout=settings.RETRIEVAL_QUERY_VECTOR_CACHE_TTL_SECONDS)
+        except Exception:
+            return vector, "write_failed"
+        return vector, "stored"
+
+
+def _await_shared_vector(key: str, query: str, recipe: EmbeddingRecipe) -> list[float]:
+    """Wait for the elected worker's vector, bounded by the interactive query timeout."""
+    deadline = time.monotonic() + _wait_seconds()
+    while True:
+        vector, _ = _read_shared(key, query, recipe)
+        if vector is not None:
+            return vector
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise EmbeddingUnavailable("a concurrent query embedding did not complete")
+        time.sleep(min(_SHARED_POLL_INTERVAL_SECONDS, remaining))
+
+
+def _read_shared(
+    key: str, query: str, recipe: EmbeddingRecipe
+) -> tuple[list[float] | None, CacheLookupOutcome]:
     try:
         vector = cache.get(key)
     except Exception:
@@ -45,24 +242,13 @@ def get_cached_query_vector(
     return [float(value) for value in vector], "hit"
 
 
-def embed_and_cache_query_vector(
-    query: str, recipe: EmbeddingRecipe
-) -> tuple[list[float], CacheWriteOutcome]:
-    """Embed one authorized cache miss and report whether the cache write succeeded."""
-    [vector] = get_embeddings([query], task="query", recipe=recipe)
-    try:
-        cache.set(
-            _query_vector_cache_key(query, recipe),
-            vector,
-            timeout=settings.RETRIEVAL_QUERY_VECTOR_CACHE_TTL_SECONDS,
-        )
-    except Exception:
-        return vector, "write_failed"
-    return vector, "stored"
+def _wait_seconds() -> float:
+    """How long an embedding may take: the provider deadline plus any batching window."""
+    return float(settings.RETRIEVAL_QUERY_EMBEDDING_TIMEOUT_SECONDS) + batch_window_seconds()
 
 
 def _query_vector_cache_key(query: str, recipe: EmbeddingRecipe) -> str:
     recipe_to_payload(recipe)  # Fail closed on invalid recipes, including on cache hits.
     recipe_digest = query_embedding_fingerprint(recipe)[1]
-    query_digest = hashlib.sha256(query.encode("utf-8")).hexdigest()
+    query_digest = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
     return f"{_CACHE_NAMESPACE}:{recipe_digest}:{query_digest}"
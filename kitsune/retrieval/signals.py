@@ -7,16 +7,19 @@ rows disappear — a ``post_clear`` or post-cascade handler cannot recover what
 Access changes are handled here as ordinary freshness transitions rather than by a separate
 security workflow (ADR 0006). Under the public-only policy, restricting a document makes it
 ineligible and the sync core evicts it; widening access makes it eligible and it is indexed.
+The same changes, and group membership changes, also bump the access generation once they
+commit, whether or not live indexing is on, so cached authorization facts are not reused.
 """
 
 from django.conf import settings
-from django.contrib.auth.models import Group
+from django.contrib.auth.models import Group, User
 from django.db import transaction
 from django.db.models import Q
 from django.db.models.signals import m2m_changed, post_save, pre_delete
 from django.dispatch import receiver
 
 from kitsune.products.models import Product, Topic
+from kitsune.retrieval.access import bump_access_generation
 from kitsune.retrieval.index import ChunkIdentity
 from kitsune.retrieval.tasks import enqueue_document_delete, enqueue_document_sync
 from kitsune.wiki.models import Document
@@ -56,6 +59,10 @@ def _refresh_families(document_ids) -> None:
     transaction.on_commit(queue_family)
 
 
+def _invalidate_access() -> None:
+    transaction.on_commit(bump_access_generation)
+
+
 def _affected_documents(instance, action, reverse, pk_set, *, reverse_accessor) -> list[int]:
     if not settings.RETRIEVAL_LIVE_INDEXING:
         return []
@@ -71,6 +78,7 @@ def _affected_documents(instance, action, reverse, pk_set, *, reverse_accessor)
 
 @receiver(post_save, sender=Document, dispatch_uid="retrieval.document_saved")
 def document_saved(sender, instance, **kwargs):
+    _invalidate_access()
     _refresh_families([instance.pk])
 
 
@@ -83,6 +91,8 @@ def document_saved(sender, instance, **kwargs):
     m2m_changed, sender=Document.topics.through, dispatch_uid="retrieval.document_topics_changed"
 )
 def taxonomy_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action.startswith("post_"):
+        _invalidate_access()
     _refresh_families(
         _affected_documents(instance, action, reverse, pk_set, reverse_accessor="document_set")
     )
@@ -91,6 +101,7 @@ def taxonomy_changed(sender, instance, action, reverse, pk_set, **kwargs):
 @receiver(pre_delete, sender=Product, dispatch_uid="retrieval.product_deleted")
 @receiver(pre_delete, sender=Topic, dispatch_uid="retrieval.topic_deleted")
 def taxonomy_deleted(sender, instance, **kwargs):
+    _invalidate_access()
     # Capture before the cascade removes the join rows.
     _refresh_families(instance.document_set.values_list("id", flat=True))
 
@@ -101,6 +112,8 @@ def taxonomy_deleted(sender, instance, **kwargs):
     dispatch_uid="retrieval.document_restrictions_changed",
 )
 def restrictions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action.startswith("post_"):
+        _invalidate_access()
     _refresh_families(
         _affected_documents(
             instance, action, reverse, pk_set, reverse_accessor="restricted_documents"
@@ -110,9 +123,22 @@ def restrictions_changed(sender, instance, action, reverse, pk_set, **kwargs):
 
 @receiver(pre_delete, sender=Group, dispatch_uid="retrieval.group_deleted")
 def group_deleted(sender, instance, **kwargs):
+    _invalidate_access()
     _refresh_families(instance.restricted_documents.values_list("id", flat=True))
 
 
+@receiver(post_save, sender=Group, dispatch_uid="retrieval.group_saved")
+def group_saved(sender, instance, **kwargs):
+    """A renamed group can become, or stop being, the staff group."""
+    _invalidate_access()
+
+
+@receiver(m2m_changed, sender=User.groups.through, dispatch_uid="retrieval.memberships_changed")
+def memberships_changed(sender, instance, action, **kwargs):
+    if action.startswith("post_"):
+        _invalidate_access()
+
+
 @receiver(pre_delete, sender=Document, dispatch_uid="retrieval.document_deleted")
 def document_deleted(sender, instance, **kwargs):
     """Evict a deleted document, capturing its identity while the row still exists.
@@ -120,6 +146,7 @@ def document_deleted(sender, instance, **kwargs):
     A deleted row cannot report its locale, and the identity is what scopes the eviction, so
     it has to be read here rather than after the delete.
     """
+    _invalidate_access()
     identity = ChunkIdentity(
         content_type=CONTENT_TYPE, object_id=str(instance.pk), locale=instance.locale
     )
@@ -11,10 +11,12 @@ from collections.abc import Iterable
 from dataclasses import dataclass, field
 from datetime import UTC, datetime
 from enum import StrEnum
+from itertools import chain
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 
+from kitsune.retrieval.chunk_vectors import cached_chunk_vectors, store_chunk_vectors
 from kitsune.retrieval.chunking import CHUNKING_GENERATION, Chunk, chunk
 from kitsune.retrieval.eligibility import (
     access_group_ids_for,
@@ -117,6 +119,10 @@ class SyncReport:
     # Embedding-adapter calls attributable to this document. A batch's shared call belongs to
     # the batch report; a document-specific fallback remains attributable here.
     embedding_calls: int = 0
+    # Of the chunks a replacement wrote, how many took a stored vector for their unchanged text
+    # and how many were sent to the provider.
+    reused_chunks: int = 0
+    embedded_chunks: int = 0
 
 
 @dataclass(frozen=True)
@@ -127,6 +133,8 @@ class BatchSyncReport:
     index: str | None = None
     redispatch: tuple[int, ...] = ()
     embedding_calls: int = 0
+    reused_chunks: int = 0
+    embedded_chunks: int = 0
 
 
 def _report(
@@ -137,6 +145,8 @@ def _report(
     *,
     object_id: str | None = None,
     approved_at: datetime | None = None,
+    reused_chunks: int = 0,
+    embedded_chunks: int = 0,
 ) -> SyncReport:
     """Emit and return one consistent result for every terminal sync path."""
     approval_latency_ms = (
@@ -152,11 +162,13 @@ def _report(
         index=index,
         outcome=outcome.value,
         embedding_calls=embedding_calls,
+        reused_chunks=reused_chunks,
+        embedded_chunks=embedded_chunks,
         # Approval to searchable: null on paths with no approved revision, never a false zero.
         # Negative values deliberately expose clock skew or a future-dated review.
         approval_latency_ms=approval_latency_ms,
     )
-    return SyncReport(identity, index, outcome, embedding_calls)
+    return SyncReport(identity, index, outcome, embedding_calls, reused_chunks, embedded_chunks)
 
 
 def build_source(document) -> ChunkSource:
@@ -266,21 +278,63 @@ class _DocumentWork:
     approved_at: datetime | None = None
 
 
+@dataclass(frozen=True)
+class _ChunkEmbedding:
+    """One document's replacement vectors and how they were obtained."""
+
+    vectors: list[list[float]] = field(default_factory=list)
+    reused_chunks: int = 0
+    # Provider calls made for this document alone; a shared call is counted by its caller.
+    calls: int = 0
+
+    @property
+    def embedded_chunks(self) -> int:
+        return len(self.vectors) - self.reused_chunks
+
+
+def _vectors_for(
+    texts: Iterable[str], recipe: EmbeddingRecipe
+) -> tuple[dict[str, list[float]], frozenset[str], int]:
+    """Vectors for chunk texts, sending only texts the chunk-vector store lacks to the provider.
+
+    Returns the vectors by text, the texts that reused a stored vector, and the provider calls.
+    """
+    texts = list(texts)
+    vectors = cached_chunk_vectors(texts, recipe)
+    reused = frozenset(vectors)
+    missing = list(dict.fromkeys(text for text in texts if text not in reused))
+    if not missing:
+        return vectors, reused, 0
+    fresh = dict(
+        zip(missing, get_embeddings(missing, task="document", recipe=recipe), strict=True)
+    )
+    # Stored before anything is written: a vector stays valid for its text even if this
+    # attempt is later abandoned as stale.
+    store_chunk_vectors(fresh, recipe)
+    return vectors | fresh, reused, 1
+
+
 def _embed_for_works(
     works: dict[int, _DocumentWork], recipe: EmbeddingRecipe
-) -> tuple[dict[int, list[list[float]]], int]:
-    """Embed all documents needing replacement in one flattened provider call."""
-    inputs: list[str] = []
-    spans: dict[int, tuple[int, int]] = {}
-    for document_id, work in works.items():
-        if work.outcome is SyncOutcome.EMBED_REPLACE:
-            spans[document_id] = (len(inputs), len(inputs) + len(work.chunks))
-            inputs.extend(chunk.text for chunk in work.chunks)
+) -> tuple[dict[int, _ChunkEmbedding], int]:
+    """Embed all documents needing replacement in one flattened provider call.
 
-    if not inputs:
-        return {}, 0
-    combined = get_embeddings(inputs, task="document", recipe=recipe)
-    return {document_id: combined[start:stop] for document_id, (start, stop) in spans.items()}, 1
+    Unchanged chunk texts reuse their stored vectors, so a small edit to a long article pays
+    only for the chunks it changed.
+    """
+    inputs = {
+        document_id: [chunk.text for chunk in work.chunks]
+        for document_id, work in works.items()
+        if work.outcome is SyncOutcome.EMBED_REPLACE
+    }
+    vectors, reused, calls = _vectors_for(chain.from_iterable(inputs.values()), recipe)
+    return {
+        document_id: _ChunkEmbedding(
+            vectors=[vectors[text] for text in texts],
+            reused_chunks=sum(text in reused for text in texts),
+        )
+        for document_id, texts in inputs.items()
+    }, calls
 
 
 def _plan_document(document, index) -> _DocumentWork | SyncReport:
@@ -356,13 +410,15 @@ def _apply_plan(
     index: str,
     recipe: EmbeddingRecipe,
     lease,
-    vectors=(),
-) -> tuple[SyncReport | None, SyncOutcome, int]:
+    embedding: _ChunkEmbedding | None = None,
+) -> tuple[SyncReport | None, SyncOutcome, _ChunkEmbedding]:
     """Apply an outcome, replacing once if metadata finds an incomplete layout.
 
     The replacement fallback embeds and then revalidates just like the main embedding path;
-    the returned call count lets single and batch reports account for that extra work.
+    the returned embedding is what was written, and its calls let single and batch reports
+    account for the fallback's extra work.
     """
+    embedding = embedding if embedding is not None else _ChunkEmbedding()
     # A plan may need several ES calls. Renew immediately before starting it; the task-level
     # deadline keeps the complete mutation shorter than the lease.
     lease.renew()
@@ -370,11 +426,11 @@ def _apply_plan(
         replace_chunks(
             index=index,
             chunks=work.chunks,
-            vectors=vectors,
+            vectors=embedding.vectors,
             source=work.source,
             expected_state=work.expected,
         )
-        return None, work.outcome, 0
+        return None, work.outcome, embedding
     elif work.outcome is SyncOutcome.METADATA_ONLY:
         try:
             update_chunks_metadata_for(
@@ -383,29 +439,33 @@ def _apply_plan(
                 source=work.source,
                 expected_state=work.expected,
             )
-            return None, work.outcome, 0
+            return None, work.outcome, _ChunkEmbedding()
         except IncompleteDocumentState:
-            fallback_vectors = get_embeddings(
-                [chunk.text for chunk in work.chunks], task="document", recipe=recipe
+            texts = [chunk.text for chunk in work.chunks]
+            vectors, reused, calls = _vectors_for(texts, recipe)
+            fallback = _ChunkEmbedding(
+                vectors=[vectors[text] for text in texts],
+                reused_chunks=sum(text in reused for text in texts),
+                calls=calls,
             )
             terminal = _revalidate(
                 work,
                 _load(work.document_id),
                 index,
                 lease,
-                1,
+                calls,
             )
             if terminal is not None:
-                return terminal, work.outcome, 1
+                return terminal, work.outcome, fallback
             lease.renew()
             replace_chunks(
                 index=index,
                 chunks=work.chunks,
-                vectors=fallback_vectors,
+                vectors=fallback.vectors,
                 source=work.source,
                 expected_state=work.expected,
             )
-            return None, SyncOutcome.EMBED_REPLACE, 1
+            return None, SyncOutcome.EMBED_REPLACE, fallback
     raise AssertionError(f"{work.outcome} is not a writable plan")
 
 
@@ -445,22 +505,30 @@ def sync_document_chunks(document_id: int, *, target_index: str | None = None) -
         if isinstance(work, SyncReport):
             return work
 
-        vectors, calls = _embed_for_works({document_id: work}, recipe)
+        embeddings, calls = _embed_for_works({document_id: work}, recipe)
         terminal = _revalidate(work, _load(document_id), index, lease, calls)
         if terminal is not None:
             return terminal
-        terminal, outcome, fallback_calls = _apply_plan(
+        terminal, outcome, written = _apply_plan(
             work,
             index,
             recipe,
             lease,
-            vectors.get(document_id, ()),
+            embeddings.get(document_id),
         )
-        calls += fallback_calls
+        calls += written.calls
         if terminal is not None:
             return terminal
 
-    return _report(identity, index, outcome, calls, approved_at=work.approved_at)
+    return _report(
+        identity,
+        index,
+        outcome,
+        calls,
+        approved_at=work.approved_at,
+        reused_chunks=written.reused_chunks,
+        embedded_chunks=written.embedded_chunks,
+    )
 
 
 def ordered_document_ids(document_ids) -> tuple[int, ...]:
@@ -571,7 +639,7 @@ def sync_document_batch(document_ids, *, target_index: str | None = None) -> Bat
             works[document_id] = work
             used_inputs += needed
 
-        vectors, calls = _embed_for_works(works, recipe)
+        embeddings, calls = _embed_for_works(works, recipe)
         for document_id, work in works.items():
             try:
                 with document_lock(work.identity) as lease:
@@ -582,10 +650,10 @@ def sync_document_batch(document_ids, *, target_index: str | None = None) -> Bat
                         else:
                             reports[document_id] = terminal
                         continue
-                    terminal, written_outcome, fallback_calls = _apply_plan(
-                        work, index, recipe, lease, vectors.get(document_id, ())
+                    terminal, written_outcome, written = _apply_plan(
+                        work, index, recipe, lease, embeddings.get(document_id)
                     )
-                    calls += fallback_calls
+                    calls += written.calls
                     if terminal is not None:
                         if terminal.outcome is SyncOutcome.ABORTED_STALE:
                             redispatch.append(document_id)
@@ -596,13 +664,17 @@ def sync_document_batch(document_ids, *, target_index: str | None = None) -> Bat
                         work.identity,
                         index,
                         written_outcome,
-                        fallback_calls,
+                        written.calls,
                         approved_at=work.approved_at,
+                        reused_chunks=written.reused_chunks,
+                        embedded_chunks=written.embedded_chunks,
                     )
             except DocumentLockUnavailable:
                 redispatch.append(document_id)
 
     redispatch = sorted(set(redispatch))
+    reused_chunks = sum(report.reused_chunks for report in reports.values())
+    embedded_chunks = sum(report.embedded_chunks for report in reports.values())
     emit(
         "retrieval.batch.completed",
         content_type=CONTENT_TYPE,
@@ -610,6 +682,8 @@ def sync_document_batch(document_ids, *, target_index: str | None = None) -> Bat
         processed_count=len(reports),
         redispatched_count=len(redispatch),
         embedding_calls=calls,
+        reused_chunks=reused_chunks,
+        embedded_chunks=embedded_chunks,
         outcomes=dict(
             Counter(
                 report_outcome.value
@@ -623,6 +697,8 @@ def sync_document_batch(document_ids, *, target_index: str | None = None) -> Bat
         index=index,
         redispatch=tuple(redispatch),
         embedding_calls=calls,
+        reused_chunks=reused_chunks,
+        embedded_chunks=embedded_chunks,
     )
 
 
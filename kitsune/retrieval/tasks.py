@@ -20,6 +20,7 @@ from kitsune.retrieval.index import (
     IndexWriteError,
     resolve_write_target,
 )
+from kitsune.retrieval.local_knn import build_snapshot
 from kitsune.retrieval.locks import DocumentLockBackendError, DocumentLockUnavailable
 from kitsune.retrieval.sync import (
     delete_document_chunks,
@@ -28,6 +29,7 @@ from kitsune.retrieval.sync import (
     sync_document_batch,
     sync_document_chunks,
 )
+from kitsune.retrieval.warmup import queries_from_analytics, warm_query_vectors
 from kitsune.sumo.decorators import skip_if_read_only_mode
 
 # The embedding adapter owns provider retries so a Celery retry cannot multiply paid calls.
@@ -154,3 +156,39 @@ def reconcile_write_index():
         enqueue_document_batch(report.stale_document_ids)
     for identity in report.unexpected_identities:
         enqueue_document_delete(identity)
+
+
+@shared_task(**_RECONCILE_LIMITS)
+@skip_if_read_only_mode
+def build_local_knn_snapshot():
+    """Refresh the local kNN snapshot of the read generation while the engine is enabled.
+
+    Chunks indexed since the last build are missing from the local semantic leg until the next
+    one; chunks removed since are filtered out by Elasticsearch when the leg is fused.
+    """
+    if settings.RETRIEVAL_LOCAL_KNN_MODE == "off" or not settings.RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR:
+        return
+    index = ChunkDocument.alias_points_at(ChunkDocument.Index.read_alias)
+    if index:
+        build_snapshot(index)
+
+
+_WARMUP_LIMITS = {
+    "soft_time_limit": 540,
+    "time_limit": 600,
+    "ignore_result": True,
+}
+
+
+@shared_task(**_WARMUP_LIMITS)
+@skip_if_read_only_mode
+def warm_query_vector_cache():
+    """Keep the most searched queries' vectors cached for the active read generation.
+
+    Runs only when a warmup size is configured and query embeddings are enabled at all: a
+    zero embedding rate is the switch that keeps provider calls off the serving path.
+    """
+    top_n = settings.RETRIEVAL_QUERY_VECTOR_WARMUP_TOP_N
+    if not top_n or settings.RETRIEVAL_QUERY_EMBEDDING_RATE.startswith("0/"):
+        return
+    warm_query_vectors(queries_from_analytics(), top_n=top_n)
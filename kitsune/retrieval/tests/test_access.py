@@ -4,11 +4,13 @@ from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.test import override_settings
 
 from kitsune.products.tests import ProductFactory
 from kitsune.retrieval.access import (
     AuthorizedPassage,
     ViewerAccess,
+    bump_access_generation,
     retrieve,
     viewer_access_for,
 )
@@ -140,6 +142,23 @@ class ViewerAccessTests(TestCase):
         with self.assertNumQueries(1):
             self.assertEqual(viewer_access_for(staff), ViewerAccess(privileged=True))
 
+    def test_memberships_are_cached_until_they_change(self):
+        group = GroupFactory()
+        user = UserFactory()
+        viewer_access_for(user)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(viewer_access_for(user), ViewerAccess())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.groups.add(group)
+        self.assertEqual(viewer_access_for(user), ViewerAccess((group.id,)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            group.name = settings.STAFF_GROUP
+            group.save()
+        self.assertEqual(viewer_access_for(user), ViewerAccess(privileged=True))
+
 
 class CandidateAuthorizationTests(TestCase):
     def test_one_query_authorizes_sources_and_prefers_requested_display_locale(self):
@@ -262,3 +281,72 @@ class CandidateAuthorizationTests(TestCase):
         self.assertIsInstance(result.candidates[0].evidence, LegacyQuestion)
         self.assertEqual(search.call_args.kwargs["viewer_group_ids"], (7,))
         self.assertEqual(search.call_args.kwargs["page_size"], 10)
+
+
+class AuthorizationCacheTests(TestCase):
+    def test_a_repeated_search_is_authorized_without_the_database(self):
+        first = _approved(locale="en-US")
+        second = _approved(locale="en-US")
+        missing = _approved(locale="en-US")
+        indexed = _result(_passage(first), _passage(second), _passage(missing))
+        Document.objects.filter(pk=missing.pk).update(is_archived=True)
+
+        cold, _ = _retrieve(indexed)
+        with self.assertNumQueries(0):
+            warm, _ = _retrieve(indexed)
+
+        self.assertEqual(warm.candidates, cold.candidates)
+        self.assertEqual(len(warm.candidates), 2)
+        self.assertEqual(warm.authorization_rejection_count, 1)
+        self.assertEqual(
+            (cold.authorization_cache_miss_count, warm.authorization_cache_miss_count), (3, 0)
+        )
+
+        # Each requested locale has its own records; other families still come from the cache.
+        with self.assertNumQueries(1):
+            _retrieve(indexed, locale="de")
+        third = _approved(locale="en-US")
+        with self.assertNumQueries(1):
+            _retrieve(_result(_passage(first), _passage(third)))
+
+    def test_committed_access_changes_are_never_served_from_the_cache(self):
+        group = GroupFactory()
+        product = ProductFactory()
+        document = _approved(locale="en-US", products=[product])
+        indexed = _result(_passage(document))
+        self.assertEqual(len(_retrieve(indexed, product_id=product.id)[0].candidates), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            document.restrict_to_groups.add(group)
+        self.assertEqual(_retrieve(indexed)[0].candidates, ())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            document.restrict_to_groups.clear()
+            document.products.clear()
+        self.assertEqual(_retrieve(indexed, product_id=product.id)[0].candidates, ())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            document.title = "Renamed"
+            document.save()
+        [candidate] = _retrieve(indexed)[0].candidates
+        self.assertEqual(candidate.evidence.display.title, "Renamed")
+
+    def test_a_bumped_generation_rereads_every_family(self):
+        indexed = _result(_passage(_approved(locale="en-US")))
+        _retrieve(indexed)
+
+        bump_access_generation()
+        with self.assertNumQueries(1):
+            result, _ = _retrieve(indexed)
+        self.assertEqual(result.authorization_cache_miss_count, 1)
+
+    @override_settings(RETRIEVAL_AUTHORIZATION_CACHE_TTL_SECONDS=0)
+    def test_a_zero_lifetime_always_reads_the_primary_database(self):
+        indexed = _result(_passage(_approved(locale="en-US")))
+        user = UserFactory(groups=[GroupFactory()])
+        _retrieve(indexed)
+        viewer_access_for(user)
+
+        with self.assertNumQueries(2):
+            _retrieve(indexed)
+            viewer_access_for(user)
@@ -0,0 +1,189 @@
+from dataclasses import replace
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from kitsune.retrieval import backfill
+from kitsune.retrieval.backfill import (
+    BackfillCheckpoint,
+    BackfillProgress,
+    TokenBucket,
+    _charge,
+    plan_ranges,
+    run_backfill,
+)
+from kitsune.retrieval.chunking import chunk, count_tokens
+from kitsune.retrieval.embeddings import configured_embedding_recipe
+from kitsune.retrieval.index import ChunkDocument, ChunkIdentity
+from kitsune.retrieval.sync import SyncOutcome, sync_document_chunks
+from kitsune.retrieval.tests import ChunkIndexTestCase, read_indexed_document
+from kitsune.wiki.tests import ApprovedRevisionFactory, DocumentFactory
+
+
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.slept = []
+
+    def bucket(self, rate, **kwargs):
+        return TokenBucket(rate, clock=lambda: self.now, sleep=self.slept.append, **kwargs)
+
+    def test_a_full_bucket_admits_a_burst_then_paces_to_the_rate(self):
+        bucket = self.bucket(100)
+
+        self.assertEqual(bucket.acquire(100), 0.0)
+        self.assertEqual(bucket.acquire(50), 0.5)
+        self.now = 1.5
+        self.assertEqual(bucket.acquire(100), 0.0)
+        self.assertEqual(self.slept, [0.5])
+
+    def test_a_request_larger_than_the_bucket_is_admitted_and_repaid(self):
+        bucket = self.bucket(10, capacity=10)
+
+        self.assertEqual(bucket.acquire(40), 3.0)
+        self.assertEqual(bucket.acquire(10), 4.0)
+
+    def test_a_zero_rate_never_waits(self):
+        bucket = self.bucket(0)
+
+        self.assertEqual(bucket.acquire(10**9), 0.0)
+        self.assertEqual(self.slept, [])
+
+
+class ProgressTests(SimpleTestCase):
+    def test_rates_and_eta_come_from_this_runs_throughput(self):
+        progress = BackfillProgress(
+            completed_ranges=3,
+            total_ranges=5,
+            completed_documents=300,
+            total_documents=500,
+            documents=100,
+            tokens=4000,
+            elapsed=10.0,
+        )
+
+        self.assertEqual((progress.documents_per_second, progress.tokens_per_second), (10, 400))
+        self.assertEqual(progress.eta_seconds, 20.0)
+        self.assertIsNone(replace(progress, elapsed=0).eta_seconds)
+        self.assertEqual(replace(progress, completed_documents=500).eta_seconds, 0.0)
+
+
+class BackfillTestCase(ChunkIndexTestCase):
+    def setUp(self):
+        super().setUp()
+        self.index = ChunkDocument.alias_points_at(ChunkDocument.Index.write_alias)
+        self.documents = []
+        for title in ("Install Firefox", "Sync bookmarks", "Clear cookies"):
+            document = DocumentFactory(title=title)
+            ApprovedRevisionFactory(document=document, content=f"How to {title.lower()}.")
+            document.refresh_from_db()
+            self.documents.append(document)
+        self.addCleanup(BackfillCheckpoint(self.index).clear)
+
+    def _indexed(self, document):
+        identity = ChunkIdentity("kb", str(document.id), document.locale)
+        return read_indexed_document(index=self.index, identity=identity).manifest is not None
+
+
+class BackfillTests(BackfillTestCase):
+    def test_ranges_are_ordered_and_the_last_is_open_ended(self):
+        ids = sorted(document.id for document in self.documents)
+
+        ranges = plan_ranges((), 2)
+
+        self.assertEqual(
+            [(item.first_id, item.last_id, item.documents) for item in ranges],
+            [(ids[0], ids[1], 2), (ids[2], None, 1)],
+        )
+
+    def test_every_eligible_document_is_synced_and_progress_is_reported(self):
+        updates = []
+
+        report = run_backfill(self.index, range_size=2, progress=updates.append)
+
+        self.assertEqual((report.ranges, report.documents, report.failed_ranges), (2, 3, []))
+        self.assertTrue(all(self._indexed(document) for document in self.documents))
+        self.assertGreater(report.tokens, 0)
+        self.assertEqual(report.reused_chunks, 0)
+        self.assertGreater(report.embedded_chunks, 0)
+        self.assertEqual(
+            [(update.completed_ranges, update.completed_documents) for update in updates],
+            [(1, 2), (2, 3)],
+        )
+
+    def test_a_rerun_resumes_after_the_completed_ranges(self):
+        real_sync_range = backfill._sync_range
+
+        def fail_the_second_range(backfill_range, *args):
+            if backfill_range.number == 1:
+                raise ConnectionError("provider down")
+            return real_sync_range(backfill_range, *args)
+
+        with (
+            mock.patch("kitsune.retrieval.backfill._sync_range", fail_the_second_range),
+            self.assertLogs("k.retrieval", level="ERROR") as logs,
+        ):
+            first = run_backfill(self.index, range_size=2)
+
+        self.assertEqual((first.documents, first.failed_ranges), (2, [1]))
+        [record] = [r for r in logs.records if r.getMessage() == "retrieval.backfill.range_failed"]
+        self.assertEqual((record.range_number, record.error_type), (1, "ConnectionError"))
+        self.assertFalse(self._indexed(max(self.documents, key=lambda document: document.id)))
+
+        # The plan is reused, so a different range size cannot shift the boundaries.
+        second = run_backfill(self.index, range_size=10)
+
+        self.assertEqual((second.ranges, second.resumed_ranges), (2, 1))
+        self.assertEqual((second.documents, second.failed_ranges), (1, []))
+        self.assertTrue(all(self._indexed(document) for document in self.documents))
+
+    def test_restart_plans_again_and_resyncs_every_range(self):
+        run_backfill(self.index, range_size=2)
+
+        report = run_backfill(self.index, range_size=10, restart=True)
+
+        self.assertEqual((report.ranges, report.resumed_ranges, report.documents), (1, 0, 3))
+
+    def test_only_chunk_texts_without_a_stored_vector_are_charged(self):
+        recipe = configured_embedding_recipe()
+        document = self.documents[0]
+        texts = [item.text for item in chunk("kb", document.html, title=document.title)]
+        bucket = mock.Mock(spec=TokenBucket)
+
+        tokens, requests = _charge([document.id], recipe, bucket)
+
+        self.assertEqual((tokens, requests), (sum(count_tokens(text) for text in texts), 1))
+        bucket.acquire.assert_called_once_with(tokens)
+
+        self.assertEqual(sync_document_chunks(document.id).outcome, SyncOutcome.EMBED_REPLACE)
+        bucket.reset_mock()
+        self.assertEqual(_charge([document.id], recipe, bucket), (0, 0))
+        bucket.acquire.assert_not_called()
+
+
+class BackfillCommandTests(BackfillTestCase):
+    def test_the_command_reports_throughput_and_the_totals(self):
+        stdout = StringIO()
+
+        call_command("backfill_chunks", "--range-size", "2", "--workers", "1", stdout=stdout)
+
+        output = stdout.getvalue()
+        self.assertIn("range 2/2: 3/3 documents", output)
+        self.assertIn("docs/s", output)
+        self.assertIn("tokens/s", output)
+        self.assertRegex(output, r"Documents synced: +3\n")
+
+    def test_the_command_fails_until_every_range_has_completed(self):
+        with (
+            mock.patch("kitsune.retrieval.backfill._sync_range", side_effect=ConnectionError),
+            self.assertRaisesRegex(CommandError, "Rerun the same command"),
+        ):
+            call_command("backfill_chunks", "--workers", "1", stdout=StringIO())
+
+    def test_invalid_bounds_are_refused(self):
+        for option in ("--workers", "--range-size"):
+            with self.subTest(option=option), self.assertRaises(CommandError):
+                call_command("backfill_chunks", option, "0", stdout=StringIO())
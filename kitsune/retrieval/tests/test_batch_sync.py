@@ -192,6 +192,30 @@ class BatchExecutorTests(BatchTestCase):
         self.assertEqual(report.embedding_calls, 1)
         self.assertEqual(report.reports[self.ids[1]].outcome, SyncOutcome.EMBED_REPLACE)
 
+    def test_the_shared_call_sends_only_chunk_texts_without_a_stored_vector(self):
+        sync_document_chunks(self.ids[0])
+        # Same title and body as the first document, so every chunk text is already stored.
+        copy = self._document(
+            "Install Firefox", "install-firefox-copy", "How to install the browser."
+        )
+
+        with mock.patch(
+            "kitsune.retrieval.sync.get_embeddings", side_effect=get_embeddings
+        ) as embed:
+            report = sync_document_batch([copy.id, self.ids[1]])
+
+        self.assertEqual(embed.call_args.args[0], self._texts(self.documents[1]))
+        copied = report.reports[copy.id]
+        self.assertEqual(copied.outcome, SyncOutcome.EMBED_REPLACE)
+        self.assertEqual(
+            (copied.reused_chunks, copied.embedded_chunks), (len(self._texts(copy)), 0)
+        )
+        self.assertEqual(
+            (report.reused_chunks, report.embedded_chunks),
+            (len(self._texts(copy)), len(self._texts(self.documents[1]))),
+        )
+        self._assert_embeds(copy, configured_embedding_recipe())
+
     def test_a_metadata_change_alone_pays_the_provider_nothing(self):
         sync_document_batch(self.ids)
         self.documents[0].products.add(ProductFactory())
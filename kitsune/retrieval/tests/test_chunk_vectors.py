@@ -0,0 +1,72 @@
+from dataclasses import replace
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from kitsune.retrieval.chunk_vectors import (
+    _chunk_vector_cache_key,
+    cached_chunk_vectors,
+    store_chunk_vectors,
+)
+from kitsune.retrieval.embeddings import FAKE_BACKEND, EmbeddingRecipe, get_embeddings
+
+RECIPE = EmbeddingRecipe(
+    provider=FAKE_BACKEND,
+    model="fake-1",
+    dimensions=8,
+    document_task="RETRIEVAL_DOCUMENT",
+    query_task="RETRIEVAL_QUERY",
+    normalization="none",
+)
+
+
+@override_settings(RETRIEVAL_CHUNK_VECTOR_CACHE_TTL_SECONDS=3600)
+class ChunkVectorStoreTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.texts = ["Install > Download the installer.", "Update > Open the menu."]
+        self.vectors = dict(
+            zip(
+                self.texts,
+                get_embeddings(self.texts, task="document", recipe=RECIPE),
+                strict=True,
+            )
+        )
+
+    def test_stored_vectors_are_returned_by_exact_text(self):
+        self.assertTrue(store_chunk_vectors(self.vectors, RECIPE))
+
+        self.assertEqual(cached_chunk_vectors(self.texts, RECIPE), self.vectors)
+        self.assertEqual(cached_chunk_vectors(["Update > Open the menu!"], RECIPE), {})
+
+    def test_the_key_hides_the_text_and_follows_the_document_embedding_space(self):
+        key = _chunk_vector_cache_key(self.texts[0], RECIPE)
+        self.assertNotIn("installer", key)
+
+        store_chunk_vectors(self.vectors, RECIPE)
+        self.assertEqual(cached_chunk_vectors(self.texts, replace(RECIPE, model="fake-2")), {})
+        # The query task does not shape stored vectors, so changing it keeps them reusable.
+        self.assertEqual(
+            cached_chunk_vectors(self.texts, replace(RECIPE, query_task="OTHER")), self.vectors
+        )
+
+    def test_entries_that_do_not_fit_the_recipe_are_misses(self):
+        cache.set(_chunk_vector_cache_key(self.texts[0], RECIPE), [0.5] * 3)
+        cache.set(_chunk_vector_cache_key(self.texts[1], RECIPE), "not a vector")
+
+        self.assertEqual(cached_chunk_vectors(self.texts, RECIPE), {})
+
+    def test_cache_failures_are_misses(self):
+        with mock.patch.object(cache, "get_many", side_effect=ConnectionError):
+            self.assertEqual(cached_chunk_vectors(self.texts, RECIPE), {})
+        with mock.patch.object(cache, "set_many", side_effect=ConnectionError):
+            self.assertFalse(store_chunk_vectors(self.vectors, RECIPE))
+
+    @override_settings(RETRIEVAL_CHUNK_VECTOR_CACHE_TTL_SECONDS=0)
+    def test_a_zero_ttl_disables_the_store(self):
+        self.assertTrue(store_chunk_vectors(self.vectors, RECIPE))
+
+        self.assertEqual(cached_chunk_vectors(self.texts, RECIPE), {})
+        self.assertIsNone(cache.get(_chunk_vector_cache_key(self.texts[0], RECIPE)))
@@ -242,7 +242,9 @@ class GateEnumerationTests(GateIndexTestCase):
         with mock.patch("kitsune.retrieval.sync.get_embeddings", wraps=get_embeddings) as embed:
             sync_report = sync_document_chunks(self.document.id)
         self.assertEqual(sync_report.outcome, SyncOutcome.EMBED_REPLACE)
-        embed.assert_called_once()
+        # The chunk texts did not change, so the repair rewrites their stored vectors.
+        embed.assert_not_called()
+        self.assertGreater(sync_report.reused_chunks, 0)
         self.assertTrue(gate_index(self.index).is_clean)
 
     def test_a_missing_manifest_is_reported(self):
@@ -0,0 +1,277 @@
+import os
+import tempfile
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+
+from kitsune.retrieval import local_knn
+from kitsune.retrieval.local_knn import (
+    LocalSnapshotUnavailable,
+    benchmark_snapshot,
+    build_snapshot,
+    load_snapshot,
+    semantic_chunk_ids,
+    serves_semantic_leg,
+)
+
+DIMENSIONS = 4
+
+
+def _hit(object_id, vector, *, locale="en-US", position=0, products=("1",), groups=None):
+    source = {
+        "object_id": str(object_id),
+        "family_id": f"kb:{object_id}",
+        "locale": locale,
+        "position": position,
+        "visibility": "group_restricted" if groups else "public",
+        "product_ids": list(products),
+        "content_vector": [float(value) for value in vector],
+    }
+    if groups:
+        source["access_group_ids"] = list(groups)
+    return {"_source": source}
+
+
+class LocalKnnTestCase(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(
+            RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR=self.directory, RETRIEVAL_LOCAL_KNN_NPROBE=0
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        patcher = mock.patch(
+            "kitsune.retrieval.local_knn.recipe_for_index",
+            return_value=SimpleNamespace(dimensions=DIMENSIONS),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, local_knn, "_loaded", None)
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def build(self, hits, index="chunks-1"):
+        with (
+            mock.patch("kitsune.retrieval.local_knn.es_client"),
+            mock.patch("kitsune.retrieval.local_knn.scan", return_value=(hit for hit in hits)),
+        ):
+            return build_snapshot(index)
+
+
+class SnapshotSearchTests(LocalKnnTestCase):
+    def setUp(self):
+        super().setUp()
+        self.report = self.build(
+            [
+                _hit(1, [1, 0, 0, 0]),
+                _hit(1, [0.9, 0.1, 0, 0], position=1),
+                _hit(2, [0.8, 0.6, 0, 0], products=("2",)),
+                _hit(3, [1, 0, 0, 0], locale="de"),
+                _hit(4, [1, 0.1, 0, 0], groups=[7]),
+                _hit(5, [0, 0, 0, 1]),
+                _hit(6, [0, 0, 0, 0]),
+                {"_source": {"object_id": "7"}},
+            ]
+        )
+        self.snapshot = load_snapshot("chunks-1")
+
+    def search(self, **kwargs):
+        return self.snapshot.search(
+            [1, 0, 0, 0], **{"locales": ["en-US"], "k": 3, **kwargs}
+        ).chunk_ids
+
+    def test_reports_what_the_build_kept(self):
+        self.assertEqual((self.report.rows, self.report.skipped), (6, 2))
+        self.assertEqual((self.report.locales, self.report.lists), (2, 0))
+        self.assertEqual(len(self.snapshot), 6)
+
+    def test_ranks_permitted_chunks_by_cosine_similarity(self):
+        self.assertEqual(self.search(), ("kb:1:en-US:0", "kb:1:en-US:1", "kb:2:en-US:0"))
+        self.assertEqual(
+            self.search(viewer_group_ids=[7]),
+            ("kb:1:en-US:0", "kb:4:en-US:0", "kb:1:en-US:1"),
+        )
+        self.assertIn("kb:4:en-US:0", self.search(privileged=True))
+        self.assertNotIn("kb:4:en-US:0", self.search(viewer_group_ids=[8]))
+
+    def test_applies_the_same_filters_as_the_knn_clause(self):
+        self.assertEqual(self.search(product_id=2), ("kb:2:en-US:0",))
+        self.assertEqual(self.search(product_id=99), ())
+        self.assertEqual(
+            self.search(excluded_family_ids={"kb:1", "aaq:2"}), ("kb:2:en-US:0", "kb:5:en-US:0")
+        )
+        self.assertEqual(self.search(similarity_floor=0.95), ("kb:1:en-US:0", "kb:1:en-US:1"))
+        self.assertEqual(self.search(locales=["de", "en-US"], k=2), ("kb:3:de:0", "kb:1:en-US:0"))
+
+    def test_rejects_unusable_queries(self):
+        for vector in ([1, 0], [0, 0, 0, 0], [float("nan"), 0, 0, 0]):
+            with self.subTest(vector=vector), self.assertRaises(ValueError):
+                self.snapshot.search(vector, locales=["en-US"], k=3)
+
+    def test_semantic_chunk_ids_uses_the_current_snapshot_of_the_named_index(self):
+        common = {
+            "locales": ["en-US"],
+            "k": 1,
+            "product_id": None,
+            "viewer_group_ids": (),
+            "privileged": False,
+            "excluded_family_ids": (),
+            "similarity_floor": 0.5,
+        }
+        self.assertEqual(semantic_chunk_ids("chunks-1", [1, 0, 0, 0], **common), ("kb:1:en-US:0",))
+        self.assertIsNone(semantic_chunk_ids("chunks-2", [1, 0, 0, 0], **common))
+        self.assertIsNone(semantic_chunk_ids("chunks-1", [1, 0], **common))
+
+    def test_the_build_emits_a_bounded_event(self):
+        with self.assertLogs("k.retrieval", level="INFO") as logs:
+            self.build([_hit(1, [1, 0, 0, 0])])
+
+        [record] = [
+            r for r in logs.records if r.getMessage() == "retrieval.local_knn.snapshot_built"
+        ]
+        self.assertEqual((record.row_count, record.skipped_count), (1, 0))
+
+
+class SnapshotLifecycleTests(LocalKnnTestCase):
+    def test_a_rebuild_is_picked_up_and_old_builds_are_pruned(self):
+        first = self.build([_hit(1, [1, 0, 0, 0])])
+        self.assertEqual(load_snapshot("chunks-1").build, first.build)
+
+        for _ in range(2):
+            latest = self.build([_hit(1, [1, 0, 0, 0]), _hit(2, [0, 1, 0, 0])])
+
+        snapshot = load_snapshot("chunks-1")
+        self.assertEqual((snapshot.build, len(snapshot)), (latest.build, 2))
+        builds = os.listdir(Path(self.directory) / "chunks-1")
+        self.assertNotIn(first.build, builds)
+        self.assertEqual(len(builds), 3)  # CURRENT and the two newest builds
+
+    def test_missing_or_unreadable_snapshots_are_not_served(self):
+        self.assertIsNone(load_snapshot("chunks-1"))
+        self.assertIsNone(load_snapshot("../chunks-1"))
+
+        (Path(self.directory) / "chunks-1").mkdir()
+        (Path(self.directory) / "chunks-1" / "CURRENT").write_text("missing")
+        self.assertIsNone(load_snapshot("chunks-1"))
+
+    def test_an_empty_index_builds_an_empty_snapshot(self):
+        report = self.build([])
+
+        self.assertEqual(report.rows, 0)
+        self.assertEqual(
+            load_snapshot("chunks-1").search([1, 0, 0, 0], locales=["en"], k=3).chunk_ids, ()
+        )
+
+    @override_settings(RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR="")
+    def test_building_requires_a_snapshot_directory(self):
+        with self.assertRaises(LocalSnapshotUnavailable):
+            build_snapshot("chunks-1")
+
+
+class InvertedFileTests(LocalKnnTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch("kitsune.retrieval.local_knn._IVF_MIN_ROWS", 100)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        rng = np.random.default_rng(3)
+        self.vectors = rng.normal(size=(400, DIMENSIONS))
+        self.report = self.build(
+            [_hit(number, vector) for number, vector in enumerate(self.vectors, start=1)]
+        )
+        self.snapshot = load_snapshot("chunks-1")
+
+    def test_large_locales_are_split_into_lists(self):
+        self.assertEqual(self.report.lists, 20)
+        offsets = self.snapshot.list_offsets
+        self.assertEqual((int(offsets[0]), int(offsets[-1])), (0, 400))
+
+    def test_probing_every_list_is_exact_and_fewer_lists_scan_less(self):
+        query = self.vectors[0]
+        exact = self.snapshot.search(query, locales=["en-US"], k=10)
+        everything = self.snapshot.search(query, locales=["en-US"], k=10, nprobe=20)
+        probed = self.snapshot.search(query, locales=["en-US"], k=10, nprobe=4)
+
+        self.assertEqual(exact.chunk_ids, everything.chunk_ids)
+        self.assertEqual(probed.chunk_ids[0], "kb:1:en-US:0")
+        self.assertLess(probed.rows_scanned, exact.rows_scanned)
+
+    def test_benchmark_measures_recall_against_the_exact_scan(self):
+        report = benchmark_snapshot(self.snapshot, queries=30, k=5, nprobe=20)
+
+        self.assertEqual((report.queries, report.exact.recall), (30, 1.0))
+        self.assertEqual(report.approximate.recall, 1.0)
+        self.assertIsNone(report.elasticsearch)
+
+        report = benchmark_snapshot(self.snapshot, queries=30, k=5, nprobe=2)
+        self.assertLess(report.approximate.recall, 1.0)
+
+
+class BreakerTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_the_mode_decides_who_serves_the_semantic_leg(self):
+        with override_settings(RETRIEVAL_LOCAL_KNN_MODE="off"):
+            local_knn.mark_elasticsearch_knn_degraded()
+            self.assertFalse(serves_semantic_leg())
+        with override_settings(RETRIEVAL_LOCAL_KNN_MODE="always"):
+            self.assertTrue(serves_semantic_leg())
+
+        cache.clear()
+        with override_settings(RETRIEVAL_LOCAL_KNN_MODE="fallback"):
+            self.assertFalse(serves_semantic_leg())
+            local_knn.mark_elasticsearch_knn_degraded()
+            self.assertTrue(serves_semantic_leg())
+
+
+class LocalKnnCommandTests(LocalKnnTestCase):
+    def test_sync_chunks_builds_a_snapshot(self):
+        stdout = StringIO()
+        with (
+            mock.patch("kitsune.retrieval.management.commands.sync_chunks.recipe_for_index"),
+            mock.patch("kitsune.retrieval.local_knn.es_client"),
+            mock.patch(
+                "kitsune.retrieval.local_knn.scan",
+                return_value=iter([_hit(1, [1, 0, 0, 0]), {"_source": {}}]),
+            ),
+        ):
+            call_command("sync_chunks", "--snapshot", "--index", "chunks-1", stdout=stdout)
+
+        self.assertIn("holds 1 chunks", stdout.getvalue())
+        self.assertIn("skipped 1 chunks", stdout.getvalue())
+        self.assertIsNotNone(load_snapshot("chunks-1"))
+
+    def test_benchmark_reports_each_engine(self):
+        self.build([_hit(number, [number, 1, 0, 0]) for number in range(1, 6)])
+        stdout = StringIO()
+
+        call_command(
+            "benchmark_local_knn",
+            "--index",
+            "chunks-1",
+            "--queries",
+            "5",
+            "--k",
+            "2",
+            stdout=stdout,
+        )
+
+        self.assertIn("exact", stdout.getvalue())
+        self.assertIn("ivf nprobe=0", stdout.getvalue())
+
+    def test_benchmark_requires_a_snapshot(self):
+        with self.assertRaisesRegex(CommandError, "sync_chunks --snapshot"):
+            call_command("benchmark_local_knn", "--index", "chunks-1", stdout=StringIO())
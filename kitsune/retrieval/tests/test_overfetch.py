@@ -0,0 +1,62 @@
+from django.test import SimpleTestCase, override_settings
+
+from kitsune.retrieval.access import ViewerAccess
+from kitsune.retrieval.overfetch import (
+    _rejection_rates,
+    authorization_overfetch,
+    record_authorization,
+)
+
+
+@override_settings(
+    RETRIEVAL_AUTHORIZATION_OVERFETCH=5,
+    RETRIEVAL_AUTHORIZATION_MAX_OVERFETCH=30,
+    RETRIEVAL_AUTHORIZATION_OVERFETCH_SAMPLES=100,
+    RETRIEVAL_AUTHORIZATION_OVERFETCH_PERCENTILE=90,
+)
+class AuthorizationOverfetchTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        _rejection_rates.clear()
+        self.addCleanup(_rejection_rates.clear)
+
+    def test_viewer_classes(self):
+        self.assertEqual(ViewerAccess().viewer_class, "public")
+        self.assertEqual(ViewerAccess((4,)).viewer_class, "group")
+        self.assertEqual(ViewerAccess(privileged=True).viewer_class, "privileged")
+
+    def test_starts_from_the_configured_overfetch_until_enough_searches_are_seen(self):
+        for _ in range(19):
+            record_authorization("public", {"kb"}, considered=10, rejected=0)
+        self.assertEqual(authorization_overfetch("public", {"kb"}, window=10), 5)
+
+        record_authorization("public", {"kb"}, considered=10, rejected=0)
+        self.assertEqual(authorization_overfetch("public", {"kb"}, window=10), 0)
+
+    def test_covers_the_configured_percentile_of_recent_rejection_rates(self):
+        for number in range(100):
+            # 89 searches reject nothing; the slowest tenth reject half their candidates.
+            record_authorization(
+                "group", {"kb", "aaq"}, considered=20, rejected=10 if number >= 89 else 0
+            )
+
+        self.assertEqual(authorization_overfetch("group", {"aaq", "kb"}, window=20), 20)
+        with override_settings(RETRIEVAL_AUTHORIZATION_OVERFETCH_PERCENTILE=80):
+            self.assertEqual(authorization_overfetch("group", {"aaq", "kb"}, window=20), 0)
+        # Other viewer classes and source mixes learn separately.
+        self.assertEqual(authorization_overfetch("group", {"kb"}, window=20), 5)
+
+    def test_only_recent_searches_count_and_the_maximum_holds(self):
+        for _ in range(100):
+            record_authorization("privileged", {"kb"}, considered=10, rejected=10)
+        self.assertEqual(authorization_overfetch("privileged", {"kb"}, window=10), 30)
+
+        for _ in range(100):
+            record_authorization("privileged", {"kb"}, considered=10, rejected=1)
+        self.assertEqual(authorization_overfetch("privileged", {"kb"}, window=9), 1)
+
+    @override_settings(RETRIEVAL_AUTHORIZATION_OVERFETCH_SAMPLES=0)
+    def test_no_samples_keeps_the_fixed_overfetch(self):
+        for _ in range(50):
+            record_authorization("public", {"kb"}, considered=10, rejected=5)
+        self.assertEqual(authorization_overfetch("public", {"kb"}, window=10), 5)
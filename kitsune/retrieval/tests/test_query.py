@@ -1,6 +1,7 @@
 from datetime import UTC, datetime
 from unittest import mock
 
+from django.core.cache import cache
 from django.test import SimpleTestCase, override_settings
 from elasticsearch.helpers import bulk
 
@@ -206,6 +207,34 @@ class NativeRetrieverCompositionTests(SimpleTestCase):
         self.assertTrue(_contains(mixed, {"terms": {"family_id": ["aaq:7"]}}))
         self.assertEqual(set(semantic["standard"]["query"]), {"knn"})
 
+    def test_a_locally_ranked_semantic_leg_keeps_the_knn_filter_and_its_order(self):
+        common = {
+            "kb_index": "retrieval-42",
+            "locale": "de",
+            "sources": {"kb"},
+            "viewer_group_ids": (),
+            "product_id": None,
+            "query_vector": [1.0, 0.0],
+            "similarity_floor": 0.75,
+            "semantic_k": 10,
+            "num_candidates": 20,
+            "rank_window_size": 20,
+            "locale_composition": "combined",
+            "include_lexical": False,
+        }
+        knn = _build_retriever("firefox", **common)["standard"]["query"]["knn"]
+        local = _build_retriever(
+            "firefox", **common, semantic_chunk_ids=["kb:2:de:0", "kb:1:en-US:3"]
+        )["standard"]["query"]["bool"]
+
+        self.assertEqual(local["_name"], "semantic:kb")
+        self.assertEqual(local["filter"][0], knn["filter"])
+        self.assertEqual(local["filter"][1], {"ids": {"values": ["kb:2:de:0", "kb:1:en-US:3"]}})
+        self.assertEqual(
+            [clause["constant_score"]["boost"] for clause in local["should"]], [2.0, 1.0]
+        )
+        self.assertFalse(_contains(local, {"similarity": 0.75}))
+
     def test_separate_locale_composition_uses_collapsed_children_and_distinct_bounds(self):
         retriever = _build_retriever(
             "firefox startup",
@@ -437,6 +466,60 @@ class BoundedRetrievalTests(SimpleTestCase):
         with self.assertRaisesRegex(InvalidRetrievalResponse, "no Elasticsearch shard"):
             _decode_response(response, page_size=2, offset=0, mode="hybrid")
 
+    def test_a_degraded_knn_response_is_rerun_from_the_local_snapshot(self):
+        def response(failed):
+            return {
+                "took": 3,
+                "timed_out": False,
+                "_shards": {"total": 2, "successful": 2 - failed, "skipped": 0, "failed": failed},
+                "hits": {"hits": []},
+                "aggregations": {"families": {"value": 0}},
+            }
+
+        client = mock.Mock()
+        client.search.side_effect = [response(1), response(0), response(0)]
+        common = {
+            "kb_index": "retrieval-42",
+            "locale": "en-US",
+            "sources": {"kb"},
+            "viewer_group_ids": (),
+            "product_id": None,
+            "query_vector": [1.0, 0.0],
+            "similarity_floor": 0.75,
+            "semantic_k": 10,
+            "num_candidates": 20,
+            "rank_window_size": 20,
+            "locale_composition": "combined",
+            "page_size": 2,
+        }
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+        with (
+            override_settings(RETRIEVAL_LOCAL_KNN_MODE="fallback"),
+            mock.patch("kitsune.retrieval.query.es_client", return_value=client),
+            mock.patch(
+                "kitsune.retrieval.query.local_knn.semantic_chunk_ids",
+                return_value=("kb:1:en-US:0",),
+            ) as local,
+            self.assertLogs("k.retrieval", level="WARNING"),
+        ):
+            degraded = _retrieve_unvalidated("firefox", **common)
+            # The breaker sends the next query straight to the snapshot.
+            tripped = _retrieve_unvalidated("firefox", **common)
+
+        self.assertEqual(client.search.call_count, 3)
+        first, rerun, next_query = (
+            call.kwargs["retriever"] for call in client.search.call_args_list
+        )
+        self.assertTrue(_contains(first, {"field": "content_vector"}))
+        self.assertFalse(_contains(rerun, {"field": "content_vector"}))
+        self.assertTrue(_contains(rerun, {"ids": {"values": ["kb:1:en-US:0"]}}))
+        self.assertEqual(rerun, next_query)
+        self.assertEqual(local.call_args.kwargs["locales"], ["en-US"])
+        self.assertEqual((degraded.semantic_engine, degraded.degraded), ("local", False))
+        self.assertEqual(tripped.semantic_engine, "local")
+
     def test_rejects_pages_outside_either_bound(self):
         common = {
             "query": "firefox",
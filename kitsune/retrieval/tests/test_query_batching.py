@@ -0,0 +1,129 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from kitsune.retrieval.embeddings import (
+    FAKE_BACKEND,
+    EmbeddingRecipe,
+    EmbeddingUnavailable,
+    get_embeddings,
+)
+from kitsune.retrieval.query_batching import QueryEmbeddingBatcher, embed_query
+
+RECIPE = EmbeddingRecipe(
+    provider=FAKE_BACKEND,
+    model="fake-1",
+    dimensions=8,
+    document_task="RETRIEVAL_DOCUMENT",
+    query_task="RETRIEVAL_QUERY",
+    normalization="none",
+)
+
+
+def _direct(text, recipe=RECIPE):
+    [vector] = get_embeddings([text], task="query", recipe=recipe)
+    return vector
+
+
+class QueryEmbeddingBatcherTests(SimpleTestCase):
+    def embed_concurrently(self, batcher, texts, **kwargs):
+        options = {"window_seconds": 0.2, "max_batch_size": 250, "timeout_seconds": 2}
+        options.update(kwargs)
+        with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+            futures = [pool.submit(batcher.embed, text, RECIPE, **options) for text in texts]
+            return [future.result() for future in futures]
+
+    def test_concurrent_misses_share_one_provider_call(self):
+        texts = ["firefox crash", "sync tabs", "firefox crash", "pdf viewer"]
+        with mock.patch(
+            "kitsune.retrieval.query_batching.get_embeddings", wraps=get_embeddings
+        ) as embed:
+            vectors = self.embed_concurrently(QueryEmbeddingBatcher(), texts)
+
+        self.assertEqual(vectors, [_direct(text) for text in texts])
+        embed.assert_called_once()
+        self.assertCountEqual(
+            embed.call_args.args[0], ["firefox crash", "sync tabs", "pdf viewer"]
+        )
+        self.assertEqual(embed.call_args.kwargs["task"], "query")
+
+    def test_a_full_batch_is_sent_without_waiting_out_the_window(self):
+        with mock.patch(
+            "kitsune.retrieval.query_batching.get_embeddings", wraps=get_embeddings
+        ) as embed:
+            started = time.monotonic()
+            self.embed_concurrently(
+                QueryEmbeddingBatcher(), ["a", "b", "c", "d"], window_seconds=5, max_batch_size=2
+            )
+
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(embed.call_count, 2)
+
+    def test_recipes_are_batched_separately(self):
+        other = EmbeddingRecipe(**{**RECIPE.__dict__, "query_task": "OTHER_QUERY"})
+        batcher = QueryEmbeddingBatcher()
+        options = {"window_seconds": 0.1, "max_batch_size": 250, "timeout_seconds": 2}
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            first = pool.submit(batcher.embed, "query", RECIPE, **options)
+            second = pool.submit(batcher.embed, "query", other, **options)
+
+            self.assertEqual(first.result(), _direct("query"))
+            self.assertEqual(second.result(), _direct("query", other))
+
+    def test_a_provider_failure_reaches_every_waiter(self):
+        with mock.patch(
+            "kitsune.retrieval.query_batching.get_embeddings",
+            side_effect=EmbeddingUnavailable("offline"),
+        ):
+            batcher = QueryEmbeddingBatcher()
+            options = {"window_seconds": 0.1, "max_batch_size": 250, "timeout_seconds": 2}
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                futures = [pool.submit(batcher.embed, text, RECIPE, **options) for text in "ab"]
+                for future in futures:
+                    with self.assertRaises(EmbeddingUnavailable):
+                        future.result()
+
+    def test_waiters_give_up_at_their_own_deadline(self):
+        release = threading.Event()
+
+        def hung(texts, **kwargs):
+            release.wait(5)
+            return [_direct(text) for text in texts]
+
+        batcher = QueryEmbeddingBatcher()
+        options = {"window_seconds": 0.05, "max_batch_size": 250, "timeout_seconds": 0.1}
+        with (
+            mock.patch("kitsune.retrieval.query_batching.get_embeddings", side_effect=hung),
+            ThreadPoolExecutor(max_workers=2) as pool,
+        ):
+            opener = pool.submit(batcher.embed, "a", RECIPE, **options)
+            time.sleep(0.01)
+            waiter = pool.submit(batcher.embed, "b", RECIPE, **options)
+            with self.assertRaises(EmbeddingUnavailable):
+                waiter.result()
+            release.set()
+            self.assertEqual(opener.result(), _direct("a"))
+
+
+class EmbedQueryTests(SimpleTestCase):
+    @override_settings(RETRIEVAL_QUERY_EMBEDDING_BATCH_WINDOW_MS=0)
+    def test_a_zero_window_embeds_directly(self):
+        with mock.patch("kitsune.retrieval.query_batching._batcher") as batcher:
+            self.assertEqual(embed_query("query", RECIPE), _direct("query"))
+        batcher.embed.assert_not_called()
+
+    @override_settings(
+        RETRIEVAL_QUERY_EMBEDDING_BATCH_WINDOW_MS=7,
+        RETRIEVAL_QUERY_EMBEDDING_TIMEOUT_SECONDS=1.5,
+        RETRIEVAL_EMBEDDING_BATCH_SIZE=40,
+    )
+    def test_batching_uses_the_configured_window_deadline_and_request_size(self):
+        with mock.patch("kitsune.retrieval.query_batching._batcher") as batcher:
+            embed_query("query", RECIPE)
+
+        batcher.embed.assert_called_once_with(
+            "query", RECIPE, window_seconds=0.007, max_batch_size=40, timeout_seconds=1.5
+        )
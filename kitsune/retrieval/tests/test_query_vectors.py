@@ -1,3 +1,6 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import replace
 from unittest import mock
 
@@ -5,10 +8,15 @@ from django.core.cache import cache
 from django.test import SimpleTestCase, override_settings
 
 from kitsune.retrieval.checks import query_configuration_problems
-from kitsune.retrieval.embeddings import FAKE_BACKEND, EmbeddingRecipe
+from kitsune.retrieval.embeddings import FAKE_BACKEND, EmbeddingRecipe, EmbeddingUnavailable
+from kitsune.retrieval.locks import DocumentLockBackendError, DocumentLockUnavailable
+from kitsune.retrieval.query_batching import embed_query
 from kitsune.retrieval.query_vectors import (
+    _local_vectors,
+    _query_vector_cache_key,
     embed_and_cache_query_vector,
     get_cached_query_vector,
+    normalize_query,
 )
 
 RECIPE = EmbeddingRecipe(
@@ -24,16 +32,27 @@ RECIPE = EmbeddingRecipe(
 class QueryVectorCacheTests(SimpleTestCase):
     def setUp(self):
         cache.clear()
+        _local_vectors.clear()
 
     def tearDown(self):
         cache.clear()
+        _local_vectors.clear()
 
-    def test_cache_is_scoped_to_the_exact_query_and_query_recipe(self):
+    def test_queries_are_normalized_before_keying(self):
+        self.assertEqual(normalize_query("  Firefox\u00a0 CRASH\t"), "firefox crash")
+        self.assertEqual(normalize_query("ﬁrefox"), "firefox")
+
+    def test_cache_is_scoped_to_the_normalized_query_and_query_recipe(self):
         vector, cached = embed_and_cache_query_vector("Firefox crashes", RECIPE)
 
         self.assertEqual(cached, "stored")
-        self.assertEqual(get_cached_query_vector("Firefox crashes", RECIPE), (vector, "hit"))
-        self.assertEqual(get_cached_query_vector("Firefox crashes ", RECIPE), (None, "miss"))
+        self.assertEqual(get_cached_query_vector("Firefox crashes", RECIPE), (vector, "local_hit"))
+        self.assertEqual(
+            get_cached_query_vector("firefox  Crashes ", RECIPE), (vector, "local_hit")
+        )
+        _local_vectors.clear()
+        self.assertEqual(get_cached_query_vector("FIREFOX crashes", RECIPE), (vector, "hit"))
+        self.assertEqual(get_cached_query_vector("Firefox crashed", RECIPE), (None, "miss"))
         self.assertEqual(
             get_cached_query_vector(
                 "Firefox crashes", replace(RECIPE, query_task="OTHER_QUERY_TASK")
@@ -46,13 +65,14 @@ class QueryVectorCacheTests(SimpleTestCase):
         query = "private-looking but public query"
         vector = [0.0] * RECIPE.dimensions
         with (
-            mock.patch("kitsune.retrieval.query_vectors.get_embeddings", return_value=[vector]),
+            mock.patch("kitsune.retrieval.query_vectors.embed_query", return_value=vector),
             mock.patch("kitsune.retrieval.query_vectors.cache.set") as cache_set,
         ):
             self.assertEqual(embed_and_cache_query_vector(query, RECIPE), (vector, "stored"))
 
         key, cached = cache_set.call_args.args
         self.assertNotIn(query, key)
+        self.assertNotIn(normalize_query(query), key)
         self.assertEqual(cached, vector)
         self.assertEqual(cache_set.call_args.kwargs["timeout"], 3600)
 
@@ -72,7 +92,7 @@ class QueryVectorCacheTests(SimpleTestCase):
     def test_cache_write_failure_still_returns_the_new_vector(self):
         vector = [0.0] * RECIPE.dimensions
         with (
-            mock.patch("kitsune.retrieval.query_vectors.get_embeddings", return_value=[vector]),
+            mock.patch("kitsune.retrieval.query_vectors.embed_query", return_value=vector),
             mock.patch(
                 "kitsune.retrieval.query_vectors.cache.set", side_effect=RuntimeError("offline")
             ),
@@ -82,12 +102,140 @@ class QueryVectorCacheTests(SimpleTestCase):
                 (vector, "write_failed"),
             )
 
+    def test_embeds_the_normalized_query(self):
+        with mock.patch("kitsune.retrieval.query_vectors.embed_query", wraps=embed_query) as embed:
+            embed_and_cache_query_vector("  Firefox   CRASH ", RECIPE)
+
+        self.assertEqual(embed.call_args.args[0], "firefox crash")
+
+    def test_shared_hits_fill_the_local_tier(self):
+        vector, _ = embed_and_cache_query_vector("query", RECIPE)
+        _local_vectors.clear()
+
+        self.assertEqual(get_cached_query_vector("query", RECIPE), (vector, "hit"))
+        with mock.patch("kitsune.retrieval.query_vectors.cache.get") as shared_get:
+            self.assertEqual(get_cached_query_vector("query", RECIPE), (vector, "local_hit"))
+        shared_get.assert_not_called()
+
+    @override_settings(RETRIEVAL_QUERY_VECTOR_LOCAL_CACHE_SIZE=2)
+    def test_local_tier_evicts_the_least_recently_used_vector(self):
+        first, _ = embed_and_cache_query_vector("first", RECIPE)
+        embed_and_cache_query_vector("second", RECIPE)
+        get_cached_query_vector("first", RECIPE)
+        embed_and_cache_query_vector("third", RECIPE)
+
+        self.assertEqual(get_cached_query_vector("first", RECIPE), (first, "local_hit"))
+        self.assertEqual(get_cached_query_vector("second", RECIPE)[1], "hit")
+
+    @override_settings(RETRIEVAL_QUERY_VECTOR_LOCAL_CACHE_SIZE=0)
+    def test_local_tier_can_be_disabled(self):
+        vector, _ = embed_and_cache_query_vector("query", RECIPE)
+
+        self.assertEqual(get_cached_query_vector("query", RECIPE), (vector, "hit"))
+
+    def test_concurrent_misses_in_one_process_share_one_provider_call(self):
+        release = threading.Event()
+        vector = [0.5] * RECIPE.dimensions
+
+        def slow_embed(*args, **kwargs):
+            release.wait(5)
+            return vector
+
+        with (
+            mock.patch(
+                "kitsune.retrieval.query_vectors.embed_query", side_effect=slow_embed
+            ) as embed,
+            ThreadPoolExecutor(max_workers=4) as pool,
+        ):
+            leader = pool.submit(embed_and_cache_query_vector, "Firefox crash", RECIPE)
+            while embed.call_count == 0:
+                time.sleep(0.01)
+            followers = [
+                pool.submit(embed_and_cache_query_vector, "firefox CRASH", RECIPE),
+                pool.submit(get_cached_query_vector, "Firefox crash", RECIPE),
+            ]
+            time.sleep(0.2)  # let both followers join the flight before it lands
+            release.set()
+
+            self.assertEqual(leader.result(), (vector, "stored"))
+            self.assertEqual(followers[0].result(), (vector, "coalesced"))
+            self.assertEqual(followers[1].result(), (vector, "coalesced"))
+        embed.assert_called_once()
+
+    def test_followers_of_a_failed_embedding_fall_back_without_calling_the_provider(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def failing_embed(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            raise EmbeddingUnavailable("offline")
+
+        with (
+            mock.patch(
+                "kitsune.retrieval.query_vectors.embed_query", side_effect=failing_embed
+            ) as embed,
+            ThreadPoolExecutor(max_workers=2) as pool,
+        ):
+            leader = pool.submit(embed_and_cache_query_vector, "query", RECIPE)
+            started.wait(5)
+            follower = pool.submit(embed_and_cache_query_vector, "query", RECIPE)
+            time.sleep(0.2)
+            release.set()
+
+            with self.assertRaises(EmbeddingUnavailable):
+                leader.result()
+            with self.assertRaises(EmbeddingUnavailable):
+                follower.result()
+        embed.assert_called_once()
+
+    def test_a_worker_that_loses_the_election_waits_for_the_shared_vector(self):
+        vector = [0.25] * RECIPE.dimensions
+        cache.set(_query_vector_cache_key("query", RECIPE), vector)
+        with (
+            mock.patch(
+                "kitsune.retrieval.query_vectors.query_vector_lock",
+                side_effect=DocumentLockUnavailable("held"),
+            ),
+            mock.patch("kitsune.retrieval.query_vectors.embed_query") as embed,
+        ):
+            self.assertEqual(embed_and_cache_query_vector("query", RECIPE), (vector, "coalesced"))
+        embed.assert_not_called()
+
+    @override_settings(RETRIEVAL_QUERY_EMBEDDING_TIMEOUT_SECONDS=0.1)
+    def test_a_worker_that_loses_the_election_gives_up_at_the_query_timeout(self):
+        with (
+            mock.patch(
+                "kitsune.retrieval.query_vectors.query_vector_lock",
+                side_effect=DocumentLockUnavailable("held"),
+            ),
+            mock.patch("kitsune.retrieval.query_vectors.embed_query") as embed,
+            self.assertRaises(EmbeddingUnavailable),
+        ):
+            embed_and_cache_query_vector("query", RECIPE)
+        embed.assert_not_called()
+
+    def test_an_unavailable_lease_backend_still_embeds(self):
+        with mock.patch(
+            "kitsune.retrieval.query_vectors.query_vector_lock",
+            side_effect=DocumentLockBackendError("offline"),
+        ):
+            vector, cached = embed_and_cache_query_vector("query", RECIPE)
+
+        self.assertEqual(cached, "stored")
+        _local_vectors.clear()
+        self.assertEqual(get_cached_query_vector("query", RECIPE), (vector, "hit"))
+
 
 class QueryConfigurationTests(SimpleTestCase):
     def test_invalid_timeout_and_ttl_are_reported(self):
         for setting, value in (
             ("RETRIEVAL_QUERY_EMBEDDING_TIMEOUT_SECONDS", 0),
             ("RETRIEVAL_QUERY_VECTOR_CACHE_TTL_SECONDS", 0),
+            ("RETRIEVAL_QUERY_VECTOR_LOCAL_CACHE_SIZE", -1),
+            ("RETRIEVAL_QUERY_EMBEDDING_BATCH_WINDOW_MS", -1),
+            ("RETRIEVAL_CHUNK_VECTOR_CACHE_TTL_SECONDS", -1),
+            ("RETRIEVAL_BACKFILL_TOKENS_PER_SECOND", -1),
         ):
             with self.subTest(setting=setting), override_settings(**{setting: value}):
                 self.assertTrue(query_configuration_problems())
@@ -112,6 +260,11 @@ class QueryConfigurationTests(SimpleTestCase):
             ("RETRIEVAL_LEXICAL_MINIMUM_SHOULD_MATCH", ""),
             ("RETRIEVAL_LOCALE_COMPOSITION", "weighted"),
             ("RETRIEVAL_QUERY_EMBEDDING_RATE", "ten/m"),
+            ("RETRIEVAL_AUTHORIZATION_CACHE_TTL_SECONDS", -1),
+            ("RETRIEVAL_AUTHORIZATION_LOCAL_CACHE_SIZE", None),
+            ("RETRIEVAL_AUTHORIZATION_MAX_OVERFETCH", 4),
+            ("RETRIEVAL_AUTHORIZATION_OVERFETCH_SAMPLES", -1),
+            ("RETRIEVAL_AUTHORIZATION_OVERFETCH_PERCENTILE", 101),
         ):
             with self.subTest(setting=setting), override_settings(**{setting: value}):
                 self.assertTrue(query_configuration_problems())
@@ -123,6 +276,21 @@ class QueryConfigurationTests(SimpleTestCase):
         ):
             self.assertTrue(query_configuration_problems())
 
+    def test_invalid_local_knn_settings_are_reported(self):
+        for overrides in (
+            {"RETRIEVAL_LOCAL_KNN_MODE": "sometimes"},
+            {"RETRIEVAL_LOCAL_KNN_MODE": "fallback", "RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR": ""},
+            {"RETRIEVAL_LOCAL_KNN_NPROBE": -1},
+            {"RETRIEVAL_LOCAL_KNN_BREAKER_SECONDS": 0},
+        ):
+            with self.subTest(overrides=overrides), override_settings(**overrides):
+                self.assertTrue(query_configuration_problems())
+
+        with override_settings(
+            RETRIEVAL_LOCAL_KNN_MODE="always", RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR="/snapshots"
+        ):
+            self.assertFalse(query_configuration_problems())
+
     def test_invalid_similarity_floor_mapping_is_reported(self):
         for floors in (
             {"not-a-fingerprint": 0.8},
@@ -1,7 +1,8 @@
 from datetime import UTC, datetime
 from unittest import mock
 
-from django.test import SimpleTestCase
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
 
 from kitsune.products.tests import ProductFactory
 from kitsune.retrieval.chunking import CHUNKING_GENERATION, Chunk, chunk
@@ -241,6 +242,7 @@ class SyncExecutorTests(ChunkIndexTestCase):
         self.assertEqual(report.embedding_calls, 1)
         stored = self._stored_state()
         self.assertGreater(len(stored.chunks), 0)
+        self.assertEqual((report.reused_chunks, report.embedded_chunks), (0, len(stored.chunks)))
         self.assertEqual(stored.manifest.chunk_count, len(stored.chunks))
         self.assertEqual(stored.manifest.indexed_revision_id, self.document.current_revision_id)
 
@@ -287,18 +289,51 @@ class SyncExecutorTests(ChunkIndexTestCase):
         self.assertEqual(report.outcome, SyncOutcome.EMBED_REPLACE)
         self.assertEqual(report.embedding_calls, 1)
 
-    def test_a_missing_manifest_is_replaced(self):
+    def test_a_missing_manifest_is_replaced_from_stored_chunk_vectors(self):
         self._sync()
         es_client().delete(index=self.index, id=manifest_id(self.identity), refresh=True)
 
         report = self._sync()
 
         self.assertEqual(report.outcome, SyncOutcome.EMBED_REPLACE)
+        self.assertEqual(report.embedding_calls, 0)
+        stored = self._stored_state()
+        self.assertEqual((report.reused_chunks, report.embedded_chunks), (len(stored.chunks), 0))
+        self.assertIsNotNone(stored.manifest)
+
+    def test_an_edit_embeds_only_the_chunks_whose_text_changed(self):
+        html = "<h2>Install</h2><p>Download the installer.</p><h2>Update</h2><p>{}</p>"
+        Document.objects.filter(pk=self.document.id).update(html=html.format("Open the menu."))
+        self._sync()
+        before = {item["position"]: item["content_vector"] for item in self._stored_state().chunks}
+        Document.objects.filter(pk=self.document.id).update(html=html.format("Open Settings."))
+        self.document.refresh_from_db()
+        texts = [item.text for item in chunk("kb", self.document.html, title=self.document.title)]
+
+        with mock.patch("kitsune.retrieval.sync.get_embeddings", wraps=get_embeddings) as embed:
+            report = self._sync()
+
+        self.assertEqual(report.outcome, SyncOutcome.EMBED_REPLACE)
+        self.assertEqual(report.embedding_calls, 1)
+        self.assertEqual(embed.call_args.args[0], texts[-1:])
+        self.assertEqual((report.reused_chunks, report.embedded_chunks), (len(texts) - 1, 1))
+        stored = {item["position"]: item["content_vector"] for item in self._stored_state().chunks}
+        self.assertEqual(stored[0], before[0])
+        self.assertNotEqual(stored[len(texts) - 1], before[len(texts) - 1])
+
+    @override_settings(RETRIEVAL_CHUNK_VECTOR_CACHE_TTL_SECONDS=0)
+    def test_without_the_chunk_vector_store_every_replacement_re_embeds(self):
+        self._sync()
+        es_client().delete(index=self.index, id=manifest_id(self.identity), refresh=True)
+
+        report = self._sync()
+
         self.assertEqual(report.embedding_calls, 1)
-        self.assertIsNotNone(self._stored_state().manifest)
+        self.assertEqual(report.reused_chunks, 0)
 
     def test_a_missing_metadata_target_falls_back_to_replacement(self):
         self._sync()
+        cache.clear()  # No stored chunk vectors, so the fallback has to pay the provider.
         self.document.products.add(ProductFactory())
 
         with (
@@ -476,6 +511,8 @@ class SyncExecutorTests(ChunkIndexTestCase):
         self.assertEqual(
             (record.index, record.outcome), (self.index, SyncOutcome.EMBED_REPLACE.value)
         )
+        self.assertEqual(record.reused_chunks, 0)
+        self.assertGreater(record.embedded_chunks, 0)
         self.assertNotIn("Install Firefox", repr(record.__dict__))
         for field in ("content_text", "content_vector", "access_group_ids"):
             self.assertNotIn(field, record.__dict__)
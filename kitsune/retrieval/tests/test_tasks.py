@@ -12,7 +12,13 @@ from kitsune.celery import app
 from kitsune.retrieval.checks import task_timing_problems
 from kitsune.retrieval.index import ChunkDocument, ChunkIdentity, IndexWriteError
 from kitsune.retrieval.locks import DocumentLockBackendError, DocumentLockUnavailable
-from kitsune.retrieval.tasks import delete_document, reconcile_write_index, sync_document
+from kitsune.retrieval.tasks import (
+    build_local_knn_snapshot,
+    delete_document,
+    reconcile_write_index,
+    sync_document,
+    warm_query_vector_cache,
+)
 
 
 class TaskTimingTests(SimpleTestCase):
@@ -81,6 +87,8 @@ class TaskRoutingTests(SimpleTestCase):
             (sync_document.name, "retrieval"),
             (delete_document.name, "retrieval"),
             (reconcile_write_index.name, "retrieval_bulk"),
+            (warm_query_vector_cache.name, "retrieval_bulk"),
+            (build_local_knn_snapshot.name, "retrieval_bulk"),
         )
         for name, queue in routes:
             with self.subTest(task=name):
@@ -207,3 +215,57 @@ class TaskBehaviourTests(SimpleTestCase):
         ):
             reconcile_write_index()
         gate.assert_not_called()
+
+
+class WarmupTaskTests(SimpleTestCase):
+    @override_settings(
+        RETRIEVAL_QUERY_VECTOR_WARMUP_TOP_N=50, RETRIEVAL_QUERY_EMBEDDING_RATE="10/m"
+    )
+    def test_warms_the_configured_number_of_analytics_queries(self):
+        with (
+            mock.patch("kitsune.retrieval.tasks.queries_from_analytics") as queries,
+            mock.patch("kitsune.retrieval.tasks.warm_query_vectors") as warm,
+        ):
+            warm_query_vector_cache()
+
+        warm.assert_called_once_with(queries.return_value, top_n=50)
+
+    def test_stays_off_without_a_size_or_with_query_embeddings_disabled(self):
+        for overrides in (
+            {"RETRIEVAL_QUERY_VECTOR_WARMUP_TOP_N": 0, "RETRIEVAL_QUERY_EMBEDDING_RATE": "10/m"},
+            {"RETRIEVAL_QUERY_VECTOR_WARMUP_TOP_N": 50, "RETRIEVAL_QUERY_EMBEDDING_RATE": "0/s"},
+        ):
+            with (
+                self.subTest(overrides=overrides),
+                override_settings(**overrides),
+                mock.patch("kitsune.retrieval.tasks.warm_query_vectors") as warm,
+            ):
+                warm_query_vector_cache()
+            warm.assert_not_called()
+
+
+class LocalKnnSnapshotTaskTests(SimpleTestCase):
+    @override_settings(
+        RETRIEVAL_LOCAL_KNN_MODE="fallback", RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR="/snapshots"
+    )
+    def test_snapshots_the_read_generation(self):
+        with (
+            mock.patch.object(ChunkDocument, "alias_points_at", return_value="chunks-2"),
+            mock.patch("kitsune.retrieval.tasks.build_snapshot") as build,
+        ):
+            build_local_knn_snapshot()
+
+        build.assert_called_once_with("chunks-2")
+
+    def test_stays_off_while_the_local_engine_is_disabled(self):
+        for overrides in (
+            {"RETRIEVAL_LOCAL_KNN_MODE": "off", "RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR": "/snapshots"},
+            {"RETRIEVAL_LOCAL_KNN_MODE": "always", "RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR": ""},
+        ):
+            with (
+                self.subTest(overrides=overrides),
+                override_settings(**overrides),
+                mock.patch("kitsune.retrieval.tasks.build_snapshot") as build,
+            ):
+                build_local_knn_snapshot()
+            build.assert_not_called()
@@ -0,0 +1,186 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+
+from kitsune.retrieval.embeddings import (
+    FAKE_BACKEND,
+    EmbeddingRecipe,
+    EmbeddingUnavailable,
+    get_embeddings,
+)
+from kitsune.retrieval.query_vectors import (
+    _local_vectors,
+    embed_and_cache_query_vector,
+    get_cached_query_vector,
+)
+from kitsune.retrieval.warmup import QueryCount, queries_from_json, warm_query_vectors
+
+RECIPE = EmbeddingRecipe(
+    provider=FAKE_BACKEND,
+    model="fake-1",
+    dimensions=8,
+    document_task="RETRIEVAL_DOCUMENT",
+    query_task="RETRIEVAL_QUERY",
+    normalization="none",
+)
+
+
+class WarmupTestCase(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        _local_vectors.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(_local_vectors.clear)
+        patcher = mock.patch(
+            "kitsune.retrieval.warmup.resolve_read_state",
+            return_value=("chunks-1", RECIPE, {}),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertCached(self, query):
+        _local_vectors.clear()
+        self.assertEqual(get_cached_query_vector(query, RECIPE)[1], "hit")
+
+
+class WarmQueryVectorsTests(WarmupTestCase):
+    def test_warms_the_top_queries_of_each_locale_in_one_request(self):
+        counts = [
+            QueryCount("en-US", "Firefox crash", 50),
+            QueryCount("en-US", "firefox  CRASH", 30),
+            QueryCount("en-US", "sync", 40),
+            QueryCount("en-US", "rare", 1),
+            QueryCount("de", "absturz", 20),
+            QueryCount("de", "selten", 1),
+        ]
+        with mock.patch("kitsune.retrieval.warmup.get_embeddings", wraps=get_embeddings) as embed:
+            report = warm_query_vectors(counts, top_n=2)
+
+        embed.assert_called_once()
+        self.assertCountEqual(embed.call_args.args[0], ["firefox crash", "sync", "absturz"])
+        self.assertEqual(embed.call_args.kwargs["task"], "query")
+        self.assertEqual((report.index, report.selected, report.embedded), ("chunks-1", 3, 3))
+        for query in ("FIREFOX crash", "sync", "absturz"):
+            self.assertCached(query)
+        self.assertEqual(get_cached_query_vector("rare", RECIPE), (None, "miss"))
+
+        self.assertEqual(report.searches, 142)
+        self.assertEqual(report.hit_rate_before, 0)
+        self.assertEqual(report.hit_rate_after, 140 / 142)
+
+    def test_cached_queries_are_refreshed_rather_than_embedded_again(self):
+        embed_and_cache_query_vector("sync", RECIPE)
+        counts = [QueryCount("en-US", "sync", 3), QueryCount("en-US", "crash", 1)]
+
+        with mock.patch("kitsune.retrieval.warmup.get_embeddings", wraps=get_embeddings) as embed:
+            report = warm_query_vectors(counts, top_n=10)
+
+        self.assertEqual(embed.call_args.args[0], ["crash"])
+        self.assertEqual((report.already_cached, report.embedded), (1, 1))
+        self.assertEqual((report.hit_rate_before, report.hit_rate_after), (0.75, 1.0))
+
+    @override_settings(RETRIEVAL_EMBEDDING_BATCH_SIZE=2)
+    def test_requests_respect_the_provider_batch_limit(self):
+        counts = [QueryCount("en-US", f"query {number}", 10 - number) for number in range(5)]
+
+        with mock.patch("kitsune.retrieval.warmup.get_embeddings", wraps=get_embeddings) as embed:
+            report = warm_query_vectors(counts, top_n=5)
+
+        self.assertEqual([len(call.args[0]) for call in embed.call_args_list], [2, 2, 1])
+        # Most searched first, so a partial run warms what matters most.
+        self.assertEqual(embed.call_args_list[0].args[0], ["query 0", "query 1"])
+        self.assertEqual(report.embedded, 5)
+
+    def test_provider_failures_are_counted_and_nothing_is_cached(self):
+        with mock.patch(
+            "kitsune.retrieval.warmup.get_embeddings",
+            side_effect=EmbeddingUnavailable("offline"),
+        ):
+            report = warm_query_vectors([QueryCount("en-US", "crash", 1)], top_n=5)
+
+        self.assertEqual((report.embedded, report.failed), (0, 1))
+        self.assertEqual(report.hit_rate_after, 0)
+        self.assertEqual(get_cached_query_vector("crash", RECIPE), (None, "miss"))
+
+    def test_reports_a_bounded_event_without_query_text(self):
+        with self.assertLogs("k.retrieval", level="INFO") as logs:
+            warm_query_vectors([QueryCount("en-US", "private query", 1)], top_n=5)
+
+        [record] = [r for r in logs.records if r.getMessage() == "retrieval.warmup.completed"]
+        self.assertEqual(record.embedded_count, 1)
+        self.assertNotIn("private query", str(record.__dict__))
+
+
+class QueriesFromJsonTests(SimpleTestCase):
+    def test_reads_queries_with_an_optional_count(self):
+        self.assertEqual(
+            queries_from_json(
+                [{"query": "crash", "locale": "en-US", "count": 4}, {"query": "a", "locale": "de"}]
+            ),
+            [QueryCount("en-US", "crash", 4), QueryCount("de", "a", 1)],
+        )
+
+    def test_rejects_malformed_entries(self):
+        for payload in (
+            {"query": "crash"},
+            [{"query": "crash"}],
+            [{"query": 1, "locale": "en-US"}],
+            [{"query": "crash", "locale": ""}],
+            [{"query": "crash", "locale": "en-US", "count": 0}],
+            [{"query": "crash", "locale": "en-US", "count": True}],
+        ):
+            with self.subTest(payload=payload), self.assertRaises(ValueError):
+                queries_from_json(payload)
+
+
+class WarmQueryVectorsCommandTests(WarmupTestCase):
+    def write_queries(self, payload):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / "queries.json"
+        path.write_text(json.dumps(payload), encoding="utf-8")
+        return str(path)
+
+    def test_warms_queries_from_a_file_and_reports_the_hit_rate(self):
+        path = self.write_queries([{"query": "crash", "locale": "en-US", "count": 3}])
+        stdout = StringIO()
+
+        call_command("warm_query_vectors", "--file", path, stdout=stdout)
+
+        self.assertIn("Embedded and cached:              1", stdout.getvalue())
+        self.assertIn("0.0% -> 100.0% of 3 searches", stdout.getvalue())
+        self.assertCached("crash")
+
+    def test_reads_analytics_when_no_file_is_given(self):
+        with mock.patch(
+            "kitsune.retrieval.management.commands.warm_query_vectors.queries_from_analytics",
+            return_value=[QueryCount("en-US", "crash", 3)],
+        ) as analytics:
+            call_command(
+                "warm_query_vectors", "--days", "30", "--max-rows", "500", stdout=StringIO()
+            )
+
+        self.assertEqual(analytics.call_args.args[1], 500)
+        self.assertCached("crash")
+
+    def test_an_unreadable_file_or_failed_embedding_is_an_error(self):
+        with self.assertRaisesRegex(CommandError, "Could not read"):
+            call_command("warm_query_vectors", "--file", self.write_queries({}), stdout=StringIO())
+
+        path = self.write_queries([{"query": "crash", "locale": "en-US"}])
+        with (
+            mock.patch(
+                "kitsune.retrieval.warmup.get_embeddings",
+                side_effect=EmbeddingUnavailable("offline"),
+            ),
+            self.assertRaisesRegex(CommandError, "could not be embedded"),
+        ):
+            call_command("warm_query_vectors", "--file", path, stdout=StringIO())
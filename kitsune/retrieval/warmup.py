@@ -0,0 +1,171 @@
+"""Pre-populate the query-vector cache with the most frequent searches.
+
+After a deploy or a Redis flush every popular query misses at once, and each miss is a
+one-input provider call on the interactive path. Warming embeds the top queries of each locale
+ahead of that traffic in fully packed provider requests and restarts the lifetime of vectors
+that are already cached.
+
+Retrieval events never record query text, so frequencies come from the site's analytics
+search events or from an operator-supplied file. Warming targets the recipe of the active read
+generation; vectors are locale-independent, so a query popular in several locales is embedded
+once.
+"""
+
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+from kitsune.dashboards import LAST_7_DAYS
+from kitsune.retrieval.chunking import count_tokens
+from kitsune.retrieval.embeddings import (
+    EmbeddingUnavailable,
+    ProviderStats,
+    get_embeddings,
+    max_input_tokens,
+    provider_request_batch_lengths,
+)
+from kitsune.retrieval.events import emit
+from kitsune.retrieval.index import resolve_read_state
+from kitsune.retrieval.query_vectors import (
+    cached_query_vectors,
+    normalize_query,
+    store_query_vectors,
+)
+from kitsune.retrieval.validation import is_positive_int
+from kitsune.sumo import googleanalytics
+
+
+@dataclass(frozen=True)
+class QueryCount:
+    locale: str
+    query: str
+    count: int
+
+
+@dataclass
+class WarmupReport:
+    index: str
+    # Distinct normalized queries chosen, and how each fared.
+    selected: int = 0
+    already_cached: int = 0
+    embedded: int = 0
+    oversized: int = 0
+    failed: int = 0
+    write_failed: int = 0
+    provider_requests: int = 0
+    # Observed search volume and how much of it the shared cache could answer.
+    searches: int = 0
+    cached_searches_before: int = 0
+    cached_searches_after: int = 0
+
+    @property
+    def hit_rate_before(self) -> float | None:
+        return self.cached_searches_before / self.searches if self.searches else None
+
+    @property
+    def hit_rate_after(self) -> float | None:
+        return self.cached_searches_after / self.searches if self.searches else None
+
+
+def queries_from_json(payload: object) -> list[QueryCount]:
+    """Read ``[{"query": ..., "locale": ..., "count": ...}]``; ``count`` defaults to one."""
+    if not isinstance(payload, list):
+        raise ValueError("the query file must contain a JSON list")
+    counts = []
+    for item in payload:
+        if not isinstance(item, dict) or not {"query", "locale"} <= set(item):
+            raise ValueError("each query entry must be an object with a query and a locale")
+        query, locale, count = item["query"], item["locale"], item.get("count", 1)
+        if not isinstance(query, str) or not isinstance(locale, str) or not locale:
+            raise ValueError("query and locale must be strings")
+        if not is_positive_int(count):
+            raise ValueError("count must be a positive integer")
+        counts.append(QueryCount(locale=locale, query=query, count=count))
+    return counts
+
+
+def queries_from_analytics(
+    period: int = LAST_7_DAYS, max_rows: int = 10_000
+) -> Iterator[QueryCount]:
+    """The most frequent site searches per locale, as recorded by analytics search events."""
+    for locale, query, count in googleanalytics.top_search_terms(period, max_rows=max_rows):
+        yield QueryCount(locale=locale, query=query, count=count)
+
+
+def warm_query_vectors(counts: Iterable[QueryCount], *, top_n: int) -> WarmupReport:
+    """Cache vectors for the ``top_n`` most searched queries of each locale.
+
+    Hit rates are measured over all the search volume supplied, not only the selected
+    queries, so they estimate what the cache answers for real traffic.
+    """
+    if top_n <= 0:
+        raise ValueError("top_n must be a positive integer")
+
+    index, recipe, _ = resolve_read_state()
+    report = WarmupReport(index=index)
+
+    volume: Counter[str] = Counter()
+    by_locale: defaultdict[str, Counter[str]] = defaultdict(Counter)
+    for item in counts:
+        query = normalize_query(item.query)
+        if not query or item.count <= 0:
+            continue
+        volume[query] += item.count
+        by_locale[item.locale][query] += item.count
+    report.searches = volume.total()
+
+    selected = {
+        query
+        for locale_counts in by_locale.values()
+        for query, _ in locale_counts.most_common(top_n)
+    }
+    report.selected = len(selected)
+
+    cached = cached_query_vectors(volume, recipe)
+    report.cached_searches_before = sum(volume[query] for query in cached)
+    report.cached_searches_after = report.cached_searches_before
+
+    refresh = {query: vector for query, vector in cached.items() if query in selected}
+    report.already_cached = len(refresh)
+    if refresh and store_query_vectors(refresh, recipe) == "write_failed":
+        report.write_failed += len(refresh)
+
+    # Most searched first, so an interrupted or failing run has warmed what matters most.
+    missing = sorted(
+        (query for query in selected if query not in cached), key=lambda query: -volume[query]
+    )
+    tokens = {query: count_tokens(query) for query in missing}
+    embeddable = [query for query in missing if tokens[query] <= max_input_tokens()]
+    report.oversized = len(missing) - len(embeddable)
+
+    start = 0
+    for batch_length in provider_request_batch_lengths([tokens[query] for query in embeddable]):
+        batch = embeddable[start : start + batch_length]
+        start += batch_length
+        stats = ProviderStats()
+        try:
+            vectors = get_embeddings(batch, task="query", recipe=recipe, stats=stats)
+        except EmbeddingUnavailable:
+            report.failed += len(batch)
+            continue
+        finally:
+            report.provider_requests += stats.request_count
+        if store_query_vectors(dict(zip(batch, vectors, strict=True)), recipe) == "write_failed":
+            report.write_failed += len(batch)
+            continue
+        report.embedded += len(batch)
+        report.cached_searches_after += sum(volume[query] for query in batch)
+
+    emit(
+        "retrieval.warmup.completed",
+        selected_count=report.selected,
+        already_cached_count=report.already_cached,
+        embedded_count=report.embedded,
+        oversized_count=report.oversized,
+        failed_count=report.failed,
+        write_failed_count=report.write_failed,
+        request_count=report.provider_requests,
+        hit_rate_before=report.hit_rate_before,
+        hit_rate_after=report.hit_rate_after,
+    )
+    return report
@@ -1,10 +1,12 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from dataclasses import field as dfield
 from datetime import UTC, datetime
+from hashlib import sha1
 from typing import Self, overload
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.paginator import EmptyPage, PageNotAnInteger
 from django.core.paginator import Paginator as DjPaginator
 from django.utils import timezone
@@ -22,9 +24,14 @@ from kitsune.search.config import (
     UPDATE_RETRY_ON_CONFLICT,
 )
 from kitsune.search.es_utils import es_client
-from kitsune.search.parser import Parser
+from kitsune.search.parser import Parser, reject_query
 from kitsune.search.parser.tokens import TermToken
 
+# Remembers which concrete index each alias points at, so result cache keys don't need
+# an Elasticsearch round trip to find out. Moving an alias overwrites its entry.
+ALIAS_CACHE_KEY = "search:alias:{alias}"
+RESULT_CACHE_KEY = "search:results:v1:{digest}"
+
 
 class SumoDocument(DSLDocument):
     """Base class with common methods for all the different documents."""
@@ -34,6 +41,10 @@ class SumoDocument(DSLDocument):
     #   False: An index action will be performed in ES.
     update_document = False
 
+    # Cheap fields, like vote counts, which change far more often than the rest of the
+    # document. They can be prepared and sent on their own with `prepare_counters`.
+    counter_fields: tuple[str, ...] = ()
+
     indexed_on = field.Date()
 
     class Meta:
@@ -103,6 +114,7 @@ class SumoDocument(DSLDocument):
                     {"add": {"index": new_index, "alias": alias}},
                 ]
             )
+        cache.set(ALIAS_CACHE_KEY.format(alias=alias), new_index, settings.CACHE_SHORT_TIMEOUT)
 
     @classmethod
     def alias_points_at(cls, alias):
@@ -177,10 +189,28 @@ class SumoDocument(DSLDocument):
 
         return obj
 
-    def to_action(self, action=None, is_bulk=False, **kwargs):
+    @classmethod
+    def prepare_counters(cls, instance):
+        """Prepare only the `counter_fields` of an object given a model instance.
+
+        The result is meant to be sent with `to_action("update", fields=cls.counter_fields)`.
+        """
+        obj = cls()
+
+        for f in cls.counter_fields:
+            prepare_method = getattr(obj, f"prepare_{f}", None)
+            setattr(obj, f, obj.get_field_value(f, instance, prepare_method))
+
+        obj.indexed_on = timezone.now()
+        obj.meta.id = instance.pk
+
+        return obj
+
+    def to_action(self, action=None, is_bulk=False, fields=None, **kwargs):
         """Method to construct the data for save, delete, update operations.
 
-        Useful for bulk operations.
+        Useful for bulk operations. Pass `fields` with an update to send only those fields
+        (and `indexed_on`) as a partial update.
         """
 
         # If an object has a discard field then mark it for deletion if exists
@@ -205,6 +235,11 @@ class SumoDocument(DSLDocument):
         if not action or action == "index":
             return payload if is_bulk else self.save(skip_empty=False, **kwargs)
         elif action == "update":
+            if fields is not None:
+                source = payload["_source"] if is_bulk else payload
+                for name in set(source) - {*fields, "indexed_on"}:
+                    del source[name]
+
             # add any additional args like doc_as_upsert
             payload.update(kwargs)
 
@@ -241,6 +276,14 @@ class SumoDocument(DSLDocument):
         """
         return cls.get_model()._default_manager
 
+    @classmethod
+    def get_counters_queryset(cls):
+        """
+        Return the queryset used to prepare only the `counter_fields`.
+        Child classes can override this to skip the work only the other fields need.
+        """
+        return cls.get_queryset()
+
     def get_field_value(self, field, instance, prepare_method):
         """Allow child classes to define their own logic for getting field values."""
         if prepare_method is not None:
@@ -254,6 +297,17 @@ class SumoDocument(DSLDocument):
         return ""
 
 
+def aliased_index(alias):
+    """Returns the index `alias` points at, looked up in the cache first."""
+    cache_key = ALIAS_CACHE_KEY.format(alias=alias)
+    index = cache.get(cache_key)
+    if index is None:
+        index = SumoDocument.alias_points_at(alias)
+        if index:
+            cache.set(cache_key, index, settings.CACHE_SHORT_TIMEOUT)
+    return index
+
+
 class SumoSearchInterface(ABC):
     """Base interface class for search classes.
 
@@ -310,8 +364,14 @@ class SumoSearch(SumoSearchInterface):
 
     Child classes should define values for the various abstract properties this
     class inherits, relevant to the documents the child class is searching over.
+
+    Child classes which set `cache_results` keep the results of each page in the cache for
+    `SEARCH_RESULT_CACHE_TIMEOUT` seconds. The cache key includes the indices the read
+    aliases point at, so moving an alias with `migrate_reads` starts from an empty cache.
     """
 
+    cache_results = False
+
     total: int = dfield(default=0, init=False)
     hits: list[AttrDict] = dfield(default_factory=list, init=False)
     results: list[dict] = dfield(default_factory=list, init=False)
@@ -347,7 +407,7 @@ class SumoSearch(SumoSearchInterface):
 
         if self.parse_query:
             try:
-                parsed = Parser(self.query)
+                parsed = Parser(self.query, scope=self.parser_scope())
             except ParseException:
                 pass
 
@@ -361,10 +421,60 @@ class SumoSearch(SumoSearchInterface):
             }
         )
 
+    def parser_scope(self):
+        """The search class, fields and settings a parsed query is rendered with."""
+        return repr((type(self).__name__, self.get_fields(), self.get_settings()))
+
+    def reject_parsed_query(self):
+        """Send this search's query down the plain, unparsed path from now on."""
+        reject_query(self.query, self.parser_scope())
+
+    def get_cache_params(self):
+        """The values which, together with the page, decide this search's results."""
+        params = [("parse_query", self.parse_query)]
+        for f in fields(self):
+            if f.init:
+                value = getattr(self, f.name)
+                # model instances, like a product, are represented by their primary key
+                params.append((f.name, getattr(value, "pk", value)))
+        return params
+
+    def result_cache_key(self, key):
+        """The cache key for the results of page `key`, or None if an alias is unset."""
+        indices = [aliased_index(alias) for alias in self.get_index().split(",")]
+        if not all(indices):
+            return None
+        if isinstance(key, slice):
+            key = (key.start, key.stop, key.step)
+        params = repr((type(self).__name__, self.get_cache_params(), key, indices))
+        return RESULT_CACHE_KEY.format(digest=sha1(params.encode()).hexdigest())
+
     def run(self, key: int | slice = slice(0, settings.SEARCH_RESULTS_PER_PAGE)) -> Self:
         """Perform search, placing the results in `self.results`, and the total
         number of results (across all pages) in `self.total`. Chainable."""
 
+        cache_key = None
+        if self.cache_results and settings.SEARCH_RESULT_CACHE_TIMEOUT:
+            cache_key = self.result_cache_key(key)
+            cached = cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                self.hits = []
+                self.last_key = key
+                self.total = cached["total"]
+                self.results = cached["results"]
+                return self
+
+        self._execute(key)
+
+        if cache_key:
+            cache.set(
+                cache_key,
+                {"results": self.results, "total": self.total},
+                settings.SEARCH_RESULT_CACHE_TIMEOUT,
+            )
+        return self
+
+    def _execute(self, key: int | slice) -> None:
         search = DSLSearch(using=es_client(), index=self.get_index()).params(
             **settings.ES_SEARCH_PARAMS
         )
@@ -384,7 +494,10 @@ class SumoSearch(SumoSearchInterface):
             if self.parse_query:
                 # try search again, but without parsing any advanced syntax
                 self.parse_query = False
-                return self.run(key)
+                self._execute(key)
+                # the query only fails once parsed, so don't parse it for later searches
+                self.reject_parsed_query()
+                return
             raise e
 
         self.hits = result.hits
@@ -393,8 +506,6 @@ class SumoSearch(SumoSearchInterface):
         self.total = self.hits.total.value  # type: ignore
         self.results = [self.make_result(hit) for hit in self.hits]
 
-        return self
-
 
 class SumoSearchPaginator(DjPaginator):
     """
@@ -419,7 +530,7 @@ class SumoSearchPaginator(DjPaginator):
             if isinstance(number, float) and not number.is_integer():
                 raise ValueError
             number = int(number)
-        except (TypeError, ValueError):
+        except TypeError, ValueError:
             raise PageNotAnInteger(_("That page number is not an integer"))
         if number < 1:
             raise EmptyPage(_("That page number is less than 1"))
@@ -141,6 +141,8 @@ class QuestionDocument(SumoDocument):
 
     locale = field.Keyword()
 
+    counter_fields = ("question_num_votes",)
+
     class Index:
         pass
 
@@ -234,6 +236,10 @@ class QuestionDocument(SumoDocument):
             .annotate(es_question_num_votes=Count("votes"))
         )
 
+    @classmethod
+    def get_counters_queryset(cls):
+        return Question.objects.annotate(es_question_num_votes=Count("votes"))
+
 
 class AnswerDocument(QuestionDocument):
     """
@@ -262,6 +268,8 @@ class AnswerDocument(QuestionDocument):
 
     is_solution = field.Boolean()
 
+    counter_fields = ("num_helpful_votes", "num_unhelpful_votes", "question_num_votes")
+
     @classmethod
     def prepare(cls, instance, **kwargs):
         """Override super method to exclude certain docs."""
@@ -333,6 +341,15 @@ class AnswerDocument(QuestionDocument):
             )
         )
 
+    @classmethod
+    def get_counters_queryset(cls):
+        return Answer.objects.prefetch_related(
+            Prefetch("question", queryset=QuestionDocument.get_counters_queryset())
+        ).annotate(
+            es_num_helpful_votes=Count("votes", filter=Q(votes__helpful=True)),
+            es_num_unhelpful_votes=Count("votes", filter=Q(votes__helpful=False)),
+        )
+
 
 class ProfileDocument(SumoDocument):
     username = field.Keyword(normalizer="lowercase")
@@ -1,14 +1,30 @@
 import importlib
 import inspect
+import logging
+import threading
+from collections import defaultdict
 
 from celery import shared_task
 from django.conf import settings
+from django.db import connection
 from elasticsearch import Elasticsearch
 from elasticsearch.dsl import Document, UpdateByQuery, analyzer, char_filter, token_filter
 from elasticsearch.helpers import bulk as es_bulk
+from elasticsearch.helpers import parallel_bulk as es_parallel_bulk
 from elasticsearch.helpers.errors import BulkIndexError
+from redis.exceptions import RedisError as RedisCommandError
 
 from kitsune.search import config
+from kitsune.sumo.redis_utils import RedisError, redis_client
+
+log = logging.getLogger("k.search.es")
+
+# Redis set of "<doc type name>:<object id>" members waiting to be indexed, and the key
+# which marks that a flush of that set is already scheduled.
+INDEX_QUEUE_KEY = "search:index-queue"
+INDEX_QUEUE_FLUSH_KEY = "search:index-queue:flush-scheduled"
+# Marks of objects which only need their counter fields updated: "<doc type name>:counters:<id>".
+COUNTERS_MARK = "counters"
 
 
 def _insert_custom_filters(analyzer_name, filter_list, char=False):
@@ -156,28 +172,56 @@ def index_object(doc_type_name, obj_id):
         doc_type.prepare(obj).to_action("index")
 
 
+def _prepare_actions(doc_type, obj_ids, counters_only=False):
+    """Yield the bulk actions which index the given objects of a document type."""
+
+    # set the appropriate action per document type
+    action = "index"
+    kwargs = {}
+    if counters_only:
+        db_objects = doc_type.get_counters_queryset().filter(pk__in=obj_ids)
+        prepare = doc_type.prepare_counters
+        action = "update"
+        kwargs.update({"fields": doc_type.counter_fields})
+    else:
+        db_objects = doc_type.get_queryset().filter(pk__in=obj_ids)
+        prepare = doc_type.prepare
+
+        # If the `update_document` is true we are using update instead of index
+        if doc_type.update_document:
+            action = "update"
+            kwargs.update({"doc_as_upsert": True})
+
+    for obj in db_objects:
+        yield prepare(obj).to_action(action=action, is_bulk=True, **kwargs)
+
+
+def _unexpected_errors(errors, counters_only=False):
+    """Filter out the bulk errors which don't mean that indexing failed."""
+    return [
+        error
+        for error in errors
+        if not (error.get("delete") and error["delete"]["status"] in [400, 404])
+        # a counter update of a document which isn't indexed (yet) has nothing to update
+        and not (counters_only and error.get("update") and error["update"]["status"] == 404)
+    ]
+
+
 @shared_task
 def index_objects_bulk(
     doc_type_name,
     obj_ids,
     timeout=settings.ES_BULK_DEFAULT_TIMEOUT,
     elastic_chunk_size=settings.ES_DEFAULT_ELASTIC_CHUNK_SIZE,
+    counters_only=False,
 ):
-    """Bulk index ORM objects given a list of object ids and a document type name."""
+    """Bulk index ORM objects given a list of object ids and a document type name.
 
-    doc_type = next(cls for cls in get_doc_types() if cls.__name__ == doc_type_name)
-
-    db_objects = doc_type.get_queryset().filter(pk__in=obj_ids)
-    # prepare the docs for indexing
-    docs = [doc_type.prepare(obj) for obj in db_objects]
+    With `counters_only`, only the document type's `counter_fields` are prepared and sent
+    as partial updates of documents already in the index; missing documents are skipped.
+    """
 
-    # set the appropriate action per document type
-    action = "index"
-    kwargs = {}
-    # If the `update_document` is true we are using update instead of index
-    if doc_type.update_document:
-        action = "update"
-        kwargs.update({"doc_as_upsert": True})
+    doc_type = next(cls for cls in get_doc_types() if cls.__name__ == doc_type_name)
 
     # if the request doesn't resolve within `timeout`,
     # sleep for `timeout` then try again up to `settings.ES_BULK_MAX_RETRIES` times,
@@ -188,18 +232,67 @@ def index_objects_bulk(
             retry_on_timeout=True,
             max_retries=settings.ES_BULK_MAX_RETRIES,
         ),
-        (doc.to_action(action=action, is_bulk=True, **kwargs) for doc in docs),
+        _prepare_actions(doc_type, obj_ids, counters_only=counters_only),
         chunk_size=elastic_chunk_size,
         raise_on_error=False,  # we'll raise the errors ourselves, so all the chunks get sent
         refresh=True if settings.TEST else False,  # update docs immediately when testing
     )
-    errors = [
-        error
-        for error in errors
-        if not (error.get("delete") and error["delete"]["status"] in [400, 404])
-    ]
+    errors = _unexpected_errors(errors, counters_only=counters_only)
+    if errors:
+        raise BulkIndexError(f"{len(errors)} document(s) failed to index.", errors)
+
+
+def index_objects_parallel(
+    doc_type_name,
+    obj_ids,
+    timeout=settings.ES_BULK_DEFAULT_TIMEOUT,
+    sql_chunk_size=settings.ES_DEFAULT_SQL_CHUNK_SIZE,
+    elastic_chunk_size=settings.ES_DEFAULT_ELASTIC_CHUNK_SIZE,
+    thread_count=4,
+):
+    """Index ORM objects from this process, given a list of object ids and a document type name.
+
+    Objects are read from the database `sql_chunk_size` at a time and their prepared actions
+    are streamed to ES through `parallel_bulk`, which sends `thread_count` bulk requests of
+    `elastic_chunk_size` documents at once. Returns the number of documents sent.
+    """
+
+    doc_type = next(cls for cls in get_doc_types() if cls.__name__ == doc_type_name)
+
+    caller = threading.get_ident()
+
+    def actions():
+        try:
+            for start in range(0, len(obj_ids), sql_chunk_size):
+                yield from _prepare_actions(doc_type, obj_ids[start : start + sql_chunk_size])
+        finally:
+            # `parallel_bulk` reads the actions on a thread of its pool, which opens its own
+            # database connection; close it with the actions.
+            if threading.get_ident() != caller:
+                connection.close()
+
+    sent = 0
+    errors = []
+    for ok, item in es_parallel_bulk(
+        es_client(
+            request_timeout=timeout,
+            retry_on_timeout=True,
+            max_retries=settings.ES_BULK_MAX_RETRIES,
+        ),
+        actions(),
+        thread_count=thread_count,
+        chunk_size=elastic_chunk_size,
+        raise_on_error=False,  # we'll raise the errors ourselves, so all the chunks get sent
+        refresh=True if settings.TEST else False,  # update docs immediately when testing
+    ):
+        sent += 1
+        if not ok:
+            errors.append(item)
+
+    errors = _unexpected_errors(errors)
     if errors:
         raise BulkIndexError(f"{len(errors)} document(s) failed to index.", errors)
+    return sent
 
 
 @shared_task
@@ -236,3 +329,78 @@ def delete_object(doc_type_name, obj_id):
     doc = doc_type()
     doc.meta.id = obj_id
     doc.to_action("delete")
+
+
+def queue_index(doc_type_name, obj_ids, counters_only=False):
+    """Mark ORM objects as needing to be indexed, given a document type name and object ids.
+
+    The marks are kept in a Redis set and indexed in bulk by `flush_index_queue`, which runs
+    `settings.ES_INDEX_QUEUE_WINDOW` seconds after the first mark of a window, so every
+    object is indexed once per window however many signals mark it. If the window is 0, or
+    Redis is unavailable, the objects are sent to be indexed immediately instead.
+
+    With `counters_only`, only the document type's `counter_fields` are updated, unless the
+    object is also marked to be fully indexed in the same window.
+    """
+    obj_ids = list(obj_ids)
+    if not obj_ids:
+        return
+
+    if settings.ES_INDEX_QUEUE_WINDOW:
+        prefix = f"{doc_type_name}:{COUNTERS_MARK}:" if counters_only else f"{doc_type_name}:"
+        try:
+            redis = redis_client("default")
+            redis.sadd(INDEX_QUEUE_KEY, *(f"{prefix}{obj_id}" for obj_id in obj_ids))
+            if redis.set(INDEX_QUEUE_FLUSH_KEY, 1, nx=True, ex=settings.ES_INDEX_QUEUE_WINDOW):
+                flush_index_queue.apply_async(countdown=settings.ES_INDEX_QUEUE_WINDOW)
+            return
+        except (RedisError, RedisCommandError) as e:
+            log.error("Redis error: {}".format(e))
+
+    if counters_only:
+        index_objects_bulk.delay(doc_type_name, obj_ids, counters_only=True)
+    elif len(obj_ids) == 1:
+        index_object.delay(doc_type_name, obj_ids[0])
+    else:
+        index_objects_bulk.delay(doc_type_name, obj_ids)
+
+
+@shared_task
+def flush_index_queue(chunk_size=settings.ES_DEFAULT_SQL_CHUNK_SIZE):
+    """Index the objects marked by `queue_index`, one bulk request per document type and chunk.
+
+    This also runs periodically, to pick up marks whose scheduled flush was lost.
+
+    A document type failing to index is logged and its marks are dropped, so it holds back
+    neither the other document types nor later flushes; its objects are marked again the
+    next time they change. Marks popped by a flush that dies before indexing them are lost
+    the same way.
+    """
+    redis = redis_client("default")
+    # Marks added from now on schedule another flush.
+    redis.delete(INDEX_QUEUE_FLUSH_KEY)
+
+    while members := redis.spop(INDEX_QUEUE_KEY, chunk_size):
+        obj_ids = defaultdict(set)
+        counter_ids = defaultdict(set)
+        for member in members:
+            doc_type_name, _, obj_id = member.rpartition(":")
+            if doc_type_name.endswith(f":{COUNTERS_MARK}"):
+                doc_type_name = doc_type_name.removesuffix(f":{COUNTERS_MARK}")
+                counter_ids[doc_type_name].add(int(obj_id))
+            else:
+                obj_ids[doc_type_name].add(int(obj_id))
+        for doc_type_name, ids in obj_ids.items():
+            _index_marked(doc_type_name, ids)
+        for doc_type_name, ids in counter_ids.items():
+            # fully indexed objects already have up-to-date counters
+            if ids := ids - obj_ids.get(doc_type_name, set()):
+                _index_marked(doc_type_name, ids, counters_only=True)
+
+
+def _index_marked(doc_type_name, obj_ids, **kwargs):
+    """Index the objects marked for a document type, logging rather than raising a failure."""
+    try:
+        index_objects_bulk(doc_type_name, list(obj_ids), **kwargs)
+    except Exception:
+        log.exception(f"Dropped {len(obj_ids)} marked {doc_type_name} objects failing to index.")
@@ -23,6 +23,7 @@ from kitsune.retrieval.checks import is_valid_query_embedding_rate
 from kitsune.retrieval.embeddings import EmbeddingUnavailable
 from kitsune.retrieval.events import emit
 from kitsune.retrieval.index import resolve_read_state
+from kitsune.retrieval.overfetch import authorization_overfetch
 from kitsune.retrieval.query import (
     AAQ_SOURCE,
     KB_SOURCE,
@@ -151,6 +152,16 @@ def run_hybrid_search(
                             embedding_ms = round((perf_counter() - embedding_started) * 1000)
 
         phase = "retrieval"
+        offset = (page - 1) * settings.SEARCH_RESULTS_PER_PAGE
+        overfetch = (
+            authorization_overfetch(
+                viewer_access.viewer_class,
+                source_set,
+                window=offset + settings.SEARCH_RESULTS_PER_PAGE,
+            )
+            if KB_SOURCE in source_set
+            else 0
+        )
         result = retrieve(
             query,
             viewer_access=viewer_access,
@@ -165,8 +176,8 @@ def run_hybrid_search(
             rank_window_size=settings.RETRIEVAL_RRF_RANK_WINDOW_SIZE,
             locale_composition=settings.RETRIEVAL_LOCALE_COMPOSITION,
             page_size=settings.SEARCH_RESULTS_PER_PAGE,
-            authorization_overfetch=settings.RETRIEVAL_AUTHORIZATION_OVERFETCH,
-            offset=(page - 1) * settings.SEARCH_RESULTS_PER_PAGE,
+            authorization_overfetch=overfetch,
+            offset=offset,
             max_offset=settings.RETRIEVAL_MAX_PAGE_OFFSET,
             default_operator=settings.RETRIEVAL_LEXICAL_DEFAULT_OPERATOR,
             minimum_should_match=(
@@ -217,10 +228,14 @@ def run_hybrid_search(
                 "degraded" if result.degraded else "fallback" if fallback_reason else "success"
             ),
             mode=result.mode,
+            semantic_engine=result.semantic_engine,
             kb_result_count=sum(item["type"] == "document" for item in presented),
             aaq_result_count=sum(item["type"] == "question" for item in presented),
             invalid_hit_count=result.invalid_hit_count,
             authorization_rejection_count=result.authorization_rejection_count,
+            authorization_cache_miss_count=result.authorization_cache_miss_count,
+            authorization_overfetch=overfetch,
+            viewer_class=viewer_access.viewer_class,
             failed_shard_count=result.failed_shards,
             requested_locale=locale,
             locale_fallback_count=sum(bool(item["locale_fallback"]) for item in presented),
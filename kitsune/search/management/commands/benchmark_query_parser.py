@@ -0,0 +1,102 @@
+"""Time search query parsing with and without the parse cache.
+
+Each pass clears the cache and parses every query of the corpus once, then parses them all
+again from the cache. The corpus is one query per line from --file, such as an export of
+the most frequent searches, or a built-in sample of plain and advanced queries.
+"""
+
+from statistics import quantiles
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from pyparsing import ParseException
+
+from kitsune.search.parser import Parser, clear_parse_cache
+
+SAMPLE_QUERIES = [
+    "firefox",
+    "firefox crashes",
+    "firefox keeps crashing on startup",
+    "how do i clear my cache",
+    "bookmarks disappeared after update",
+    "sync not working",
+    "reset password firefox account",
+    "youtube videos won't play",
+    "pdf viewer",
+    "import passwords from chrome",
+    "thunderbird not receiving emails",
+    "更新 firefox",
+    "mettre à jour firefox",
+    '"secure connection failed"',
+    '"this connection is not secure" windows',
+    "sync AND bookmarks",
+    "crash OR hang",
+    "firefox NOT thunderbird",
+    "NOT sync",
+    "(addons OR extensions) AND disabled",
+    "field:title:sync",
+    "field:content:(pop-up blocker)",
+    "exact:category:troubleshooting crash",
+    "range:updated:gt:2023-01-01 sync",
+    "(a b",
+    "exact:category:(how-to",
+]
+
+
+def _milliseconds(timings):
+    if len(timings) > 1:
+        cuts = quantiles(timings, n=20)
+        p50, p95 = cuts[9], cuts[18]
+    else:
+        p50 = p95 = timings[0]
+    return f"p50 {p50:>8.3f} ms   p95 {p95:>8.3f} ms   total {sum(timings):>10.1f} ms"
+
+
+def _parse_all(queries):
+    timings = []
+    rejected = 0
+    for query in queries:
+        started = perf_counter()
+        try:
+            Parser(query)
+        except ParseException:
+            rejected += 1
+        timings.append((perf_counter() - started) * 1000)
+    return timings, rejected
+
+
+class Command(BaseCommand):
+    help = "Measure search query parse times, uncached and cached."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            default=None,
+            metavar="PATH",
+            help="Queries to parse, one per line. Absent means a built-in sample.",
+        )
+        parser.add_argument("--passes", type=int, default=5, help="Times to parse the corpus.")
+
+    def handle(self, *args, **options):
+        if options["passes"] <= 0:
+            raise CommandError("--passes must be a positive integer.")
+        if options["file"]:
+            with open(options["file"], encoding="utf-8") as f:
+                queries = [line.strip() for line in f if line.strip()]
+        else:
+            queries = SAMPLE_QUERIES
+        if not queries:
+            raise CommandError("The corpus is empty.")
+
+        uncached, cached = [], []
+        for _ in range(options["passes"]):
+            clear_parse_cache()
+            timings, rejected = _parse_all(queries)
+            uncached.extend(timings)
+            cached.extend(_parse_all(queries)[0])
+        clear_parse_cache()
+
+        write = self.stdout.write
+        write(f"{len(queries):,} queries ({rejected:,} unparseable), {options['passes']} passes:")
+        write(f"  uncached   {_milliseconds(uncached)}")
+        write(f"  cached     {_milliseconds(cached)}")
@@ -1,11 +1,33 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from math import ceil
 
+import django
 from dateutil.parser import parse as dateutil_parse
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from django.db import connection, reset_queries
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, reset_queries
 
-from kitsune.search.es_utils import get_doc_types, index_objects_bulk
+from kitsune.search.es_utils import get_doc_types, index_objects_bulk, index_objects_parallel
+
+
+def _setup_worker():
+    """Make sure Django is set up in a worker process, whichever way it was started."""
+    django.setup()
+
+
+def _reindex_slice(doc_type_name, obj_ids, options):
+    """Index one slice of a document type's ids, returning how many and how long it took."""
+    started = time.monotonic()
+    sent = index_objects_parallel(
+        doc_type_name,
+        obj_ids,
+        timeout=options["timeout"],
+        sql_chunk_size=options["sql_chunk_size"],
+        elastic_chunk_size=options["elastic_chunk_size"],
+        thread_count=options["threads"],
+    )
+    return sent, time.monotonic() - started
 
 
 class Command(BaseCommand):
@@ -62,6 +84,22 @@ class Command(BaseCommand):
             default=None,
             help="Only index model instances updated after this date",
         )
+        parser.add_argument(
+            "--parallel",
+            type=int,
+            default=0,
+            metavar="N",
+            help=(
+                "Index from this command instead of Celery, splitting each doc type's ids "
+                "into N slices indexed by N processes at once"
+            ),
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=4,
+            help="With --parallel, the number of bulk requests each process sends at once",
+        )
         parser.add_argument(
             "--print-sql-count",
             action="store_true",
@@ -69,6 +107,9 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **kwargs):
+        if kwargs["parallel"] < 0 or kwargs["threads"] <= 0:
+            raise CommandError("--parallel must not be negative and --threads must be positive.")
+
         doc_types = get_doc_types()
 
         limit = kwargs["limit"]
@@ -115,6 +156,10 @@ class Command(BaseCommand):
             id_list = list(qs.values_list("pk", flat=True))
             sql_chunk_size = kwargs["sql_chunk_size"]
 
+            if kwargs["parallel"]:
+                self.reindex_parallel(dt.__name__, sorted(id_list), kwargs)
+                continue
+
             # slice the list of ids into chunks of `sql_chunk_size` and send a task to celery
             # to process each chunk. we do this so as to not OOM on celery when processing
             # tens of thousands of documents
@@ -134,3 +179,60 @@ class Command(BaseCommand):
                     self.stdout.write(f"{len(connection.queries)} SQL queries executed")
                     reset_queries()
                 self.stdout.write(f"Indexed {min(end, count)} out of {count}")
+
+    def reindex_parallel(self, doc_type_name, id_list, options):
+        """Split the ids into contiguous slices and index each in its own process."""
+        slice_count = min(options["parallel"], len(id_list)) or 1
+        slice_size = ceil(len(id_list) / slice_count) or 1
+        slices = [id_list[x : x + slice_size] for x in range(0, len(id_list), slice_size)]
+        # only pass picklable options to the worker processes
+        slice_options = {
+            key: options[key]
+            for key in ("timeout", "sql_chunk_size", "elastic_chunk_size", "threads")
+        }
+
+        started = time.monotonic()
+        indexed = 0
+        failures = []
+        for number, result in self.run_slices(doc_type_name, slices, slice_options):
+            if isinstance(result, Exception):
+                self.stderr.write(f"Slice {number}/{len(slices)} failed: {result}")
+                failures.append(number)
+                continue
+            sent, seconds = result
+            indexed += sent
+            self.stdout.write(
+                f"Slice {number}/{len(slices)}: {sent} documents in {seconds:.1f}s "
+                f"({sent / seconds if seconds else 0:.1f} docs/sec)"
+            )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"Indexed {indexed} documents of {doc_type_name} in {elapsed:.1f}s "
+            f"({indexed / elapsed if elapsed else 0:.1f} docs/sec)"
+        )
+        if failures:
+            raise CommandError(f"{len(failures)} slice(s) of {doc_type_name} failed to index.")
+
+    def run_slices(self, doc_type_name, slices, options):
+        """Yield each slice's number with its result, or the exception it raised."""
+        if len(slices) <= 1:
+            for number, obj_ids in enumerate(slices, start=1):
+                try:
+                    yield number, _reindex_slice(doc_type_name, obj_ids, options)
+                except Exception as e:
+                    yield number, e
+            return
+
+        # every process opens its own database connection; none may inherit this one
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=len(slices), initializer=_setup_worker) as executor:
+            futures = {
+                executor.submit(_reindex_slice, doc_type_name, obj_ids, options): number
+                for number, obj_ids in enumerate(slices, start=1)
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], e
@@ -1,3 +1,8 @@
+from collections import OrderedDict
+from collections.abc import Hashable
+from threading import Lock
+from typing import NamedTuple
+
 from pyparsing import (
     Literal,
     ParseException,
@@ -14,9 +19,11 @@ from pyparsing import (
 )
 
 from .operators import AndOperator, FieldOperator, NotOperator, OrOperator, SpaceOperator
-from .tokens import ExactToken, RangeToken, TermToken
+from .tokens import BaseToken, ExactToken, RangeToken, TermToken
 
 _MAX_NESTING_DEPTH = 10
+# Queries whose outcome `Parser` remembers, least recently used dropped first.
+_PARSE_CACHE_SIZE = 2048
 
 # Avoid repeated backtracking through nested Boolean expressions.
 ParserElement.enable_packrat()
@@ -67,30 +74,106 @@ search_expression = (
 )
 
 
+class _Rejected(NamedTuple):
+    """Stands in for a parsed tree when a query should take the plain term path."""
+
+    loc: int
+    msg: str
+
+
+class _ParseCache:
+    """A bounded LRU of parsed trees, or of rejected queries, by key.
+
+    Rendering a tree doesn't change it, so one tree serves every search for its query.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._entries: OrderedDict[Hashable, BaseToken | _Rejected] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Parsed trees by query, and queries rejected by the search backend by query and scope.
+_parse_cache = _ParseCache(_PARSE_CACHE_SIZE)
+_rejected_cache = _ParseCache(_PARSE_CACHE_SIZE)
+
+
+def reject_query(query, scope=""):
+    """Make `Parser` raise ParseException for `query` in `scope`, without parsing it.
+
+    For queries which parse, but which Elasticsearch refuses once parsed. Whether it does
+    depends on the fields and settings the query is rendered with, so `scope` names them,
+    and only a `Parser` given the same scope takes the fallback path.
+    """
+    _rejected_cache.set((query, scope), _Rejected(0, "query was rejected by the search backend"))
+
+
+def clear_parse_cache():
+    """Forget every parsed and rejected query."""
+    _parse_cache.clear()
+    _rejected_cache.clear()
+
+
+def _parse(query):
+    depth = 0
+    quoted = False
+    escaped = False
+    for position, character in enumerate(query):
+        if escaped:
+            escaped = False
+        elif quoted and character == "\\":
+            escaped = True
+        elif character == '"':
+            quoted = not quoted
+        elif not quoted and character == "(":
+            depth += 1
+            if depth > _MAX_NESTING_DEPTH:
+                raise ParseException(query, position, "query nesting is too deep")
+        elif not quoted and character == ")":
+            depth = max(0, depth - 1)
+    try:
+        return search_expression.parse_string(query)[0]
+    except RecursionError as exc:
+        # The lightweight check above cannot exactly reproduce pyparsing's treatment of
+        # malformed quotes. Keep parser complexity failures on the existing fallback path.
+        raise ParseException(query, 0, "query nesting is too deep") from exc
+
+
 class Parser:
-    def __init__(self, query):
-        depth = 0
-        quoted = False
-        escaped = False
-        for position, character in enumerate(query):
-            if escaped:
-                escaped = False
-            elif quoted and character == "\\":
-                escaped = True
-            elif character == '"':
-                quoted = not quoted
-            elif not quoted and character == "(":
-                depth += 1
-                if depth > _MAX_NESTING_DEPTH:
-                    raise ParseException(query, position, "query nesting is too deep")
-            elif not quoted and character == ")":
-                depth = max(0, depth - 1)
-        try:
-            self.parsed = search_expression.parse_string(query)[0]
-        except RecursionError as exc:
-            # The lightweight check above cannot exactly reproduce pyparsing's treatment of
-            # malformed quotes. Keep parser complexity failures on the existing fallback path.
-            raise ParseException(query, 0, "query nesting is too deep") from exc
+    def __init__(self, query, scope=""):
+        if (rejected := _rejected_cache.get((query, scope))) is not None:
+            raise ParseException(query, rejected.loc, rejected.msg)
+        parsed = _parse_cache.get(query)
+        if parsed is None:
+            try:
+                parsed = _parse(query)
+            except ParseException as exc:
+                parsed = _Rejected(exc.loc, exc.msg)
+            _parse_cache.set(query, parsed)
+        if isinstance(parsed, _Rejected):
+            raise ParseException(query, parsed.loc, parsed.msg)
+        self.parsed = parsed
 
     def __repr__(self):
         """Create a string representation of this parsed string suitable for debugging."""
@@ -372,6 +372,8 @@ class ForumSearch(SumoSearch):
 class CompoundSearch(SumoSearch):
     """Combine a number of SumoSearch classes into one search."""
 
+    cache_results = True
+
     _children: list[SumoSearch] = dfield(default_factory=list, init=False)
     _parse_query: bool = True
 
@@ -386,6 +388,13 @@ class CompoundSearch(SumoSearch):
         for child in self._children:
             child.parse_query = value
 
+    def reject_parsed_query(self):
+        for child in self._children:
+            child.reject_parsed_query()
+
+    def get_cache_params(self):
+        return [(type(child).__name__, child.get_cache_params()) for child in self._children]
+
     def add(self, child):
         """Add a SumoSearch instance to search over. Chainable."""
         self._children.append(child)
@@ -2,12 +2,7 @@ from django.db.models.signals import m2m_changed, post_delete, post_save
 
 from kitsune.questions.models import Answer, AnswerVote, Question, QuestionVote
 from kitsune.search.decorators import search_receiver
-from kitsune.search.es_utils import (
-    delete_object,
-    index_object,
-    index_objects_bulk,
-    remove_from_field,
-)
+from kitsune.search.es_utils import delete_object, queue_index, remove_from_field
 from kitsune.tags.models import SumoTag
 
 
@@ -16,8 +11,8 @@ from kitsune.tags.models import SumoTag
 def handle_question_save(instance, **kwargs):
     if not isinstance(instance, Question):
         return
-    index_object.delay("QuestionDocument", instance.pk)
-    index_objects_bulk.delay("AnswerDocument", list(instance.answers.values_list("pk", flat=True)))
+    queue_index("QuestionDocument", [instance.pk])
+    queue_index("AnswerDocument", instance.answers.values_list("pk", flat=True))
 
 
 @search_receiver(post_delete, Question)
@@ -28,7 +23,7 @@ def handle_question_delete(instance, **kwargs):
 @search_receiver(post_delete, Answer)
 def handle_answer_delete(instance, **kwargs):
     delete_object.delay("AnswerDocument", instance.pk)
-    index_object.delay("QuestionDocument", instance.question_id)
+    queue_index("QuestionDocument", [instance.question_id])
 
 
 @search_receiver(post_delete, SumoTag)
@@ -40,24 +35,30 @@ def handle_tag_delete(instance, **kwargs):
 def handle_tag_save(instance, created=False, **kwargs):
     if created:
         return
-    question_ids = list(Question.objects.filter(tags=instance).values_list("pk", flat=True))
-    if question_ids:
-        index_objects_bulk.delay("QuestionDocument", question_ids)
+    queue_index(
+        "QuestionDocument", Question.objects.filter(tags=instance).values_list("pk", flat=True)
+    )
+
+
+# Votes only change the documents' counter fields, so only those are updated.
 
 
+@search_receiver(post_save, QuestionVote)
 @search_receiver(post_delete, QuestionVote)
-def handle_question_vote_delete(instance, **kwargs):
-    index_object.delay("QuestionDocument", instance.question_id)
-    index_objects_bulk.delay(
-        "AnswerDocument", list(instance.question.answers.values_list("pk", flat=True))
+def handle_question_vote_change(instance, **kwargs):
+    queue_index("QuestionDocument", [instance.question_id], counters_only=True)
+    queue_index(
+        "AnswerDocument",
+        Answer.objects.filter(question_id=instance.question_id).values_list("pk", flat=True),
+        counters_only=True,
     )
 
 
 @search_receiver(post_save, AnswerVote)
 def handle_answer_vote_save(instance, **kwargs):
-    index_object.delay("AnswerDocument", instance.answer_id)
+    queue_index("AnswerDocument", [instance.answer_id], counters_only=True)
 
 
 @search_receiver(post_delete, AnswerVote)
 def handle_answer_vote_delete(instance, **kwargs):
-    index_object.delay("AnswerDocument", instance.answer_id)
+    queue_index("AnswerDocument", [instance.answer_id], counters_only=True)
@@ -10,7 +10,9 @@ from kitsune.questions.tests import (
     QuestionVoteFactory,
 )
 from kitsune.search.documents import AnswerDocument, QuestionDocument
+from kitsune.search.es_utils import COUNTERS_MARK, INDEX_QUEUE_FLUSH_KEY, INDEX_QUEUE_KEY
 from kitsune.search.tests import ElasticTestCase
+from kitsune.sumo.redis_utils import redis_client
 from kitsune.tags.tests import TagFactory
 from kitsune.wiki.tests import DocumentFactory
 
@@ -191,3 +193,32 @@ class AnswerDocumentSignalsTests(ElasticTestCase):
         tag.delete()
 
         self.assertEqual(self.get_doc().question_tag_ids, [])
+
+
+@override_settings(ES_INDEX_QUEUE_WINDOW=60)
+class VoteStormSignalsTests(ElasticTestCase):
+    def setUp(self):
+        self.redis = redis_client("default")
+        self.redis.delete(INDEX_QUEUE_KEY, INDEX_QUEUE_FLUSH_KEY)
+        self.addCleanup(self.redis.delete, INDEX_QUEUE_KEY, INDEX_QUEUE_FLUSH_KEY)
+        self.answer = AnswerFactory()
+
+    @patch("kitsune.search.es_utils.flush_index_queue.apply_async")
+    def test_votes_in_one_window_mark_the_answer_once(self, apply_async):
+        self.redis.delete(INDEX_QUEUE_KEY, INDEX_QUEUE_FLUSH_KEY)
+
+        AnswerVoteFactory.create_batch(5, answer=self.answer, helpful=True)
+
+        apply_async.assert_called_once()
+        self.assertIn(f"AnswerDocument:{self.answer.id}", self.redis.smembers(INDEX_QUEUE_KEY))
+
+    @patch("kitsune.search.es_utils.flush_index_queue.apply_async")
+    def test_a_question_vote_marks_the_counters_of_the_question_and_its_answers(self, apply_async):
+        self.redis.delete(INDEX_QUEUE_KEY, INDEX_QUEUE_FLUSH_KEY)
+
+        QuestionVoteFactory(question=self.answer.question)
+
+        apply_async.assert_called_once()
+        marks = self.redis.smembers(INDEX_QUEUE_KEY)
+        self.assertIn(f"QuestionDocument:{COUNTERS_MARK}:{self.answer.question_id}", marks)
+        self.assertIn(f"AnswerDocument:{COUNTERS_MARK}:{self.answer.id}", marks)
@@ -1,8 +1,13 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test.utils import override_settings
 from elasticsearch.helpers import bulk as es_bulk
 
-from kitsune.search.documents import ProfileDocument
+from kitsune.search.base import ALIAS_CACHE_KEY, SumoSearch
+from kitsune.search.documents import ProfileDocument, WikiDocument
 from kitsune.search.es_utils import es_client
+from kitsune.search.search import CompoundSearch, WikiSearch
 from kitsune.search.tests import ElasticTestCase
 from kitsune.users.tests import GroupFactory, ProfileFactory
 
@@ -40,3 +45,57 @@ class ToActionTests(ElasticTestCase):
         payload = self.prepare().to_action("update", is_bulk=True)
         es_bulk(es_client(), [payload])
         self.assertEqual(self.doc.group_ids, [])
+
+
+@override_settings(SEARCH_RESULT_CACHE_TIMEOUT=300)
+class ResultCacheTests(ElasticTestCase):
+    def search(self, query="firefox", locale="en-US"):
+        search = CompoundSearch()
+        search.add(WikiSearch(query=query, locale=locale))
+        return search
+
+    def run_search(self, search, key=slice(0, 10)):
+        with mock.patch.object(SumoSearch, "_execute", autospec=True) as execute:
+            search.run(key)
+        return execute.call_count
+
+    def test_repeated_search_is_served_from_the_cache(self):
+        self.assertEqual(self.run_search(self.search()), 1)
+        self.assertEqual(self.run_search(self.search()), 0)
+
+    def test_query_locale_and_page_are_part_of_the_key(self):
+        self.run_search(self.search())
+
+        self.assertEqual(self.run_search(self.search(query="sync")), 1)
+        self.assertEqual(self.run_search(self.search(locale="de")), 1)
+        self.assertEqual(self.run_search(self.search(), key=slice(10, 20)), 1)
+
+    def test_moving_the_read_alias_misses_the_cache(self):
+        self.run_search(self.search())
+        cache.set(ALIAS_CACHE_KEY.format(alias=WikiDocument.Index.read_alias), "sumo_wiki_new")
+
+        self.assertEqual(self.run_search(self.search()), 1)
+
+    def test_migrate_reads_records_the_new_read_index(self):
+        read_alias = WikiDocument.Index.read_alias
+        cache.set(ALIAS_CACHE_KEY.format(alias=read_alias), "sumo_wiki_old")
+
+        WikiDocument.migrate_reads()
+
+        self.assertEqual(
+            cache.get(ALIAS_CACHE_KEY.format(alias=read_alias)),
+            WikiDocument.alias_points_at(read_alias),
+        )
+
+    def test_cached_page_has_results_and_total(self):
+        search = self.search().run()
+        cached = self.search().run()
+
+        self.assertEqual((cached.results, cached.total), (search.results, search.total))
+        self.assertEqual(cached.hits, [])
+
+    @override_settings(SEARCH_RESULT_CACHE_TIMEOUT=0)
+    def test_zero_timeout_disables_the_cache(self):
+        self.run_search(self.search())
+
+        self.assertEqual(self.run_search(self.search()), 1)
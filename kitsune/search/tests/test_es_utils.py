@@ -1,15 +1,31 @@
-from unittest.mock import patch
+from io import StringIO
+from unittest.mock import call, patch
 
+from django.core.management import call_command
 from django.test.utils import override_settings
 from elasticsearch import NotFoundError
 from elasticsearch.helpers.errors import BulkIndexError
 
 from kitsune.questions.models import Question
-from kitsune.questions.tests import AnswerFactory, QuestionFactory
+from kitsune.questions.tests import (
+    AnswerFactory,
+    AnswerVoteFactory,
+    QuestionFactory,
+    QuestionVoteFactory,
+)
 from kitsune.search.base import SumoDocument
-from kitsune.search.documents import QuestionDocument
-from kitsune.search.es_utils import index_objects_bulk
+from kitsune.search.documents import AnswerDocument, QuestionDocument
+from kitsune.search.es_utils import (
+    INDEX_QUEUE_FLUSH_KEY,
+    INDEX_QUEUE_KEY,
+    flush_index_queue,
+    index_objects_bulk,
+    index_objects_parallel,
+    queue_index,
+)
 from kitsune.search.tests import ElasticTestCase
+from kitsune.sumo.redis_utils import redis_client
+from kitsune.sumo.tests import TestCase
 
 
 @override_settings(ES_LIVE_INDEXING=False)
@@ -55,3 +71,137 @@ class IndexObjectsBulkTestCase(ElasticTestCase):
             QuestionDocument.get(id_without_exception)
         except NotFoundError:
             self.fail("Couldn't get question, so later chunks weren't sent.")
+
+
+@override_settings(ES_LIVE_INDEXING=False)
+class IndexCountersBulkTestCase(ElasticTestCase):
+    def setUp(self):
+        self.answer = AnswerFactory(content="answer")
+        self.question = self.answer.question
+        index_objects_bulk("QuestionDocument", [self.question.id])
+        index_objects_bulk("AnswerDocument", [self.answer.id])
+
+    def test_only_counter_fields_are_sent(self):
+        Question.objects.filter(id=self.question.id).update(title="changed")
+        QuestionVoteFactory(question=self.question)
+        AnswerVoteFactory(answer=self.answer, helpful=True)
+
+        index_objects_bulk("QuestionDocument", [self.question.id], counters_only=True)
+        index_objects_bulk("AnswerDocument", [self.answer.id], counters_only=True)
+
+        question_doc = QuestionDocument.get(self.question.id)
+        self.assertEqual(question_doc.question_num_votes, 1)
+        self.assertNotEqual(question_doc.question_title["en-US"], "changed")
+        self.assertIn("answer", question_doc.answer_content["en-US"])
+        answer_doc = AnswerDocument.get(self.answer.id)
+        self.assertEqual((answer_doc.num_helpful_votes, answer_doc.question_num_votes), (1, 1))
+        self.assertEqual(answer_doc.content["en-US"], "answer")
+
+    def test_missing_documents_are_skipped(self):
+        answer = AnswerFactory(question=self.question)
+
+        index_objects_bulk("AnswerDocument", [answer.id], counters_only=True)
+
+        with self.assertRaises(NotFoundError):
+            AnswerDocument.get(answer.id)
+
+
+@override_settings(ES_LIVE_INDEXING=False)
+class ReindexParallelTestCase(ElasticTestCase):
+    def setUp(self):
+        self.ids = [QuestionFactory().id for _ in range(3)]
+
+    def test_objects_are_streamed_in_sql_chunks(self):
+        sent = index_objects_parallel(
+            "QuestionDocument", self.ids, sql_chunk_size=2, elastic_chunk_size=1, thread_count=2
+        )
+
+        self.assertEqual(sent, 3)
+        for question_id in self.ids:
+            QuestionDocument.get(question_id)
+
+    @patch("kitsune.search.es_utils.connection")
+    def test_the_database_connection_of_the_pool_thread_is_closed(self, connection):
+        index_objects_parallel("QuestionDocument", self.ids, thread_count=2)
+
+        connection.close.assert_called_once()
+
+    def test_command_reports_docs_per_second(self):
+        stdout = StringIO()
+
+        call_command("es_reindex", "--limit", "QuestionDocument", "--parallel", "1", stdout=stdout)
+
+        output = stdout.getvalue()
+        self.assertIn("Slice 1/1: 3 documents", output)
+        self.assertRegex(output, r"Indexed 3 documents of QuestionDocument in .*docs/sec")
+        for question_id in self.ids:
+            QuestionDocument.get(question_id)
+
+
+@override_settings(ES_INDEX_QUEUE_WINDOW=60)
+class IndexQueueTestCase(TestCase):
+    def setUp(self):
+        self.redis = redis_client("default")
+        self.redis.delete(INDEX_QUEUE_KEY, INDEX_QUEUE_FLUSH_KEY)
+        self.addCleanup(self.redis.delete, INDEX_QUEUE_KEY, INDEX_QUEUE_FLUSH_KEY)
+
+    @patch("kitsune.search.es_utils.index_objects_bulk")
+    @patch("kitsune.search.es_utils.flush_index_queue.apply_async")
+    def test_marks_are_deduplicated_and_flushed_once_per_window(self, apply_async, bulk):
+        for _ in range(5):
+            queue_index("AnswerDocument", [1, 2])
+        queue_index("QuestionDocument", [3])
+
+        apply_async.assert_called_once_with(countdown=60)
+        flush_index_queue()
+
+        self.assertEqual(
+            sorted((args[0], sorted(args[1])) for args, _ in bulk.call_args_list),
+            [("AnswerDocument", [1, 2]), ("QuestionDocument", [3])],
+        )
+        self.assertEqual(self.redis.scard(INDEX_QUEUE_KEY), 0)
+
+        queue_index("AnswerDocument", [1])
+        self.assertEqual(apply_async.call_count, 2)
+
+    @patch("kitsune.search.es_utils.index_objects_bulk")
+    @patch("kitsune.search.es_utils.flush_index_queue.apply_async")
+    def test_a_failing_document_type_is_logged_and_dropped(self, apply_async, bulk):
+        def fail_answers(doc_type_name, *args, **kwargs):
+            if doc_type_name == "AnswerDocument":
+                raise ConnectionError
+
+        bulk.side_effect = fail_answers
+        queue_index("AnswerDocument", [1, 2])
+        queue_index("QuestionDocument", [3])
+
+        with self.assertLogs("k.search.es", level="ERROR"):
+            flush_index_queue()
+
+        self.assertIn(call("QuestionDocument", [3]), bulk.call_args_list)
+        self.assertEqual(self.redis.scard(INDEX_QUEUE_KEY), 0)
+
+    @override_settings(ES_INDEX_QUEUE_WINDOW=0)
+    @patch("kitsune.search.es_utils.index_objects_bulk.delay")
+    @patch("kitsune.search.es_utils.index_object.delay")
+    def test_no_window_indexes_immediately(self, index_object, bulk):
+        queue_index("QuestionDocument", [1])
+        queue_index("AnswerDocument", [2, 3])
+        queue_index("AnswerDocument", [])
+
+        index_object.assert_called_once_with("QuestionDocument", 1)
+        self.assertEqual(bulk.call_args_list, [call("AnswerDocument", [2, 3])])
+        self.assertEqual(self.redis.scard(INDEX_QUEUE_KEY), 0)
+
+    @patch("kitsune.search.es_utils.index_objects_bulk")
+    @patch("kitsune.search.es_utils.flush_index_queue.apply_async")
+    def test_counter_marks_are_dropped_for_fully_indexed_objects(self, apply_async, bulk):
+        queue_index("AnswerDocument", [1, 2], counters_only=True)
+        queue_index("AnswerDocument", [2])
+
+        flush_index_queue()
+
+        self.assertEqual(
+            bulk.call_args_list,
+            [call("AnswerDocument", [2]), call("AnswerDocument", [1], counters_only=True)],
+        )
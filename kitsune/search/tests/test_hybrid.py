@@ -14,6 +14,7 @@ from kitsune.retrieval.access import (
     ViewerAccess,
 )
 from kitsune.retrieval.embeddings import EmbeddingRecipe, EmbeddingUnavailable
+from kitsune.retrieval.overfetch import _rejection_rates, record_authorization
 from kitsune.retrieval.query import (
     HighlightFragment,
     LegacyQuestion,
@@ -97,6 +98,11 @@ def _run(**patches):
 
 
 class HybridOrchestrationTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        _rejection_rates.clear()
+        self.addCleanup(_rejection_rates.clear)
+
     def test_existing_tabs_map_to_explicit_sources(self):
         self.assertEqual(sources_for_where(1), {"kb"})
         self.assertEqual(sources_for_where(2), {"aaq"})
@@ -172,6 +178,8 @@ class HybridOrchestrationTests(SimpleTestCase):
             {
                 "aaq_result_count",
                 "authorization_rejection_count",
+                "authorization_cache_miss_count",
+                "authorization_overfetch",
                 "cache_lookup",
                 "cache_write",
                 "db_ms",
@@ -185,11 +193,79 @@ class HybridOrchestrationTests(SimpleTestCase):
                 "outcome",
                 "invalid_hit_count",
                 "requested_locale",
+                "semantic_engine",
                 "total_ms",
+                "viewer_class",
             },
         )
         self.assertNotIn("firefox", repr(event.__dict__))
 
+    @override_settings(
+        RETRIEVAL_AUTHORIZATION_OVERFETCH=5,
+        RETRIEVAL_AUTHORIZATION_MAX_OVERFETCH=12,
+        RETRIEVAL_AUTHORIZATION_OVERFETCH_SAMPLES=50,
+        RETRIEVAL_AUTHORIZATION_OVERFETCH_PERCENTILE=90,
+        SEARCH_RESULTS_PER_PAGE=10,
+    )
+    def test_overfetch_follows_the_viewer_class_and_source_mix(self):
+        for _ in range(50):
+            record_authorization("group", {"kb"}, considered=15, rejected=3)
+            record_authorization("public", {"kb"}, considered=15, rejected=0)
+
+        overfetch = {}
+        for viewer_access, sources in (
+            (ViewerAccess((3,)), {"kb"}),
+            (ViewerAccess(), {"kb"}),
+            (ViewerAccess(), {"kb", "aaq"}),
+            (ViewerAccess(), {"aaq"}),
+        ):
+            with (
+                _run(viewer_access_for=viewer_access) as (*_, retrieve),
+                self.assertLogs("k.retrieval", level="INFO") as logs,
+            ):
+                run_hybrid_search(
+                    _request(),
+                    query="firefox",
+                    locale="en-US",
+                    sources=sources,
+                    product_id=None,
+                    page=1,
+                )
+            [event] = [r for r in logs.records if r.getMessage() == "retrieval.query.completed"]
+            key = (viewer_access.viewer_class, "+".join(sorted(sources)))
+            overfetch[key] = event.authorization_overfetch
+            self.assertEqual(event.viewer_class, viewer_access.viewer_class)
+            if "kb" in sources:
+                self.assertEqual(
+                    retrieve.call_args.kwargs["authorization_overfetch"],
+                    event.authorization_overfetch,
+                )
+
+        self.assertEqual(
+            overfetch,
+            {
+                # A fifth of the candidates rejected needs a quarter more of them.
+                ("group", "kb"): 3,
+                ("public", "kb"): 0,
+                # Too few samples for this mix yet: the configured starting value.
+                ("public", "aaq+kb"): 5,
+                ("public", "aaq"): 0,
+            },
+        )
+
+        for _ in range(50):
+            record_authorization("group", {"kb"}, considered=10, rejected=9)
+        with _run(viewer_access_for=ViewerAccess((3,))) as (*_, retrieve):
+            run_hybrid_search(
+                _request(),
+                query="firefox",
+                locale="en-US",
+                sources={"kb"},
+                product_id=None,
+                page=2,
+            )
+        self.assertEqual(retrieve.call_args.kwargs["authorization_overfetch"], 12)
+
     @override_settings(RETRIEVAL_QUERY_EMBEDDING_RATE="10/m")
     def test_paid_miss_embeds_once_while_expected_failures_use_lexical(self):
         cases = (
@@ -1,3 +1,7 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
 from django.test import SimpleTestCase, TestCase
 from elasticsearch.dsl import Q
 from elasticsearch.dsl.query import Bool as B
@@ -5,7 +9,8 @@ from elasticsearch.dsl.query import SimpleQueryString as S
 from parameterized import parameterized
 from pyparsing import ParseException
 
-from kitsune.search.parser import Parser
+from kitsune.search import parser
+from kitsune.search.parser import Parser, _ParseCache, clear_parse_cache, reject_query
 
 
 class ElasticQueryContainsMixin:
@@ -219,3 +224,62 @@ class ExactTokenTests(TestCase, ElasticQueryContainsMixin):
             {"settings": {"exact_mappings": exact_mappings}}
         )
         self.assertElasticQueryContains(elastic_query, expected)
+
+
+class ParseCacheTests(SimpleTestCase):
+    def setUp(self):
+        clear_parse_cache()
+        self.addCleanup(clear_parse_cache)
+
+    def test_a_query_is_parsed_once(self):
+        with mock.patch.object(parser, "_parse", wraps=parser._parse) as parse:
+            first = Parser("firefox AND sync")
+            second = Parser("firefox AND sync")
+
+        self.assertIs(first.parsed, second.parsed)
+        parse.assert_called_once_with("firefox AND sync")
+
+    def test_a_failed_query_fails_again_without_parsing(self):
+        with mock.patch.object(parser, "_parse", wraps=parser._parse) as parse:
+            for _ in range(2):
+                with self.assertRaises(ParseException):
+                    Parser("(a b")
+
+        parse.assert_called_once_with("(a b")
+
+    def test_a_rejected_query_takes_the_fallback_path(self):
+        Parser("a OR b")
+        reject_query("a OR b")
+
+        with self.assertRaises(ParseException):
+            Parser("a OR b")
+
+    def test_a_query_is_only_rejected_in_its_scope(self):
+        reject_query("a OR b", "WikiSearch")
+
+        with self.assertRaises(ParseException):
+            Parser("a OR b", scope="WikiSearch")
+        Parser("a OR b", scope="QuestionSearch")
+        Parser("a OR b")
+
+    def test_the_least_recently_used_query_is_dropped(self):
+        cache = _ParseCache(2)
+        cache.set("a", "tree a")
+        cache.set("b", "tree b")
+        cache.get("a")
+        cache.set("c", "tree c")
+
+        self.assertEqual(
+            (cache.get("a"), cache.get("b"), cache.get("c")), ("tree a", None, "tree c")
+        )
+        self.assertEqual(len(cache), 2)
+
+    def test_benchmark_reports_uncached_and_cached_times(self):
+        stdout = StringIO()
+
+        call_command("benchmark_query_parser", "--passes", "2", stdout=stdout)
+
+        output = stdout.getvalue()
+        self.assertIn("unparseable", output)
+        self.assertRegex(output, r"uncached +p50")
+        self.assertRegex(output, r"  cached +p50")
@@ -363,6 +363,11 @@ RETRIEVAL_EMBEDDING_BATCH_SIZE = config("RETRIEVAL_EMBEDDING_BATCH_SIZE", defaul
 RETRIEVAL_EMBEDDING_TIMEOUT_SECONDS = config(
     "RETRIEVAL_EMBEDDING_TIMEOUT_SECONDS", default=30, cast=float
 )
+# Document-chunk vectors are kept by chunk text and embedding recipe so a re-sync pays only for
+# chunks whose text changed; 0 disables the store and every replacement re-embeds.
+RETRIEVAL_CHUNK_VECTOR_CACHE_TTL_SECONDS = config(
+    "RETRIEVAL_CHUNK_VECTOR_CACHE_TTL_SECONDS", default=60 * 60 * 24 * 30, cast=int
+)
 # Interactive queries get one short attempt and fall back to lexical retrieval when the
 # provider is unavailable. Successful exact-query vectors are cached independently.
 RETRIEVAL_QUERY_EMBEDDING_TIMEOUT_SECONDS = config(
@@ -371,6 +376,22 @@ RETRIEVAL_QUERY_EMBEDDING_TIMEOUT_SECONDS = config(
 RETRIEVAL_QUERY_VECTOR_CACHE_TTL_SECONDS = config(
     "RETRIEVAL_QUERY_VECTOR_CACHE_TTL_SECONDS", default=60 * 60, cast=int
 )
+# Concurrent query-embedding misses arriving within this window share one provider request;
+# 0 sends each miss on its own. Only threaded or async web workers have concurrent misses
+# to batch, so it's opt-in: with sync workers each miss would wait out the window alone.
+RETRIEVAL_QUERY_EMBEDDING_BATCH_WINDOW_MS = config(
+    "RETRIEVAL_QUERY_EMBEDDING_BATCH_WINDOW_MS", default=0, cast=int
+)
+# Vectors held in each process in front of the shared cache; 0 disables the local tier.
+RETRIEVAL_QUERY_VECTOR_LOCAL_CACHE_SIZE = config(
+    "RETRIEVAL_QUERY_VECTOR_LOCAL_CACHE_SIZE", default=1024, cast=int
+)
+# The scheduled warmup embeds this many of each locale's most searched queries ahead of
+# traffic; 0 turns the scheduled warmup off. It also stays off while
+# RETRIEVAL_QUERY_EMBEDDING_RATE disables query embeddings.
+RETRIEVAL_QUERY_VECTOR_WARMUP_TOP_N = config(
+    "RETRIEVAL_QUERY_VECTOR_WARMUP_TOP_N", default=0, cast=int
+)
 # Calibrate these initial retrieval bounds in each serving environment before enabling
 # hybrid search.
 RETRIEVAL_SEMANTIC_K = config("RETRIEVAL_SEMANTIC_K", default=100, cast=int)
@@ -379,6 +400,18 @@ RETRIEVAL_RRF_RANK_WINDOW_SIZE = config("RETRIEVAL_RRF_RANK_WINDOW_SIZE", defaul
 RETRIEVAL_AUTHORIZATION_OVERFETCH = config(
     "RETRIEVAL_AUTHORIZATION_OVERFETCH", default=5, cast=int
 )
+# Over-fetch adapts to the rejection rates of the last SAMPLES searches per viewer class and
+# source mix, at the given percentile, and never exceeds MAX; RETRIEVAL_AUTHORIZATION_OVERFETCH
+# applies until enough searches are seen, and always when SAMPLES is 0.
+RETRIEVAL_AUTHORIZATION_MAX_OVERFETCH = config(
+    "RETRIEVAL_AUTHORIZATION_MAX_OVERFETCH", default=20, cast=int
+)
+RETRIEVAL_AUTHORIZATION_OVERFETCH_SAMPLES = config(
+    "RETRIEVAL_AUTHORIZATION_OVERFETCH_SAMPLES", default=200, cast=int
+)
+RETRIEVAL_AUTHORIZATION_OVERFETCH_PERCENTILE = config(
+    "RETRIEVAL_AUTHORIZATION_OVERFETCH_PERCENTILE", default=95, cast=int
+)
 RETRIEVAL_MAX_PAGE_OFFSET = config("RETRIEVAL_MAX_PAGE_OFFSET", default=40, cast=int)
 RETRIEVAL_LEXICAL_DEFAULT_OPERATOR = config("RETRIEVAL_LEXICAL_DEFAULT_OPERATOR", default="OR")
 RETRIEVAL_LEXICAL_MINIMUM_SHOULD_MATCH = config(
@@ -391,6 +424,27 @@ RETRIEVAL_QUERY_EMBEDDING_RATE = config("RETRIEVAL_QUERY_EMBEDDING_RATE", defaul
 RETRIEVAL_KNN_SIMILARITY_FLOORS = config(
     "RETRIEVAL_KNN_SIMILARITY_FLOORS", default="{}", cast=json.loads
 )
+# Per-family authorization records and viewer memberships are cached for this long, behind a
+# generation that retrieval signals bump on every access-relevant change; 0 reads the primary
+# database on every search. Each process keeps up to the local size of records in memory.
+RETRIEVAL_AUTHORIZATION_CACHE_TTL_SECONDS = config(
+    "RETRIEVAL_AUTHORIZATION_CACHE_TTL_SECONDS", default=300, cast=int
+)
+RETRIEVAL_AUTHORIZATION_LOCAL_CACHE_SIZE = config(
+    "RETRIEVAL_AUTHORIZATION_LOCAL_CACHE_SIZE", default=4096, cast=int
+)
+# An in-process copy of the chunk vectors can rank the semantic leg instead of Elasticsearch kNN:
+# "fallback" uses it for a while after a hybrid response loses shards or times out, "always"
+# uses it for every query, and "off" never loads it. Snapshots are built into a directory the
+# serving hosts can read; without one the engine is unavailable and kNN serves as before.
+RETRIEVAL_LOCAL_KNN_MODE = config("RETRIEVAL_LOCAL_KNN_MODE", default="off")
+RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR = config("RETRIEVAL_LOCAL_KNN_SNAPSHOT_DIR", default="")
+# IVF lists searched per locale; 0 scans every vector of the locale exactly.
+RETRIEVAL_LOCAL_KNN_NPROBE = config("RETRIEVAL_LOCAL_KNN_NPROBE", default=16, cast=int)
+# How long one degraded kNN response routes every worker's semantic leg to the local engine.
+RETRIEVAL_LOCAL_KNN_BREAKER_SECONDS = config(
+    "RETRIEVAL_LOCAL_KNN_BREAKER_SECONDS", default=60, cast=int
+)
 
 # Retrieval document leases have no background renewer. Keep each retrieval task's Celery
 # time limit below this ttl so the lease cannot lapse while the task is running.
@@ -420,6 +474,11 @@ RETRIEVAL_BULK_MAX_DOCUMENTS = config("RETRIEVAL_BULK_MAX_DOCUMENTS", default=50
 RETRIEVAL_BULK_MAX_EMBEDDING_INPUTS = config(
     "RETRIEVAL_BULK_MAX_EMBEDDING_INPUTS", default=500, cast=int
 )
+# Ceiling on estimated embedding input tokens per second for the backfill_chunks command,
+# shared by all of its workers; 0 leaves the provider's own quota as the only limit.
+RETRIEVAL_BACKFILL_TOKENS_PER_SECOND = config(
+    "RETRIEVAL_BACKFILL_TOKENS_PER_SECOND", default=0, cast=int
+)
 
 TEXT_DOMAIN = "messages"
 
@@ -871,6 +930,12 @@ ES_SEARCH_PARAMS = {"request_timeout": ES_TIMEOUT}
 ES_INDEX_PREFIX = config("ES_INDEX_PREFIX", default="sumo")
 # Keep indexes up to date as objects are made/deleted.
 ES_LIVE_INDEXING = config("ES_LIVE_INDEXING", default=True, cast=bool)
+# Seconds during which live indexing collects changed objects in Redis before indexing them
+# in bulk, so each object is indexed at most once per window. 0 indexes on every change.
+ES_INDEX_QUEUE_WINDOW = config("ES_INDEX_QUEUE_WINDOW", default=10, cast=int)
+# Seconds for which searches that opt in keep each page of decoded results in the cache.
+# 0 sends every search to Elasticsearch.
+SEARCH_RESULT_CACHE_TIMEOUT = config("SEARCH_RESULT_CACHE_TIMEOUT", default=300, cast=int)
 
 SEARCH_MAX_RESULTS = 1000
 SEARCH_RESULTS_PER_PAGE = 10
@@ -1023,6 +1088,16 @@ CELERY_WORKER_HIJACK_ROOT_LOGGER = config(
 
 # Wiki rebuild settings
 WIKI_REBUILD_TOKEN = "sumo:wiki:full-rebuild"
+# How long the fingerprint of a rendered document is kept to skip it in later rebuilds.
+# It outlasts the weekly forced rebuild, which renews every fingerprint.
+WIKI_REBUILD_FINGERPRINT_TIMEOUT = config(
+    "WIKI_REBUILD_FINGERPRINT_TIMEOUT", default=60 * 60 * 24 * 8, cast=int
+)  # 8 days
+
+# How long rendered includes and templates are reused across parses; 0 disables it.
+WIKI_FRAGMENT_CACHE_TIMEOUT = config(
+    "WIKI_FRAGMENT_CACHE_TIMEOUT", default=CACHE_LONG_TIMEOUT, cast=int
+)
 
 # Anonymous user cookie
 ANONYMOUS_COOKIE_NAME = config("ANONYMOUS_COOKIE_NAME", default="SUMO_ANONID")
@@ -1051,6 +1126,12 @@ TIDINGS_CONFIRM_ANONYMOUS_WATCHES = config(
 )
 TIDINGS_MODEL_BASE = "kitsune.sumo.models.ModelBase"
 TIDINGS_REVERSE = "kitsune.sumo.urlresolvers.reverse"
+# Watchers of an event are read from the database and mailed in chunks of this many recipients.
+TIDINGS_SEND_CHUNK_SIZE = config("TIDINGS_SEND_CHUNK_SIZE", default=500, cast=int)
+# How many chunks of an event fired asynchronously may be mailed at once. The task that fires
+# the event mails the first chunk and hands the rest to chains of subtasks, one fewer than
+# this; 1 mails every chunk in the task itself.
+TIDINGS_SEND_CONCURRENCY = config("TIDINGS_SEND_CONCURRENCY", default=1, cast=int)
 
 
 # Google Analytics settings.
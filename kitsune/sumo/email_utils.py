@@ -1,4 +1,5 @@
 import logging
+import secrets
 from functools import wraps
 
 from django.conf import settings
@@ -10,6 +11,7 @@ from django.core.validators import validate_email
 from django.template.loader import render_to_string
 from django.test.client import RequestFactory
 from django.utils import translation
+from markupsafe import Markup, escape
 from post_office.settings import get_override_recipients
 from premailer import transform
 
@@ -158,6 +160,94 @@ def make_mail(
     return mail
 
 
+class _WatchSlot:
+    """Stands in for each recipient's watch in the templates of a ``BulkMail``."""
+
+    def __init__(self, marker):
+        self.marker = marker
+
+    def unsubscribe_url(self):
+        return self.marker
+
+
+class BulkMail:
+    """
+    An email to many recipients, rendered once and then filled in for each of them.
+
+    Only the context values named in ``slots`` differ between recipients. The templates are
+    rendered, and the HTML inlined by premailer, with a marker in place of each of them, which
+    ``make_mail()`` replaces with a recipient's values, escaped in the HTML version. The slot
+    named "watch" stands in for the recipient's watch, so templates can call its
+    ``unsubscribe_url()``. A value that changes what is rendered, rather than only being
+    printed, such as whether the recipient has a name at all, can't be a slot; use a
+    ``BulkMail`` for each such kind of recipient instead.
+
+    Render it within the recipients' locale, like ``make_mail()``.
+    """
+
+    def __init__(
+        self,
+        subject,
+        text_template,
+        html_template,
+        context_vars,
+        from_email,
+        slots,
+        headers=None,
+    ):
+        # The markers can't be predicted by anyone writing the content being mailed. They
+        # start with a URL scheme, so premailer leaves them alone in links.
+        nonce = secrets.token_hex(8)
+        self.markers = {name: f"slot{nonce}:{name};" for name in (*slots, "to_email")}
+        context_vars = {**context_vars}
+        for name in slots:
+            marker = Markup(self.markers[name])
+            context_vars[name] = _WatchSlot(marker) if name == "watch" else marker
+
+        self.subject = subject
+        self.from_email = from_email
+        self.headers = {"Reply-To": settings.DEFAULT_REPLY_TO_EMAIL, **(headers or {})}
+
+        # See make_mail() for the overriding of recipients.
+        override_recipients = get_override_recipients()
+        if override_recipients:
+            context_vars.update(original_recipient=Markup(self.markers["to_email"]))
+
+        self.body = render_email(text_template, context_vars)
+        if override_recipients:
+            self.body = f"Original recipient: {self.markers['to_email']}\n" + self.body
+
+        self.html = None
+        if html_template:
+            self.html = transform(
+                render_email(html_template, context_vars),
+                base_url="https://" + Site.objects.get_current().domain,
+                cssutils_logging_level=logging.ERROR,
+            )
+
+    def _fill(self, rendered, values, quote):
+        for name, value in values.items():
+            rendered = rendered.replace(self.markers[name], quote(value))
+        return rendered
+
+    def make_mail(self, to_email, **values):
+        """Return an EmailMultiAlternatives to ``to_email``, given a value for each slot."""
+        if "watch" in values:
+            values["watch"] = values["watch"].unsubscribe_url()
+        values["to_email"] = to_email
+
+        mail = EmailMultiAlternatives(
+            self.subject,
+            self._fill(self.body, values, str),
+            self.from_email,
+            [to_email],
+            headers=self.headers,
+        )
+        if self.html is not None:
+            mail.attach_alternative(self._fill(self.html, values, escape), "text/html")
+        return mail
+
+
 def emails_with_users_and_watches(
     subject,
     text_template,
@@ -202,6 +202,31 @@ def create_search_report_request(date_range, offset=0, limit=10000):
     )
 
 
+def create_search_term_report_request(date_range, offset=0, limit=10000):
+    """
+    Create a RunReportRequest instance for a report of the number of search events for
+    each search term and locale in the given date range, most frequent first, and limited
+    to the results with the given offset and limit.
+    """
+    return RunReportRequest(
+        property=f"properties/{settings.GA_PROPERTY_ID}",
+        dimensions=[Dimension(name="searchTerm"), Dimension(name="customEvent:locale")],
+        metrics=[Metric(name="eventCount")],
+        date_ranges=[date_range],
+        dimension_filter=FilterExpression(
+            filter=Filter(
+                field_name="eventName",
+                string_filter=Filter.StringFilter(
+                    value="search", match_type=Filter.StringFilter.MatchType.EXACT
+                ),
+            )
+        ),
+        order_bys=[OrderBy(metric=OrderBy.MetricOrderBy(metric_name="eventCount"), desc=True)],
+        limit=limit,
+        offset=offset,
+    )
+
+
 def create_click_search_result_report_request(date_range, offset=0, limit=10000):
     """
     Create a RunReportRequest instance for a report of the total number of clicks on search
@@ -391,3 +416,28 @@ def search_clicks_and_impressions(start_date, end_date, verbose=False):
         total_clicks = search_result_clicks_by_date.get(ga_date_key, 0)
         yield (date, total_clicks, total_searches)
         date += datetime.timedelta(days=1)
+
+
+def top_search_terms(period, max_rows=10000, verbose=False):
+    """
+    A generator that yields tuples of (locale, search_term, num_searches) for the most
+    frequent search terms within the given period, most frequent first. At most "max_rows"
+    rows are read, so the long tail of one-off searches is never fetched.
+    """
+    date_range = DateRange(start_date=PERIOD_TO_DAYS_AGO[period], end_date="today")
+
+    rows = run_report(
+        date_range, create_search_term_report_request, limit=max_rows, verbose=verbose
+    )
+    for num_rows, row in enumerate(rows):
+        if num_rows >= max_rows:
+            break
+        search_term = row.dimension_values[0].value
+        locale = row.dimension_values[1].value
+        if locale not in VALID_LOCALES:
+            continue
+        try:
+            num_searches = int(row.metric_values[0].value)
+        except ValueError:
+            continue
+        yield (locale, search_term, num_searches)
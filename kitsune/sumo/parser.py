@@ -54,6 +54,8 @@ YOUTUBE_DOMAINS = frozenset(
 )
 UI_COMPONENT_PLACEHOLDER = "<p>UI_COMPONENT_EMBED_PLACEHOLDER_%s</p>"
 ALLOWED_UI_COMPONENTS = frozenset(["device_migration_wizard", "details_start", "details_end"])
+# The target of a [[link]], up to the closing brackets.
+LINK_TARGET_RE = re.compile(r"\[\[([^\[\]\n]+)\]\]")
 
 
 def wiki_to_html(
@@ -120,6 +122,60 @@ def get_object_fallback(cls, title, locale, default=None, **kwargs):
         return default
 
 
+def get_objects_fallback(cls, titles, locale, **kwargs):
+    """Bulk version of get_object_fallback(): return a dict mapping each of
+    the titles to the instance get_object_fallback() would return, or None.
+
+    The lookups in the requested and the default locale and the lookup of
+    translations take one query each; only redirects are followed one by
+    one.
+
+    """
+    titles = set(titles)
+    found = {
+        obj.title: obj for obj in cls.objects.filter(title__in=titles, locale=locale, **kwargs)
+    }
+    missing = titles - found.keys()
+    if not missing or locale == settings.WIKI_DEFAULT_LANGUAGE:
+        return {title: found.get(title) for title in titles}
+
+    fallbacks = {
+        obj.title: obj
+        for obj in cls.objects.filter(
+            title__in=missing, locale=settings.WIKI_DEFAULT_LANGUAGE, **kwargs
+        )
+    }
+
+    # The bulk equivalent of Document.translated_to().
+    translations = {}
+    if fallbacks and hasattr(cls, "translated_to"):
+        translations = {
+            obj.parent_id: obj
+            for obj in cls.objects.filter(
+                locale=locale, parent__in=[obj.id for obj in fallbacks.values()]
+            )
+        }
+
+    for title, default_lang_doc in fallbacks.items():
+        trans = translations.get(default_lang_doc.id)
+        if trans and trans.current_revision_id:
+            found[title] = trans
+            continue
+
+        # Follow redirects as get_object_fallback() does.
+        if hasattr(default_lang_doc, "redirect_document"):
+            target = default_lang_doc.redirect_document()
+            if target:
+                trans = target.translated_to(locale)
+                if trans and trans.current_revision:
+                    found[title] = trans
+                    continue
+
+        found[title] = default_lang_doc
+
+    return {title: found.get(title) for title in titles}
+
+
 def _get_wiki_link(title, locale):
     """Checks the page exists, and returns its URL or the URL to create it.
 
@@ -133,6 +189,11 @@ def _get_wiki_link(title, locale):
     from kitsune.wiki.models import Document
 
     d = get_object_fallback(Document, locale=locale, title=title, is_template=False)
+    return _wiki_link(d, title, locale)
+
+
+def _wiki_link(d, title, locale):
+    """Returns the _get_wiki_link() dict for a title that was looked up as d."""
     if d:
         # If the article redirects use its destination article
         while d.redirect_document():
@@ -216,7 +277,17 @@ class WikiParser(Parser):
 
     image_template = "wikiparser/hook_image.html"
 
+    # Whether parse() looks up the documents and images the markup links to
+    # in bulk before rendering it, instead of once per link.
+    prefetch_links = False
+
     def __init__(self, base_url=None):
+        # Namespaces with a link hook, and the objects links resolved to,
+        # which are kept for the duration of the outermost call to parse().
+        self._link_namespaces = set()
+        self._objects = {}
+        self._parse_depth = 0
+
         super().__init__(base_url)
 
         # Register default hooks
@@ -272,8 +343,43 @@ class WikiParser(Parser):
             can skip embedding here and do it on their own at the end
             of parsing.
         """
+        if not self._parse_depth:
+            self._objects = {}
+        self._parse_depth += 1
+        try:
+            return self._parse_markup(
+                text,
+                show_toc=show_toc,
+                tags=tags,
+                attributes=attributes,
+                styles=styles,
+                locale=locale,
+                nofollow=nofollow,
+                youtube_embeds=youtube_embeds,
+                ui_component_embeds=ui_component_embeds,
+                **kwargs,
+            )
+        finally:
+            self._parse_depth -= 1
+
+    def _parse_markup(
+        self,
+        text,
+        show_toc,
+        tags,
+        attributes,
+        styles,
+        locale,
+        nofollow,
+        youtube_embeds,
+        ui_component_embeds,
+        **kwargs,
+    ):
         self.locale = locale
 
+        if self.prefetch_links:
+            self.prefetch_objects(text)
+
         @email_utils.safe_translation
         def _parse(locale):
             try:
@@ -303,6 +409,56 @@ class WikiParser(Parser):
 
         return html
 
+    def registerInternalLinkHook(self, tag, function):
+        """Register a link hook, remembering its namespace for prefetching."""
+        super().registerInternalLinkHook(tag, function)
+        self._link_namespaces.add(tag)
+
+    def get_object(self, cls, title, locale, **kwargs):
+        """get_object_fallback() that returns None when nothing is found,
+        answered from the objects prefetched or looked up during this parse."""
+        key = (cls, title, locale, tuple(sorted(kwargs.items())))
+        if key not in self._objects:
+            self._objects[key] = get_object_fallback(cls, title, locale, **kwargs)
+        return self._objects[key]
+
+    def prefetch_objects(self, text):
+        """First pass of the two-pass rendering mode: collect what the links in
+        the markup refer to and look it all up in a few bulk queries, so the
+        hooks find it in get_object()."""
+        lookups = {}
+        for target in LINK_TARGET_RE.findall(text):
+            space, sep, name = target.partition(":")
+            if not sep or space not in self._link_namespaces:
+                space, name = None, target
+            for cls, title, kwargs in self._link_lookups(space, name):
+                if title:
+                    lookups.setdefault((cls, tuple(sorted(kwargs.items()))), set()).add(title)
+
+        for (cls, kwargs), titles in lookups.items():
+            titles = {
+                title for title in titles if (cls, title, self.locale, kwargs) not in self._objects
+            }
+            if not titles:
+                continue
+            objects = get_objects_fallback(cls, titles, self.locale, **dict(kwargs))
+            for title, obj in objects.items():
+                self._objects[(cls, title, self.locale, kwargs)] = obj
+
+    def _link_lookups(self, space, name):
+        """Yield the (model, title, lookup kwargs) that the hook of a link in
+        the given namespace passes to get_object()."""
+        # Prevent circular import, see _get_wiki_link().
+        from kitsune.wiki.models import Document
+
+        if space is None:
+            title = name
+            if "|" in name:
+                title = re.sub(r"\s+", " ", name.split("|", 1)[0]).strip()
+            yield Document, title.split("#", 1)[0], {"is_template": False}
+        elif space == "Image":
+            yield Image, name.split("|", 1)[0].strip(), {}
+
     def bleach(self, text, nofollow, attributes, styles, strip_comments):
         """Override wikimarkup.parser.Parser's bleach method to use justhtml instead."""
         text = linkify(text, nofollow=nofollow)
@@ -368,7 +524,11 @@ class WikiParser(Parser):
                 text = hash.replace("_", " ")
             return '<a href="{}">{}</a>'.format(hash, text)
 
-        link = _get_wiki_link(title, self.locale)
+        # Prevent circular import, see _get_wiki_link().
+        from kitsune.wiki.models import Document
+
+        d = self.get_object(Document, title, self.locale, is_template=False)
+        link = _wiki_link(d, title, self.locale)
         extra_a_attr = ""
         if not link["found"]:
             extra_a_attr += ' class="new" title="{tooltip}"'.format(
@@ -384,10 +544,9 @@ class WikiParser(Parser):
         """Adds syntax for inserting images."""
         title, params = build_hook_params(name, self.locale, IMAGE_PARAMS, IMAGE_PARAM_VALUES)
 
-        message = _lazy('The image "%s" does not exist.') % title
-        image = get_object_fallback(Image, title, self.locale, message)
-        if isinstance(image, str):
-            return image
+        image = self.get_object(Image, title, self.locale)
+        if image is None:
+            return _lazy('The image "%s" does not exist.') % title
 
         return render_to_string(
             self.image_template,
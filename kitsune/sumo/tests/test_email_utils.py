@@ -1,4 +1,4 @@
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 from django.conf import settings
 from django.contrib.sites.models import Site
@@ -7,7 +7,12 @@ from django.utils import translation
 from django.utils.functional import lazy
 from django.utils.translation import get_language
 
-from kitsune.sumo.email_utils import emails_with_users_and_watches, safe_translation, send_messages
+from kitsune.sumo.email_utils import (
+    BulkMail,
+    emails_with_users_and_watches,
+    safe_translation,
+    send_messages,
+)
 from kitsune.sumo.tests import TestCase
 from kitsune.users.tests import UserFactory
 
@@ -135,6 +140,37 @@ class PremailerTests(TestCase):
                 self.assertIn(tag % Site.objects.get_current().domain, str(m.message()))
 
 
+class BulkMailTests(TestCase):
+    def test_rendered_once_and_filled_per_recipient(self):
+        def render(template, context):
+            url, name = context["watch"].unsubscribe_url(), context["name"]
+            if template.endswith(".html"):
+                return f'<html><body><a href="{url}">{name}</a></body></html>'
+            return f"Hi {name}, {url}"
+
+        watches = [
+            Mock(**{"unsubscribe_url.return_value": f"https://example.com/u?s={n}&t=1"})
+            for n in range(2)
+        ]
+        with patch("kitsune.sumo.email_utils.render_to_string", side_effect=render) as mocked:
+            bulk_mail = BulkMail(
+                "Subject", "a.ltxt", "a.html", {}, "from@example.com", slots=["name", "watch"]
+            )
+            mails = [
+                bulk_mail.make_mail("ann@example.com", name="<Ann>", watch=watches[0]),
+                bulk_mail.make_mail("bob@example.com", name="Bob", watch=watches[1]),
+            ]
+
+        self.assertEqual(2, mocked.call_count)
+        self.assertEqual(["ann@example.com"], mails[0].to)
+        self.assertEqual("Hi <Ann>, https://example.com/u?s=0&t=1", mails[0].body)
+        self.assertEqual("Hi Bob, https://example.com/u?s=1&t=1", mails[1].body)
+        self.assertIn(
+            '<a href="https://example.com/u?s=0&amp;t=1">&lt;Ann&gt;</a>',
+            mails[0].alternatives[0][0],
+        )
+
+
 class SendMessagesTests(TestCase):
 
     @patch("kitsune.sumo.email_utils.mail")
@@ -191,3 +191,32 @@ class GoogleAnalyticsTests(TestCase):
         self.assertEqual(result[0], (date(2024, 4, 11), 4657, 10328))
         self.assertEqual(result[1], (date(2024, 4, 12), 0, 0))
         self.assertEqual(result[2], (date(2024, 4, 13), 3791, 9739))
+
+    @patch.object(googleanalytics, "run_report")
+    def test_top_search_terms(self, run_report):
+        """Test googleanalytics.top_search_terms()."""
+        run_report.return_value = (
+            Row(
+                dimension_values=[
+                    DimensionValue(value="firefox crash"),
+                    DimensionValue(value="en-US"),
+                ],
+                metric_values=[MetricValue(value="5000")],
+            ),
+            Row(
+                dimension_values=[DimensionValue(value="absturz"), DimensionValue(value="de")],
+                metric_values=[MetricValue(value="700")],
+            ),
+            Row(
+                dimension_values=[DimensionValue(value="junk"), DimensionValue(value="(not set)")],
+                metric_values=[MetricValue(value="600")],
+            ),
+            Row(
+                dimension_values=[DimensionValue(value="sync"), DimensionValue(value="en-US")],
+                metric_values=[MetricValue(value="500")],
+            ),
+        )
+
+        result = list(googleanalytics.top_search_terms(LAST_7_DAYS, max_rows=3))
+
+        self.assertEqual(result, [("en-US", "firefox crash", 5000), ("de", "absturz", 700)])
@@ -14,6 +14,7 @@ from kitsune.sumo.parser import (
     _get_wiki_link,
     build_hook_params,
     get_object_fallback,
+    get_objects_fallback,
     wiki_to_html,
 )
 from kitsune.sumo.tests import TestCase
@@ -130,6 +131,61 @@ class GetObjectFallbackTests(TestCase):
         )
 
 
+class GetObjectsFallbackTests(TestCase):
+    def test_matches_get_object_fallback(self):
+        en_only = DocumentFactory(title="English only")
+        translated = DocumentFactory(title="Translated")
+        ApprovedRevisionFactory(document=translated)
+        fr_translation = ApprovedRevisionFactory(
+            document__parent=translated, document__locale="fr"
+        ).document
+        fr_only = DocumentFactory(title="French only", locale="fr")
+        unapproved = DocumentFactory(title="Unapproved translation")
+        DocumentFactory(parent=unapproved, locale="fr")
+        target_rev = ApprovedRevisionFactory(document__title="target")
+        ApprovedRevisionFactory(document__parent=target_rev.document, document__locale="fr")
+        ApprovedRevisionFactory(document__title="redirect", content="REDIRECT [[target]]")
+        titles = [
+            "English only",
+            "Translated",
+            "French only",
+            "Unapproved translation",
+            "redirect",
+            "Missing",
+        ]
+
+        for locale in ("fr", "en-US"):
+            with self.subTest(locale=locale):
+                self.assertEqual(
+                    {title: get_object_fallback(Document, title, locale) for title in titles},
+                    get_objects_fallback(Document, titles, locale),
+                )
+        self.assertEqual(
+            en_only, get_objects_fallback(Document, ["English only"], "fr")["English only"]
+        )
+        self.assertEqual(
+            {"Translated": fr_translation, "French only": fr_only},
+            get_objects_fallback(Document, ["Translated", "French only"], "fr"),
+        )
+
+    def test_lookup_kwargs_are_applied(self):
+        DocumentFactory(title="A doc")
+
+        self.assertEqual(
+            {"A doc": None}, get_objects_fallback(Document, ["A doc"], "fr", is_template=True)
+        )
+
+    def test_queries_do_not_grow_with_the_titles(self):
+        titles = [f"Doc {i}" for i in range(10)]
+        for title in titles:
+            ApprovedRevisionFactory(document__title=title)
+
+        with self.assertNumQueries(3):
+            objects = get_objects_fallback(Document, titles, "fr")
+
+        self.assertEqual(set(titles), {obj.title for obj in objects.values()})
+
+
 class TestWikiParser(TestCase):
     def setUp(self):
         self.d, self.r, self.p = doc_rev_parser("Test content", "Installing Firefox")
@@ -211,6 +267,22 @@ class TestWikiParser(TestCase):
             _get_wiki_link("Installing Firefox", locale=settings.WIKI_DEFAULT_LANGUAGE),
         )
 
+    def test_prefetch_resolves_links_and_images_in_bulk(self):
+        titles = [f"Article {i}" for i in range(10)]
+        for title in titles:
+            ApprovedRevisionFactory(document__title=title)
+        ImageFactory(title="test.jpg")
+        markup = " ".join(f"[[{title}]]" for title in titles) + " [[Missing]] [[Image:test.jpg]]"
+        expected = self.p.parse(markup)
+
+        p = WikiParser()
+        p.prefetch_links = True
+        with patch("kitsune.sumo.parser.get_object_fallback") as get_object:
+            html = p.parse(markup)
+
+        self.assertEqual(expected, html)
+        get_object.assert_not_called()
+
     def test_showfor(self):
         """<showfor> tags should be escaped, not obeyed."""
         self.assertEqual(
@@ -1,7 +1,10 @@
+import heapq
 import itertools
 import random
+import string
 from smtplib import SMTPException
 
+from celery import chain
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
@@ -11,9 +14,11 @@ from django.db.models import Q
 
 from kitsune.sumo.email_utils import send_messages
 from kitsune.tidings.models import EmailUser, Watch, WatchFilter, multi_raw
-from kitsune.tidings.tasks import send_emails
+from kitsune.tidings.tasks import send_email_chunk, send_emails
 from kitsune.tidings.utils import hash_to_unsigned
 
+ASCII_LOWERCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
 
 class ActivationRequestFailed(Exception):
     """Raised when activation request fails, e.g. if email could not be sent"""
@@ -32,7 +37,7 @@ def unique_by_email(*users_and_watches):
     that all watches associated with the same email are aggregated.
 
     The consolidation logic follows these rules:
-    1. Email comparison is case-insensitive.
+    1. Email comparison is case-insensitive in ASCII letters, see ``fold_email()``.
     2. If multiple entries exist for the same email, an authenticated User
        object is preferred over an EmailUser or unauthenticated User.
     3. All watch lists associated with the same email are concatenated.
@@ -56,7 +61,7 @@ def unique_by_email(*users_and_watches):
             else:
                 continue
 
-        email_lower = user.email.lower()
+        email_lower = fold_email(user.email)
 
         if email_lower not in by_email:
             by_email[email_lower] = [user, watches]
@@ -75,6 +80,37 @@ def unique_by_email(*users_and_watches):
         yield (user, watches)
 
 
+def fold_email(email):
+    """Return the address that an email address is consolidated under.
+
+    Only ASCII letters are lowercased, as the database lowercases them when ordering the
+    watchers by address, whatever its locale.
+    """
+    return email.translate(ASCII_LOWERCASE)
+
+
+def _email_key(user_and_watches):
+    """Return the folded address that ``unique_by_email()`` consolidates a pair under."""
+    user, watches = user_and_watches
+    email = getattr(user, "email", None) or (watches and getattr(watches[0], "email", None))
+    return fold_email(email or "")
+
+
+def merge_by_email(*users_and_watches):
+    """
+    Consolidate (user, [watches]) pairs by email address as ``unique_by_email()`` does,
+    without holding them all in memory.
+
+    Each iterable must already be ordered by its folded email addresses, descending,
+    as the streams of ``Event._users_watching()`` are. Pairs are yielded in the same order
+    as ``unique_by_email()`` yields them, as soon as all of an address's pairs have been
+    seen.
+    """
+    merged = heapq.merge(*users_and_watches, key=_email_key, reverse=True)
+    for _, same_email in itertools.groupby(merged, key=_email_key):
+        yield from unique_by_email(same_email)
+
+
 class Event:
     """Abstract base class for events
 
@@ -119,7 +155,7 @@ class Event:
         else:
             self.send_emails(exclude=exclude)
 
-    def send_emails(self, exclude=None):
+    def send_emails(self, exclude=None, concurrency=1):
         """
         Notify everyone watching the event (build and send emails).
 
@@ -130,11 +166,41 @@ class Event:
         tests. If we want implicit event firing, we can always register a
         signal handler that calls :meth:`fire()`.
 
+        Watchers are read from the database and mailed in chunks of
+        ``settings.TIDINGS_SEND_CHUNK_SIZE`` recipients, so only one chunk's
+        users, watches and messages are in memory at a time.
+
         :arg exclude: A sequence of users or None. If a sequence of users is
           passed in, each of those users will not be notified, though anonymous
           notifications having the same email address may still be sent.
+        :arg concurrency: How many chunks may be mailed at once. Beyond 1, the
+          first chunk is mailed here while the rest are mailed by
+          ``concurrency - 1`` chains of Celery subtasks, which requires
+          :meth:`serialize()`.
         """
-        send_messages(self._mails(self._users_watching(exclude=exclude)))
+        chunks = itertools.batched(
+            self._recipients(exclude=exclude), settings.TIDINGS_SEND_CHUNK_SIZE, strict=False
+        )
+        if concurrency <= 1:
+            for users_and_watches in chunks:
+                send_messages(self._mails(users_and_watches))
+            return
+
+        first = next(chunks, None)
+        if first is None:
+            return
+        # Only the ids of the remaining recipients are kept, which the subtasks load again.
+        event_info = self.serialize()
+        lanes = [[] for _ in range(concurrency - 1)]
+        for n, users_and_watches in enumerate(chunks):
+            recipients = [
+                [user.id, [w.id for w in watches]] for user, watches in users_and_watches
+            ]
+            lanes[n % len(lanes)].append(send_email_chunk.si(event_info, recipients))
+        for lane in lanes:
+            if lane:
+                chain(*lane).delay()
+        send_messages(self._mails(first))
 
     def serialize(self):
         """
@@ -177,6 +243,9 @@ class Event:
         returned. Users are favored over EmailUsers so we are sure to be able
         to, for example, include a link to a user profile in the mail.
 
+        The tuples are streamed from the database in descending order of
+        email address, as :func:`unique_by_email` would order them.
+
         The list of :class:`~tidings.models.Watch` objects includes both
         those tied to the given User (if there is a registered user)
         and to any anonymous Watch having the same email address. This
@@ -271,17 +340,23 @@ class Event:
             "WHERE {wheres} "
             "AND (length(w.email)>0 OR length(u.email)>0) "
             "AND w.is_active "
-            "ORDER BY u.email DESC, w.email DESC"
+            "ORDER BY translate(COALESCE(NULLIF(u.email, ''), w.email), '{upper}', '{lower}') "
+            'COLLATE "C" DESC, u.email DESC, w.email DESC'
         ).format(
+            upper=string.ascii_uppercase,
+            lower=string.ascii_lowercase,
             fields=", ".join(query_fields),
             joins=" ".join(joins),
             wheres=" AND ".join(wheres),
             user_table=User._meta.db_table,
         )
         # IIRC, the DESC ordering was something to do with the placement of
-        # NULLs. Track this down and explain it.
+        # NULLs. Track this down and explain it. Ordering by the address the
+        # rows are consolidated under first, folded as fold_email() does and in
+        # code point order like Python's, brings the rows of each address
+        # together so they can be streamed.
 
-        return unique_by_email(
+        return merge_by_email(
             (u, [w]) for u, w in multi_raw(query, params, [User, Watch], model_to_fields)
         )
 
@@ -470,11 +545,24 @@ class Event:
         # redoing the templating every time.
         raise NotImplementedError
 
+    def _recipients(self, exclude=None):
+        """Return an iterable of (User or EmailUser, [Watches]) pairs to mail
+        when this event is sent.
+
+        Default implementation returns :meth:`_users_watching()`. Override it
+        to notify the watchers of other events too, with an
+        :class:`EventUnion` whose first event is this one.
+
+        """
+        return self._users_watching(exclude=exclude)
+
     def _users_watching(self, **kwargs):
         """Return an iterable of Users and EmailUsers watching this event
         and the Watches that map them to it.
 
-        Each yielded item is a tuple: (User or EmailUser, [list of Watches]).
+        Each yielded item is a tuple: (User or EmailUser, [list of Watches]),
+        ordered by email address, descending, like the results of
+        :meth:`_users_watching_by_filter()`.
 
         Default implementation returns users watching this object's event_type
         and, if defined, content_type.
@@ -552,7 +640,7 @@ class EventUnion(Event):
         return self.events[0]._mails(users_and_watches)
 
     def _users_watching(self, **kwargs):
-        return unique_by_email(*[e._users_watching(**kwargs) for e in self.events])
+        return merge_by_email(*[e._users_watching(**kwargs) for e in self.events])
 
 
 class InstanceEvent(Event):
@@ -10,7 +10,7 @@ from .utils import import_from_setting, reverse
 ModelBase: models.Model = import_from_setting("TIDINGS_MODEL_BASE", models.Model)
 
 
-def multi_raw(query, params, models, model_to_fields):
+def multi_raw(query, params, models, model_to_fields, chunk_size=1000):
     """Scoop multiple model instances out of the DB at once, given a query that
     returns all fields of each.
 
@@ -19,17 +19,19 @@ def multi_raw(query, params, models, model_to_fields):
 
         [(<User such-and-such>, <Watch such-and-such>), ...]
 
+    The rows are read through a server-side cursor, ``chunk_size`` at a
+    time, so only one chunk of them is held in memory.
+
     """
-    cursor = connections[router.db_for_read(models[0])].cursor()
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-
-    for row in rows:
-        row_iter = iter(row)
-        yield [
-            model_class(**{a: next(row_iter) for a in model_to_fields[model_class]})
-            for model_class in models
-        ]
+    with connections[router.db_for_read(models[0])].chunked_cursor() as cursor:
+        cursor.execute(query, params)
+        while rows := cursor.fetchmany(chunk_size):
+            for row in rows:
+                row_iter = iter(row)
+                yield [
+                    model_class(**{a: next(row_iter) for a in model_to_fields[model_class]})
+                    for model_class in models
+                ]
 
 
 class Watch(ModelBase):
@@ -1,8 +1,10 @@
 from celery import shared_task
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from sentry_sdk import capture_exception
 
-from kitsune.tidings.models import Watch
+from kitsune.sumo.email_utils import send_messages
+from kitsune.tidings.models import EmailUser, Watch
 from kitsune.tidings.utils import get_class
 
 
@@ -16,13 +18,9 @@ def claim_watches(user_id):
     Watch.objects.filter(email=user.email).update(email=None, user=user)
 
 
-@shared_task
-def send_emails(event_info, exclude_user_ids=None):
-    """
-    Celery task that is JSON-serializer friendly, and that fires the event specified by
-    the "event_info" argument while excluding the users specified by "exclude_user_ids",
-    which must be a sequence of user ids if not None.
-    """
+def _event_from_info(event_info):
+    """Construct the event described by ``Event.serialize()``, or return None if its
+    instance no longer exists."""
     event_cls_info = event_info["event"]
     instance_info = event_info.get("instance")
 
@@ -37,10 +35,20 @@ def send_emails(event_info, exclude_user_ids=None):
             instance = instance_cls.objects.get(id=instance_info["id"])
         except instance_cls.DoesNotExist as err:
             capture_exception(err)
-            return
-        event = event_cls(instance)
-    else:
-        event = event_cls()
+            return None
+        return event_cls(instance)
+    return event_cls()
+
+
+@shared_task
+def send_emails(event_info, exclude_user_ids=None):
+    """
+    Celery task that is JSON-serializer friendly, and that fires the event specified by
+    the "event_info" argument while excluding the users specified by "exclude_user_ids",
+    which must be a sequence of user ids if not None.
+    """
+    if (event := _event_from_info(event_info)) is None:
+        return
 
     # Get the excluded users, if any.
     if exclude_user_ids:
@@ -48,4 +56,44 @@ def send_emails(event_info, exclude_user_ids=None):
     else:
         exclude = None
 
-    event.send_emails(exclude=exclude)
+    event.send_emails(exclude=exclude, concurrency=settings.TIDINGS_SEND_CONCURRENCY)
+
+
+@shared_task
+def send_email_chunk(event_info, recipients):
+    """
+    Mail one chunk of the recipients of the event specified by "event_info", on behalf of
+    ``Event.send_emails()``. Each recipient is a [user id, [watch ids]] pair, where the
+    user id is None for an anonymous watcher. Watches and users deleted since the chunk
+    was made are skipped.
+
+    A failure is reported rather than raised, since the chunks chained after this one
+    are only mailed once it succeeds.
+    """
+    try:
+        _send_email_chunk(event_info, recipients)
+    except Exception as err:
+        capture_exception(err)
+
+
+def _send_email_chunk(event_info, recipients):
+    if (event := _event_from_info(event_info)) is None:
+        return
+
+    watches = Watch.objects.in_bulk([watch_id for _, ids in recipients for watch_id in ids])
+    users = get_user_model().objects.in_bulk(
+        [user_id for user_id, _ in recipients if user_id is not None]
+    )
+
+    users_and_watches = []
+    for user_id, watch_ids in recipients:
+        if not (user_watches := [watches[i] for i in watch_ids if i in watches]):
+            continue
+        if user_id is None:
+            user = EmailUser(email=user_watches[0].email)
+        elif (user := users.get(user_id)) is None:
+            continue
+        users_and_watches.append((user, user_watches))
+
+    if users_and_watches:
+        send_messages(event._mails(users_and_watches))
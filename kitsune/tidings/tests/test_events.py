@@ -1,5 +1,15 @@
+from smtplib import SMTPException
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core import mail
+from django.test import override_settings
+
+from kitsune.sumo.email_utils import send_messages
 from kitsune.sumo.tests import TestCase
-from kitsune.tidings.events import unique_by_email
+from kitsune.tidings.events import Event, merge_by_email, unique_by_email
+from kitsune.tidings.models import EmailUser
+from kitsune.tidings.tasks import send_email_chunk
 from kitsune.tidings.tests import WatchFactory
 from kitsune.users.tests import UserFactory
 
@@ -41,3 +51,110 @@ class UniqueByEmailTests(TestCase):
         self.assertEqual(
             {w.event_type for w in watches}, {w1.event_type, w2.event_type, w5.event_type}
         )
+
+    def test_merge_by_email(self):
+        """Streams ordered by email are consolidated as unique_by_email() would."""
+        u1 = UserFactory(email="Alice@example.com")
+        u2 = UserFactory(email="sally@example.com")
+        u3 = UserFactory(email="")
+
+        w1 = WatchFactory(user=u1, event_type="thread reply")
+        w2 = WatchFactory(user=u2, event_type="forum thread")
+        w3 = WatchFactory(email="alice@example.com")
+        w4 = WatchFactory(email="ringo@example.com")
+
+        first = [(u2, [w2]), (u1, [w1])]
+        u4 = EmailUser(email="ringo@example.com")
+        second = [(u4, [w4]), (u3, [w3])]
+
+        self.assertEqual(list(merge_by_email(first, second)), list(unique_by_email(first, second)))
+        self.assertEqual(
+            [(user.email, watches) for user, watches in merge_by_email(first, second)],
+            [("sally@example.com", [w2]), (u4.email, [w4]), ("Alice@example.com", [w1, w3])],
+        )
+
+
+class FooEvent(Event):
+    event_type = "fooevent"
+
+    def _mails(self, users_and_watches):
+        return [
+            mail.EmailMessage("Foo", "Bar", settings.TIDINGS_FROM_ADDRESS, [user.email])
+            for user, _ in users_and_watches
+        ]
+
+    def serialize(self):
+        return {"event": {"module": "kitsune.tidings.tests.test_events", "class": "FooEvent"}}
+
+
+@override_settings(TIDINGS_SEND_CHUNK_SIZE=2)
+class SendEmailsTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.users = [
+            UserFactory(email=email)
+            for email in ("dave@example.com", "carol@example.com", "bob@example.com")
+        ]
+        for user in self.users:
+            WatchFactory(user=user)
+        # An anonymous watch of a registered user's address is mailed to the user once.
+        WatchFactory(email="Carol@example.com")
+        WatchFactory(email="alice@example.com")
+        self.expected = [
+            "dave@example.com",
+            "carol@example.com",
+            "bob@example.com",
+            "alice@example.com",
+        ]
+
+    def test_chunks_are_mailed_in_order(self):
+        FooEvent().send_emails()
+
+        self.assertEqual([message.to[0] for message in mail.outbox], self.expected)
+
+    def test_excluded_users_are_skipped(self):
+        FooEvent().send_emails(exclude=[self.users[0]])
+
+        self.assertEqual([message.to[0] for message in mail.outbox], self.expected[1:])
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+    def test_chunks_are_fanned_out_to_subtasks(self):
+        FooEvent().send_emails(concurrency=3)
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), sorted(self.expected))
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True, TIDINGS_SEND_CHUNK_SIZE=1)
+    def test_a_failing_chunk_does_not_stop_its_lane(self):
+        def fail_bob(messages):
+            messages = list(messages)
+            if messages[0].to == ["bob@example.com"]:
+                raise SMTPException
+            send_messages(messages)
+
+        with patch("kitsune.tidings.tasks.send_messages", side_effect=fail_bob):
+            FooEvent().send_emails(concurrency=2)
+
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["alice@example.com", "carol@example.com", "dave@example.com"],
+        )
+
+    def test_addresses_differing_in_non_ascii_case_are_mailed_once_each(self):
+        emails = ["Émile@example.com", "émile@example.com", "zoë@example.com", "ZOË@example.com"]
+        for email in emails:
+            WatchFactory(email=email)
+
+        FooEvent().send_emails()
+
+        recipients = [message.to[0] for message in mail.outbox]
+        self.assertEqual(sorted(recipients), sorted([*self.expected, *emails]))
+
+    def test_chunk_skips_deleted_watches(self):
+        watch = WatchFactory(email="eve@example.com")
+        gone = WatchFactory(email="mallory@example.com")
+        gone_id = gone.id
+        gone.delete()
+
+        send_email_chunk(FooEvent().serialize(), [[None, [watch.id]], [None, [gone_id]]])
+
+        self.assertEqual([message.to for message in mail.outbox], [["eve@example.com"]])
@@ -156,8 +156,6 @@ class _BaseProductFilter:
         products = self.revision.document.get_products()
         product_hashes = [hash_to_unsigned(s.slug) for s in products]
 
-        watchers_and_watches = []
-
         # Weed out the users that have a product filter that isn't one of the
         # document's products.
         for user, watches in all_watchers:
@@ -167,18 +165,16 @@ class _BaseProductFilter:
 
                 # If there are no product filters, they are watching them all.
                 if len(prods) == 0:
-                    watchers_and_watches.append((user, watches))
+                    yield (user, watches)
                     break
 
                 # Otherwise, check if they are watching any of the document's
                 # products.
                 for prod in prods:
                     if prod in product_hashes:
-                        watchers_and_watches.append((user, watches))
+                        yield (user, watches)
                         break
 
-        return watchers_and_watches
-
 
 class _ProductFilter(_BaseProductFilter):
     """
@@ -9,7 +9,7 @@ from django.conf import settings
 from django.contrib.auth.models import Group, User
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError, models
+from django.db import IntegrityError, models, transaction
 from django.db.models import Q, Value
 from django.db.models.functions import Now
 from django.urls import is_valid_path
@@ -665,33 +665,100 @@ class Document(NotificationsMixin, ModelBase, DocumentPermissionMixin):
             helpful=True,
         ).count()
 
-    def parse_and_calculate_links(self):
+    def parse_and_calculate_links(self, fragments=None, fragments_since=None):
         """Calculate What Links Here data for links going out from this.
 
         Also returns a parsed version of the current html, because that
-        is a byproduct of the process, and is useful.
+        is a byproduct of the process, and is useful. Pass a dict as
+        ``fragments`` to reuse includes and templates rendered for other
+        documents parsed with the same dict, and a timestamp as
+        ``fragments_since`` to reuse only cached ones rendered since then.
         """
         if not self.current_revision:
             return ""
 
-        if not settings.READ_ONLY:
-            # Remove "what links here" reverse links, because they might be
-            # stale and re-rendering will re-add them. This cannot be done
-            # reliably in the parser's parse() function, because that is
-            # often called multiple times per document.
-            self.links_from().delete()
-
-            # Also delete the DocumentImage instances for this document.
-            DocumentImage.objects.filter(document=self).delete()
-
         from kitsune.wiki.parser import WhatLinksHereParser, wiki_to_html
 
-        return wiki_to_html(
-            self.current_revision.content,
-            locale=self.locale,
+        parser = WhatLinksHereParser(
             doc_id=self.id,
-            parser_cls=WhatLinksHereParser,
+            document=self,
             restrict_to_groups=self.original.restrict_to_groups,
+            fragments=fragments,
+            fragments_since=fragments_since,
+        )
+        html = wiki_to_html(self.current_revision.content, locale=self.locale, parser=parser)
+
+        if not settings.READ_ONLY:
+            # The links are collected while parsing and stored once parsed,
+            # because the parser's parse() is often called multiple times
+            # per document.
+            added, removed = self.update_links(parser.links, parser.image_ids)
+            if added or removed:
+                log.debug(f"Links of document {self.id}: {added} added, {removed} removed.")
+
+        return html
+
+    def update_links(self, links, image_ids):
+        """Make the links and images going out from this the given ones.
+
+        ``links`` are (linked-to document id, kind) pairs. Only the rows that
+        differ are written, in one transaction, so "what links here" is never
+        missing the links that remain. Returns the numbers of rows added and
+        removed.
+        """
+        links = set(links)
+        image_ids = set(image_ids)
+
+        with transaction.atomic():
+            stored_links = {
+                (linked_to_id, kind): pk
+                for pk, linked_to_id, kind in self.links_from().values_list(
+                    "id", "linked_to_id", "kind"
+                )
+            }
+            stored_images = dict(
+                DocumentImage.objects.filter(document=self).values_list("image_id", "id")
+            )
+            stale_links = [pk for link, pk in stored_links.items() if link not in links]
+            stale_images = [
+                pk for image_id, pk in stored_images.items() if image_id not in image_ids
+            ]
+
+            # Fragments reused from the cache may refer to what was deleted since.
+            new_links = links - stored_links.keys()
+            if new_links:
+                existing = set(
+                    Document.objects.filter(
+                        id__in={linked_to_id for linked_to_id, _ in new_links}
+                    ).values_list("id", flat=True)
+                )
+                new_links = {link for link in new_links if link[0] in existing}
+            new_image_ids = image_ids - stored_images.keys()
+            if new_image_ids:
+                new_image_ids &= set(
+                    Image.objects.filter(id__in=new_image_ids).values_list("id", flat=True)
+                )
+
+            if stale_links:
+                DocumentLink.objects.filter(id__in=stale_links).delete()
+            if stale_images:
+                DocumentImage.objects.filter(id__in=stale_images).delete()
+            # Another render of this document may have stored the same rows meanwhile.
+            DocumentLink.objects.bulk_create(
+                [
+                    DocumentLink(linked_from=self, linked_to_id=linked_to_id, kind=kind)
+                    for linked_to_id, kind in new_links
+                ],
+                ignore_conflicts=True,
+            )
+            DocumentImage.objects.bulk_create(
+                [DocumentImage(document=self, image_id=image_id) for image_id in new_image_ids],
+                ignore_conflicts=True,
+            )
+
+        return (
+            len(new_links) + len(new_image_ids),
+            len(stale_links) + len(stale_images),
         )
 
     def links_from(self):
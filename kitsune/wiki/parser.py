@@ -1,8 +1,11 @@
+import hashlib
 import re
+import time
 from itertools import count
 from xml.sax.saxutils import quoteattr
 
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import translation
 from django.utils.functional import cached_property
 from django.utils.translation import gettext as _
@@ -17,7 +20,7 @@ from wikimarkup.parser import ALLOWED_TAGS
 
 from kitsune.gallery.models import Image
 from kitsune.sumo import parser as sumo_parser
-from kitsune.sumo.parser import ALLOWED_ATTRIBUTES, ALLOWED_STYLES, get_object_fallback
+from kitsune.sumo.parser import ALLOWED_ATTRIBUTES, ALLOWED_STYLES
 from kitsune.sumo.sanitize import clean
 from kitsune.wiki.models import Document
 
@@ -49,6 +52,7 @@ BLOCK_LEVEL_ELEMENTS = [
     "section",
 ]
 TEMPLATE_ARG_REGEX = re.compile("{{{([^{]+?)}}}")
+FRAGMENT_CACHE_KEY = "wiki:fragment:v1:{kind}:{doc_id}:{revision_id}:{locale}:{groups}:{params}"
 
 
 def wiki_to_html(
@@ -57,13 +61,20 @@ def wiki_to_html(
     doc_id=None,
     parser_cls=None,
     restrict_to_groups=None,
+    fragments=None,
+    parser=None,
 ):
-    """Wiki Markup -> HTML with the wiki app's enhanced parser"""
-    if parser_cls is None:
-        parser_cls = WikiParser
+    """Wiki Markup -> HTML with the wiki app's enhanced parser
 
+    Pass a parser instance as "parser" to read what it collected afterwards;
+    "parser_cls" and the arguments it is constructed with are then ignored.
+    """
     with translation.override(locale):
-        content = parser_cls(doc_id=doc_id, restrict_to_groups=restrict_to_groups).parse(
+        if parser is None:
+            parser = (parser_cls or WikiParser)(
+                doc_id=doc_id, restrict_to_groups=restrict_to_groups, fragments=fragments
+            )
+        content = parser.parse(
             wiki_markup,
             show_toc=False,
             locale=locale,
@@ -388,18 +399,42 @@ class WikiParser(sumo_parser.WikiParser):
 
     image_template = "wikiparser/hook_image_lazy.html"
 
-    def __init__(self, base_url=None, doc_id=None, restrict_to_groups=None):
+    # Whether rendered includes and templates may be reused across parses.
+    cache_fragments = True
+    # Keeps the fragments of parsers that record different things apart in the cache.
+    fragment_namespace = ""
+    prefetch_links = True
+
+    def __init__(
+        self,
+        base_url=None,
+        doc_id=None,
+        restrict_to_groups=None,
+        fragments=None,
+        fragments_since=None,
+    ):
         """
         Pass the ID of the document being rendered to detect recursion immediately,
         and pass "restrict_to_groups" to enforce restrictions on the parsed content.
+        Pass a dict as "fragments" to share the rendered fragments with other
+        parsers, instead of only for the duration of each outermost parse.
+        Pass a timestamp as "fragments_since" to reuse only the cached fragments
+        rendered since then.
         """
         super().__init__(base_url)
 
         self.restrict_to_groups = restrict_to_groups
+        self.fragments_since = fragments_since
 
         # Stack of document IDs to prevent include/template recursion.
         self.inclusions = [doc_id] if doc_id else []
 
+        # Fragments rendered during the outermost call to parse(), and the stack
+        # of fragments being rendered.
+        self._shared_fragments = fragments
+        self._fragments = {}
+        self._fragment_frames = []
+
         # The wiki has additional hooks not used elsewhere
         self.registerInternalLinkHook("Include", self._hook_include)
         self.registerInternalLinkHook("I", self._hook_include)
@@ -408,6 +443,8 @@ class WikiParser(sumo_parser.WikiParser):
 
     def parse(self, text, **kwargs):
         """Wrap SUMO's parse() to support additional wiki-only features."""
+        if not self._parse_depth:
+            self._fragments = {} if self._shared_fragments is None else self._shared_fragments
 
         # Replace fors with inline tokens the wiki formatter will tolerate:
         text, data = ForParser.strip_fors(text)
@@ -462,10 +499,118 @@ class WikiParser(sumo_parser.WikiParser):
             set(include_doc.original.restrict_to_groups.values_list("pk", flat=True))
         )
 
+    @cached_property
+    def _restriction_signature(self):
+        """The restriction groups as a stable string, for fragment cache keys."""
+        return ",".join(str(pk) for pk in sorted(self.restrict_to_group_ids))
+
+    def _link_lookups(self, space, name):
+        if space in ("Include", "I"):
+            yield Document, name, {}
+        elif space in ("Template", "T"):
+            yield Document, "Template:" + name.split("|", 1)[0], {"is_template": True}
+        else:
+            yield from super()._link_lookups(space, name)
+
+    def _fragment_cache_key(self, kind, document, params=""):
+        cache_key = FRAGMENT_CACHE_KEY.format(
+            kind=self.fragment_namespace + kind,
+            doc_id=document.id,
+            revision_id=document.current_revision_id,
+            locale=self.locale,
+            groups=self._restriction_signature,
+            params=hashlib.sha1(params.encode()).hexdigest(),
+        )
+        return hashlib.sha1(cache_key.encode()).hexdigest()
+
+    def _record(self, record):
+        """Note something the parsed content refers to, such as a linked document.
+
+        Fragments keep the records made while they were rendered, and replay
+        them through this method when they are reused.
+        """
+        for frame in self._fragment_frames:
+            frame["records"].add(record)
+
+    def _mark_recursion(self):
+        """Output that depends on the inclusion stack must not be reused."""
+        for frame in self._fragment_frames:
+            frame["recursive"] = True
+
+    def _is_fragment_current(self, fragment):
+        """Whether a fragment was rendered since "fragments_since", if given, and
+        none of the documents nested in it changed revision."""
+        if self.fragments_since and fragment.get("rendered", 0) < self.fragments_since:
+            return False
+        dependencies = dict(fragment["dependencies"])
+        if not dependencies:
+            return True
+        current = Document.objects.filter(pk__in=dependencies).values_list(
+            "pk", "current_revision_id"
+        )
+        return dict(current) == dependencies
+
+    def _render_fragment(self, parser, kind, document, render, params=""):
+        """Return the HTML of an included document or template, reusing the
+        fragment rendered earlier in this parse or stored in the cache.
+
+        The cache key carries the document's current revision, so approving a
+        new revision of the included document invalidates its fragments.
+        Documents nested within a fragment are recorded with their revisions
+        and checked before the fragment is reused. The titles, slugs and images
+        its links point to aren't, so renders that must pick up changes to those
+        pass "fragments_since". The records made while
+        it was rendered are made again when it is reused. A fragment is not reused
+        while one of its nested documents is being included already, since it
+        would now render a recursion message instead.
+        """
+        if self.cache_fragments:
+            key = self._fragment_cache_key(kind, document, params)
+            fragment = self._fragments.get(key)
+            if fragment is None and settings.WIKI_FRAGMENT_CACHE_TIMEOUT:
+                fragment = cache.get(key)
+                if fragment is not None and not self._is_fragment_current(fragment):
+                    fragment = None
+            if fragment is not None and not any(
+                doc_id in parser.inclusions for doc_id, _revision_id in fragment["dependencies"]
+            ):
+                self._fragments[key] = fragment
+                for frame in self._fragment_frames:
+                    frame["dependencies"].update(map(tuple, fragment["dependencies"]))
+                    frame["dependencies"].add((document.id, document.current_revision_id))
+                for record in fragment.get("records", ()):
+                    self._record(tuple(record))
+                return fragment["html"]
+
+        frame = {"dependencies": set(), "recursive": False, "records": set()}
+        self._fragment_frames.append(frame)
+        parser.inclusions.append(document.id)
+        try:
+            html = render()
+        finally:
+            parser.inclusions.pop()
+            self._fragment_frames.pop()
+
+        for parent in self._fragment_frames:
+            parent["dependencies"].update(frame["dependencies"])
+            parent["dependencies"].add((document.id, document.current_revision_id))
+
+        if self.cache_fragments and not frame["recursive"]:
+            fragment = {
+                "html": html,
+                "dependencies": sorted(frame["dependencies"]),
+                "records": sorted(frame["records"]),
+                "rendered": time.time(),
+            }
+            self._fragments[key] = fragment
+            if settings.WIKI_FRAGMENT_CACHE_TIMEOUT:
+                cache.set(key, fragment, settings.WIKI_FRAGMENT_CACHE_TIMEOUT)
+        return html
+
     def _hook_include(self, parser, space, title):
         """Returns the document's parsed content."""
         message = _('The document "%s" does not exist.') % title
-        include = get_object_fallback(Document, title, locale=self.locale)
+        include = self.get_object(Document, title, self.locale)
         if not include or not include.current_revision:
             return message
 
@@ -473,13 +618,17 @@ class WikiParser(sumo_parser.WikiParser):
             return message
 
         if include.id in parser.inclusions:
+            self._mark_recursion()
             return RECURSION_MESSAGE % title
-        else:
-            parser.inclusions.append(include.id)
-        ret = parser.parse(include.current_revision.content, show_toc=False, locale=self.locale)
-        parser.inclusions.pop()
 
-        return ret
+        return self._render_fragment(
+            parser,
+            "include",
+            include,
+            lambda: parser.parse(
+                include.current_revision.content, show_toc=False, locale=self.locale
+            ),
+        )
 
     # Wiki templates are documents that receive arguments.
     #
@@ -495,9 +644,7 @@ class WikiParser(sumo_parser.WikiParser):
         template_title = "Template:" + short_title
 
         message = _('The template "%s" does not exist or has no approved revision.') % short_title
-        template = get_object_fallback(
-            Document, template_title, locale=self.locale, is_template=True
-        )
+        template = self.get_object(Document, template_title, self.locale, is_template=True)
 
         if not template or not template.current_revision:
             return message
@@ -506,30 +653,58 @@ class WikiParser(sumo_parser.WikiParser):
             return message
 
         if template.id in parser.inclusions:
+            self._mark_recursion()
             return RECURSION_MESSAGE % template_title
-        else:
-            parser.inclusions.append(template.id)
-        c = template.current_revision.content.rstrip()
-        # Note: this completely ignores the allowed attributes passed to the
-        # WikiParser.parse() method and defaults to ALLOWED_ATTRIBUTES.
-        parsed = parser.parse(c, show_toc=False, attributes=ALLOWED_ATTRIBUTES, locale=self.locale)
-        parser.inclusions.pop()
 
-        # Special case for inline templates
-        if "\n" not in c:
-            parsed = parsed.replace("<p>", "")
-            parsed = parsed.replace("</p>", "")
-        # Do some string formatting to replace parameters
-        return _format_template_content(parsed, _build_template_params(params))
+        def render():
+            c = template.current_revision.content.rstrip()
+            # Note: this completely ignores the allowed attributes passed to the
+            # WikiParser.parse() method and defaults to ALLOWED_ATTRIBUTES.
+            parsed = parser.parse(
+                c, show_toc=False, attributes=ALLOWED_ATTRIBUTES, locale=self.locale
+            )
+
+            # Special case for inline templates
+            if "\n" not in c:
+                parsed = parsed.replace("<p>", "")
+                parsed = parsed.replace("</p>", "")
+            # Do some string formatting to replace parameters
+            return _format_template_content(parsed, _build_template_params(params))
+
+        return self._render_fragment(parser, "template", template, render, "|".join(params))
 
 
 class WhatLinksHereParser(WikiParser):
     """An extension of the wiki that deals with what links here data."""
 
-    def __init__(self, doc_id, **kwargs):
-        self.current_doc = Document.objects.get(pk=doc_id)
+    # Links found in nested content are replayed from reused fragments, which
+    # therefore aren't shared with parsers that don't record them.
+    fragment_namespace = "links:"
+
+    def __init__(self, doc_id, document=None, **kwargs):
+        self.current_doc = document or Document.objects.get(pk=doc_id)
+        # What the current document refers to: (document id, kind) pairs and
+        # image ids. They are stored with Document.update_links once parsed.
+        self.links = set()
+        self.image_ids = set()
         super().__init__(doc_id=doc_id, **kwargs)
 
+    def _record(self, record):
+        """Collect a ("link", document id, kind) or ("image", image id) record."""
+        super()._record(record)
+        if record[0] == "link":
+            self.links.add(record[1:])
+        else:
+            self.image_ids.add(record[1])
+
+    def _link_lookups(self, space, name):
+        """Also prefetch the lookups the hooks below record links with."""
+        yield from super()._link_lookups(space, name)
+        if space is None:
+            yield Document, re.sub(r"\s+", " ", name.split("|", 1)[0].strip()), {}
+        elif space == "Image":
+            yield Image, name.split("|", 1)[0], {}
+
     def _hook_internal_link(self, parser, space, name):
         """Records links between documents, and then calls super()."""
 
@@ -539,39 +714,39 @@ class WhatLinksHereParser(WikiParser):
         link_text = rest[0] if rest else ""
         name = f"{title}|{link_text}" if link_text else title
 
-        linked_doc = get_object_fallback(Document, title, locale)
+        linked_doc = self.get_object(Document, title, locale)
         if linked_doc is not None:
-            self.current_doc.add_link_to(linked_doc, "link")
+            self._record(("link", linked_doc.id, "link"))
         return super()._hook_internal_link(parser, space, name)
 
     def _hook_template(self, parser, space, name):
         """Record a template link between documents, and then call super()."""
 
         params = name.split("|")
-        template = get_object_fallback(
-            Document, "Template:" + params[0], locale=self.locale, is_template=True
+        template = self.get_object(
+            Document, "Template:" + params[0], self.locale, is_template=True
         )
 
         if template:
-            self.current_doc.add_link_to(template, "template")
+            self._record(("link", template.id, "template"))
 
         return super()._hook_template(parser, space, name)
 
     def _hook_include(self, parser, space, name):
         """Record an include link between documents, and then call super()."""
-        include = get_object_fallback(Document, name, locale=self.locale)
+        include = self.get_object(Document, name, self.locale)
 
         if include:
-            self.current_doc.add_link_to(include, "include")
+            self._record(("link", include.id, "include"))
 
         return super()._hook_include(parser, space, name)
 
     def _hook_image_tag(self, parser, space, name):
         """Record an image is included in a document, then call super()."""
         title = name.split("|")[0]
-        image = get_object_fallback(Image, title, self.locale)
+        image = self.get_object(Image, title, self.locale)
 
         if image:
-            self.current_doc.add_image(image)
+            self._record(("image", image.id))
 
         return super()._hook_image_tag(parser, space, name)
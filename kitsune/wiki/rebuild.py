@@ -0,0 +1,258 @@
+"""Plan re-rendering the knowledge base in dependency order, skipping unchanged documents.
+
+The same ordering serves a cascade, which re-renders the documents that include a given
+document, directly or not, after it has changed.
+
+A document that includes others, with ``[[Include:...]]`` or ``[[Template:...]]``, is
+rendered after them, so the fragments and links of what it includes are ready to be
+reused. Only the documents that others include have to wait for anything: they are
+rendered first, in dependency order, and every other document is independent of the
+rest, so those are rendered in parallel chunks.
+
+A document is skipped when the fingerprint of its inputs matches the fingerprint stored
+when it was last rendered. The inputs are its current revision, its restrictions, the
+current revisions of everything it includes, directly or not, the titles and slugs of
+the documents and images it refers to, and, outside the default locale, the current
+revisions of the translations of the default-language documents it falls back to. A
+link or image that didn't resolve when the document was rendered isn't known, so one
+that would resolve now, as well as a change to the parser, needs a forced rebuild.
+"""
+
+import hashlib
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from kitsune.gallery.models import Image
+from kitsune.wiki.models import Document, DocumentImage, DocumentLink
+
+FINGERPRINT_CACHE_KEY = "wiki:rebuild:v1:fingerprint:{doc_id}"
+INCLUSION_KINDS = ("include", "template")
+
+# A document and every document including it, directly or not. UNION drops the rows
+# already found, so a cycle of inclusions ends the recursion.
+SQL_INCLUDED_BY = """
+    WITH RECURSIVE affected(id) AS (
+        SELECT %s::integer
+        UNION
+        SELECT link.linked_from_id
+        FROM wiki_documentlink link
+        JOIN affected ON link.linked_to_id = affected.id
+        WHERE link.kind IN ('include', 'template')
+    )
+    SELECT id FROM affected
+"""
+
+
+@dataclass
+class RebuildPlan:
+    # The documents other documents include, with what they include first.
+    shared: list[int]
+    # The documents nothing includes, which can be rendered in any order.
+    independent: list[int]
+    # The fingerprint of the inputs of each document to render.
+    fingerprints: dict[int, str]
+    # How many documents are unchanged since they were last rendered.
+    unchanged: int
+
+
+def dependency_order(documents, includes):
+    """Return the documents ordered so each comes after the documents it includes.
+
+    ``includes`` maps a document to the documents it includes; those that aren't
+    among ``documents`` are ignored. Documents that include each other in a cycle
+    come last, in id order.
+    """
+    pending = {doc_id: set(includes.get(doc_id, ())) & documents for doc_id in documents}
+    included_by = defaultdict(set)
+    for doc_id, included in pending.items():
+        for included_id in included:
+            included_by[included_id].add(doc_id)
+
+    ready = sorted((doc_id for doc_id, included in pending.items() if not included), reverse=True)
+    order = []
+    while ready:
+        doc_id = ready.pop()
+        order.append(doc_id)
+        for includer_id in sorted(included_by[doc_id], reverse=True):
+            pending[includer_id].discard(doc_id)
+            if not pending[includer_id]:
+                ready.append(includer_id)
+
+    ordered = set(order)
+    order.extend(sorted(documents - ordered))
+    return order
+
+
+def plan_cascade(document_id):
+    """Return the document and those including it, directly or not, in dependency order."""
+    with connection.cursor() as cursor:
+        cursor.execute(SQL_INCLUDED_BY, [document_id])
+        affected = {row[0] for row in cursor.fetchall()}
+
+    includes = defaultdict(set)
+    for linked_from_id, linked_to_id in DocumentLink.objects.filter(
+        linked_from_id__in=affected, linked_to_id__in=affected, kind__in=INCLUSION_KINDS
+    ).values_list("linked_from_id", "linked_to_id"):
+        includes[linked_from_id].add(linked_to_id)
+    return dependency_order(affected, includes)
+
+
+def _transitive_includes(doc_id, includes):
+    seen = set()
+    todo = list(includes.get(doc_id, ()))
+    while todo:
+        included_id = todo.pop()
+        if included_id not in seen and included_id != doc_id:
+            seen.add(included_id)
+            todo.extend(includes.get(included_id, ()))
+    return seen
+
+
+def fingerprint(revision_id, groups, included_revisions, references=()):
+    """Return the fingerprint of a document's rendering inputs."""
+    inputs = repr((revision_id, sorted(groups), sorted(included_revisions), sorted(references)))
+    return hashlib.sha1(inputs.encode()).hexdigest()
+
+
+def store_fingerprints(fingerprints):
+    """Remember the fingerprints of documents that have been rendered."""
+    cache.set_many(
+        {FINGERPRINT_CACHE_KEY.format(doc_id=doc_id): fp for doc_id, fp in fingerprints.items()},
+        settings.WIKI_REBUILD_FINGERPRINT_TIMEOUT,
+    )
+
+
+def plan_rebuild(force=False):
+    """Plan the re-rendering of every document with a current revision.
+
+    Unless ``force`` is set, documents whose fingerprint is unchanged are left out.
+    """
+    documents = Document.objects.using("default").filter(current_revision__isnull=False)
+    revisions = {}
+    originals = {}
+    locales = {}
+    for doc_id, revision_id, parent_id, locale in documents.values_list(
+        "id", "current_revision_id", "parent_id", "locale"
+    ):
+        revisions[doc_id] = revision_id
+        originals[doc_id] = parent_id or doc_id
+        locales[doc_id] = locale
+
+    includes = defaultdict(set)
+    links = defaultdict(set)
+    for linked_from_id, linked_to_id, kind in DocumentLink.objects.using("default").values_list(
+        "linked_from_id", "linked_to_id", "kind"
+    ):
+        if kind in INCLUSION_KINDS:
+            includes[linked_from_id].add(linked_to_id)
+        else:
+            links[linked_from_id].add(linked_to_id)
+    linked = set().union(*links.values()) if links else set()
+    link_targets = {}
+    for doc_id, title, slug, revision_id, locale in (
+        Document.objects.using("default")
+        .filter(id__in=linked)
+        .values_list("id", "title", "slug", "current_revision_id", "locale")
+    ):
+        link_targets[doc_id] = ("document", doc_id, title, slug, revision_id is not None)
+        locales[doc_id] = locale
+
+    images = defaultdict(set)
+    for doc_id, image_id in DocumentImage.objects.using("default").values_list(
+        "document_id", "image_id"
+    ):
+        images[doc_id].add(image_id)
+    image_targets = {
+        image_id: ("image", image_id, title, file, str(updated))
+        for image_id, title, file, updated in Image.objects.using("default")
+        .filter(id__in=set().union(*images.values()) if images else set())
+        .values_list("id", "title", "file", "updated")
+    }
+
+    included = set().union(*includes.values()) if includes else set()
+    # The revisions of included documents without one count too, as None, so that
+    # approving their first revision re-renders the documents including them.
+    included_revisions = {}
+    for doc_id, revision_id, locale in (
+        Document.objects.using("default")
+        .filter(id__in=included - revisions.keys())
+        .values_list("id", "current_revision_id", "locale")
+    ):
+        included_revisions[doc_id] = revision_id
+        locales[doc_id] = locale
+    included_revisions.update(revisions)
+
+    # Includes and links resolve to the translation of a default-language target in the
+    # locale of the document, once it has an approved revision. So the revisions of those
+    # translations count too, as None while there is none, so that approving one
+    # re-renders the documents of that locale which fell back to the target.
+    fallback_targets = {
+        doc_id
+        for doc_id in included | linked
+        if locales.get(doc_id) == settings.WIKI_DEFAULT_LANGUAGE
+    }
+    translated_revisions = {
+        (parent_id, locale): revision_id
+        for parent_id, locale, revision_id in Document.objects.using("default")
+        .filter(parent_id__in=fallback_targets)
+        .values_list("parent_id", "locale", "current_revision_id")
+    }
+
+    def translations(doc_id, targets):
+        locale = locales[doc_id]
+        if locale == settings.WIKI_DEFAULT_LANGUAGE:
+            return []
+        return [
+            ("translation", target_id, translated_revisions.get((target_id, locale)))
+            for target_id in targets
+            if target_id in fallback_targets
+        ]
+
+    groups = defaultdict(set)
+    for doc_id, group_id in (
+        Document.restrict_to_groups.through.objects.using("default")
+        .filter(document_id__in=set(originals.values()))
+        .values_list("document_id", "group_id")
+    ):
+        groups[doc_id].add(group_id)
+
+    transitive_includes = {doc_id: _transitive_includes(doc_id, includes) for doc_id in revisions}
+    fingerprints = {
+        doc_id: fingerprint(
+            revision_id,
+            groups[originals[doc_id]],
+            [
+                (included_id, included_revisions.get(included_id))
+                for included_id in transitive_includes[doc_id]
+            ],
+            [link_targets[linked_id] for linked_id in links[doc_id] if linked_id in link_targets]
+            + [image_targets[image_id] for image_id in images[doc_id] if image_id in image_targets]
+            + translations(doc_id, transitive_includes[doc_id] | links[doc_id]),
+        )
+        for doc_id, revision_id in revisions.items()
+    }
+
+    unchanged = 0
+    if not force:
+        stored = cache.get_many(
+            [FINGERPRINT_CACHE_KEY.format(doc_id=doc_id) for doc_id in revisions]
+        )
+        for doc_id in list(fingerprints):
+            if stored.get(FINGERPRINT_CACHE_KEY.format(doc_id=doc_id)) == fingerprints[doc_id]:
+                del fingerprints[doc_id]
+                unchanged += 1
+
+    # Included documents are rendered first wherever they fall in the plan, so the
+    # fragments they leave behind are reused by the documents including them.
+    to_render = set(fingerprints)
+    shared = included & revisions.keys()
+    return RebuildPlan(
+        shared=[doc_id for doc_id in dependency_order(shared, includes) if doc_id in to_render],
+        independent=sorted(to_render - shared),
+        fingerprints=fingerprints,
+        unchanged=unchanged,
+    )
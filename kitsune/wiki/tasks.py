@@ -1,4 +1,5 @@
 import logging
+import time
 from datetime import date, datetime, timedelta
 from itertools import batched, chain
 
@@ -23,6 +24,8 @@ from sentry_sdk import capture_exception
 from kitsune.community.utils import num_deleted_contributions
 from kitsune.kbadge.utils import get_or_create_badge
 from kitsune.products.models import Product
+from kitsune.retrieval.tasks import enqueue_document_batch
+from kitsune.search.es_utils import queue_index
 from kitsune.sumo import email_utils
 from kitsune.sumo.decorators import skip_if_read_only_mode
 from kitsune.sumo.urlresolvers import reverse
@@ -41,8 +44,10 @@ from kitsune.wiki.models import (
     RevisionTranslationRecord,
     SlugCollision,
     TitleCollision,
+    doc_html_cache_key,
     resolves_to_document_view,
 )
+from kitsune.wiki.rebuild import plan_cascade, plan_rebuild, store_fingerprints
 from kitsune.wiki.utils import generate_short_url
 
 log = logging.getLogger("k.task")
@@ -207,12 +212,14 @@ def schedule_rebuild_kb():
 
     cache.set(settings.WIKI_REBUILD_TOKEN, True)
 
-    rebuild_kb.delay()
+    # The titles and images that changed may be those of links that didn't resolve
+    # before, which no fingerprint covers.
+    rebuild_kb.delay(force=True)
 
 
 @shared_task
 @skip_if_read_only_mode
-def run_rebuild_kb() -> None:
+def run_rebuild_kb(force: bool = False) -> None:
     """Try to run a KB rebuild, if we're allowed to."""
     if waffle.switch_is_active("wiki-rebuild-on-demand"):
         return
@@ -223,7 +230,7 @@ def run_rebuild_kb() -> None:
 
     cache.set(settings.WIKI_REBUILD_TOKEN, True)
 
-    rebuild_kb()
+    rebuild_kb(force=force)
 
 
 @shared_task
@@ -270,37 +277,80 @@ def generate_missing_share_links() -> None:
 
 @shared_task(rate_limit="3/h")
 @skip_if_read_only_mode
-def rebuild_kb() -> None:
-    """Re-render all documents in the KB in chunks."""
+def rebuild_kb(force: bool = False) -> None:
+    """Re-render the documents in the KB whose rendering inputs changed.
+
+    The documents other documents include are re-rendered here first, with
+    what they include before them, so the documents including them reuse
+    their rendered fragments. The rest don't depend on each other and are
+    re-rendered in parallel chunks. With ``force``, every document is
+    re-rendered.
+
+    Only the fragments rendered since the rebuild started are reused, since
+    older ones may link to documents and images by titles, slugs and URLs that
+    have changed since.
+    """
     cache.delete(settings.WIKI_REBUILD_TOKEN)
 
-    d = (
-        Document.objects.using("default")
-        .filter(current_revision__isnull=False)
-        .values_list("id", flat=True)
+    started = time.time()
+    plan = plan_rebuild(force=force)
+
+    log.info(
+        f"Started rebuild of {len(plan.fingerprints)} documents, "
+        f"{plan.unchanged} unchanged since the last rebuild."
     )
 
-    log.info(f"Started rebuild of {d.count()} documents.")
+    if plan.shared:
+        _rebuild_documents(
+            plan.shared,
+            [plan.fingerprints[pk] for pk in plan.shared],
+            "rebuild_kb",
+            started=started,
+        )
 
-    for chunk in batched(d, 50, strict=False):
-        _rebuild_kb_chunk.delay(list(chunk))
+    for chunk in batched(plan.independent, 50, strict=False):
+        _rebuild_kb_chunk.delay(
+            list(chunk),
+            fingerprints=[plan.fingerprints[pk] for pk in chunk],
+            started=started,
+        )
 
 
-@shared_task(rate_limit="5/m")
-def _rebuild_kb_chunk(data: list[int]) -> None:
+@shared_task
+def _rebuild_kb_chunk(
+    data: list[int], fingerprints: list[str] | None = None, started: float | None = None
+) -> None:
     """Re-render a chunk of documents.
 
+    ``fingerprints`` are those of the documents in ``data``, in the same order,
+    and are stored for the documents that rendered. ``started`` is when the
+    rebuild started, see rebuild_kb.
+    """
+    log.info(f"Rebuilding {len(data)} documents.")
+    _rebuild_documents(data, fingerprints, "_rebuild_kb_chunk", started=started)
+
+
+def _rebuild_documents(pks, fingerprints, source, started=None):
+    """Re-render documents in order, sharing the includes and templates they render.
+
+    Cached includes and templates are reused only if rendered since ``started``,
+    which defaults to now.
+
     Note: Don't use host components when making redirects to wiki pages; those
     redirects won't be auto-pruned when they're 404s.
 
     """
-    log.info(f"Rebuilding {len(data)} documents.")
-
+    started = started or time.time()
+    documents = Document.objects.select_related("current_revision", "parent").in_bulk(pks)
+    fragments = {}
+    rendered = {}
     messages = []
-    for pk in data:
+    for pk, fingerprint in zip(pks, fingerprints or [None] * len(pks), strict=True):
         message = None
         try:
-            document = Document.objects.get(pk=pk)
+            if pk not in documents:
+                raise Document.DoesNotExist
+            document = documents[pk]
 
             # If we know a redirect link to be broken (i.e. if it looks like a
             # link to a document but the document isn't there), log an error:
@@ -308,13 +358,15 @@ def _rebuild_kb_chunk(data: list[int]) -> None:
             if url and resolves_to_document_view(url) and not document.redirect_document():
                 log.warning(f"Invalid redirect document: {pk}")
 
-            html = document.parse_and_calculate_links()
+            html = document.parse_and_calculate_links(fragments=fragments, fragments_since=started)
             if document.html != html:
                 # We are calling update here to so we only update the html
                 # column instead of all of them. This bypasses post_save
                 # signal handlers like the one that triggers reindexing.
                 # See bug 797038 and bug 797352.
                 Document.objects.filter(pk=pk).update(html=html)
+            if fingerprint:
+                rendered[pk] = fingerprint
         except Document.DoesNotExist:
             message = "Missing document: %d" % pk
         except Revision.DoesNotExist:
@@ -331,10 +383,11 @@ def _rebuild_kb_chunk(data: list[int]) -> None:
             messages.append(message)
 
     if messages:
-        subject = "[{}] Exceptions raised in _rebuild_kb_chunk()".format(settings.PLATFORM_NAME)
+        subject = "[{}] Exceptions raised in {}()".format(settings.PLATFORM_NAME, source)
         mail_admins(subject=subject, message="\n".join(messages))
     if not transaction.get_connection().in_atomic_block:
         transaction.commit()
+    store_fingerprints(rendered)
 
 
 @shared_task
@@ -413,35 +466,48 @@ def maybe_award_badge(badge_template: dict, year: int, user_id: int) -> bool:
 @shared_task
 @skip_if_read_only_mode
 def render_document_cascade(base_doc_id):
-    """Given a document, render it and all documents that may be affected."""
-
-    # This walks along the graph of links between documents. If there is
-    # a document A that includes another document B as a template, then
-    # there is an edge from A to B in this graph. The goal here is to
-    # process every node exactly once. This is robust to cycles and
-    # diamonds in the graph, since it keeps track of what nodes have
-    # been visited already.
-
+    """Given a document, render it and all documents that may be affected.
+
+    Those are the documents including it, directly or not, which are found in
+    one query and rendered after what they include, sharing the includes and
+    templates rendered along the way. The html that changed is written in bulk,
+    bypassing the post_save signals of a save(), so the search and retrieval
+    indexes are asked to refresh the changed documents together instead. Cached
+    includes and templates rendered before the cascade started are not reused,
+    since they may link to documents and images by titles, slugs and URLs that
+    have changed since.
+    """
+    started = time.time()
     try:
         base_doc = Document.objects.get(id=base_doc_id)
     except Document.DoesNotExist as err:
         capture_exception(err)
         return
-    todo = {base_doc}
-    done = set()
 
-    while todo:
-        d = todo.pop()
-        if d in done:
-            # Don't process a node twice.
-            continue
-        d.html = d.parse_and_calculate_links()
-        d.save()
-        done.add(d)
-        todo.update(
-            link_to.linked_from
-            for link_to in d.links_to().filter(kind__in=["template", "include"])
-        )
+    order = plan_cascade(base_doc.id)
+    documents = Document.objects.select_related("current_revision", "parent").in_bulk(order)
+
+    fragments = {}
+    changed = []
+    for doc_id in order:
+        # A document deleted since the plan was made has nothing to render.
+        if document := documents.get(doc_id):
+            html = document.parse_and_calculate_links(fragments=fragments, fragments_since=started)
+            if document.html != html:
+                document.html = html
+                changed.append(document)
+
+    if not changed:
+        return
+
+    Document.objects.bulk_update(changed, ["html"], batch_size=500)
+    cache.delete_many([doc_html_cache_key(d.locale, d.slug) for d in changed])
+
+    changed_ids = [d.id for d in changed if d.current_revision_id]
+    if settings.ES_LIVE_INDEXING:
+        transaction.on_commit(lambda: queue_index("WikiDocument", changed_ids))
+    if settings.RETRIEVAL_LIVE_INDEXING:
+        transaction.on_commit(lambda: enqueue_document_batch(changed_ids))
 
 
 @shared_task_with_retry
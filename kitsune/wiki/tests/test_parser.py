@@ -1,11 +1,15 @@
 import re
+import time
 from unittest.mock import patch
 
 from django.conf import settings
+from django.contrib.auth.models import Group
+from django.test import override_settings
 from pyquery import PyQuery as pq
 
 import kitsune.sumo.tests.test_parser
 from kitsune.gallery.tests import ImageFactory
+from kitsune.sumo.parser import get_objects_fallback
 from kitsune.sumo.tests import TestCase
 from kitsune.users.tests import GroupFactory
 from kitsune.wiki.config import TEMPLATE_TITLE_PREFIX, TEMPLATES_CATEGORY
@@ -593,6 +597,96 @@ class TestWikiTemplateRestricted(TestCase):
         self.assertIn("Secret template content", doc.text())
 
 
+class TestWikiFragmentCache(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = TemplateDocumentFactory(title=TEMPLATE_TITLE_PREFIX + "Tip")
+        ApprovedRevisionFactory(document=self.template, content="Tip for {{{1}}}")
+
+    def _parse(self, markup, **kwargs):
+        with patch("kitsune.wiki.parser._build_template_params", wraps=_btp) as render:
+            html = WikiParser(**kwargs).parse(markup)
+        return html, render.call_count
+
+    def test_repeated_templates_are_resolved_and_rendered_once_per_parse(self):
+        with patch(
+            "kitsune.sumo.parser.get_objects_fallback", wraps=get_objects_fallback
+        ) as resolve:
+            html, renders = self._parse("[[T:Tip|you]] [[T:Tip|you]] [[T:Tip|them]]")
+
+        self.assertEqual(3, html.count("Tip for"))
+        self.assertIn("Tip for them", html)
+        resolve.assert_called_once()
+        self.assertEqual({TEMPLATE_TITLE_PREFIX + "Tip"}, set(resolve.call_args.args[1]))
+        self.assertEqual(2, renders)
+
+    def test_fragments_are_reused_across_parses(self):
+        first, _ = self._parse("[[T:Tip|you]]")
+
+        second, renders = self._parse("[[T:Tip|you]]")
+
+        self.assertEqual(first, second)
+        self.assertEqual(0, renders)
+
+    def test_fragments_are_not_shared_across_locales_or_restrictions(self):
+        self._parse("[[T:Tip|you]]")
+
+        with patch("kitsune.wiki.parser._build_template_params", wraps=_btp) as render:
+            WikiParser().parse("[[T:Tip|you]]", locale="fr")
+            WikiParser(restrict_to_groups=Group.objects.filter(pk=GroupFactory().pk)).parse(
+                "[[T:Tip|you]]"
+            )
+        self.assertEqual(2, render.call_count)
+
+    def test_a_new_revision_invalidates_the_fragment(self):
+        self._parse("[[T:Tip|you]]")
+        ApprovedRevisionFactory(document=self.template, content="New tip for {{{1}}}")
+
+        html, renders = self._parse("[[T:Tip|you]]")
+
+        self.assertIn("New tip for you", html)
+        self.assertEqual(1, renders)
+
+    def test_a_new_revision_of_a_nested_document_invalidates_the_fragment(self):
+        nested = DocumentFactory(title="Nested")
+        ApprovedRevisionFactory(document=nested, content="Old words")
+        ApprovedRevisionFactory(
+            document=self.template, content="Tip for {{{1}}}: [[Include:Nested]]"
+        )
+        self.assertIn("Old words", self._parse("[[T:Tip|you]]")[0])
+
+        ApprovedRevisionFactory(document=nested, content="New words")
+
+        self.assertIn("New words", self._parse("[[T:Tip|you]]")[0])
+
+    def test_a_fragment_nesting_the_parsed_document_is_not_reused(self):
+        outer = DocumentFactory(title="Outer")
+        ApprovedRevisionFactory(document=outer, content="Outer words")
+        ApprovedRevisionFactory(document=self.template, content="Tip: [[Include:Outer]]")
+        self.assertIn("Outer words", self._parse("[[T:Tip]]")[0])
+
+        html, _ = self._parse("[[T:Tip]]", doc_id=outer.id)
+
+        self.assertIn(str(RECURSION_MESSAGE % "Outer"), html)
+
+    def test_fragments_since_skips_fragments_cached_before(self):
+        linked = DocumentFactory(title="Linked", slug="linked")
+        ApprovedRevisionFactory(document=linked)
+        ApprovedRevisionFactory(document=self.template, content="Tip: [[Linked]]")
+        self.assertIn("/kb/linked", self._parse("[[T:Tip]]")[0])
+        Document.objects.filter(pk=linked.pk).update(slug="moved")
+
+        self.assertIn("/kb/linked", self._parse("[[T:Tip]]")[0])
+        html, renders = self._parse("[[T:Tip]]", fragments_since=time.time() + 1)
+        self.assertIn("/kb/moved", html)
+        self.assertEqual(1, renders)
+
+    @override_settings(WIKI_FRAGMENT_CACHE_TIMEOUT=0)
+    def test_a_zero_timeout_keeps_only_the_per_parse_memo(self):
+        self.assertEqual(1, self._parse("[[T:Tip|you]] [[T:Tip|you]]")[1])
+        self.assertEqual(1, self._parse("[[T:Tip|you]]")[1])
+
+
 class TestWikiVideo(TestCase):
     """Video hook."""
 
@@ -1036,6 +1130,30 @@ class WhatLinksHereTests(TestCase):
         self.assertEqual(len(img.documents()), 1)
         self.assertEqual(img.documents()[0], d1)
 
+    def test_only_changed_links_are_written(self):
+        doc_rev_parser("", title="D1")
+        d2, _, _ = doc_rev_parser("", title="D2")
+        d3, _, _ = doc_rev_parser("[[D1]] [[D2]]", title="D3")
+        kept = d3.links_from().get(linked_to=d2)
+
+        ApprovedRevisionFactory(document=d3, content="[[D2]]")
+
+        self.assertEqual(list(d3.links_from()), [kept])
+        self.assertEqual(d3.update_links({(d2.id, "link")}, set()), (0, 0))
+
+    def test_update_links_reports_added_and_removed_rows(self):
+        img = ImageFactory(title="image-file.png")
+        d1, _, _ = doc_rev_parser("", title="D1")
+        d2, _, _ = doc_rev_parser("[[D1]]", title="D2")
+
+        self.assertEqual(d2.update_links({(d1.id, "include")}, {img.id}), (2, 1))
+        self.assertEqual([link.kind for link in d2.links_from()], ["include"])
+        self.assertEqual(list(d2.images), [img])
+
+        # Documents and images that no longer exist aren't linked to.
+        self.assertEqual(d2.update_links({(0, "link")}, {0}), (0, 2))
+        self.assertEqual(len(d2.links_from()), 0)
+
 
 class TestLazyWikiImageTags(TestCase):
     def setUp(self):
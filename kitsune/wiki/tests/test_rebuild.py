@@ -0,0 +1,50 @@
+from kitsune.sumo.tests import TestCase
+from kitsune.wiki.config import TEMPLATE_TITLE_PREFIX, TEMPLATES_CATEGORY
+from kitsune.wiki.rebuild import dependency_order, plan_rebuild, store_fingerprints
+from kitsune.wiki.tests import ApprovedRevisionFactory
+from kitsune.wiki.tests.test_parser import doc_rev_parser
+
+
+class DependencyOrderTests(TestCase):
+    def test_included_documents_come_first(self):
+        includes = {1: {2, 3}, 2: {3}, 4: {9}}
+
+        self.assertEqual(dependency_order({1, 2, 3, 4}, includes), [3, 2, 1, 4])
+
+    def test_cycles_come_last(self):
+        includes = {1: {2}, 2: {1}, 3: {4}}
+
+        self.assertEqual(dependency_order({1, 2, 3, 4}, includes), [4, 3, 1, 2])
+
+
+class PlanRebuildTests(TestCase):
+    def setUp(self):
+        self.one, _, _ = doc_rev_parser(
+            "one", title=TEMPLATE_TITLE_PREFIX + "One", category=TEMPLATES_CATEGORY
+        )
+        self.two, _, _ = doc_rev_parser(
+            "[[T:One]] two", title=TEMPLATE_TITLE_PREFIX + "Two", category=TEMPLATES_CATEGORY
+        )
+        self.three, _, _ = doc_rev_parser("[[T:Two]] [[T:One]] three", title="Three")
+        self.four, _, _ = doc_rev_parser("four", title="Four")
+
+    def test_included_documents_are_planned_first_in_dependency_order(self):
+        plan = plan_rebuild(force=True)
+
+        self.assertEqual(plan.shared, [self.one.id, self.two.id])
+        self.assertEqual(plan.independent, sorted([self.three.id, self.four.id]))
+        self.assertEqual(plan.unchanged, 0)
+
+    def test_only_documents_with_changed_inputs_are_planned(self):
+        store_fingerprints(plan_rebuild(force=True).fingerprints)
+
+        plan = plan_rebuild()
+        self.assertEqual((plan.shared, plan.independent, plan.unchanged), ([], [], 4))
+
+        ApprovedRevisionFactory(document=self.one, content="ONE")
+        plan = plan_rebuild()
+
+        # Everything including the template, directly or not, has to be rendered again.
+        self.assertEqual(plan.shared, [self.one.id, self.two.id])
+        self.assertEqual(plan.independent, [self.three.id])
+        self.assertEqual(plan.unchanged, 1)
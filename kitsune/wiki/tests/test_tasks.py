@@ -29,8 +29,10 @@ from kitsune.wiki.tasks import (
 from kitsune.wiki.tests import (
     ApprovedRevisionFactory,
     DeferredRevisionFactory,
+    DocumentFactory,
     RevisionAnchorRecordFactory,
     RevisionFactory,
+    TranslatedRevisionFactory,
 )
 from kitsune.wiki.tests.test_parser import doc_rev_parser
 
@@ -112,6 +114,39 @@ class RebuildTestCase(TestCase):
         # There should be 4 documents with an approved revision
         self.assertEqual(4, len(delay.call_args.args[0]))
 
+    @mock.patch.object(_rebuild_kb_chunk, "delay")
+    def test_rebuild_skips_unchanged_documents(self, delay):
+        rebuild_kb()
+        _rebuild_kb_chunk(*delay.call_args.args, **delay.call_args.kwargs)
+        delay.reset_mock()
+
+        rebuild_kb()
+        assert not delay.called
+
+        rebuild_kb(force=True)
+        self.assertEqual(4, len(delay.call_args.args[0]))
+
+    def test_rebuild_renders_the_first_translation_of_an_included_template(self):
+        template, _, _ = doc_rev_parser(
+            "English tip", title=TEMPLATE_TITLE_PREFIX + "Tip", category=TEMPLATES_CATEGORY
+        )
+        article = TranslatedRevisionFactory(document__locale="de", content="[[T:Tip]]").document
+        rebuild_kb()
+        article.refresh_from_db()
+        self.assertIn("English tip", article.html)
+
+        translation = DocumentFactory(
+            locale="de",
+            parent=template,
+            title=TEMPLATE_TITLE_PREFIX + "Tipp",
+            category=TEMPLATES_CATEGORY,
+        )
+        ApprovedRevisionFactory(document=translation, content="Deutscher Tipp")
+        rebuild_kb()
+
+        article.refresh_from_db()
+        self.assertIn("Deutscher Tipp", article.html)
+
 
 class ReviewMailTestCase(TestCase):
     """Test that the review mail gets sent."""
@@ -218,6 +253,33 @@ class TestDocumentRenderCascades(TestCase):
         self.assertEqual(self._clean(d2), "ONE two")
         self.assertEqual(self._clean(d3), "ONE ONE two three")
 
+    @mock.patch("kitsune.wiki.tasks.queue_index")
+    def test_cascade_writes_in_bulk_and_reindexes_once(self, queue_index):
+        d1, _, _ = doc_rev_parser(
+            "one ", title=TEMPLATE_TITLE_PREFIX + "D1", category=TEMPLATES_CATEGORY
+        )
+        d2, _, _ = doc_rev_parser(
+            "[[T:D1]] two", title=TEMPLATE_TITLE_PREFIX + "D2", category=TEMPLATES_CATEGORY
+        )
+        d3, _, _ = doc_rev_parser("[[T:D2]] three", title="D3")
+        unrelated, _, _ = doc_rev_parser("four", title="D4")
+        RevisionFactory(document=d1, content="ONE", is_approved=True)
+
+        with (
+            override_settings(ES_LIVE_INDEXING=True),
+            mock.patch.object(Document, "save") as save,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            render_document_cascade(d1.id)
+
+        self.assertEqual(self._clean(d3), "ONE two three")
+        save.assert_not_called()
+        queue_index.assert_called_once()
+        doc_type_name, ids = queue_index.call_args.args
+        self.assertEqual(doc_type_name, "WikiDocument")
+        self.assertLessEqual({d2.id, d3.id}, set(ids))
+        self.assertNotIn(unrelated.id, ids)
+
 
 class TestMaybeAwardBadge(TestCase):
     """Test that the annual wiki badges are awarded correctly."""